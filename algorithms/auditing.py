@@ -1,34 +1,70 @@
 import networkx as nx
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from utils.instrumentation import traced
+from utils.result_cache import cached_result, result_cache, result_key
+from algorithms.centrality import CentralityAnalyzer
+from algorithms.partitioning import ShardedAnalysis
+from algorithms.spectral import SpectralAnalyzer
+
+# Kiểm toán chuyên sâu chạy trên một luồng nền riêng (các lần gọi xếp hàng)
+_AUDIT_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit")
+# Kiểm toán nền đang chạy theo khoá cache của đồ thị gốc: lần gọi trùng dùng chung future
+_PENDING = {}
+_PENDING_LOCK = threading.Lock()
 
 class NetworkAuditor:
     """
     Class chịu trách nhiệm kiểm tra sức khỏe và độ tin cậy của mạng.
     """
+    TOP_CRITICAL_NODES = 10  # Số thiết bị trọng yếu (betweenness cao nhất) đưa vào báo cáo
+    REGION_MIN_NODES = 200   # Từ kích thước này báo cáo thêm kiểm toán theo vùng
+    AUDIT_REGIONS = 4
+    # Tuỳ chọn của Kiểm Toán Chuyên Sâu; báo cáo .txt dùng đúng bộ này để chung kết quả cache
+    DEEP_AUDIT = {'centrality': True, 'regions': True, 'spectral': True}
 
     @staticmethod
-    def perform_full_audit(G):
+    @traced("auditing.perform_full_audit")
+    @cached_result("auditing.perform_full_audit")
+    def perform_full_audit(G, centrality=False, regions=False, spectral=False):
         """
         Thực hiện quét toàn bộ mạng để tìm lỗi và điểm yếu.
+        Mặc định chỉ chạy các kiểm tra tuyến tính (liên thông, cầu, bậc); các mục đắt phải bật rõ.
         
         Args:
             G (nx.Graph): Đồ thị mạng.
+            centrality (bool): xếp hạng thiết bị trọng yếu theo betweenness (O(số nguồn x số cạnh)).
+            regions (bool): kiểm toán theo vùng của phân hoạch (chỉ với mạng >= REGION_MIN_NODES).
+            spectral (bool): chỉ số phổ λ2 / khoảng cách phổ / điện trở hiệu dụng (giải hệ Laplacian lặp).
             
         Returns:
-            dict: Báo cáo chi tiết gồm tình trạng liên thông, danh sách điểm yếu (Bridges).
+            dict: Báo cáo chi tiết gồm tình trạng liên thông, danh sách điểm yếu (Bridges),
+                  (nếu bật) xếp hạng thiết bị trọng yếu theo betweenness kèm sai số ước lượng
+                  và kiểm toán theo từng vùng của phân hoạch, và các chỉ số phổ
+                  (nếu bật; λ2, khoảng cách phổ, điện trở hiệu dụng - xem SpectralAnalyzer.analyze,
+                  không kèm vector Fiedler).
         """
         report = {
             "is_connected": False,
             "connected_components": 0,
             "critical_links": [], # Các cạnh cầu (Bridges)
-            "average_redundancy": 0.0
+            "average_redundancy": 0.0,
+            "critical_nodes": [], # [(node, type, betweenness)] giảm dần
+            "centrality": {},     # Xem CentralityAnalyzer.rank_critical_nodes
+            "regions": [],        # Xem ShardedAnalysis.region_audit
+            "spectral": {}        # Xem SpectralAnalyzer.analyze
         }
 
         try:
             # 1. Kiểm tra tính liên thông (Connectivity)
             # Mạng tốt phải liên thông hoàn toàn (1 thành phần)
-            report["is_connected"] = nx.is_connected(G)
-            report["connected_components"] = nx.number_connected_components(G)
+            parts = ShardedAnalysis.shard_parts(G)
+            if parts:
+                report["connected_components"] = len(ShardedAnalysis.connected_components(G, parts))
+            else:
+                report["connected_components"] = nx.number_connected_components(G)
+            report["is_connected"] = report["connected_components"] == 1
 
             # 2. Tìm điểm yếu chí tử (Network Bridges)
             # Bridge là cạnh mà nếu xóa đi, số thành phần liên thông tăng lên -> Nguy hiểm
@@ -41,9 +77,61 @@ class NetworkAuditor:
             if degrees:
                 report["average_redundancy"] = sum(degrees) / len(degrees)
 
+            # 4. Thiết bị trọng yếu: Router/Switch mang nhiều đường ngắn nhất nhất
+            # (betweenness chính xác với mạng nhỏ, lấy mẫu có chặn sai số với mạng lớn)
+            if centrality:
+                ranking, info = CentralityAnalyzer.rank_critical_nodes(G, top=NetworkAuditor.TOP_CRITICAL_NODES)
+                report["critical_nodes"] = ranking
+                report["centrality"] = info
+
+            # 5. Kiểm toán theo vùng (phân hoạch tối thiểu cạnh cắt, mỗi vùng chạy trên một tiến trình)
+            if regions and G.number_of_nodes() >= NetworkAuditor.REGION_MIN_NODES:
+                report["regions"] = ShardedAnalysis.region_audit(G, NetworkAuditor.AUDIT_REGIONS)
+
+            # 6. Chỉ số phổ: độ dư thừa thực sự (số đường song song độc lập), không chỉ bậc trung bình
+            if spectral:
+                metrics = SpectralAnalyzer.analyze(G)
+                report["spectral"] = {k: v for k, v in metrics.items() if k != 'fiedler'}
+
             logging.info(f"Audit Complete. Critical Links found: {len(bridges)}")
             return report
 
         except Exception as e:
             logging.error(f"Lỗi Audit: {str(e)}")
-            return report
\ No newline at end of file
+            return report
+
+    @staticmethod
+    def audit_async(G, **options):
+        """
+        Chạy perform_full_audit(G, **options) trên luồng nền, trả về concurrent.futures.Future.
+        Kiểm toán trên bản sao đồ thị nên UI có thể tiếp tục chỉnh sửa đồ thị gốc; kết quả được
+        lưu cache theo (graph_id, version) của đồ thị GỐC lúc gọi, nên perform_full_audit(G, **options)
+        sau đó (VD xuất báo cáo) dùng lại ngay. Đã có trong cache -> future đã xong; đang chạy
+        với cùng khoá -> dùng chung future đó.
+        """
+        key = result_key("auditing.perform_full_audit", G, (), options) if result_cache.enabled else None
+        if key is not None:
+            report = result_cache.get(key)
+            if report is not None:
+                future = Future()
+                future.set_result(report)
+                return future
+        with _PENDING_LOCK:
+            future = _PENDING.get(key) if key is not None else None
+            if future is not None:
+                return future
+            snapshot = nx.Graph(G)
+
+            def job():
+                try:
+                    report = NetworkAuditor.perform_full_audit(snapshot, **options)
+                    if key is not None:
+                        result_cache.put(key, report)
+                    return report
+                finally:
+                    with _PENDING_LOCK:
+                        _PENDING.pop(key, None)
+            future = _AUDIT_EXECUTOR.submit(job)
+            if key is not None:
+                _PENDING[key] = future
+            return future
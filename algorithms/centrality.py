@@ -0,0 +1,218 @@
+import heapq
+import logging
+import math
+import os
+from collections import deque
+import numpy as np
+from algorithms.representations import SparseRepresentation
+from utils.instrumentation import traced, tracer
+from utils.result_cache import cached_result
+from utils.shared_graph import SharedGraph, worker_pool
+from utils.versioned_graph import nodes_of_type
+
+
+def _brandes_chunk(indptr, indices, weights, sources):
+    """
+    Pha tích luỹ Brandes cho một lô nguồn trên CSR (chạy trong tiến trình worker).
+    weights=None -> BFS (số bước), ngược lại Dijkstra theo trọng số.
+
+    Returns:
+        np.ndarray: tổng phụ thuộc delta_s(v) của mọi nguồn s trong lô, theo chỉ số node.
+    """
+    n = len(indptr) - 1
+    indptr = indptr.tolist()
+    indices = indices.tolist()
+    weights = weights.tolist() if weights is not None else None
+    acc = [0.0] * n
+    for s in sources:
+        s = int(s)
+        sigma = {s: 1}
+        preds = {s: []}
+        order = []
+        if weights is None:
+            dist = {s: 0}
+            queue = deque([s])
+            while queue:
+                u = queue.popleft()
+                order.append(u)
+                du, su = dist[u] + 1, sigma[u]
+                for p in range(indptr[u], indptr[u + 1]):
+                    v = indices[p]
+                    dv = dist.get(v)
+                    if dv is None:
+                        dist[v] = du
+                        sigma[v] = su
+                        preds[v] = [u]
+                        queue.append(v)
+                    elif dv == du:
+                        sigma[v] += su
+                        preds[v].append(u)
+        else:
+            dist = {s: 0.0}
+            settled = set()
+            heap = [(0.0, s)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if u in settled:
+                    continue
+                settled.add(u)
+                order.append(u)
+                su = sigma[u]
+                for p in range(indptr[u], indptr[u + 1]):
+                    v = indices[p]
+                    if v in settled:
+                        continue
+                    nd = d + weights[p]
+                    dv = dist.get(v)
+                    if dv is None or nd < dv:
+                        dist[v] = nd
+                        sigma[v] = su
+                        preds[v] = [u]
+                        heapq.heappush(heap, (nd, v))
+                    elif nd == dv:
+                        sigma[v] += su
+                        preds[v].append(u)
+        delta = dict.fromkeys(order, 0.0)
+        for w in reversed(order):
+            coeff = (1.0 + delta[w]) / sigma[w]
+            for v in preds[w]:
+                delta[v] += sigma[v] * coeff
+            if w != s:
+                acc[w] += delta[w]
+    return np.array(acc)
+
+
+def _brandes_shared(handle, weighted, sources):
+    """Tác vụ worker: gắn vào CSR trong bộ nhớ chia sẻ (không sao chép) rồi tích luỹ Brandes."""
+    arrays = SharedGraph.attach(handle)
+    return _brandes_chunk(arrays['indptr'], arrays['indices'], arrays['weights'] if weighted else None, sources)
+
+
+class CentralityAnalyzer:
+    """
+    Xếp hạng mức trọng yếu của thiết bị theo betweenness (số đường ngắn nhất đi qua).
+
+    - Đồ thị nhỏ (<= EXACT_MAX_NODES): Brandes chính xác, mọi nút làm nguồn.
+    - Đồ thị lớn: lấy mẫu k nguồn ngẫu nhiên (có hoàn lại), ước lượng không chệch
+      n/k * tổng delta_s(v). Theo bất đẳng thức Hoeffding + chặn hợp trên n nút, với xác
+      suất >= 1 - delta MỌI điểm số chuẩn hoá sai lệch không quá
+          epsilon = n/(n-1) * sqrt(ln(2n / delta) / (2k)).
+    - Các lô nguồn chạy song song trên pool tiến trình; CSR nằm trong bộ nhớ chia sẻ
+      (SharedGraph), mỗi tác vụ chỉ mang handle và danh sách nguồn.
+    Điểm số chuẩn hoá giống nx.betweenness_centrality(normalized=True).
+    """
+
+    EXACT_MAX_NODES = 500
+    MAX_SAMPLES = 2048          # Trần số nguồn mẫu (epsilon ~0.05 tới vài chục nghìn nút; sai số thực tế được báo lại)
+    PARALLEL_MIN_WORK = 2_000_000  # Số nguồn x số cạnh tối thiểu để đáng chia sang tiến trình khác
+    CHUNKS_PER_WORKER = 4
+
+    @staticmethod
+    def samples_for(n, epsilon, delta=0.05):
+        """Số nguồn mẫu cần để mọi điểm số sai lệch <= epsilon với xác suất >= 1 - delta."""
+        if n < 3:
+            return n
+        scale = n / (n - 1)
+        return math.ceil(math.log(2 * n / delta) * scale * scale / (2 * epsilon * epsilon))
+
+    @staticmethod
+    def error_bound(n, samples, delta=0.05):
+        """Sai số epsilon (Hoeffding) ứng với `samples` nguồn mẫu."""
+        if n < 3 or samples <= 0:
+            return 0.0
+        return n / (n - 1) * math.sqrt(math.log(2 * n / delta) / (2 * samples))
+
+    @staticmethod
+    @traced("centrality.betweenness")
+    @cached_result("centrality.betweenness")
+    def betweenness(G, epsilon=0.05, delta=0.05, max_samples=MAX_SAMPLES, weight='weight',
+                    exact=None, workers=None, seed=0):
+        """
+        Betweenness chuẩn hoá của mọi nút.
+
+        Args:
+            epsilon, delta: sai số mong muốn và xác suất vượt sai số (chế độ lấy mẫu).
+            max_samples: trần số nguồn mẫu; nếu chạm trần thì epsilon báo lại sẽ lớn hơn yêu cầu.
+            weight: thuộc tính trọng số (None = số bước).
+            exact: True/False ép chế độ; None = tự chọn theo kích thước.
+            workers: số tiến trình (None = số CPU; 1 = chạy tại chỗ).
+        Returns:
+            dict: {'scores': {node: điểm}, 'exact', 'samples', 'epsilon', 'delta', 'nodes'}
+        """
+        n = G.number_of_nodes()
+        result = {'scores': {}, 'exact': True, 'samples': n, 'epsilon': 0.0, 'delta': delta, 'nodes': n}
+        if n < 3:
+            result['scores'] = dict.fromkeys(G.nodes(), 0.0)
+            return result
+
+        rep = SparseRepresentation.from_graph(G, weight=weight or 'weight')
+        indptr, indices, data = rep.adjacency_csr(weighted=weight is not None)
+        weights = data if weight is not None else None
+
+        needed = CentralityAnalyzer.samples_for(n, epsilon, delta)
+        if exact is None:
+            exact = n <= CentralityAnalyzer.EXACT_MAX_NODES or min(needed, max_samples) >= n
+        if exact:
+            sources = np.arange(n, dtype=np.int64)
+        else:
+            k = min(needed, max_samples)
+            sources = np.random.default_rng(seed).integers(0, n, size=k)
+
+        totals = CentralityAnalyzer._accumulate(G, weight, indptr, indices, weights, sources, workers)
+        scale = 1.0 / ((n - 1) * (n - 2))
+        if not exact:
+            scale *= n / len(sources)
+        scores = totals * scale
+
+        result['scores'] = {node: float(scores[i]) for i, node in enumerate(rep.nodes)}
+        result['exact'] = bool(exact)
+        result['samples'] = len(sources)
+        result['epsilon'] = 0.0 if exact else CentralityAnalyzer.error_bound(n, len(sources), delta)
+        tracer.count("centrality.sources", len(sources))
+        logging.info(f"Betweenness ({'exact' if exact else 'sampled'}): {len(sources)} sources, "
+                     f"epsilon={result['epsilon']:.4f}")
+        return result
+
+    @staticmethod
+    def _accumulate(G, weight, indptr, indices, weights, sources, workers):
+        """Chia nguồn thành lô, chạy song song nếu đủ lớn rồi cộng kết quả các lô."""
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(sources) * len(indices) < CentralityAnalyzer.PARALLEL_MIN_WORK:
+            return _brandes_chunk(indptr, indices, weights, sources)
+        # Giữ tham chiếu tới segment tới khi mọi lô xong (đồ thị không version thì không được cache)
+        shared = SharedGraph.from_graph(G, weight=weight or 'weight', capacity=None)
+        chunks = np.array_split(sources, min(len(sources), workers * CentralityAnalyzer.CHUNKS_PER_WORKER))
+        pool = worker_pool(workers)
+        futures = [pool.submit(_brandes_shared, shared.handle, weights is not None, chunk) for chunk in chunks]
+        total = np.zeros(len(indptr) - 1)
+        for future in futures:
+            total += future.result()
+        return total
+
+    @staticmethod
+    def rank_critical_nodes(G, top=10, types=('Router', 'Switch'), **kwargs):
+        """
+        Xếp hạng thiết bị hạ tầng theo betweenness (giảm dần), kèm kiểm tra độ tin cậy thứ hạng:
+        mỗi điểm số lệch tối đa epsilon nên hai hạng liền kề chắc chắn đúng thứ tự khi cách nhau
+        hơn 2·epsilon (luôn đúng với chế độ chính xác).
+
+        Returns:
+            tuple: ([(node, type, score)], thông tin ước lượng {'exact', 'samples', 'epsilon', 'delta',
+                   'confident_ranks': số hạng đầu chắc chắn đúng thứ tự,
+                   'top_certain': False nếu hạng cuối có thể đổi chỗ với thiết bị ngoài danh sách})
+        """
+        result = CentralityAnalyzer.betweenness(G, **kwargs)
+        scores = result['scores']
+        candidates = set()
+        for t in types:
+            candidates.update(nodes_of_type(G, t))
+        if not candidates:  # Đồ thị không gắn loại thiết bị -> xếp hạng mọi nút
+            candidates = scores.keys()
+        ranked = sorted(((n, scores[n]) for n in candidates), key=lambda item: item[1], reverse=True)[:top + 1]
+        bound = 2 * result['epsilon']
+        separated = [result['exact'] or a - b > bound for (_, a), (_, b) in zip(ranked, ranked[1:])]
+        ranked, rest = ranked[:top], ranked[top:]
+        info = {k: result[k] for k in ('exact', 'samples', 'epsilon', 'delta')}
+        info['confident_ranks'] = next((i for i, ok in enumerate(separated[:len(ranked)]) if not ok), len(ranked))
+        info['top_certain'] = not rest or separated[len(ranked) - 1]
+        return [(n, G.nodes[n].get('type', 'Unknown'), s) for n, s in ranked], info
@@ -0,0 +1,109 @@
+import numpy as np
+from collections import deque
+from utils.instrumentation import tracer
+
+
+class EulerianEngine:
+    """
+    Bộ máy Euler cho đồ thị lớn, chạy trên biểu diễn thưa (CSR có mã cạnh).
+
+    - `analyze()`: MỘT lần duyệt BFS vừa kiểm tra liên thông (phần có cạnh) vừa đếm
+      đỉnh bậc lẻ -> không cần nx.is_connected, không tạo subgraph.
+    - `iter_walk()`: thuật toán Hierholzer dạng lặp (không đệ quy). Mỗi nút giữ một
+      con trỏ vào hàng CSR của nó, cạnh đã đi được đánh dấu trong mảng `used`, nên
+      "xoá cạnh" là O(1) và mỗi ô CSR chỉ bị quét qua một lần -> tổng O(n + m).
+      Đường đi được phát ra theo từng đoạn ngay khi các đỉnh được lấy khỏi ngăn xếp.
+    """
+
+    def __init__(self, rep):
+        self.rep = rep
+
+    def analyze(self):
+        """
+        Returns:
+            dict: {'kind': 'circuit' | 'path' | None, 'reason': str | None,
+                   'odd_nodes': [chỉ số nút bậc lẻ], 'start': chỉ số nút bắt đầu}
+        """
+        rep = self.rep
+        degrees = rep.degrees
+        result = {"kind": None, "reason": None, "odd_nodes": [], "start": None}
+
+        active = int(np.count_nonzero(degrees))
+        if active == 0:
+            result["reason"] = "Đồ thị không có cạnh nào."
+            return result
+
+        indptr = memoryview(rep.indptr)
+        indices = memoryview(rep.indices)
+        start = int(np.flatnonzero(degrees)[0])
+
+        # Một lần BFS: đánh dấu các nút đến được + thu thập nút bậc lẻ
+        seen = bytearray(rep.num_nodes)
+        seen[start] = 1
+        queue = deque([start])
+        reached = 0
+        odd = []
+        while queue:
+            v = queue.popleft()
+            reached += 1
+            lo, hi = indptr[v], indptr[v + 1]
+            if (hi - lo) & 1:
+                odd.append(v)
+            for p in range(lo, hi):
+                w = indices[p]
+                if not seen[w]:
+                    seen[w] = 1
+                    queue.append(w)
+
+        result["odd_nodes"] = odd
+        if reached != active:
+            result["reason"] = "Đồ thị không liên thông (có nhiều thành phần chứa cạnh)."
+            return result
+        if len(odd) == 0:
+            result["kind"], result["start"] = "circuit", start
+        elif len(odd) == 2:
+            result["kind"], result["start"] = "path", odd[0]
+        else:
+            result["reason"] = "Số lượng đỉnh bậc lẻ khác 0 và 2."
+        return result
+
+    def iter_walk(self, start, chunk_size=4096):
+        """
+        Sinh đường đi/chu trình Euler (chỉ số nút) theo từng đoạn `chunk_size` nút.
+
+        Thứ tự lấy khỏi ngăn xếp của Hierholzer là chiều ngược của đường đi xuất phát
+        từ `start`; với đồ thị vô hướng chiều ngược vẫn là một đường đi Euler hợp lệ,
+        nên có thể phát ra ngay mà không phải giữ và đảo toàn bộ đường đi.
+        """
+        rep = self.rep
+        indptr = memoryview(rep.indptr)
+        indices = memoryview(rep.indices)
+        edge_ids = memoryview(rep.edge_ids)
+        ptr = rep.indptr[:-1].copy()   # Con trỏ ô CSR kế tiếp chưa xét của mỗi nút
+        cursor = memoryview(ptr)
+        used = bytearray(rep.num_edges)
+
+        stack = [start]
+        chunk = []
+        emitted = 0
+        while stack:
+            v = stack[-1]
+            p, end = cursor[v], indptr[v + 1]
+            while p < end and used[edge_ids[p]]:
+                p += 1
+            if p < end:
+                used[edge_ids[p]] = 1
+                cursor[v] = p + 1
+                stack.append(indices[p])
+            else:
+                cursor[v] = p
+                stack.pop()
+                chunk.append(v)
+                if len(chunk) >= chunk_size:
+                    emitted += len(chunk)
+                    yield chunk
+                    chunk = []
+        if chunk:
+            emitted += len(chunk)
+            yield chunk
+        tracer.count("euler.walk_nodes", emitted)
@@ -0,0 +1,591 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import networkx as nx
+import numpy as np
+from algorithms.partitioning import ENDPOINT_TYPES
+from algorithms.representations import SparseRepresentation
+from algorithms.routing import RoutingManager
+from utils.attribute_store import pack_ipv4, unpack_ipv4
+from utils.instrumentation import traced, tracer
+from utils.network_data import NetworkGenerator
+from utils.result_cache import cached_result
+from utils.shared_graph import SharedGraph, worker_pool
+
+# Next hop đặc biệt trong bảng chuyển tiếp
+NO_ROUTE = -1   # Không tuyến nào khớp -> gói bị huỷ (black hole)
+LOCAL = -2      # Địa chỉ của chính thiết bị -> nhận tại chỗ
+
+# Kết quả chuyển tiếp của từng gói
+DELIVERED, BLACK_HOLE, TTL_EXCEEDED = 0, 1, 2
+
+# Kiểm chứng FIB theo yêu cầu của UI chạy trên một luồng nền riêng (các lần gọi xếp hàng)
+_CHECK_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fib-check")
+
+_MASKS = np.array([(0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF for length in range(33)], dtype=np.uint64)
+
+
+def _format_prefix(prefix, length):
+    return f"{unpack_ipv4(int(prefix))}/{int(length)}"
+
+
+class _TrieNode:
+    __slots__ = ('key', 'length', 'value', 'children')
+
+    def __init__(self, key, length, value=None):
+        self.key = key          # Các bit tiền tố (căn trái trong 32 bit, phần sau length là 0)
+        self.length = length
+        self.value = value      # None = nút chỉ để rẽ nhánh, không phải tuyến
+        self.children = [None, None]
+
+
+class PrefixTrie:
+    """
+    Trie nhị phân nén đường (Patricia) cho tra cứu tiền tố dài nhất (LPM) trên IPv4.
+
+    Mỗi nút giữ cả đoạn bit chung thay vì một bit, nên độ sâu chỉ bằng số tiền tố lồng nhau
+    trên đường tra cứu (tối đa 33) chứ không phải 32 tầng mỗi lần. Dùng cho tra cứu từng địa
+    chỉ (dò đường, hiển thị tuyến khớp); tra cứu theo lô dùng dạng phẳng `segments()`.
+    """
+
+    def __init__(self):
+        self._root = _TrieNode(0, 0)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def from_routes(routes):
+        """Dựng trie từ dãy (prefix uint32, độ dài, giá trị); tiền tố trùng -> giá trị sau thắng."""
+        trie = PrefixTrie()
+        for prefix, length, value in routes:
+            trie.insert(prefix, length, value)
+        return trie
+
+    @staticmethod
+    def _bit(key, position):
+        return (key >> (31 - position)) & 1
+
+    def insert(self, prefix, length, value):
+        prefix, length = int(prefix) & int(_MASKS[length]), int(length)
+        node = self._root
+        while True:
+            if node.length == length:
+                self._size += node.value is None
+                node.value = value
+                return
+            bit = self._bit(prefix, node.length)
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = _TrieNode(prefix, length, value)
+                self._size += 1
+                return
+            diff = prefix ^ child.key
+            common = min(length, child.length, 32 - diff.bit_length())
+            if common == child.length:
+                node = child
+                continue
+            if common == length:
+                # Tiền tố mới nằm giữa node và child
+                new = _TrieNode(prefix, length, value)
+                new.children[self._bit(child.key, length)] = child
+            else:
+                # Tách nhánh tại bit khác nhau đầu tiên
+                new = _TrieNode(prefix & int(_MASKS[common]), common)
+                new.children[self._bit(child.key, common)] = child
+                new.children[self._bit(prefix, common)] = _TrieNode(prefix, length, value)
+            node.children[bit] = new
+            self._size += 1
+            return
+
+    def longest_match(self, address):
+        """Tuyến khớp dài nhất của `address` (uint32): (prefix, độ dài, giá trị) hoặc None."""
+        address = int(address)
+        node, best = self._root, None
+        while node is not None:
+            if node.length and (address ^ node.key) >> (32 - node.length):
+                break
+            if node.value is not None:
+                best = node
+            if node.length == 32:
+                break
+            node = node.children[self._bit(address, node.length)]
+        return (best.key, best.length, best.value) if best is not None else None
+
+    def segments(self, default=NO_ROUTE):
+        """
+        Dạng phẳng (leaf-pushed) của trie: danh sách (địa chỉ bắt đầu, giá trị) phủ kín
+        [0, 2^32), đoạn kề nhau khác giá trị. Tra cứu = tìm nhị phân đoạn chứa địa chỉ.
+        """
+        out = []
+
+        def emit(start, value):
+            if out and out[-1][0] == start:
+                out.pop()
+            if not out or out[-1][1] != value:
+                out.append((start, value))
+
+        def walk(node, inherited):
+            value = inherited if node.value is None else node.value
+            emit(node.key, value)
+            for child in node.children:
+                if child is not None:
+                    walk(child, value)
+                    end = child.key + (1 << (32 - child.length))
+                    if end < 1 << 32:
+                        emit(end, value)
+
+        walk(self._root, default)
+        return out
+
+
+def _transit_mask(types, type_names):
+    """Nút được chuyển tiếp hộ (mọi loại trừ PC/Server) theo mã loại của SharedGraph."""
+    endpoint_codes = [code for code, t in enumerate(type_names) if t in ENDPOINT_TYPES]
+    return ~np.isin(types, endpoint_codes)
+
+
+def _spt_chunk(indptr, indices, weights, transit, roots):
+    """
+    Cây đường đi ngắn nhất về từng root trong lô (chạy trong tiến trình worker).
+
+    Returns:
+        np.ndarray[int32] (số root x số nút chuyển tiếp): next hop của từng nút chuyển tiếp tới root.
+    """
+    routers = np.flatnonzero(transit)
+    indptr, indices, weights, transit = indptr.tolist(), indices.tolist(), weights.tolist(), transit.tolist()
+    out = np.empty((len(roots), len(routers)), dtype=np.int32)
+    for k, root in enumerate(roots):
+        out[k] = RoutingManager.shortest_path_tree_csr(indptr, indices, weights, int(root), transit)[routers]
+    return out
+
+
+def _spt_shared(handle, roots):
+    """Tác vụ worker: gắn vào CSR trong bộ nhớ chia sẻ rồi dựng cây cho lô root."""
+    arrays = SharedGraph.attach(handle)
+    transit = _transit_mask(arrays['types'], handle.meta['type_names'])
+    return _spt_chunk(arrays['indptr'], arrays['indices'], arrays['weights'], transit, roots)
+
+
+class ForwardingTable:
+    """
+    Bảng chuyển tiếp (FIB) đã biên dịch của MỌI thiết bị, gộp trong một bảng đoạn phẳng.
+
+    - `keys` (uint64, tăng dần) = chỉ số thiết bị << 32 | địa chỉ bắt đầu đoạn; `next_hops`
+      (int32) là next hop của đoạn (chỉ số nút, NO_ROUTE hoặc LOCAL). Mỗi thiết bị có một đoạn
+      bắt đầu tại địa chỉ 0 nên đoạn tìm được luôn thuộc đúng thiết bị đó.
+    - Tra cứu một lô (thiết bị, địa chỉ) = MỘT lần np.searchsorted, không vòng lặp Python.
+    - Đoạn kề nhau cùng next hop đã được gộp -> số đoạn thường nhỏ hơn số tuyến.
+    - Danh sách tuyến gốc (prefix, độ dài, next hop) của từng thiết bị được giữ để liệt kê
+      và dựng PrefixTrie khi cần tra cứu từng địa chỉ.
+    """
+
+    def __init__(self, nodes, addresses, prefix_lens, transit, routes, keys, next_hops, from_graph):
+        self.nodes = nodes
+        self.index = {node: i for i, node in enumerate(nodes)}
+        self.addresses = addresses
+        self.prefix_lens = prefix_lens
+        self.transit = transit
+        self.keys = keys
+        self.next_hops = next_hops
+        self.addresses_from_graph = from_graph  # False = địa chỉ tự sinh vì thuộc tính thiếu/trùng
+        self._route_owner, self._route_prefix, self._route_len, self._route_hop = routes
+        self._by_address = np.argsort(addresses, kind='stable')
+        self._tries = {}
+
+    @property
+    def num_routes(self):
+        return len(self._route_owner)
+
+    @property
+    def num_segments(self):
+        return len(self.keys)
+
+    def memory_bytes(self):
+        return self.keys.nbytes + self.next_hops.nbytes
+
+    def lookup(self, nodes, addresses):
+        """Next hop (chỉ số nút / NO_ROUTE / LOCAL) của từng cặp (thiết bị, địa chỉ đích) trong lô."""
+        query = (np.asarray(nodes, dtype=np.uint64) << np.uint64(32)) | np.asarray(addresses, dtype=np.uint64)
+        return self.next_hops[np.searchsorted(self.keys, query, side='right') - 1]
+
+    def owner_of(self, addresses):
+        """Chỉ số nút mang từng địa chỉ, -1 nếu không nút nào mang."""
+        addresses = np.asarray(addresses, dtype=np.uint32)
+        sorted_addrs = self.addresses[self._by_address]
+        pos = np.minimum(np.searchsorted(sorted_addrs, addresses), len(sorted_addrs) - 1)
+        return np.where(sorted_addrs[pos] == addresses, self._by_address[pos], -1)
+
+    def address_of(self, node):
+        i = self.index[node]
+        return f"{unpack_ipv4(int(self.addresses[i]))}/{int(self.prefix_lens[i])}"
+
+    def _route_slice(self, i):
+        lo, hi = np.searchsorted(self._route_owner, [i, i + 1])
+        return slice(lo, hi)
+
+    def routes(self, node):
+        """Tuyến của thiết bị dạng [(prefix 'a.b.c.d/len', next hop)], next hop là tên nút, 'local' hoặc 'drop'."""
+        span = self._route_slice(self.index[node])
+        return [(_format_prefix(p, l), self.hop_name(h))
+                for p, l, h in zip(self._route_prefix[span], self._route_len[span], self._route_hop[span])]
+
+    def hop_name(self, hop):
+        hop = int(hop)
+        if hop == LOCAL:
+            return 'local'
+        if hop == NO_ROUTE:
+            return 'drop'
+        return self.nodes[hop]
+
+    def trie(self, node):
+        """PrefixTrie của thiết bị (dựng lười, giữ lại cho lần sau)."""
+        i = self.index[node]
+        trie = self._tries.get(i)
+        if trie is None:
+            span = self._route_slice(i)
+            trie = PrefixTrie.from_routes(zip(self._route_prefix[span].tolist(),
+                                              self._route_len[span].tolist(),
+                                              self._route_hop[span].tolist()))
+            self._tries[i] = trie
+        return trie
+
+    def segments(self, node):
+        """Phần của thiết bị trong bảng phẳng: [(địa chỉ bắt đầu, next hop)]."""
+        i = self.index[node]
+        lo, hi = np.searchsorted(self.keys, [np.uint64(i) << np.uint64(32), np.uint64(i + 1) << np.uint64(32)])
+        starts = (self.keys[lo:hi] & np.uint64(0xFFFFFFFF)).tolist()
+        return list(zip(starts, self.next_hops[lo:hi].tolist()))
+
+
+class ForwardingCompiler:
+    """
+    Biên dịch cây đường đi ngắn nhất của RoutingManager thành bảng chuyển tiếp theo tiền tố.
+
+    - Mỗi thiết bị hạ tầng (Router/Switch) quảng bá một tiền tố: mạng con truy cập nếu có
+      host (prefix_len < 32), ngược lại loopback /32.
+    - Với mỗi thiết bị D, một cây Dijkstra hướng về D cho next hop của mọi thiết bị khác tới
+      tiền tố của D. PC/Server không chuyển tiếp hộ (chỉ là lá của cây).
+    - Gateway giữ tuyến /32 cho từng host gắn trực tiếp; địa chỉ còn lại của mạng con là
+      'drop'. Host có tuyến mặc định 0.0.0.0/0 về gateway.
+    - Cuối cùng mọi tuyến được đẩy xuống lá (LPM giải sẵn) thành bảng đoạn phẳng.
+    Chi phí: một Dijkstra cho mỗi thiết bị hạ tầng, bảng có cỡ (số thiết bị)^2 -> có trần MAX_ROUTES.
+    """
+
+    MAX_ROUTES = 20_000_000
+    PARALLEL_MIN_WORK = 2_000_000  # Số root x số cạnh tối thiểu để đáng chia sang tiến trình khác
+    CHUNKS_PER_WORKER = 4
+
+    @staticmethod
+    def _addresses(G, rep):
+        """
+        Địa chỉ và độ dài tiền tố theo chỉ số nút, lấy từ thuộc tính `ip`/`prefix_len`.
+        Thiếu, sai dạng hoặc trùng địa chỉ -> dùng kế hoạch địa chỉ tự sinh (không ghi vào đồ thị).
+        """
+        n = rep.num_nodes
+        addresses = np.zeros(n, dtype=np.uint32)
+        prefix_lens = np.zeros(n, dtype=np.int8)
+        complete = True
+        for i, node in enumerate(rep.nodes):
+            data = G.nodes[node]
+            packed, length = pack_ipv4(data.get('ip')), data.get('prefix_len')
+            if packed is None or type(length) is not int or not 0 <= length <= 32:
+                complete = False
+                break
+            addresses[i], prefix_lens[i] = packed, length
+        if complete and len(np.unique(addresses)) == n:
+            return addresses, prefix_lens, True
+
+        logging.warning("Địa chỉ IP thiếu hoặc trùng lặp -> biên dịch FIB theo kế hoạch địa chỉ tự sinh")
+        plan = NetworkGenerator.plan_addresses(G)
+        for i, node in enumerate(rep.nodes):
+            addresses[i], prefix_lens[i] = plan[node]
+        return addresses, prefix_lens, False
+
+    @staticmethod
+    def _trees(G, rep, weight, transit, workers):
+        """Sinh (lô root, next hop của các nút chuyển tiếp tới từng root) - song song nếu đủ lớn."""
+        roots = np.flatnonzero(transit)
+        workers = workers or os.cpu_count() or 1
+        indptr, indices, weights = rep.adjacency_csr(weighted=True)
+        if workers <= 1 or len(roots) * len(indices) < ForwardingCompiler.PARALLEL_MIN_WORK:
+            for chunk in np.array_split(roots, max(1, len(roots) // 256)):
+                yield chunk, _spt_chunk(indptr, indices, weights, transit, chunk)
+            return
+        shared = SharedGraph.from_graph(G, weight=weight, capacity=None)
+        chunks = np.array_split(roots, min(len(roots), workers * ForwardingCompiler.CHUNKS_PER_WORKER))
+        pool = worker_pool(workers)
+        futures = [pool.submit(_spt_shared, shared.handle, chunk) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            yield chunk, future.result()
+
+    @staticmethod
+    @traced("forwarding.compile")
+    @cached_result("forwarding.compile")
+    def compile(G, weight='weight', workers=None):
+        """
+        Biên dịch FIB cho mọi nút của G.
+
+        Returns:
+            ForwardingTable
+        Raises:
+            ValueError: nếu bảng vượt MAX_ROUTES tuyến.
+        """
+        rep = SparseRepresentation.from_graph(G, weight=weight)
+        n = rep.num_nodes
+        addresses, prefix_lens, from_graph = ForwardingCompiler._addresses(G, rep)
+        transit = np.array([G.nodes[v].get('type') not in ENDPOINT_TYPES for v in rep.nodes], dtype=bool)
+        routers = np.flatnonzero(transit)
+        if len(routers) * len(routers) > ForwardingCompiler.MAX_ROUTES:
+            raise ValueError(f"{len(routers)} thiết bị định tuyến -> bảng chuyển tiếp vượt "
+                             f"{ForwardingCompiler.MAX_ROUTES:,} tuyến")
+
+        networks = (addresses.astype(np.uint64) & _MASKS[prefix_lens]).astype(np.uint32)
+        owner, prefix, length, hop = [], [], [], []
+
+        def add(o, p, l, h):
+            owner.append(np.asarray(o, dtype=np.int32))
+            prefix.append(np.asarray(p, dtype=np.uint32))
+            length.append(np.asarray(l, dtype=np.int8))
+            hop.append(np.asarray(h, dtype=np.int32))
+
+        # Tuyến tới tiền tố của thiết bị khác: next hop = cha trong cây về thiết bị đó
+        column = np.full(n, -1, dtype=np.int64)
+        column[routers] = np.arange(len(routers))
+        for roots, parents in ForwardingCompiler._trees(G, rep, weight, transit, workers):
+            reachable = parents >= 0
+            reachable[np.arange(len(roots)), column[roots]] = False
+            rows, cols = np.nonzero(reachable)
+            dest = roots[rows]
+            add(routers[cols], networks[dest], prefix_lens[dest], parents[rows, cols])
+
+        # Tuyến tại chỗ: mạng con của gateway là 'drop' trừ các host đã biết, địa chỉ riêng là LOCAL
+        subnet = routers[prefix_lens[routers] < 32]
+        add(subnet, networks[subnet], prefix_lens[subnet], np.full(len(subnet), NO_ROUTE))
+        add(np.arange(n), addresses, np.full(n, 32), np.full(n, LOCAL))
+
+        # Host: tuyến mặc định về thiết bị hạ tầng đầu tiên; gateway giữ /32 của host thuộc mạng con của nó
+        indptr, indices = rep.indptr, rep.indices
+        defaults, host_routes = [], []
+        for e in np.flatnonzero(~transit).tolist():
+            neighbors = indices[indptr[e]:indptr[e + 1]]
+            uplinks = neighbors[transit[neighbors]]
+            if not len(uplinks):
+                continue
+            defaults.append((e, uplinks[0]))
+            inside = (addresses[e] & _MASKS[prefix_lens[uplinks]]) == networks[uplinks]
+            host_routes.extend((g, e) for g in uplinks[inside & (prefix_lens[uplinks] < 32)].tolist())
+        if defaults:
+            hosts, gateways = np.array(defaults).T
+            add(hosts, np.zeros(len(hosts)), np.zeros(len(hosts)), gateways)
+        if host_routes:
+            gateways, hosts = np.array(host_routes).T
+            add(gateways, addresses[hosts], np.full(len(hosts), 32), hosts)
+
+        routes = [np.concatenate(part) for part in (owner, prefix, length, hop)]
+        routes, keys, next_hops = ForwardingCompiler._leaf_push(n, *routes)
+        tracer.count("forwarding.routes", len(routes[0]))
+        tracer.count("forwarding.segments", len(keys))
+        logging.info(f"FIB compiled: {len(routers)} routers, {len(routes[0])} routes, "
+                     f"{len(keys)} segments ({keys.nbytes + next_hops.nbytes} bytes)")
+        return ForwardingTable(rep.nodes, addresses, prefix_lens, transit, routes, keys, next_hops, from_graph)
+
+    @staticmethod
+    def _leaf_push(n, owner, prefix, length, hop):
+        """
+        Giải LPM sẵn cho mọi điểm biên của tiền tố (vector hoá): tại mỗi địa chỉ bắt đầu/kết
+        thúc tuyến, next hop là của tuyến dài nhất chứa điểm đó - thử từ /32 ngược về /0.
+        Kết quả tương đương PrefixTrie.segments() của từng thiết bị, gộp thành một bảng.
+
+        Returns:
+            tuple: (tuyến đã khử trùng và sắp theo thiết bị, keys, next_hops)
+        """
+        shift = np.uint64(32)
+        entry_keys = (owner.astype(np.uint64) << shift) | prefix.astype(np.uint64)
+        # Khử trùng (thiết bị, prefix, độ dài): tuyến thêm sau thắng (lexsort ổn định)
+        order = np.lexsort((length, entry_keys))
+        entry_keys, length = entry_keys[order], length[order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = (entry_keys[1:] != entry_keys[:-1]) | (length[1:] != length[:-1])
+        order, entry_keys, length = order[last], entry_keys[last], length[last]
+        owner, prefix, hop = owner[order], prefix[order], hop[order]
+
+        ends = prefix.astype(np.uint64) + (np.uint64(1) << (np.uint64(32) - length.astype(np.uint64)))
+        bounded = ends < np.uint64(1 << 32)
+        points = np.unique(np.concatenate([
+            np.arange(n, dtype=np.uint64) << shift,                      # Đoạn mở đầu của mỗi thiết bị
+            entry_keys,
+            (owner[bounded].astype(np.uint64) << shift) | ends[bounded],
+        ]))
+
+        resolved = np.full(len(points), NO_ROUTE, dtype=np.int32)
+        pending = np.ones(len(points), dtype=bool)
+        device_bits = points & ~np.uint64(0xFFFFFFFF)
+        for bits in range(32, -1, -1):
+            of_len = length == bits
+            if not of_len.any() or not pending.any():
+                continue
+            keys_l, hops_l = entry_keys[of_len], hop[of_len]   # Đã tăng dần vì entry_keys đã sắp
+            idx = np.flatnonzero(pending)
+            masked = device_bits[idx] | (points[idx] & _MASKS[bits])
+            pos = np.minimum(np.searchsorted(keys_l, masked), len(keys_l) - 1)
+            hit = keys_l[pos] == masked
+            resolved[idx[hit]] = hops_l[pos[hit]]
+            pending[idx[hit]] = False
+
+        # Gộp đoạn kề cùng next hop (giữ đoạn mở đầu của mỗi thiết bị)
+        keep = np.ones(len(points), dtype=bool)
+        keep[1:] = (resolved[1:] != resolved[:-1]) | (device_bits[1:] != device_bits[:-1])
+        return (owner, prefix, length, hop), points[keep], resolved[keep]
+
+
+class ForwardingSimulator:
+    """
+    Mô phỏng chuyển tiếp gói theo lô trên ForwardingTable: mỗi chặng là một lần tra cứu
+    vector hoá cho mọi gói còn đang đi, nên thông lượng tính bằng triệu tra cứu/giây.
+    Dùng để kiểm chứng khả năng tới đích và tìm black hole / vòng lặp định tuyến.
+    """
+
+    MAX_HOPS = 64
+    BATCH = 1 << 20
+    TOP_BLACK_HOLES = 10
+    PACKETS_PER_NODE = 100      # Số gói kiểm chứng mặc định: mỗi nút đích nhận trung bình chừng này gói
+    MIN_PACKETS = 20_000
+    MAX_PACKETS = 1_000_000
+
+    @staticmethod
+    def packets_for(G):
+        """Số gói kiểm chứng tỉ lệ với số nút, kẹp trong [MIN_PACKETS, MAX_PACKETS]."""
+        return min(max(ForwardingSimulator.PACKETS_PER_NODE * G.number_of_nodes(),
+                       ForwardingSimulator.MIN_PACKETS), ForwardingSimulator.MAX_PACKETS)
+
+    @staticmethod
+    def forward(table, sources, destinations, max_hops=MAX_HOPS):
+        """
+        Đẩy từng gói (nút nguồn, địa chỉ đích) theo FIB cho tới khi được nhận, bị huỷ hoặc hết TTL.
+
+        Returns:
+            dict: 'status' (DELIVERED/BLACK_HOLE/TTL_EXCEEDED), 'hops', 'final' (nút cuối cùng
+                  giữ gói) theo từng gói, và 'lookups' (tổng số lần tra cứu).
+        """
+        current = np.array(sources, dtype=np.int64)
+        destinations = np.asarray(destinations, dtype=np.uint32)
+        status = np.full(len(current), TTL_EXCEEDED, dtype=np.int8)
+        hops = np.zeros(len(current), dtype=np.int32)
+        active = np.arange(len(current))
+        lookups = 0
+        for _ in range(max_hops + 1):
+            if not len(active):
+                break
+            nxt = table.lookup(current[active], destinations[active])
+            lookups += len(active)
+            status[active[nxt == LOCAL]] = DELIVERED
+            status[active[nxt == NO_ROUTE]] = BLACK_HOLE
+            moving = nxt >= 0
+            active = active[moving]
+            current[active] = nxt[moving]
+            hops[active] += 1
+        return {'status': status, 'hops': hops, 'final': current, 'lookups': lookups}
+
+    @staticmethod
+    @traced("forwarding.validate")
+    def validate(G, packets=None, seed=0, weight='weight', max_hops=MAX_HOPS, table=None):
+        """
+        Kiểm chứng FIB bằng `packets` gói ngẫu nhiên (None = packets_for(G)): nguồn là host
+        (PC/Server; không có thì mọi nút), đích là địa chỉ của một nút bất kỳ. `table` là FIB
+        đã biên dịch từ G nếu người gọi có sẵn.
+
+        Returns:
+            dict: số gói delivered / black_holes / ttl_exceeded / misdelivered, số chặng trung bình,
+                  'black_hole_spots' [(thiết bị huỷ gói, nút đích, số gói)], thông lượng tra cứu
+                  và cỡ bảng ('routes', 'segments', 'fib_bytes', 'addresses_from_graph').
+        """
+        if packets is None:
+            packets = ForwardingSimulator.packets_for(G)
+        if table is None:
+            table = ForwardingCompiler.compile(G, weight=weight)
+        n = len(table.nodes)
+        result = {'packets': 0, 'delivered': 0, 'black_holes': 0, 'ttl_exceeded': 0, 'misdelivered': 0,
+                  'mean_hops': 0.0, 'black_hole_spots': [], 'lookups': 0, 'seconds': 0.0,
+                  'lookups_per_sec': 0.0, 'routes': table.num_routes, 'segments': table.num_segments,
+                  'fib_bytes': table.memory_bytes(), 'addresses_from_graph': table.addresses_from_graph}
+        if n == 0 or packets <= 0:
+            return result
+
+        hosts = np.flatnonzero(~table.transit)
+        if not len(hosts):
+            hosts = np.arange(n)
+        rng = np.random.default_rng(seed)
+        drops = []
+        total_hops = 0
+        for start in range(0, packets, ForwardingSimulator.BATCH):
+            size = min(ForwardingSimulator.BATCH, packets - start)
+            sources = rng.choice(hosts, size)
+            targets = rng.integers(0, n, size)
+            began = time.perf_counter()
+            run = ForwardingSimulator.forward(table, sources, table.addresses[targets], max_hops)
+            result['seconds'] += time.perf_counter() - began
+            result['lookups'] += run['lookups']
+
+            status = run['status']
+            delivered = status == DELIVERED
+            result['delivered'] += int(delivered.sum())
+            result['misdelivered'] += int((run['final'][delivered] != targets[delivered]).sum())
+            result['black_holes'] += int((status == BLACK_HOLE).sum())
+            result['ttl_exceeded'] += int((status == TTL_EXCEEDED).sum())
+            total_hops += int(run['hops'][delivered].sum())
+            lost = status == BLACK_HOLE
+            drops.append(run['final'][lost] * n + targets[lost])
+
+        result['packets'] = packets
+        result['mean_hops'] = total_hops / result['delivered'] if result['delivered'] else 0.0
+        result['lookups_per_sec'] = result['lookups'] / result['seconds'] if result['seconds'] else 0.0
+        spots, counts = np.unique(np.concatenate(drops), return_counts=True)
+        top = np.argsort(-counts, kind='stable')[:ForwardingSimulator.TOP_BLACK_HOLES]
+        result['black_hole_spots'] = [(table.nodes[spots[i] // n], table.nodes[spots[i] % n], int(counts[i]))
+                                      for i in top]
+        tracer.count("forwarding.lookups", result['lookups'])
+        logging.info(f"Forwarding check: {result['delivered']}/{packets} delivered, "
+                     f"{result['black_holes']} black-holed, {result['lookups_per_sec'] / 1e6:.1f}M lookups/s")
+        return result
+
+    @staticmethod
+    def validate_async(G, packets=None, weight='weight', **kwargs):
+        """
+        Biên dịch FIB và chạy validate trên luồng nền, trả về concurrent.futures.Future của
+        (kết quả validate, ForwardingTable). Chạy trên bản sao đồ thị nên UI có thể tiếp tục
+        chỉnh sửa đồ thị gốc; ValueError của compile được ném lại khi gọi future.result().
+        """
+        snapshot = nx.Graph(G)
+        if packets is None:
+            packets = ForwardingSimulator.packets_for(G)
+
+        def job():
+            table = ForwardingCompiler.compile(snapshot, weight=weight)
+            return ForwardingSimulator.validate(snapshot, packets, weight=weight, table=table, **kwargs), table
+        return _CHECK_EXECUTOR.submit(job)
+
+    @staticmethod
+    def trace(table, source, address, max_hops=MAX_HOPS):
+        """
+        Dò từng chặng của một gói bằng PrefixTrie của từng thiết bị (để hiển thị tuyến khớp).
+
+        Returns:
+            tuple: ([(nút, tuyến khớp 'a.b.c.d/len' hoặc None, next hop)], trạng thái)
+        """
+        address = pack_ipv4(address) if isinstance(address, str) else int(address)
+        if address is None or source not in table.index:
+            return [], BLACK_HOLE
+        hops, node = [], source
+        for _ in range(max_hops + 1):
+            match = table.trie(node).longest_match(address)
+            hop = match[2] if match is not None else NO_ROUTE
+            hops.append((node, _format_prefix(match[0], match[1]) if match else None, table.hop_name(hop)))
+            if hop == LOCAL:
+                return hops, DELIVERED
+            if hop == NO_ROUTE:
+                return hops, BLACK_HOLE
+            node = table.nodes[hop]
+        return hops, TTL_EXCEEDED
@@ -1,5 +1,11 @@
 import networkx as nx
-import numpy as np
+from array import array
+from collections import deque
+from utils.instrumentation import traced
+from utils.result_cache import cached_result
+from algorithms.representations import SparseRepresentation
+from utils.result_stream import ResultStream
+from algorithms.eulerian import EulerianEngine
 
 class GraphTheoryManager:
     """
@@ -7,35 +13,68 @@ class GraphTheoryManager:
     Đáp ứng các yêu cầu: DFS, Bipartite, Biểu diễn ma trận, Chu trình Euler.
     """
 
+    # Ngưỡng hiển thị: đồ thị lớn chỉ hiển thị bản tóm tắt
+    DENSE_MATRIX_NODES = 40   # In ma trận kề dạng đặc khi n <= ngưỡng này
+    FULL_VIEW_NODES = 500     # Liệt kê đầy đủ danh sách kề/cạnh khi n <= ngưỡng này
+    SUMMARY_ROWS = 50         # Số dòng hiển thị trong chế độ tóm tắt
+    WALK_CHUNK = 20           # Số nút trên mỗi hàng khi in một đường đi dài
+
+    @traced("graph_theory.run_dfs")
+    @cached_result("graph_theory.run_dfs")
     def run_dfs(self, G, start_node=None):
         """4. Duyệt đồ thị theo chiều sâu (DFS)."""
         if G.number_of_nodes() == 0: return "Đồ thị rỗng."
-        
+        return self.dfs_stream(G, start_node).to_text() + "\n"
+
+    def dfs_stream(self, G, start_node=None):
+        """Kết quả DFS dạng luồng hàng (cho trình xem ảo hoá / xuất file)."""
+        if G.number_of_nodes() == 0:
+            return ResultStream.from_text("DFS", "Đồ thị rỗng.")
+
         # Nếu không chọn nút bắt đầu, lấy nút đầu tiên
         if start_node is None or start_node not in G:
             start_node = next(iter(G.nodes()))
 
-        # Sử dụng NetworkX để duyệt DFS
-        # Kết quả trả về là một generator các cạnh theo thứ tự duyệt
-        dfs_edges = list(nx.dfs_edges(G, source=start_node))
-        
-        # Format kết quả cho dễ đọc
-        result = f"Kết quả duyệt theo chiều sâu (DFS) bắt đầu từ '{start_node}':\n"
-        path_nodes = [start_node] + [v for u, v in dfs_edges]
-        result += " -> ".join(path_nodes)
-        
-        # Liệt kê chi tiết các bước duyệt
-        result += "\n\n[Các bước chi tiết (Cạnh đã duyệt)]:\n"
-        for i, (u, v) in enumerate(dfs_edges):
-            result += f"{i+1}. {u} -> {v}\n"
-            
-        return result
+        def rows():
+            # Thứ tự duyệt, chia thành từng đoạn để mỗi hàng có độ dài vừa phải
+            chunk, offset = [start_node], 0
+            for u, v in nx.dfs_edges(G, source=start_node):
+                chunk.append(v)
+                if len(chunk) == self.WALK_CHUNK:
+                    yield ('walk', offset, chunk)
+                    chunk, offset = [], offset + self.WALK_CHUNK
+            if chunk:
+                yield ('walk', offset, chunk)
+
+            # Liệt kê chi tiết các bước duyệt (duyệt lại lười, không giữ danh sách cạnh)
+            yield ""
+            yield "[Các bước chi tiết (Cạnh đã duyệt)]:"
+            for i, (u, v) in enumerate(nx.dfs_edges(G, source=start_node)):
+                yield ('edge', i + 1, u, v)
+
+        return ResultStream(
+            "DFS", rows, self._format_row,
+            header=[f"Kết quả duyệt theo chiều sâu (DFS) bắt đầu từ '{start_node}':"],
+        )
 
+    @staticmethod
+    def _format_row(row):
+        """Định dạng các hàng thô dùng chung của GraphTheoryManager."""
+        kind = row[0]
+        if kind == 'walk':
+            text = " -> ".join(str(n) for n in row[2])
+            return text if row[1] == 0 else "-> " + text
+        if kind == 'edge':
+            return f"{row[1]}. {row[2]} -> {row[3]}"
+        return str(row)
+
+    @traced("graph_theory.check_bipartite")
+    @cached_result("graph_theory.check_bipartite")
     def check_bipartite(self, G):
         """5. Kiểm tra đồ thị 2 phía (Bipartite Graph) & Giải thích chi tiết."""
         if G.number_of_nodes() == 0: return "Đồ thị rỗng."
         
-        is_bip = nx.is_bipartite(G)
+        is_bip, set_a, set_b, cycle = self.bipartite_certificate(G)
         ket_qua_bool = "CÓ" if is_bip else "KHÔNG"
         result = f"KẾT QUẢ KIỂM TRA ĐỒ THỊ 2 PHÍA (BIPARTITE):\n"
         result += f" => {ket_qua_bool}\n\n"
@@ -43,146 +82,276 @@ class GraphTheoryManager:
         if is_bip:
             # Nếu là 2 phía, liệt kê 2 tập hợp
             result += "GIẢI THÍCH: Đồ thị CÓ THỂ chia làm 2 tập đỉnh riêng biệt (A và B) sao cho không có cạnh nào nối 2 đỉnh cùng một tập.\n\n"
-            try:
-                sets = nx.bipartite.sets(G)
-                # Giới hạn hiển thị nếu danh sách quá dài và dịch "node"
-                set_a = list(sets[0])
-                set_b = list(sets[1])
-                result += f"[TẬP A - {len(set_a)} nút]: {str(set_a[:10])}..." if len(set_a) > 10 else f"[TẬP A]: {str(set_a)}"
-                result += "\n"
-                result += f"[TẬP B - {len(set_b)} nút]: {str(set_b[:10])}..." if len(set_b) > 10 else f"[TẬP B]: {str(set_b)}"
-            except:
-                pass
+            # Giới hạn hiển thị nếu danh sách quá dài và dịch "node"
+            result += f"[TẬP A - {len(set_a)} nút]: {str(set_a[:10])}..." if len(set_a) > 10 else f"[TẬP A]: {str(set_a)}"
+            result += "\n"
+            result += f"[TẬP B - {len(set_b)} nút]: {str(set_b[:10])}..." if len(set_b) > 10 else f"[TẬP B]: {str(set_b)}"
         else:
-            # Nếu KHÔNG phải 2 phía, tìm bằng chứng (Chu trình lẻ)
+            # Nếu KHÔNG phải 2 phía, đưa ra bằng chứng (Chu trình lẻ tìm được khi tô màu BFS)
             result += "GIẢI THÍCH: Đồ thị chứa CHU TRÌNH LẺ (Odd Cycle). Theo định lý Kőnig, đồ thị chứa chu trình lẻ không thể là đồ thị 2 phía.\n\n"
             result += "[BẰNG CHỨNG - CÁC NÚT GÂY XUNG ĐỘT]:\n"
-            
-            try:
-                # Tìm cơ sở chu trình (Cycle Basis)
-                cycles = nx.cycle_basis(G)
-                found_odd = False
-                for cycle in cycles:
-                    if len(cycle) % 2 != 0:
-                        # Tìm thấy chu trình lẻ!
-                        path_str = " -> ".join(cycle) + f" -> {cycle[0]}"
-                        result += f"(!) Phát hiện chu trình độ dài {len(cycle)} (Lẻ):\n    {path_str}\n"
-                        
-                        # Giải thích logic tô màu
-                        result += "\nLý do xung đột (Minh họa bằng tô màu 2 màu):\n"
-                        result += f"  1. Giả sử {cycle[0]} màu ĐỎ.\n"
-                        result += f"  2. Thì {cycle[1]} phải màu XANH.\n"
-                        if len(cycle) == 3:
-                            result += f"  3. Thì {cycle[2]} phải màu ĐỎ.\n"
-                            result += f"  => NHƯNG {cycle[2]} nối lại về {cycle[0]} (cũng ĐỎ). XUNG ĐỘT!"
-                        else:
-                            result += f"  3. Tiếp tục tô xen kẽ, đỉnh cuối cùng ({cycle[-1]}) sẽ có màu ĐỎ.\n"
-                            result += f"  => NHƯNG {cycle[-1]} lại nối về đỉnh đầu tiên ({cycle[0]}) (cũng ĐỎ). XUNG ĐỘT!"
-                        
-                        found_odd = True
-                        break # Chỉ cần chỉ ra 1 cái là đủ chứng minh
-                
-                if not found_odd:
-                    result += "(Không tìm thấy chu trình lẻ đơn giản trong cơ sở, nhưng cấu trúc phức tạp gây xung đột)."
-            except Exception as e:
-                result += f"Không thể trích xuất chu trình cụ thể: {str(e)}"
+
+            shown = cycle if len(cycle) <= self.SUMMARY_ROWS else cycle[:self.SUMMARY_ROWS] + ['...']
+            path_str = " -> ".join(str(n) for n in shown) + f" -> {cycle[0]}"
+            result += f"(!) Phát hiện chu trình độ dài {len(cycle)} (Lẻ):\n    {path_str}\n"
+
+            # Giải thích logic tô màu
+            result += "\nLý do xung đột (Minh họa bằng tô màu 2 màu):\n"
+            result += f"  1. Giả sử {cycle[0]} màu ĐỎ.\n"
+            if len(cycle) == 1:
+                result += f"  => NHƯNG {cycle[0]} có cạnh nối với chính nó (khuyên). XUNG ĐỘT!"
+            else:
+                result += f"  2. Thì {cycle[1]} phải màu XANH.\n"
+                if len(cycle) == 3:
+                    result += f"  3. Thì {cycle[2]} phải màu ĐỎ.\n"
+                    result += f"  => NHƯNG {cycle[2]} nối lại về {cycle[0]} (cũng ĐỎ). XUNG ĐỘT!"
+                else:
+                    result += f"  3. Tiếp tục tô xen kẽ, đỉnh cuối cùng ({cycle[-1]}) sẽ có màu ĐỎ.\n"
+                    result += f"  => NHƯNG {cycle[-1]} lại nối về đỉnh đầu tiên ({cycle[0]}) (cũng ĐỎ). XUNG ĐỘT!"
             
         return result
 
+    @cached_result("graph_theory.bipartite_certificate")
+    def bipartite_certificate(self, G):
+        """
+        Tô 2 màu bằng BFS trên biểu diễn CSR - một lần duyệt O(n + m), bộ nhớ tuyến tính.
+
+        Returns:
+            tuple: (is_bipartite, set_a, set_b, odd_cycle)
+                   - Nếu 2 phía: set_a/set_b là 2 tập đỉnh, odd_cycle = [].
+                   - Nếu không: odd_cycle là chu trình lẻ dựng lại từ con trỏ cha
+                     (ngắn nhất trong các xung đột của cây BFS: xung đột đầu tiên luôn
+                     nằm ở tầng nông nhất), set_a/set_b rỗng.
+        """
+        rep = SparseRepresentation.from_graph(G)
+        n = rep.num_nodes
+        indptr = memoryview(rep.indptr)
+        indices = memoryview(rep.indices)
+        color = bytearray(n)          # 0: chưa tô, 1: tập A, 2: tập B
+        parent = array('q', [-1]) * n
+        depth = array('q', [0]) * n
+
+        for root in range(n):
+            if color[root]:
+                continue
+            color[root] = 1
+            queue = deque([root])
+            while queue:
+                u = queue.popleft()
+                cu = color[u]
+                for p in range(indptr[u], indptr[u + 1]):
+                    w = indices[p]
+                    if not color[w]:
+                        color[w] = 3 - cu
+                        parent[w] = u
+                        depth[w] = depth[u] + 1
+                        queue.append(w)
+                    elif color[w] == cu:
+                        cycle = self._odd_cycle_from_parents(u, w, parent, depth)
+                        return False, [], [], [rep.nodes[i] for i in cycle]
+
+        set_a = [rep.nodes[i] for i in range(n) if color[i] == 1]
+        set_b = [rep.nodes[i] for i in range(n) if color[i] == 2]
+        return True, set_a, set_b, []
+
+    @staticmethod
+    def _odd_cycle_from_parents(u, w, parent, depth):
+        """Dựng chu trình lẻ từ cạnh xung đột (u, w): u -> ... -> LCA <- ... <- w."""
+        if u == w:
+            return [u]  # Khuyên (self-loop) là chu trình lẻ độ dài 1
+        path_u, path_w = [u], [w]
+        a, b = u, w
+        while depth[a] > depth[b]:
+            a = parent[a]; path_u.append(a)
+        while depth[b] > depth[a]:
+            b = parent[b]; path_w.append(b)
+        while a != b:
+            a = parent[a]; path_u.append(a)
+            b = parent[b]; path_w.append(b)
+        # path_u: u..LCA, path_w: w..LCA -> chu trình: LCA..u, w..(con của LCA)
+        return path_u[::-1] + path_w[:-1]
+
+    @traced("graph_theory.get_representations")
+    @cached_result("graph_theory.get_representations")
     def get_representations(self, G):
-        """6. Chuyển đổi các phương pháp biểu diễn đồ thị."""
+        """6. Chuyển đổi các phương pháp biểu diễn đồ thị (dựa trên biểu diễn thưa CSR/COO)."""
         if G.number_of_nodes() == 0: return "Đồ thị rỗng."
-        
-        nodes = sorted(list(G.nodes()))
-        node_to_idx = {node: i for i, node in enumerate(nodes)}
-        n = len(nodes)
-
-        res = "=== CÁC PHƯƠNG PHÁP BIỂU DIỄN ĐỒ THỊ ===\n\n"
-        res += f"Danh sách đỉnh (Ánh xạ sang chỉ số 0..{n-1}): {nodes}\n\n"
-
-        # 1. MA TRẬN KỀ (Adjacency Matrix)
-        res += "[1] MA TRẬN KỀ (Adjacency Matrix):\n"
-        adj_matrix = np.zeros((n, n), dtype=int)
-        for u, v in G.edges():
-            i, j = node_to_idx[u], node_to_idx[v]
-            adj_matrix[i][j] = 1
-            adj_matrix[j][i] = 1 # Đồ thị vô hướng
-        
-        # In ma trận đẹp hơn
-        res += "   " + " ".join([f"{i:2d}" for i in range(n)]) + "\n"
-        for i in range(n):
-            res += f"{i:2d} [" + " ".join([f"{x:2d}" for x in adj_matrix[i]]) + "]\n"
+
+        rep = SparseRepresentation.from_graph(G)
+        nodes, n, m = rep.nodes, rep.num_nodes, rep.num_edges
+        lines = self._representation_overview(rep, full=n <= self.FULL_VIEW_NODES)
+
+        # 1. MA TRẬN KỀ (Adjacency Matrix) - chỉ in dạng đặc khi đồ thị đủ nhỏ
+        if n <= self.DENSE_MATRIX_NODES:
+            lines.append("[1] MA TRẬN KỀ (Adjacency Matrix):")
+            lines.append("   " + " ".join(f"{i:2d}" for i in range(n)))
+            for i in range(n):
+                row = [0] * n
+                for j in rep.neighbors(i):
+                    row[j] = 1
+                lines.append(f"{i:2d} [" + " ".join(f"{x:2d}" for x in row) + "]")
+        else:
+            lines.append("[1] MA TRẬN KỀ (dạng CSR - hàng i: các cột khác 0):")
+            for i in range(min(n, self.SUMMARY_ROWS)):
+                lines.append(f"  {i}: {rep.neighbors(i).tolist()}")
+            if n > self.SUMMARY_ROWS:
+                lines.append(f"  ... (còn {n - self.SUMMARY_ROWS} hàng, xuất file .npz để xem đầy đủ)")
 
         # 2. DANH SÁCH KỀ (Adjacency List)
-        res += "\n[2] DANH SÁCH KỀ (Adjacency List):\n"
-        for node in nodes:
-            neighbors = sorted(list(G.neighbors(node)))
-            res += f"  {node}: {neighbors}\n"
-
-        # 3. DANH SÁCH CẠNH (Edge List)
-        res += "\n[3] DANH SÁCH CẠNH (Edge List):\n"
-        edges = sorted([sorted(e) for e in G.edges()]) # Chuẩn hóa để (u,v) giống (v,u)
-        seen_edges = set()
-        for u, v in edges:
-            edge_tuple = tuple(sorted((u,v)))
-            if edge_tuple not in seen_edges:
-                 res += f"  ({u}, {v})\n"
-                 seen_edges.add(edge_tuple)
-
-        return res
+        lines.append("")
+        lines.append("[2] DANH SÁCH KỀ (Adjacency List):")
+        shown = n if n <= self.FULL_VIEW_NODES else self.SUMMARY_ROWS
+        for i in range(shown):
+            lines.append(f"  {nodes[i]}: {[nodes[j] for j in rep.neighbors(i)]}")
+        if shown < n:
+            lines.append(f"  ... (còn {n - shown} nút)")
 
+        # 3. DANH SÁCH CẠNH (Edge List) - lấy các ô (i, j) với i <= j theo thứ tự CSR,
+        # mỗi cạnh đúng một lần, không cần sắp xếp/loại trùng
+        lines.append("")
+        lines.append("[3] DANH SÁCH CẠNH (Edge List):")
+        limit = m if n <= self.FULL_VIEW_NODES else self.SUMMARY_ROWS
+        count = 0
+        for i in range(n):
+            if count >= limit:
+                break
+            for j in rep.neighbors(i):
+                if j >= i and count < limit:
+                    lines.append(f"  ({nodes[i]}, {nodes[j]})")
+                    count += 1
+        if limit < m:
+            lines.append(f"  ... (còn {m - limit} cạnh)")
+
+        return "\n".join(lines) + "\n"
+
+    def _representation_overview(self, rep, full):
+        """Các dòng mở đầu: ánh xạ đỉnh và thống kê biểu diễn thưa."""
+        nodes, n, m = rep.nodes, rep.num_nodes, rep.num_edges
+        degrees = rep.degrees
+        lines = ["=== CÁC PHƯƠNG PHÁP BIỂU DIỄN ĐỒ THỊ ===", ""]
+        if full:
+            lines.append(f"Danh sách đỉnh (Ánh xạ sang chỉ số 0..{n-1}): {nodes}")
+        else:
+            lines.append(f"Danh sách đỉnh: {n} nút (chỉ số 0..{n-1}), ví dụ: {nodes[:self.SUMMARY_ROWS]} ...")
+        lines.append("")
+
+        # 0. TỔNG QUAN BIỂU DIỄN THƯA
+        dense_bytes = n * n * 8
+        lines.append("[0] TỔNG QUAN (CSR/COO):")
+        lines.append(f"  Số cạnh: {m} | Phần tử khác 0 của ma trận kề: {len(rep.indices)}")
+        lines.append(f"  Mật độ: {len(rep.indices) / (n * n):.6f}")
+        lines.append(f"  Bậc: nhỏ nhất {int(degrees.min())}, lớn nhất {int(degrees.max())}, trung bình {degrees.mean():.2f}")
+        lines.append(f"  Bộ nhớ CSR: {rep.memory_bytes() / 1024:.1f} KB (ma trận đặc sẽ cần {dense_bytes / 1024:.1f} KB)")
+        lines.append("")
+        return lines
+
+    def representations_stream(self, G):
+        """
+        Biểu diễn đồ thị dạng luồng hàng: liệt kê ĐẦY ĐỦ danh sách kề và danh sách cạnh,
+        nhưng mỗi hàng chỉ được định dạng khi hiển thị/ghi ra.
+        """
+        if G.number_of_nodes() == 0:
+            return ResultStream.from_text("Biểu diễn Đồ thị", "Đồ thị rỗng.")
+
+        rep = SparseRepresentation.from_graph(G)
+        nodes, n = rep.nodes, rep.num_nodes
+        dense = n <= self.DENSE_MATRIX_NODES
+
+        def rows():
+            if dense:
+                yield "[1] MA TRẬN KỀ (Adjacency Matrix):"
+                yield "   " + " ".join(f"{i:2d}" for i in range(n))
+                for i in range(n):
+                    yield ('matrix', i)
+            else:
+                yield "[1] MA TRẬN KỀ (dạng CSR - hàng i: các cột khác 0):"
+                for i in range(n):
+                    yield ('csr', i)
+            yield ""
+            yield "[2] DANH SÁCH KỀ (Adjacency List):"
+            for i in range(n):
+                yield ('adj', i)
+            yield ""
+            yield "[3] DANH SÁCH CẠNH (Edge List):"
+            for i in range(n):
+                for j in rep.neighbors(i).tolist():
+                    if j >= i:
+                        yield ('pair', i, j)
+
+        def fmt(row):
+            kind, i = row[0], row[1]
+            if kind == 'matrix':
+                cells = [0] * n
+                for j in rep.neighbors(i):
+                    cells[j] = 1
+                return f"{i:2d} [" + " ".join(f"{x:2d}" for x in cells) + "]"
+            if kind == 'csr':
+                return f"  {i}: {rep.neighbors(i).tolist()}"
+            if kind == 'adj':
+                return f"  {nodes[i]}: {[nodes[j] for j in rep.neighbors(i)]}"
+            return f"  ({nodes[i]}, {nodes[row[2]]})"
+
+        return ResultStream(
+            "Biểu diễn Đồ thị", rows, fmt,
+            header=self._representation_overview(rep, full=n <= self.FULL_VIEW_NODES),
+        )
+
+    def export_representations(self, G, filepath):
+        """Xuất biểu diễn thưa (CSR, danh sách cạnh, bậc) ra file nhị phân .npz."""
+        if G is None or G.number_of_nodes() == 0:
+            return False, "Empty Graph"
+        return SparseRepresentation.from_graph(G).save_npz(filepath)
+
+    @traced("graph_theory.find_eulerian")
+    @cached_result("graph_theory.find_eulerian")
     def find_eulerian(self, G):
         """7.4 & 7.5. Tìm đường đi/Chu trình Euler (Đại diện cho Fleury/Hierholzer)."""
-        # Lưu ý: NetworkX sử dụng thuật toán tối ưu (thường là Hierholzer cải tiến) 
-        # để tìm chu trình Euler. Nó đáp ứng yêu cầu tìm kiếm Euler.
-        
         if G.number_of_nodes() == 0: return "Đồ thị rỗng."
-        
-        # Kiểm tra điều kiện Euler cho đồ thị vô hướng:
+        return self.euler_stream(G).to_text()
+
+    def euler_stream(self, G):
+        """
+        Phân tích Euler dạng luồng: kết luận ở header, đường đi được sinh lười theo đoạn
+        bởi EulerianEngine (Hierholzer lặp trên CSR có mã cạnh).
+        """
+        title = "Euler"
+        if G.number_of_nodes() == 0:
+            return ResultStream.from_text(title, "Đồ thị rỗng.")
+
+        # Kiểm tra điều kiện Euler cho đồ thị vô hướng (một lần duyệt):
         # - Liên thông (trừ các đỉnh cô lập bậc 0)
         # - Chu trình Euler: Tất cả các đỉnh có bậc chẵn.
         # - Đường đi Euler: Có đúng 0 hoặc 2 đỉnh bậc lẻ.
-        
-        res = "=== PHÂN TÍCH ĐƯỜNG ĐI/CHU TRÌNH EULER ===\n\n"
-        
-        # Kiểm tra tính liên thông của các cạnh
-        if not nx.is_connected(G):
-             # Loại bỏ các node cô lập để kiểm tra phần có cạnh
-             G_core = G.subgraph([n for n, d in G.degree() if d > 0])
-             if not nx.is_connected(G_core) and G_core.number_of_nodes() > 0:
-                 return res + "Kết quả: KHÔNG CÓ đường đi hay chu trình Euler.\nLý do: Đồ thị không liên thông (có nhiều thành phần chứa cạnh)."
-
-        odd_degree_nodes = [n for n, d in G.degree() if d % 2 != 0]
-        num_odd = len(odd_degree_nodes)
-        
-        res += f"Số đỉnh bậc lẻ: {num_odd} ({odd_degree_nodes})\n\n"
-        
-        if num_odd == 0:
-            res += "=> KẾT LUẬN: Đồ thị có CHU TRÌNH EULER.\n"
-            try:
-                circuit = list(nx.eulerian_circuit(G))
-                res += "\nChu trình tìm được:\n"
-                path_str = " -> ".join([str(u) for u, v in circuit] + [str(circuit[-1][1])])
-                res += path_str
-            except Exception as e:
-                 res += f"\n(Không thể trích xuất chu trình cụ thể: {e})"
-
-        elif num_odd == 2:
-            res += "=> KẾT LUẬN: Đồ thị có ĐƯỜNG ĐI EULER.\n"
-            res += f"Đường đi sẽ bắt đầu và kết thúc tại 2 đỉnh bậc lẻ: {odd_degree_nodes}\n"
-            try:
-                # NetworkX < 3.0 dùng eulerian_path, >= 3.0 cần kiểm tra
-                if hasattr(nx, 'eulerian_path'):
-                     path = list(nx.eulerian_path(G))
-                     res += "\nĐường đi tìm được:\n"
-                     path_str = " -> ".join([str(u) for u, v in path] + [str(path[-1][1])])
-                     res += path_str
-                else:
-                    res += "\n(Phiên bản NetworkX hiện tại không hỗ trợ hiển thị đường đi cụ thể)."
-            except Exception as e:
-                 res += f"\n(Không thể trích xuất đường đi cụ thể: {e})"
+        rep = SparseRepresentation.from_graph(G)
+        engine = EulerianEngine(rep)
+        info = engine.analyze()
+        nodes = rep.nodes
+
+        header = ["=== PHÂN TÍCH ĐƯỜNG ĐI/CHU TRÌNH EULER ===", ""]
+        if info["kind"] is None and not info["odd_nodes"]:
+            header += ["Kết quả: KHÔNG CÓ đường đi hay chu trình Euler.", f"Lý do: {info['reason']}"]
+            return ResultStream(title, header=header)
+
+        odd_names = [nodes[i] for i in info["odd_nodes"][:self.SUMMARY_ROWS]]
+        if len(info["odd_nodes"]) > self.SUMMARY_ROWS:
+            odd_names.append('...')
+        header += [f"Số đỉnh bậc lẻ: {len(info['odd_nodes'])} ({odd_names})", ""]
+
+        if info["kind"] == "circuit":
+            header += ["=> KẾT LUẬN: Đồ thị có CHU TRÌNH EULER.", "", "Chu trình tìm được:"]
+        elif info["kind"] == "path":
+            header += ["=> KẾT LUẬN: Đồ thị có ĐƯỜNG ĐI EULER.",
+                       f"Đường đi sẽ bắt đầu và kết thúc tại 2 đỉnh bậc lẻ: {odd_names}",
+                       "", "Đường đi tìm được:"]
         else:
-             res += "=> KẾT LUẬN: Đồ thị KHÔNG CÓ đường đi hay chu trình Euler.\n"
-             res += "Lý do: Số lượng đỉnh bậc lẻ khác 0 và 2."
-             
-        return res
\ No newline at end of file
+            header += ["=> KẾT LUẬN: Đồ thị KHÔNG CÓ đường đi hay chu trình Euler.", f"Lý do: {info['reason']}"]
+            return ResultStream(title, header=header)
+
+        def rows():
+            offset = 0
+            for chunk in engine.iter_walk(info["start"], chunk_size=self.WALK_CHUNK):
+                yield ('walk', offset, [nodes[i] for i in chunk])
+                offset += len(chunk)
+
+        return ResultStream(title, rows, self._format_row, header=header,
+                            total_rows=-(-(rep.num_edges + 1) // self.WALK_CHUNK))
@@ -0,0 +1,261 @@
+import hashlib
+import heapq
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import networkx as nx
+import numpy as np
+from algorithms.representations import SparseRepresentation
+from utils.instrumentation import traced, tracer
+
+# Một luồng nền duy nhất cho việc dựng chỉ mục (các lần dựng xếp hàng, không tranh CPU với nhau)
+_BUILD_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alt-build")
+
+
+def graph_fingerprint(rep):
+    """Dấu vân tay cấu trúc (tên nút + cạnh + trọng số) để kiểm tra chỉ mục đã lưu còn khớp không."""
+    h = hashlib.sha1()
+    h.update("\x00".join(str(n) for n in rep.nodes).encode("utf-8"))
+    for arr in (rep.edge_src, rep.edge_dst, rep.edge_weight):
+        h.update(np.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()
+
+
+class LandmarkIndex:
+    """
+    Chỉ mục tiền xử lý ALT (A*, Landmarks, Triangle inequality) cho truy vấn điểm-điểm.
+
+    - Chọn L landmark theo chiến lược "xa nhất" (farthest), mỗi landmark lưu một mảng
+      khoảng cách float32 tới mọi nút -> bộ nhớ L * n * 4 byte.
+    - Cận dưới d(v, t) >= max_L |d(L, v) - d(L, t)| (bất đẳng thức tam giác).
+    - `query()` chạy A* hai chiều với thế năng trung bình p(v) = (π_t(v) - π_s(v)) / 2,
+      nên điều kiện dừng giống Dijkstra hai chiều: top_f + top_r >= μ.
+
+    Khoảng cách lưu float32: chính xác tuyệt đối với trọng số nguyên (độ trễ ms) tới 2^24.
+    """
+
+    def __init__(self, rep, landmarks, dist, fingerprint=None):
+        self.rep = rep
+        self.landmarks = np.asarray(landmarks, dtype=np.int64)
+        self.dist = np.asarray(dist, dtype=np.float32)   # shape (L, n)
+        self._dist_t = np.ascontiguousarray(self.dist.T)  # (n, L): hàng liên tục cho từng nút
+        self.fingerprint = fingerprint or graph_fingerprint(rep)
+        self.graph_key = None  # (graph_id, version) của đồ thị đã dựng, nếu có
+        self._rejected_key = None  # (graph_id, version) gần nhất đã kiểm tra là không khớp
+        self._adj = None
+
+    # --- Dựng chỉ mục ---
+    @classmethod
+    @traced("landmarks.build")
+    def build(cls, G, num_landmarks=8, weight='weight'):
+        rep = SparseRepresentation.from_graph(G, weight)
+        n = rep.num_nodes
+        indptr, indices, data = (a.tolist() for a in rep.adjacency_csr(weighted=True))
+
+        landmarks, rows = [], []
+        # Khoảng cách nhỏ nhất tới tập landmark hiện có; inf = chưa phủ (thành phần liên thông mới)
+        nearest = np.full(n, np.inf)
+        for _ in range(min(num_landmarks, n)):
+            unreached = np.flatnonzero(np.isinf(nearest))
+            if len(unreached) and landmarks:
+                cand = int(unreached[0])        # Phủ thành phần liên thông chưa có landmark
+            elif landmarks:
+                cand = int(np.argmax(nearest))  # Nút xa nhất so với các landmark đã chọn
+            else:
+                cand = int(np.argmax(rep.degrees)) if n else 0
+            if landmarks and cand in landmarks:
+                break
+            row = cls._sssp(indptr, indices, data, cand, n)
+            landmarks.append(cand)
+            rows.append(row)
+            np.minimum(nearest, row, out=nearest)
+
+        index = cls(rep, landmarks, np.array(rows, dtype=np.float32).reshape(len(rows), n))
+        index.graph_key = (getattr(G, 'graph_id', None), getattr(G, 'version', None))
+        index._adj = (indptr, indices, data)
+        tracer.count("landmarks.count", len(landmarks))
+        logging.info(f"ALT index built: {len(landmarks)} landmarks, {index.memory_bytes()} bytes")
+        return index
+
+    @classmethod
+    def build_async(cls, G, num_landmarks=8, weight='weight'):
+        """
+        Dựng chỉ mục trên luồng nền, trả về concurrent.futures.Future.
+        Dựng trên bản sao đồ thị nên UI có thể tiếp tục chỉnh sửa đồ thị gốc.
+        """
+        snapshot = nx.Graph(G)  # Bản sao chỉ đọc: nx.Graph thường, không cần chỉ mục/theo dõi
+        key = (getattr(G, 'graph_id', None), getattr(G, 'version', None))
+
+        def job():
+            index = cls.build(snapshot, num_landmarks, weight)
+            index.graph_key = key
+            return index
+        return _BUILD_EXECUTOR.submit(job)
+
+    @staticmethod
+    def _sssp(indptr, indices, data, source, n):
+        """Dijkstra một nguồn trên CSR, trả về mảng khoảng cách (inf nếu không tới được)."""
+        dist = [float('inf')] * n
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for p in range(indptr[u], indptr[u + 1]):
+                v = indices[p]
+                nd = d + data[p]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return np.array(dist)
+
+    # --- Kiểm tra hợp lệ ---
+    def is_valid_for(self, G):
+        """
+        Nhanh: so (graph_id, version). Cùng đồ thị nhưng khác version -> lỗi thời, trả False
+        ngay (nơi dùng dựng lại ở nền); (graph_id, version) đã từng không khớp cũng trả False
+        ngay. Chỉ đồ thị khác / không có version mới phải so dấu vân tay cấu trúc (O(n + m)).
+        """
+        key = (getattr(G, 'graph_id', None), getattr(G, 'version', None))
+        versioned = key[0] is not None
+        if versioned and self.graph_key is not None:
+            if key == self.graph_key:
+                return True
+            if key[0] == self.graph_key[0]:
+                return False
+        if versioned and key == self._rejected_key:
+            return False
+        if (G.number_of_nodes() == self.rep.num_nodes and G.number_of_edges() == self.rep.num_edges
+                and graph_fingerprint(SparseRepresentation.from_graph(G)) == self.fingerprint):
+            self.graph_key = key
+            return True
+        if versioned:
+            self._rejected_key = key
+        return False
+
+    def memory_bytes(self):
+        return self.dist.nbytes
+
+    # --- Truy vấn ---
+    def lower_bound(self, u, v):
+        """Cận dưới ALT của d(u, v) theo chỉ số nút."""
+        with np.errstate(invalid='ignore'):  # inf - inf: landmark ở thành phần khác
+            diff = self._dist_t[u] - self._dist_t[v]
+        diff = diff[np.isfinite(diff)]
+        return float(np.abs(diff).max()) if len(diff) else 0.0
+
+    def _adjacency(self):
+        if self._adj is None:
+            self._adj = tuple(a.tolist() for a in self.rep.adjacency_csr(weighted=True))
+        return self._adj
+
+    @traced("landmarks.query")
+    def query(self, source_id, target_id):
+        """
+        A* hai chiều với cận dưới ALT.
+
+        Returns:
+            tuple: (path, cost, settled) - path là danh sách tên nút, None nếu không có đường;
+                   settled là số nút đã chốt ở cả hai chiều (để đo hiệu quả chỉ mục).
+        """
+        index = self.rep.index
+        if source_id not in index or target_id not in index:
+            return None, 0, 0
+        s, t = index[source_id], index[target_id]
+        if s == t:
+            return [source_id], 0, 0
+
+        # Khác thành phần liên thông: một landmark tới được nút này nhưng không tới được nút kia
+        fs, ft = np.isfinite(self._dist_t[s]), np.isfinite(self._dist_t[t])
+        if np.any(fs != ft):
+            return None, 0, 0
+
+        indptr, indices, data = self._adjacency()
+        pot_cache = {}
+
+        def pot(v):
+            # Thế năng chiều xuôi; chiều ngược dùng -pot(v)
+            p = pot_cache.get(v)
+            if p is None:
+                p = (self.lower_bound(v, t) - self.lower_bound(v, s)) / 2.0
+                pot_cache[v] = p
+            return p
+
+        dist = ({s: 0.0}, {t: 0.0})
+        parent = ({s: -1}, {t: -1})
+        settled = (set(), set())
+        heaps = ([(pot(s), s)], [(-pot(t), t)])
+        sign = (1.0, -1.0)
+        best, meet = float('inf'), -1
+
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            _, u = heapq.heappop(heaps[side])
+            if u in settled[side]:
+                continue
+            settled[side].add(u)
+            d_self, d_other = dist[side], dist[1 - side]
+            du = d_self[u]
+            if u in d_other and du + d_other[u] < best:
+                best, meet = du + d_other[u], u
+            for p in range(indptr[u], indptr[u + 1]):
+                v = indices[p]
+                nd = du + data[p]
+                if nd < d_self.get(v, float('inf')):
+                    d_self[v] = nd
+                    parent[side][v] = u
+                    heapq.heappush(heaps[side], (nd + sign[side] * pot(v), v))
+                    if v in d_other and nd + d_other[v] < best:
+                        best, meet = nd + d_other[v], v
+
+        n_settled = len(settled[0]) + len(settled[1])
+        tracer.count("landmarks.settled", n_settled)
+        if meet < 0:
+            return None, 0, n_settled
+
+        path = []
+        v = meet
+        while v != -1:
+            path.append(v)
+            v = parent[0][v]
+        path.reverse()
+        v = parent[1][meet]
+        while v != -1:
+            path.append(v)
+            v = parent[1][v]
+        nodes = self.rep.nodes
+        cost = best if best != int(best) else int(best)
+        return [nodes[i] for i in path], cost, n_settled
+
+    # --- Lưu trữ ---
+    def save_npz(self, filepath):
+        """Ghi chỉ mục ra .npz (nén). Trả về (ok, msg) giống các hàm I/O khác."""
+        try:
+            np.savez_compressed(filepath, landmarks=self.landmarks, dist=self.dist,
+                                fingerprint=np.array(self.fingerprint))
+            logging.info(f"ALT index saved to {filepath}")
+            return True, "Success"
+        except Exception as e:
+            logging.error(f"ALT Save Error: {str(e)}")
+            return False, str(e)
+
+    @classmethod
+    def load_npz(cls, filepath, G):
+        """
+        Đọc chỉ mục đã lưu cho đồ thị G. Trả về (index, msg); index là None nếu file lỗi
+        hoặc dấu vân tay không khớp với G (tô pô đã đổi kể từ lần lưu).
+        """
+        try:
+            rep = SparseRepresentation.from_graph(G)
+            with np.load(filepath) as data:
+                fingerprint = str(data['fingerprint'])
+                if fingerprint != graph_fingerprint(rep):
+                    return None, "Chỉ mục ALT không khớp với tô pô hiện tại."
+                index = cls(rep, data['landmarks'], data['dist'], fingerprint)
+            index.graph_key = (getattr(G, 'graph_id', None), getattr(G, 'version', None))
+            return index, "Success"
+        except Exception as e:
+            logging.error(f"ALT Load Error: {str(e)}")
+            return None, str(e)
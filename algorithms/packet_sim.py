@@ -0,0 +1,297 @@
+import heapq
+import logging
+import random
+import time
+from collections import deque
+import numpy as np
+from algorithms.forwarding import ForwardingCompiler, ForwardingSimulator, LOCAL
+from algorithms.representations import SparseRepresentation
+from utils.instrumentation import traced, tracer
+
+# Loại sự kiện (2 bit thấp của mã sự kiện); phần giữa là mã luồng (nguồn) hoặc mã liên kết
+_ARRIVAL, _TX_DONE, _RX = 0, 1, 2
+_KIND_BITS = 2
+
+
+class PacketSimulator:
+    """
+    Mô phỏng mức gói theo sự kiện rời rạc (discrete-event) với hàng đợi trên từng liên kết.
+
+    - Mỗi cạnh vô hướng là 2 liên kết một chiều (ô CSR u->v), mỗi liên kết có hàng đợi FIFO
+      hữu hạn (`buffer_packets` gói, đầy thì huỷ gói đến sau - tail drop).
+    - Thời gian truyền (serialization) = kích thước gói / `capacity` (Mbps); thời gian lan
+      truyền = `weight` (ms). Gói đi theo bảng chuyển tiếp đã biên dịch (ForwardingCompiler).
+    - Bộ lập lịch là heap số nguyên: mỗi sự kiện là MỘT int (thời điểm ns | mã | loại), trạng
+      thái gói nằm trong các list tái sử dụng qua danh sách rỗi -> vòng lặp sự kiện không tạo
+      tuple/bản ghi sự kiện nào, so sánh trong heap là so sánh int.
+    - Mỗi liên kết chỉ có tối đa một sự kiện "truyền xong" và một sự kiện "gói đầu dây tới
+      nút kế" (gói rời dây theo đúng thứ tự vào) -> heap chỉ cỡ số liên kết + số luồng, không
+      phình theo số gói đang bay, và mã liên kết dùng thẳng làm mã sự kiện.
+
+    Thông lượng phụ thuộc máy và tải, không phải hằng số: đo trên 1 CPU, ca benchmark
+    `packet_sim.simulate` (20 luồng, 20 ms) đạt 1,2-1,5 triệu sự kiện/giây, lần chạy lớn
+    (200 luồng, 50 ms, 0,2-6,5 triệu sự kiện) đạt 0,9-1,1 triệu/giây, và máy khác đo được
+    0,6-0,8 triệu/giây. Số đo thực của mỗi lần chạy nằm ở khoá 'events_per_sec'.
+    """
+
+    PACKET_BYTES = 1500
+    BUFFER_PACKETS = 64
+    MAX_EVENTS = 50_000_000
+    TOP_LINKS = 10
+
+    @staticmethod
+    def random_flows(G, count, rate_mbps, seed=0):
+        """Chọn `count` cặp host (PC/Server; không có thì mọi nút) khác nhau làm luồng nền."""
+        from algorithms.partitioning import ENDPOINT_TYPES
+        hosts = [v for v, t in G.nodes(data='type') if t in ENDPOINT_TYPES] or list(G.nodes())
+        if len(hosts) < 2:
+            return []
+        rng = random.Random(seed)
+        return [tuple(rng.sample(hosts, 2)) + (rate_mbps,) for _ in range(count)]
+
+    @staticmethod
+    def _flow_paths(table, rep, flows):
+        """
+        Đường đi (dãy ô CSR) của từng luồng theo FIB: tra cứu cả lô luồng mỗi chặng.
+
+        Returns:
+            list: mỗi luồng một list ô CSR, hoặc None nếu gói bị huỷ / lặp vòng.
+        """
+        n = len(table.nodes)
+        src = np.array([table.index[s] for s, _, _ in flows], dtype=np.int64)
+        dst = table.addresses[[table.index[d] for _, d, _ in flows]]
+        paths = [[] for _ in flows]
+        routable = [False] * len(flows)
+        current, active = src.copy(), np.arange(len(flows))
+        for _ in range(ForwardingSimulator.MAX_HOPS + 1):
+            if not len(active):
+                break
+            nxt = table.lookup(current[active], dst[active])
+            for f, u, v in zip(active.tolist(), current[active].tolist(), nxt.tolist()):
+                if v >= 0:
+                    paths[f].append(u * n + v)
+                elif v == LOCAL:
+                    routable[f] = True
+            moving = nxt >= 0
+            active = active[moving]
+            current[active] = nxt[moving]
+
+        # (u, v) -> ô CSR: hàng tăng dần, trong hàng cột tăng dần nên u*n+v đã được sắp
+        rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(rep.indptr))
+        slot_keys = rows * n + rep.indices
+        return [np.searchsorted(slot_keys, path).tolist() if ok else None
+                for path, ok in zip(paths, routable)]
+
+    @staticmethod
+    @traced("packet_sim.simulate")
+    def simulate(G, flows, duration=1.0, arrivals='poisson', packet_bytes=PACKET_BYTES,
+                 buffer_packets=BUFFER_PACKETS, weight='weight', capacity='capacity',
+                 seed=0, max_events=MAX_EVENTS):
+        """
+        Mô phỏng các luồng trong `duration` giây (sau đó không sinh gói mới, gói đang đi được
+        chạy nốt tới khi tới đích hoặc bị huỷ).
+
+        Args:
+            flows: danh sách (nút nguồn, nút đích, tốc độ Mbps).
+            arrivals: 'poisson' (khoảng cách gói theo phân phối mũ) hoặc 'cbr' (đều).
+            buffer_packets: sức chứa hàng đợi mỗi liên kết (không tính gói đang truyền).
+            max_events: trần số sự kiện (chạm trần -> 'truncated').
+        Returns:
+            dict: 'flows' - mỗi luồng {'src', 'dst', 'rate', 'routable', 'sent', 'delivered',
+                  'dropped', 'loss', 'latency_ms': {'mean','p50','p90','p99','max','jitter'}};
+                  'links' - các liên kết bận nhất [(u, v, mức sử dụng trong `duration`, hàng đợi dài nhất,
+                  số gói huỷ)];
+                  'latencies' - (mảng mã luồng, mảng độ trễ ms) của mọi gói tới đích;
+                  'events', 'seconds', 'events_per_sec', 'truncated'.
+        """
+        table = ForwardingCompiler.compile(G, weight=weight)
+        rep = SparseRepresentation.from_graph(G, weight=weight)
+        flows = [(s, d, float(r)) for s, d, r in flows if s in table.index and d in table.index and s != d]
+        paths = PacketSimulator._flow_paths(table, rep, flows) if flows else []
+
+        # Tham số liên kết theo ô CSR (thời gian tính bằng ns nguyên)
+        _, _, latency = rep.adjacency_csr(weighted=True)
+        bandwidth = SparseRepresentation.from_graph(G, weight=capacity).edge_weight[rep.edge_ids]
+        bits = packet_bytes * 8
+        prop = np.rint(latency * 1e6).astype(np.int64).tolist()
+        ser = np.maximum(np.rint(bits * 1e3 / np.maximum(bandwidth, 1e-3)), 1).astype(np.int64).tolist()
+        links = len(prop)
+
+        # Luồng: đường đi phẳng + khoảng cách gói trung bình (ns)
+        path_links, path_start, path_len = [], [], []
+        for path in paths:
+            path_start.append(len(path_links))
+            path_len.append(len(path) if path else 0)
+            path_links.extend(path or ())
+        gap = [bits * 1e3 / r if r > 0 else 0.0 for _, _, r in flows]
+        sent = [0] * len(flows)
+        dropped = [0] * len(flows)
+        delivered_flow, delivered_latency = [], []
+
+        # Trạng thái liên kết: gói đang truyền (-1 = rảnh), hàng đợi FIFO, "dây" chứa các gói
+        # đang lan truyền (ra khỏi dây đúng thứ tự vào vì trễ lan truyền của liên kết cố định)
+        serving = [-1] * links
+        queues = [deque() for _ in range(links)]
+        wires = [deque() for _ in range(links)]
+        q_peak = [0] * links
+        busy = [0] * links  # ns truyền trong [0, end): phần chạy nốt sau `duration` không tính
+        link_drops = [0] * links
+
+        # Trạng thái gói (tái sử dụng qua free); due = thời điểm tới đầu kia dây hiện tại
+        pkt_flow, pkt_hop, pkt_born, pkt_due, free = [], [], [], [], []
+
+        end = int(duration * 1e9)
+        id_bits = max(links, len(flows), 1).bit_length()
+        shift = _KIND_BITS + id_bits
+        id_mask = (1 << id_bits) - 1
+        rng = random.Random(seed)
+        expo = rng.expovariate
+        poisson = arrivals == 'poisson'
+        heap = []
+        for f, path in enumerate(paths):
+            if path is not None and gap[f] > 0:
+                first = int(rng.random() * gap[f])
+                if first < end:
+                    heap.append((first << shift) | (f << _KIND_BITS) | _ARRIVAL)
+        heapq.heapify(heap)
+
+        push, pop, replace = heapq.heappush, heapq.heappop, heapq.heapreplace
+        events = 0
+        began = time.perf_counter()
+        while heap and events < max_events:
+            # Sự kiện nhỏ nhất để nguyên ở đỉnh heap: lần hẹn đầu tiên của nó dùng heapreplace
+            # (một lần vun đống thay vì pop + push), không hẹn gì thì mới pop
+            ev = heap[0]
+            top = True
+            events += 1
+            now = ev >> shift
+            link = (ev >> _KIND_BITS) & id_mask
+            kind = ev & 3
+            p = -1
+
+            if kind == _RX:
+                # Gói đầu dây tới nút trung gian: xếp hàng ở liên kết kế tiếp
+                wire = wires[link]
+                p = wire.popleft()
+                if wire:
+                    replace(heap, (pkt_due[wire[0]] << shift) | (link << _KIND_BITS) | _RX)
+                    top = False
+                f = pkt_flow[p]
+                hop = pkt_hop[p] + 1
+                pkt_hop[p] = hop
+                link = path_links[path_start[f] + hop]
+            elif kind == _TX_DONE:
+                # Truyền xong gói đang phục vụ: chặng cuối thì gói tới đích sau trễ lan truyền
+                # (không còn gì chờ phía trước), ngược lại đưa lên dây; rồi lấy gói kế trong hàng đợi
+                done = serving[link]
+                due = now + prop[link]
+                f = pkt_flow[done]
+                if pkt_hop[done] + 1 == path_len[f]:
+                    delivered_flow.append(f)
+                    delivered_latency.append(due - pkt_born[done])
+                    free.append(done)
+                else:
+                    pkt_due[done] = due
+                    wire = wires[link]
+                    if not wire:
+                        replace(heap, (due << shift) | (link << _KIND_BITS) | _RX)
+                        top = False
+                    wire.append(done)
+                queue = queues[link]
+                if queue:
+                    serving[link] = queue.popleft()
+                    if now < end:
+                        busy[link] += min(ser[link], end - now)
+                    if top:
+                        replace(heap, ((now + ser[link]) << shift) | (link << _KIND_BITS) | _TX_DONE)
+                        top = False
+                    else:
+                        push(heap, ((now + ser[link]) << shift) | (link << _KIND_BITS) | _TX_DONE)
+                else:
+                    serving[link] = -1
+            else:
+                # Nguồn sinh gói mới và hẹn gói kế tiếp của luồng
+                f = link
+                nxt = now + (int(expo(1.0 / gap[f])) if poisson else int(gap[f]))
+                if nxt < end:
+                    replace(heap, (nxt << shift) | (f << _KIND_BITS) | _ARRIVAL)
+                    top = False
+                sent[f] += 1
+                if free:
+                    p = free.pop()
+                    pkt_flow[p] = f
+                    pkt_hop[p] = 0
+                    pkt_born[p] = now
+                else:
+                    p = len(pkt_flow)
+                    pkt_flow.append(f)
+                    pkt_hop.append(0)
+                    pkt_born.append(now)
+                    pkt_due.append(0)
+                link = path_links[path_start[f]]
+
+            if p >= 0:
+                # Đưa gói p vào liên kết `link`: truyền ngay nếu rảnh, xếp hàng nếu còn chỗ, không thì huỷ
+                if serving[link] < 0:
+                    serving[link] = p
+                    if now < end:
+                        busy[link] += min(ser[link], end - now)
+                    if top:
+                        replace(heap, ((now + ser[link]) << shift) | (link << _KIND_BITS) | _TX_DONE)
+                        top = False
+                    else:
+                        push(heap, ((now + ser[link]) << shift) | (link << _KIND_BITS) | _TX_DONE)
+                else:
+                    queue = queues[link]
+                    size = len(queue)
+                    if size < buffer_packets:
+                        queue.append(p)
+                        if size >= q_peak[link]:
+                            q_peak[link] = size + 1
+                    else:
+                        dropped[pkt_flow[p]] += 1
+                        link_drops[link] += 1
+                        free.append(p)
+            if top:
+                pop(heap)
+        seconds = time.perf_counter() - began
+        truncated = bool(heap)
+        tracer.count("packet_sim.events", events)
+
+        return PacketSimulator._summarize(rep, flows, paths, sent, dropped, delivered_flow,
+                                          delivered_latency, busy, q_peak, link_drops, max(end, 1),
+                                          events, seconds, truncated)
+
+    @staticmethod
+    def _summarize(rep, flows, paths, sent, dropped, delivered_flow, delivered_latency,
+                   busy, q_peak, link_drops, end, events, seconds, truncated):
+        flow_ids = np.array(delivered_flow, dtype=np.int64)
+        latency_ms = np.array(delivered_latency, dtype=np.float64) / 1e6
+        order = np.argsort(flow_ids, kind='stable')
+        flow_ids, latency_ms = flow_ids[order], latency_ms[order]
+        bounds = np.searchsorted(flow_ids, np.arange(len(flows) + 1))
+
+        flow_stats = []
+        for f, (src, dst, rate) in enumerate(flows):
+            samples = latency_ms[bounds[f]:bounds[f + 1]]
+            stats = {'src': src, 'dst': dst, 'rate': rate, 'routable': paths[f] is not None,
+                     'sent': sent[f], 'delivered': len(samples), 'dropped': dropped[f],
+                     'loss': dropped[f] / sent[f] if sent[f] else 0.0, 'latency_ms': None}
+            if len(samples):
+                p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+                stats['latency_ms'] = {'mean': float(samples.mean()), 'p50': float(p50), 'p90': float(p90),
+                                       'p99': float(p99), 'max': float(samples.max()),
+                                       'jitter': float(samples.std())}
+            flow_stats.append(stats)
+
+        utilization = np.array(busy, dtype=np.float64) / end
+        rows = np.repeat(np.arange(rep.num_nodes), np.diff(rep.indptr))
+        top = np.argsort(-utilization, kind='stable')[:PacketSimulator.TOP_LINKS]
+        link_stats = [(rep.nodes[rows[p]], rep.nodes[rep.indices[p]], float(utilization[p]), q_peak[p], link_drops[p])
+                      for p in top if utilization[p] > 0]
+
+        rate = events / seconds if seconds else 0.0
+        logging.info(f"Packet simulation: {events} events in {seconds:.2f}s ({rate / 1e6:.2f}M events/s), "
+                     f"{len(delivered_flow)} delivered, {sum(dropped)} dropped")
+        return {'flows': flow_stats, 'links': link_stats, 'latencies': (flow_ids, latency_ms),
+                'events': events, 'seconds': seconds, 'events_per_sec': rate, 'truncated': truncated}
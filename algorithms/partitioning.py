@@ -0,0 +1,650 @@
+import heapq
+import logging
+import os
+from collections import deque
+import numpy as np
+from algorithms.representations import SparseRepresentation
+from utils.instrumentation import traced, tracer
+from utils.result_cache import cached_result, result_cache
+from utils.shared_graph import SharedGraph, worker_pool
+from utils.versioned_graph import node_type_groups
+
+# Bậc trong phân cấp thiết bị: thiết bị đầu cuối luôn đi cùng thiết bị truy cập của nó
+INFRA_TYPES = ('Router', 'Switch')
+ENDPOINT_TYPES = ('PC', 'Server')
+
+
+class Shard:
+    """
+    Một vùng của phân hoạch (chỉ số nút theo SparseRepresentation).
+
+    - nodes: các nút thuộc vùng (tăng dần).
+    - boundary: nút của vùng có hàng xóm ở vùng khác.
+    - halo: nút của vùng khác kề với vùng này (bản sao chỉ đọc khi ghép kết quả).
+    - cut_edges: số cạnh nối vùng này với vùng khác.
+    """
+
+    __slots__ = ('index', 'nodes', 'boundary', 'halo', 'cut_edges')
+
+    def __init__(self, index, nodes, boundary, halo, cut_edges):
+        self.index = index
+        self.nodes = nodes
+        self.boundary = boundary
+        self.halo = halo
+        self.cut_edges = cut_edges
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __repr__(self):
+        return (f"Shard({self.index}: {len(self.nodes)} nodes, {len(self.boundary)} boundary, "
+                f"{len(self.halo)} halo, {self.cut_edges} cut edges)")
+
+
+class Partition:
+    """
+    Kết quả phân hoạch: `assignment[i]` là vùng của nút `rep.nodes[i]`.
+    Các shard và payload CSR cục bộ được dựng một lần khi dùng tới.
+    """
+
+    def __init__(self, rep, assignment, parts):
+        self.rep = rep
+        self.assignment = np.asarray(assignment, dtype=np.int64)
+        self.parts = parts
+        self._shards = None
+        self._payloads = None
+        self._shared = None
+
+    @property
+    def sizes(self):
+        return np.bincount(self.assignment, minlength=self.parts)
+
+    @property
+    def edge_cut(self):
+        """Số cạnh có hai đầu ở hai vùng khác nhau."""
+        rep = self.rep
+        return int(np.count_nonzero(self.assignment[rep.edge_src] != self.assignment[rep.edge_dst]))
+
+    @property
+    def imbalance(self):
+        """Tỉ lệ vùng lớn nhất so với kích thước trung bình (1.0 = cân bằng tuyệt đối)."""
+        n = len(self.assignment)
+        return float(self.sizes.max() * self.parts / n) if n else 1.0
+
+    def part_of(self, node):
+        return int(self.assignment[self.rep.index[node]])
+
+    def shard_nodes(self, p):
+        """Tên các nút của vùng p."""
+        nodes = self.rep.nodes
+        return [nodes[i] for i in self.shards()[p].nodes.tolist()]
+
+    def _entries_by_shard(self):
+        """Các ô CSR (src, dst) gom theo vùng của src; trong mỗi vùng vẫn tăng dần theo src."""
+        rep = self.rep
+        src = np.repeat(np.arange(rep.num_nodes, dtype=np.int64), rep.degrees)
+        order = np.argsort(self.assignment[src], kind='stable')
+        bounds = np.zeros(self.parts + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.assignment[src], minlength=self.parts), out=bounds[1:])
+        return src[order], rep.indices[order], bounds
+
+    def shards(self):
+        if self._shards is None:
+            self._build()
+        return self._shards
+
+    def payloads(self):
+        """
+        CSR cục bộ của từng vùng cho tiến trình worker: (glob, indptr, indices, n_owned).
+        Chỉ số cục bộ 0..n_owned-1 là nút của vùng, từ n_owned trở đi là nút halo;
+        glob[i] là chỉ số toàn cục. Chỉ có hàng cho nút của vùng.
+        """
+        if self._payloads is None:
+            self._build()
+        return self._payloads
+
+    def shared(self):
+        """Payload của mọi vùng trong một segment bộ nhớ chia sẻ (công bố một lần, worker gắn vào)."""
+        if self._shared is None:
+            arrays = {}
+            for p, (glob, indptr, indices, _) in enumerate(self.payloads()):
+                arrays[f'glob{p}'], arrays[f'indptr{p}'], arrays[f'indices{p}'] = glob, indptr, indices
+            self._shared = SharedGraph(arrays, meta={'n_owned': [pl[3] for pl in self.payloads()]})
+        return self._shared
+
+    def release_shared(self):
+        """
+        Bỏ segment của `shared()` khi phân tích xong. Partition nằm trong cache kết quả lâu hơn
+        một phân tích (và lâu hơn cả version của đồ thị) nên không giữ segment giữa các lần gọi.
+        """
+        self._shared = None  # Phân tích khác đang chạy vẫn giữ tham chiếu riêng; segment bị xoá khi hết tham chiếu
+
+    def _build(self):
+        assign = self.assignment
+        src, dst, bounds = self._entries_by_shard()
+        order = np.argsort(assign, kind='stable')
+        starts = np.zeros(self.parts + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=self.parts), out=starts[1:])
+        local = np.empty(len(assign), dtype=np.int64)
+        local[order] = np.arange(len(assign), dtype=np.int64) - starts[assign[order]]
+
+        shards, payloads = [], []
+        for p in range(self.parts):
+            nodes = order[starts[p]:starts[p + 1]]
+            s, d = src[bounds[p]:bounds[p + 1]], dst[bounds[p]:bounds[p + 1]]
+            cross = assign[d] != p
+            halo = np.unique(d[cross])
+            boundary = np.unique(s[cross])
+            n_owned = len(nodes)
+            local_dst = np.where(cross, n_owned + np.searchsorted(halo, d), local[d])
+            indptr = np.zeros(n_owned + 1, dtype=np.int64)
+            np.cumsum(np.bincount(local[s], minlength=n_owned), out=indptr[1:])
+            shards.append(Shard(p, nodes, boundary, halo, int(np.count_nonzero(cross))))
+            payloads.append((np.concatenate([nodes, halo]), indptr, local_dst, n_owned))
+        self._shards, self._payloads = shards, payloads
+
+
+# --- Các bước của phân hoạch đa mức (trên danh sách cạnh hai chiều src/dst/w) ---
+def _contract(mapping, src, dst, w, vw):
+    """Gộp các nút cùng đại diện; trọng số cạnh song song được cộng dồn, khuyên bị bỏ."""
+    _, cmap = np.unique(mapping, return_inverse=True)
+    nc = int(cmap.max()) + 1 if len(cmap) else 0
+    cvw = np.bincount(cmap, weights=vw, minlength=nc)
+    cs, cd = cmap[src], cmap[dst]
+    keep = cs != cd
+    keys, inverse = np.unique(cs[keep] * nc + cd[keep], return_inverse=True)
+    cw = np.bincount(inverse, weights=w[keep], minlength=len(keys))
+    return cmap, keys // nc if nc else keys, keys % nc if nc else keys, cw, cvw
+
+
+def _attach_endpoints(n, src, dst, is_endpoint):
+    """Bước gộp đầu tiên: mỗi thiết bị đầu cuối gộp vào thiết bị hạ tầng đầu tiên nó nối tới."""
+    mapping = np.arange(n, dtype=np.int64)
+    mask = is_endpoint[src] & ~is_endpoint[dst]
+    s, d = src[mask], dst[mask]
+    first_s, first = np.unique(s, return_index=True)
+    mapping[first_s] = d[first]
+    return mapping
+
+
+def _heavy_edge_matching(n, src, dst, w, vw, max_vw, rng, rounds=3):
+    """
+    Ghép cặp theo cạnh nặng nhất kiểu "bắt tay": mỗi nút tự do chọn hàng xóm tự do có cạnh
+    nặng nhất (hoà thì ngẫu nhiên), cặp nào chọn nhau thì được ghép. Lặp vài vòng.
+    """
+    match = np.full(n, -1, dtype=np.int64)
+    for _ in range(rounds):
+        free = match < 0
+        mask = free[src] & free[dst] & (vw[src] + vw[dst] <= max_vw)
+        if not mask.any():
+            break
+        s, d, ww = src[mask], dst[mask], w[mask]
+        order = np.lexsort((rng.random(len(s)), -ww, s))
+        s, d = s[order], d[order]
+        first_s, first = np.unique(s, return_index=True)
+        pick = np.full(n, -1, dtype=np.int64)
+        pick[first_s] = d[first]
+        mutual = first_s[pick[pick[first_s]] == first_s]
+        if not len(mutual):
+            break
+        match[mutual] = pick[mutual]
+    unmatched = match < 0
+    match[unmatched] = np.flatnonzero(unmatched)
+    return np.minimum(np.arange(n, dtype=np.int64), match)
+
+
+def _to_csr(n, src, dst, w):
+    order = np.lexsort((dst, src))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[order], w[order]
+
+
+def _grow_initial(n, indptr, indices, vw, parts):
+    """Phân hoạch ban đầu trên đồ thị thô nhất: nuôi lớn từng vùng bằng BFS tới khi đủ trọng số."""
+    part = [-1] * n
+    indptr, indices, vw = indptr.tolist(), indices.tolist(), vw.tolist()
+    remaining = sum(vw)
+    unassigned = deque(range(n))
+    for p in range(parts - 1):
+        target = remaining / (parts - p)
+        weight = 0.0
+        while weight < target:
+            while unassigned and part[unassigned[0]] >= 0:
+                unassigned.popleft()
+            if not unassigned:
+                break
+            # Hạt giống: nút xa nhất (theo BFS) trong phần chưa gán chứa nút chưa gán đầu tiên
+            seed = unassigned[0]
+            seen, queue = {seed}, deque([seed])
+            while queue:
+                seed = queue.popleft()
+                for q in range(indptr[seed], indptr[seed + 1]):
+                    v = indices[q]
+                    if part[v] < 0 and v not in seen:
+                        seen.add(v)
+                        queue.append(v)
+            queue = deque([seed])
+            part[seed] = p
+            weight += vw[seed]
+            while queue and weight < target:
+                u = queue.popleft()
+                for q in range(indptr[u], indptr[u + 1]):
+                    v = indices[q]
+                    if part[v] < 0 and weight < target:
+                        part[v] = p
+                        weight += vw[v]
+                        queue.append(v)
+        remaining -= weight
+    return np.array([parts - 1 if x < 0 else x for x in part], dtype=np.int64)
+
+
+def _refine(indptr, indices, w, vw, part, parts, max_w, passes):
+    """
+    Tinh chỉnh biên kiểu Fiduccia-Mattheyses tham lam: chuyển nút biên sang vùng kề làm giảm
+    tổng trọng số cạnh cắt mà không vượt trần cân bằng; vùng đang quá tải được phép nhả nút.
+    """
+    n = len(vw)
+    src = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+    pw = np.bincount(part, weights=vw, minlength=parts).tolist()
+    ip, ix, ww, vwl = indptr.tolist(), indices.tolist(), w.tolist(), vw.tolist()
+    part_l = part.tolist()
+    for _ in range(passes):
+        boundary = np.unique(src[part[src] != part[indices]]).tolist()
+        moved = 0
+        for v in boundary:
+            pv = part_l[v]
+            conn = {}
+            for q in range(ip[v], ip[v + 1]):
+                pq = part_l[ix[q]]
+                conn[pq] = conn.get(pq, 0.0) + ww[q]
+            internal = conn.pop(pv, 0.0)
+            overloaded = pw[pv] > max_w
+            best, best_gain = pv, None
+            for q, c in conn.items():
+                gain = c - internal
+                if pw[q] + vwl[v] > max_w:
+                    continue
+                if gain > 0 or overloaded or (gain == 0 and pw[q] + vwl[v] < pw[pv]):
+                    if best_gain is None or gain > best_gain or (gain == best_gain and pw[q] < pw[best]):
+                        best, best_gain = q, gain
+            if best != pv:
+                part_l[v] = best
+                pw[pv] -= vwl[v]
+                pw[best] += vwl[v]
+                moved += 1
+        part = np.array(part_l, dtype=np.int64)
+        if not moved:
+            break
+    return part
+
+
+class GraphPartitioner:
+    """
+    Phân hoạch đồ thị thành k vùng (shard) cân bằng, tối thiểu số cạnh cắt (kiểu METIS):
+
+    1. Gộp thô (coarsening): bước đầu gộp mọi PC/Server vào Router/Switch nó nối tới để
+       không bao giờ tách thiết bị đầu cuối khỏi thiết bị truy cập (tôn trọng phân cấp);
+       các bước sau ghép cặp theo cạnh nặng nhất, trọng số cạnh = số liên kết gốc bị gộp.
+    2. Phân hoạch ban đầu trên đồ thị thô nhất bằng nuôi vùng BFS.
+    3. Chiếu ngược từng mức và tinh chỉnh biên (FM tham lam) dưới trần cân bằng.
+
+    Mọi bước gộp/chiếu là phép toán NumPy trên danh sách cạnh; vòng lặp Python chỉ chạy
+    trên đồ thị thô nhất và trên các nút biên.
+    """
+
+    IMBALANCE = 0.05        # Vùng lớn nhất <= (1 + IMBALANCE) x trung bình (khi trọng số nút cho phép)
+    COARSEST_PER_PART = 40  # Dừng gộp khi đồ thị thô còn <= số này x k nút
+    MIN_SHRINK = 0.9        # Dừng gộp nếu một mức không giảm được ít nhất 10% số nút
+    REFINE_PASSES = 4
+
+    @staticmethod
+    @traced("partitioning.partition")
+    @cached_result("partitioning.partition")
+    def partition(G, parts=None, imbalance=IMBALANCE, seed=0):
+        """
+        Chia đồ thị thành `parts` vùng (None = số CPU).
+
+        Returns:
+            Partition: phân hoạch kèm shard (boundary/halo) và payload CSR cục bộ.
+        """
+        rep = SparseRepresentation.from_graph(G)
+        n = rep.num_nodes
+        parts = max(1, min(parts or os.cpu_count() or 1, n or 1))
+        if parts == 1 or n == 0:
+            return Partition(rep, np.zeros(n, dtype=np.int64), parts)
+
+        is_endpoint = np.zeros(n, dtype=bool)
+        for t, members in node_type_groups(G).items():
+            if t in ENDPOINT_TYPES:
+                is_endpoint[[rep.index[v] for v in members]] = True
+
+        src = np.concatenate([rep.edge_src, rep.edge_dst])
+        dst = np.concatenate([rep.edge_dst, rep.edge_src])
+        keep = src != dst
+        src, dst = src[keep], dst[keep]
+        w = np.ones(len(src))
+        vw = np.ones(n)
+        rng = np.random.default_rng(seed)
+        max_w = (1 + imbalance) * n / parts
+
+        # 1. Gộp thô, lưu ánh xạ và đồ thị của từng mức
+        levels = []
+        mapping = _attach_endpoints(n, src, dst, is_endpoint)
+        while True:
+            cur_n = len(vw)
+            cmap, c_src, c_dst, c_w, c_vw = _contract(mapping, src, dst, w, vw)
+            if len(c_vw) > GraphPartitioner.MIN_SHRINK * cur_n and levels:
+                break
+            levels.append((cmap, src, dst, w, vw))
+            src, dst, w, vw = c_src, c_dst, c_w, c_vw
+            if len(vw) <= GraphPartitioner.COARSEST_PER_PART * parts:
+                break
+            mapping = _heavy_edge_matching(len(vw), src, dst, w, vw, max_w / 2, rng)
+
+        # 2. Phân hoạch ban đầu + tinh chỉnh trên đồ thị thô nhất
+        indptr, indices, cw = _to_csr(len(vw), src, dst, w)
+        part = _grow_initial(len(vw), indptr, indices, vw, parts)
+        part = _refine(indptr, indices, cw, vw, part, parts, max_w, GraphPartitioner.REFINE_PASSES)
+
+        # 3. Chiếu ngược và tinh chỉnh ở từng mức mịn hơn; mức gốc chỉ chiếu (giữ PC/Server cùng vùng
+        #    với thiết bị truy cập)
+        for depth, (cmap, src, dst, w, vw) in reversed(list(enumerate(levels))):
+            part = part[cmap]
+            if depth == 0:
+                break
+            indptr, indices, cw = _to_csr(len(vw), src, dst, w)
+            part = _refine(indptr, indices, cw, vw, part, parts, max_w, GraphPartitioner.REFINE_PASSES)
+
+        result = Partition(rep, part, parts)
+        tracer.count("partitioning.levels", len(levels))
+        logging.info(f"Partition: {parts} parts, {len(levels)} levels, edge cut {result.edge_cut}, "
+                     f"imbalance {result.imbalance:.3f}")
+        return result
+
+
+# --- Tác vụ chạy trong tiến trình worker (chỉ nhận payload CSR cục bộ của một vùng) ---
+def _on_shard(func, handle, p, *args):
+    """Gắn vào segment của phân hoạch, dựng payload vùng p (view chỉ đọc) rồi gọi func."""
+    arrays = SharedGraph.attach(handle)
+    payload = (arrays[f'glob{p}'], arrays[f'indptr{p}'], arrays[f'indices{p}'], handle.meta['n_owned'][p])
+    return func(payload, *args)
+
+
+def _shard_components(payload):
+    """Thành phần liên thông bên trong vùng (chỉ cạnh nội vùng). Trả về (nhãn cục bộ, số thành phần)."""
+    _, indptr, indices, n_owned = payload
+    indptr, indices = indptr.tolist(), indices.tolist()
+    label = [-1] * n_owned
+    count = 0
+    for r in range(n_owned):
+        if label[r] >= 0:
+            continue
+        label[r] = count
+        stack = [r]
+        while stack:
+            u = stack.pop()
+            for q in range(indptr[u], indptr[u + 1]):
+                v = indices[q]
+                if v < n_owned and label[v] < 0:
+                    label[v] = count
+                    stack.append(v)
+        count += 1
+    return np.array(label, dtype=np.int64), count
+
+
+def _shard_bfs(payload, dist, seeds):
+    """
+    Một siêu bước BFS trong vùng: lan từ các hạt giống (chỉ số cục bộ, khoảng cách) qua cạnh
+    nội vùng. Khoảng cách chỉ được ghi khi nhỏ hơn giá trị cũ (-1 = chưa tới).
+
+    Returns:
+        tuple: (chỉ số cục bộ bị đổi, khoảng cách mới, chỉ số toàn cục halo, khoảng cách đề xuất)
+    """
+    glob, indptr, indices, n_owned = payload
+    indptr, indices = indptr.tolist(), indices.tolist()
+    dist = dist.tolist()
+    heap = []
+    changed = set()
+    for v, d in seeds:
+        if dist[v] < 0 or d < dist[v]:
+            dist[v] = d
+            changed.add(v)
+            heap.append((d, v))
+    heapq.heapify(heap)
+    messages = {}
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        nd = d + 1
+        for q in range(indptr[u], indptr[u + 1]):
+            v = indices[q]
+            if v >= n_owned:
+                if messages.get(v, nd + 1) > nd:
+                    messages[v] = nd
+            elif dist[v] < 0 or nd < dist[v]:
+                dist[v] = nd
+                changed.add(v)
+                heapq.heappush(heap, (nd, v))
+    changed = np.fromiter(changed, dtype=np.int64, count=len(changed))
+    halo = np.fromiter(messages.keys(), dtype=np.int64, count=len(messages))
+    return (changed, np.array(dist, dtype=np.int64)[changed],
+            glob[halo], np.fromiter(messages.values(), dtype=np.int64, count=len(messages)))
+
+
+def _local_bridges(indptr, indices, n_owned):
+    """Số cầu của đồ thị con nội vùng (Tarjan lặp, không đệ quy)."""
+    disc, low = [-1] * n_owned, [0] * n_owned
+    timer, count = 0, 0
+    for r in range(n_owned):
+        if disc[r] >= 0:
+            continue
+        disc[r] = low[r] = timer
+        timer += 1
+        stack = [(r, -1, indptr[r])]
+        while stack:
+            u, parent, q = stack[-1]
+            if q < indptr[u + 1]:
+                stack[-1] = (u, parent, q + 1)
+                v = indices[q]
+                if v >= n_owned:
+                    continue
+                if disc[v] < 0:
+                    disc[v] = low[v] = timer
+                    timer += 1
+                    stack.append((v, u, indptr[v]))
+                elif v != parent:
+                    low[u] = min(low[u], disc[v])
+            else:
+                stack.pop()
+                if stack:
+                    pu = stack[-1][0]
+                    low[pu] = min(low[pu], low[u])
+                    if low[u] > disc[pu]:
+                        count += 1
+    return count
+
+
+def _shard_audit(payload):
+    """Chỉ số kiểm toán của một vùng: cạnh nội vùng, số thành phần, số cầu nội vùng."""
+    _, indptr, indices, n_owned = payload
+    internal = int(np.count_nonzero(indices < n_owned)) // 2
+    _, components = _shard_components(payload)
+    bridges = _local_bridges(indptr.tolist(), indices.tolist(), n_owned)
+    return {'internal_edges': internal, 'components': components, 'bridges': bridges}
+
+
+class ShardedAnalysis:
+    """
+    Các phân tích duyệt đồ thị chạy theo vùng trên nhiều tiến trình rồi ghép ở biên.
+    Mỗi worker chỉ đọc CSR cục bộ của vùng nó xử lý (nút của vùng + halo) từ bộ nhớ chia
+    sẻ của phân hoạch; phần ghép chỉ đụng tới cạnh cắt nên chi phí tuần tự tỉ lệ với
+    edge cut, không với m.
+    """
+
+    # Ngưỡng dưới, không phải điểm hoà vốn đã đo: trên 1 CPU (benchmark traversal.simulate_spread
+    # so với traversal.simulate_spread_sharded / partitioning.partition) BFS theo vùng chậm hơn BFS
+    # tuần tự ở mọi cỡ đã đo, kể cả khi phân hoạch có sẵn; chưa đo trên máy nhiều CPU.
+    SHARDED_MIN_NODES = 200_000
+
+    @staticmethod
+    def shard_parts(G, workers=None):
+        """
+        Số vùng để chạy BFS/liên thông theo vùng, 0 = chạy tuần tự.
+
+        Chỉ chạy theo vùng khi phân hoạch của đúng version hiện tại đã có trong cache (VD vừa
+        kiểm toán theo vùng): tự phân hoạch tốn hơn nhiều lần chính phép duyệt nó thay thế và
+        bị tính lại mỗi khi version đổi (mỗi nhịp telemetry).
+        """
+        workers = workers or os.cpu_count() or 1
+        version = getattr(G, 'version', None)
+        if workers <= 1 or version is None or G.number_of_nodes() < ShardedAnalysis.SHARDED_MIN_NODES:
+            return 0
+        cached = result_cache.cached_args(G.graph_id, version, "partitioning.partition")
+        return max((args[0] for args in cached if len(args) == 1 and args[0]), default=0)
+
+    @staticmethod
+    def _partition(G, parts):
+        # Luôn gọi với số vùng cụ thể để khoá cache khớp với shard_parts
+        return GraphPartitioner.partition(G, parts or os.cpu_count() or 1)
+
+    @staticmethod
+    def _map(func, partition, tasks, workers, keep=False):
+        """
+        Chạy func(payload vùng p, *args) cho mỗi (p, args) trong `tasks`. Song song thì worker
+        chỉ nhận handle bộ nhớ chia sẻ + chỉ số vùng, không nhận mảng. Segment được bỏ ngay khi
+        xong, trừ khi `keep` (người gọi còn chạy tiếp và tự gọi partition.release_shared()).
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(tasks) <= 1:
+            payloads = partition.payloads()
+            return [func(payloads[p], *args) for p, args in tasks]
+        try:
+            shared = partition.shared()  # Giữ segment sống tới khi mọi tác vụ xong
+            pool = worker_pool(workers)
+            futures = [pool.submit(_on_shard, func, shared.handle, p, *args) for p, args in tasks]
+            return [future.result() for future in futures]
+        finally:
+            if not keep:
+                partition.release_shared()
+
+    @staticmethod
+    @traced("partitioning.connected_components")
+    def connected_components(G, parts=None, workers=None):
+        """
+        Thành phần liên thông: mỗi vùng gán nhãn cục bộ song song, sau đó hợp nhất nhãn
+        (union-find) dọc các cạnh cắt.
+
+        Returns:
+            list[set]: các thành phần, lớn trước.
+        """
+        partition = ShardedAnalysis._partition(G, parts)
+        results = ShardedAnalysis._map(_shard_components, partition, [(p, ()) for p in range(partition.parts)], workers)
+
+        label = np.empty(partition.rep.num_nodes, dtype=np.int64)
+        offset = 0
+        for shard, (local, count) in zip(partition.shards(), results):
+            label[shard.nodes] = local + offset
+            offset += count
+
+        parent = list(range(offset))
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        rep, assign = partition.rep, partition.assignment
+        cut = assign[rep.edge_src] != assign[rep.edge_dst]
+        for a, b in zip(label[rep.edge_src[cut]].tolist(), label[rep.edge_dst[cut]].tolist()):
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[max(ra, rb)] = min(ra, rb)
+
+        groups = {}
+        nodes = rep.nodes
+        for i, lab in enumerate(label.tolist()):
+            groups.setdefault(find(lab), set()).add(nodes[i])
+        return sorted(groups.values(), key=len, reverse=True)
+
+    @staticmethod
+    @traced("partitioning.bfs_layers")
+    def bfs_layers(G, source, parts=None, workers=None):
+        """
+        BFS theo lớp từ `source` kiểu đồng bộ khối (BSP): mỗi siêu bước các vùng có hạt giống
+        lan song song trong nội vùng, khoảng cách tới nút halo được gửi cho vùng sở hữu
+        ở siêu bước sau. Sửa nhãn (label-correcting) nên kết quả đúng bằng BFS tuần tự.
+
+        Returns:
+            list: các lớp node cùng dạng VirusSimulator.simulate_spread.
+        """
+        if source not in G:
+            return []
+        partition = ShardedAnalysis._partition(G, parts)
+        rep, assign = partition.rep, partition.assignment
+        shards = partition.shards()
+        dist = np.full(rep.num_nodes, -1, dtype=np.int64)
+
+        s = rep.index[source]
+        local_of = {}
+        seeds = {int(assign[s]): [(int(np.searchsorted(shards[assign[s]].nodes, s)), 0)]}
+        supersteps = 0
+        try:
+            while seeds:
+                supersteps += 1
+                active = sorted(seeds)
+                results = ShardedAnalysis._map(
+                    _shard_bfs, partition, [(p, (dist[shards[p].nodes], seeds[p])) for p in active], workers,
+                    keep=True)
+                best = {}
+                for p, (changed, values, halo, proposed) in zip(active, results):
+                    dist[shards[p].nodes[changed]] = values
+                    for g, d in zip(halo.tolist(), proposed.tolist()):
+                        if best.get(g, d + 1) > d:
+                            best[g] = d
+                seeds = {}
+                for g, d in best.items():
+                    if dist[g] < 0 or d < dist[g]:
+                        p = int(assign[g])
+                        if g not in local_of:
+                            local_of[g] = int(np.searchsorted(shards[p].nodes, g))
+                        seeds.setdefault(p, []).append((local_of[g], d))
+        finally:
+            partition.release_shared()
+
+        tracer.count("partitioning.bfs_supersteps", supersteps)
+        reached = np.flatnonzero(dist >= 0)
+        order = reached[np.argsort(dist[reached], kind='stable')]
+        bounds = np.searchsorted(dist[order], np.arange(int(dist.max()) + 2))
+        nodes = rep.nodes
+        return [[nodes[i] for i in order[bounds[k]:bounds[k + 1]].tolist()] for k in range(len(bounds) - 1)]
+
+    @staticmethod
+    @traced("partitioning.region_audit")
+    def region_audit(G, parts=None, workers=None):
+        """
+        Kiểm toán theo vùng: mỗi vùng tự đếm cạnh nội vùng, phân mảnh và cầu nội vùng song song;
+        số cạnh cắt, nút biên/halo và thành phần loại thiết bị lấy từ phân hoạch.
+
+        Returns:
+            list[dict]: mỗi vùng {'region', 'nodes', 'internal_edges', 'cut_edges', 'boundary',
+                        'halo', 'components', 'bridges', 'types': {loại: số lượng}}
+        """
+        partition = ShardedAnalysis._partition(G, parts)
+        results = ShardedAnalysis._map(_shard_audit, partition, [(p, ()) for p in range(partition.parts)], workers)
+        rep = partition.rep
+        codes = np.full(rep.num_nodes, -1, dtype=np.int64)
+        type_names = []
+        for t, members in node_type_groups(G).items():
+            codes[[rep.index[v] for v in members]] = len(type_names)
+            type_names.append(t or 'Unknown')
+
+        regions = []
+        for shard, stats in zip(partition.shards(), results):
+            counts = np.bincount(codes[shard.nodes], minlength=len(type_names)) if len(type_names) else []
+            regions.append(dict(stats, region=shard.index, nodes=len(shard.nodes), cut_edges=shard.cut_edges,
+                                boundary=len(shard.boundary), halo=len(shard.halo),
+                                types={type_names[i]: int(c) for i, c in enumerate(counts) if c}))
+        return regions
@@ -0,0 +1,151 @@
+import numpy as np
+import logging
+from utils.result_cache import cached_result
+
+
+class SparseRepresentation:
+    """
+    Biểu diễn thưa của đồ thị vô hướng bằng mảng NumPy (không bao giờ tạo ma trận n x n).
+
+    - Nút được ánh xạ sang chỉ số 0..n-1 (`nodes[i]`, `index[node]`).
+    - Mỗi cạnh có một mã cạnh 0..m-1, lưu dạng chuẩn (edge_src[e], edge_dst[e]).
+    - Ma trận kề dạng CSR: hàng xóm của nút i là indices[indptr[i]:indptr[i+1]],
+      `edge_ids` cho biết mã cạnh của từng ô (dùng để đánh dấu/xoá cạnh O(1)).
+    - Ma trận liên thuộc (incidence) dạng COO: mỗi cạnh có 2 phần tử (u, e), (v, e).
+
+    Bộ nhớ: O(n + m) thay vì O(n²) của ma trận kề đặc.
+    """
+
+    def __init__(self, nodes, edge_src, edge_dst, edge_weight):
+        self.nodes = list(nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.edge_src = np.asarray(edge_src, dtype=np.int64)
+        self.edge_dst = np.asarray(edge_dst, dtype=np.int64)
+        self.edge_weight = np.asarray(edge_weight, dtype=np.float64)
+        self._build_csr()
+
+    def _build_csr(self):
+        n, m = len(self.nodes), len(self.edge_src)
+        # Mỗi cạnh vô hướng xuất hiện ở cả 2 hàng (u->v và v->u)
+        src = np.concatenate([self.edge_src, self.edge_dst])
+        dst = np.concatenate([self.edge_dst, self.edge_src])
+        eid = np.concatenate([np.arange(m, dtype=np.int64)] * 2)
+        order = np.lexsort((dst, src))  # Sắp theo hàng, trong hàng theo cột
+        self.indices = dst[order]
+        self.edge_ids = eid[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self.indptr[1:])
+
+    @classmethod
+    @cached_result("representations.from_graph")
+    def from_graph(cls, G, weight='weight'):
+        """
+        Xây dựng biểu diễn thưa từ nx.Graph. Nút được sắp theo tên (giống cách hiển thị cũ);
+        nếu tên nút không so sánh được với nhau thì giữ thứ tự chèn.
+        """
+        try:
+            nodes = sorted(G.nodes())
+        except TypeError:
+            nodes = list(G.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+        m = G.number_of_edges()
+
+        edge_src = np.empty(m, dtype=np.int64)
+        edge_dst = np.empty(m, dtype=np.int64)
+        edge_weight = np.empty(m, dtype=np.float64)
+        for e, (u, v, w) in enumerate(G.edges(data=weight, default=1)):
+            i, j = index[u], index[v]
+            if i > j:
+                i, j = j, i
+            edge_src[e] = i
+            edge_dst[e] = j
+            edge_weight[e] = w
+        return cls(nodes, edge_src, edge_dst, edge_weight)
+
+    # --- Thuộc tính cơ bản ---
+    @property
+    def num_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def num_edges(self):
+        return len(self.edge_src)
+
+    @property
+    def degrees(self):
+        """Mảng bậc của từng nút (khuyên/self-loop tính 2, giống NetworkX)."""
+        return np.diff(self.indptr)
+
+    def neighbors(self, i):
+        """Chỉ số các hàng xóm của nút có chỉ số i."""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    # --- Các dạng ma trận thưa ---
+    def adjacency_csr(self, weighted=False):
+        """Trả về (indptr, indices, data) của ma trận kề."""
+        data = self.edge_weight[self.edge_ids] if weighted else np.ones(len(self.indices), dtype=np.int8)
+        return self.indptr, self.indices, data
+
+    def adjacency_coo(self, weighted=False):
+        """Trả về (rows, cols, data) của ma trận kề (đủ 2 chiều của mỗi cạnh)."""
+        rows = np.repeat(np.arange(self.num_nodes, dtype=np.int64), self.degrees)
+        _, cols, data = self.adjacency_csr(weighted)
+        return rows, cols, data
+
+    def incidence_coo(self):
+        """
+        Trả về (rows, cols, data) của ma trận liên thuộc n x m (không dấu).
+        Khuyên (u == v) được ghi một phần tử giá trị 2.
+        """
+        m = self.num_edges
+        loops = self.edge_src == self.edge_dst
+        rows = np.concatenate([self.edge_src, self.edge_dst[~loops]])
+        cols = np.concatenate([np.arange(m, dtype=np.int64), np.flatnonzero(~loops)])
+        data = np.concatenate([np.where(loops, 2, 1), np.ones(int((~loops).sum()), dtype=np.int64)]).astype(np.int8)
+        return rows, cols, data
+
+    def to_scipy(self, kind='adjacency', weighted=False):
+        """Chuyển sang scipy.sparse (chỉ khi đã cài SciPy - không bắt buộc)."""
+        try:
+            import scipy.sparse as sp
+        except ImportError:
+            raise ImportError("Cần cài đặt SciPy để chuyển sang scipy.sparse (pip install scipy).")
+        n, m = self.num_nodes, self.num_edges
+        if kind == 'adjacency':
+            indptr, indices, data = self.adjacency_csr(weighted)
+            return sp.csr_matrix((data, indices, indptr), shape=(n, n))
+        if kind == 'incidence':
+            rows, cols, data = self.incidence_coo()
+            return sp.coo_matrix((data, (rows, cols)), shape=(n, m))
+        raise ValueError(f"Loại biểu diễn không hỗ trợ: {kind}")
+
+    def memory_bytes(self):
+        """Tổng bộ nhớ các mảng số (không tính danh sách tên nút)."""
+        arrays = (self.indptr, self.indices, self.edge_ids, self.edge_src, self.edge_dst, self.edge_weight)
+        return sum(a.nbytes for a in arrays)
+
+    # --- Lưu trữ nhị phân ---
+    def save_npz(self, filepath):
+        """
+        Ghi ra file .npz (nén) để xử lý số học bên ngoài (NumPy/SciPy).
+        Trả về (ok, msg) giống các hàm I/O khác.
+        """
+        try:
+            np.savez_compressed(
+                filepath,
+                nodes=np.array([str(n) for n in self.nodes]),
+                indptr=self.indptr, indices=self.indices, edge_ids=self.edge_ids,
+                edge_src=self.edge_src, edge_dst=self.edge_dst,
+                edge_weight=self.edge_weight, degrees=self.degrees,
+            )
+            logging.info(f"Sparse representation saved to {filepath}")
+            return True, "Success"
+        except Exception as e:
+            logging.error(f"NPZ Save Error: {str(e)}")
+            return False, str(e)
+
+    @classmethod
+    def load_npz(cls, filepath):
+        """Đọc lại file .npz do save_npz tạo (tên nút ở dạng chuỗi)."""
+        with np.load(filepath) as data:
+            return cls(data['nodes'].tolist(), data['edge_src'], data['edge_dst'], data['edge_weight'])
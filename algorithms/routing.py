@@ -1,5 +1,10 @@
 import networkx as nx
+import heapq
 import logging
+import numpy as np
+from itertools import count
+from utils.instrumentation import traced, tracer
+from utils.result_cache import cached_result
 
 class RoutingManager:
     """
@@ -8,6 +13,8 @@ class RoutingManager:
     """
     
     @staticmethod
+    @traced("routing.find_shortest_path")
+    @cached_result("routing.find_shortest_path")
     def find_shortest_path(G, source_id, target_id):
         """
         Tìm đường đi ngắn nhất giữa 2 node.
@@ -33,6 +40,7 @@ class RoutingManager:
             # Tính tổng độ trễ (Cost)
             total_latency = nx.path_weight(G, path, weight='weight')
             
+            tracer.count("routing.path_hops", len(path) - 1)
             logging.info(f"Route found: {path} (Latency: {total_latency}ms)")
             return path, total_latency
 
@@ -41,4 +49,236 @@ class RoutingManager:
             return None, 0
         except Exception as e:
             logging.error(f"Lỗi Routing: {str(e)}")
-            return None, 0
\ No newline at end of file
+            return None, 0
+
+    @staticmethod
+    def find_shortest_path_indexed(G, source_id, target_id, index=None):
+        """
+        Giống find_shortest_path nhưng dùng chỉ mục ALT (LandmarkIndex) nếu có và còn khớp
+        với G: A* hai chiều chỉ chốt một phần nhỏ đồ thị thay vì gần như toàn bộ.
+        Không có chỉ mục hợp lệ -> quay về Dijkstra thường.
+
+        Returns:
+            tuple: (path, latency) giống find_shortest_path.
+        """
+        if index is None or not index.is_valid_for(G):
+            return RoutingManager.find_shortest_path(G, source_id, target_id)
+        path, cost, settled = index.query(source_id, target_id)
+        if path is None:
+            logging.warning(f"Không có đường đi từ {source_id} đến {target_id}.")
+            return None, 0
+        tracer.count("routing.path_hops", len(path) - 1)
+        logging.info(f"Route found (ALT, {settled} settled): {path} (Latency: {cost}ms)")
+        return path, cost
+
+    # ===========================
+    # ĐƯỜNG DỰ PHÒNG (K-SHORTEST) & ECMP
+    # ===========================
+
+    @staticmethod
+    def iter_k_shortest_paths(G, source_id, target_id, weight='weight'):
+        """
+        Generator LƯỜI các đường đi không lặp (loop-free) theo thứ tự chi phí tăng dần
+        (thuật toán Yen qua nx.shortest_simple_paths).
+
+        Các đường đã tính được dùng chung qua cache theo version đồ thị: hỏi 3 đường đầu
+        chỉ tốn chi phí của 3 đường; lần sau hỏi 5 đường chỉ tính thêm 2 đường mới.
+
+        Yields:
+            tuple: (path, cost)
+        """
+        if not G.has_node(source_id) or not G.has_node(target_id):
+            return
+        enum = RoutingManager._k_shortest_enumerator(G, source_id, target_id, weight)
+        i = 0
+        while True:
+            item = enum.get(i)
+            if item is None:
+                return
+            yield item
+            i += 1
+
+    @staticmethod
+    @cached_result("routing.k_shortest_enumerator")
+    def _k_shortest_enumerator(G, source_id, target_id, weight):
+        return _LazyPathList(G, source_id, target_id, weight)
+
+    @staticmethod
+    @traced("routing.ecmp_dag")
+    @cached_result("routing.ecmp_dag")
+    def ecmp_dag(G, source_id, target_id, weight='weight'):
+        """
+        Dựng DAG các đường đi ngắn nhất CÙNG CHI PHÍ (ECMP) từ nguồn tới đích.
+
+        Dijkstra ghi nhận mọi đỉnh cha có cùng khoảng cách và dừng ngay khi khoảng cách
+        lấy ra vượt quá khoảng cách tới đích; sau đó chỉ giữ các đỉnh nằm trên một
+        đường ngắn nhất nào đó tới đích.
+
+        Returns:
+            tuple: (preds, cost) - preds: {node: [các đỉnh cha trên đường ngắn nhất]};
+                   ({}, None) nếu không có đường.
+        """
+        if not G.has_node(source_id) or not G.has_node(target_id):
+            return {}, None
+
+        dist = {source_id: 0}
+        preds = {source_id: []}
+        settled = set()
+        tie = count()
+        heap = [(0, next(tie), source_id)]
+        target_dist = None
+        while heap:
+            d, _, u = heapq.heappop(heap)
+            if u in settled:
+                continue
+            if target_dist is not None and d > target_dist:
+                break
+            settled.add(u)
+            if u == target_id:
+                target_dist = d
+                continue
+            for v, data in G[u].items():
+                nd = d + data.get(weight, 1)
+                old = dist.get(v)
+                if old is None or nd < old:
+                    dist[v] = nd
+                    preds[v] = [u]
+                    heapq.heappush(heap, (nd, next(tie), v))
+                elif nd == old and v not in settled:
+                    preds[v].append(u)
+
+        if target_dist is None:
+            return {}, None
+
+        # Chỉ giữ các đỉnh đi được tới đích theo con trỏ cha
+        dag = {}
+        stack = [target_id]
+        while stack:
+            v = stack.pop()
+            if v in dag:
+                continue
+            dag[v] = preds[v]
+            stack.extend(preds[v])
+        tracer.count("routing.ecmp_dag_nodes", len(dag))
+        return dag, target_dist
+
+    @staticmethod
+    def count_ecmp_paths(G, source_id, target_id, weight='weight'):
+        """Đếm số đường ECMP bằng quy hoạch động trên DAG (không cần liệt kê)."""
+        dag, cost = RoutingManager.ecmp_dag(G, source_id, target_id, weight)
+        if cost is None:
+            return 0
+        # Thứ tự topo: đỉnh gần nguồn trước -> sắp theo khoảng cách là đủ, nhưng DAG không
+        # lưu khoảng cách nên dùng DFS hậu thứ tự từ đích
+        order, seen, stack = [], set(), [(target_id, iter(dag[target_id]))]
+        seen.add(target_id)
+        while stack:
+            v, it = stack[-1]
+            nxt = next(it, None)
+            if nxt is None:
+                order.append(v)
+                stack.pop()
+            elif nxt not in seen:
+                seen.add(nxt)
+                stack.append((nxt, iter(dag[nxt])))
+        ways = {}
+        for v in order:
+            ways[v] = 1 if v == source_id else sum(ways[p] for p in dag[v])
+        return ways[target_id]
+
+    @staticmethod
+    def iter_ecmp_paths(G, source_id, target_id, weight='weight'):
+        """
+        Generator LƯỜI mọi đường ECMP (cùng chi phí nhỏ nhất) từ nguồn tới đích.
+        Số đường có thể tăng theo hàm mũ nên chỉ duyệt tới đâu tính tới đó.
+
+        Yields:
+            tuple: (path, cost)
+        """
+        dag, cost = RoutingManager.ecmp_dag(G, source_id, target_id, weight)
+        if cost is None:
+            return
+        # DFS ngược từ đích theo con trỏ cha; `suffix` là phần đường từ đỉnh hiện tại tới đích
+        suffix = [target_id]
+        stack = [iter(dag[target_id])]
+        while stack:
+            if suffix[-1] == source_id:
+                yield suffix[::-1], cost
+                stack.pop()
+                suffix.pop()
+                continue
+            nxt = next(stack[-1], None)
+            if nxt is None:
+                stack.pop()
+                suffix.pop()
+            else:
+                suffix.append(nxt)
+                stack.append(iter(dag[nxt]))
+
+
+    # ===========================
+    # CÂY ĐƯỜNG ĐI NGẮN NHẤT (BẢNG CHUYỂN TIẾP)
+    # ===========================
+
+    @staticmethod
+    def shortest_path_tree_csr(indptr, indices, weights, root, transit=None):
+        """
+        Cây đường đi ngắn nhất HƯỚNG VỀ `root` trên CSR (chỉ số nút): parent[u] là hàng xóm
+        kế tiếp của u trên một đường ngắn nhất từ u tới root, tức next hop của u khi gửi gói
+        tới root. Đồ thị vô hướng nên chạy Dijkstra một lần từ root là đủ cho mọi u.
+        Khi hoà chi phí, đỉnh cha được chốt trước được giữ (kết quả tất định).
+
+        Args:
+            indptr, indices, weights: CSR; truyền list Python (tolist()) nếu gọi nhiều lần.
+            transit: mảng bool tuỳ chọn - nút False chỉ là điểm cuối, không chuyển tiếp qua
+                     (VD: PC/Server không định tuyến hộ).
+        Returns:
+            np.ndarray[int32]: parent theo chỉ số nút; -1 = không tới được, parent[root] = root.
+        """
+        n = len(indptr) - 1
+        parent = [-1] * n
+        dist = [None] * n
+        parent[root] = root
+        dist[root] = 0
+        settled = [False] * n
+        heap = [(0, root)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if settled[u]:
+                continue
+            settled[u] = True
+            if transit is not None and u != root and not transit[u]:
+                continue
+            for p in range(indptr[u], indptr[u + 1]):
+                v = indices[p]
+                if settled[v]:
+                    continue
+                nd = d + weights[p]
+                old = dist[v]
+                if old is None or nd < old:
+                    dist[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return np.array(parent, dtype=np.int32)
+
+
+class _LazyPathList:
+    """Danh sách đường đi được tính dần theo yêu cầu từ generator Yen của NetworkX."""
+
+    def __init__(self, G, source_id, target_id, weight):
+        self._G = G
+        self._weight = weight
+        self._gen = nx.shortest_simple_paths(G, source_id, target_id, weight=weight)
+        self._items = []
+
+    def get(self, i):
+        """Đường thứ i (tính từ 0) dạng (path, cost), hoặc None nếu không còn đường."""
+        while len(self._items) <= i and self._gen is not None:
+            try:
+                path = next(self._gen)
+            except (StopIteration, nx.NetworkXNoPath):
+                self._gen = None
+                break
+            self._items.append((path, nx.path_weight(self._G, path, weight=self._weight)))
+            tracer.count("routing.k_shortest_paths")
+        return self._items[i] if i < len(self._items) else None
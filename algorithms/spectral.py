@@ -0,0 +1,380 @@
+import logging
+import time
+import networkx as nx
+import numpy as np
+from algorithms.representations import SparseRepresentation
+from utils.instrumentation import traced, tracer
+from utils.result_cache import cached_result
+
+_LEAF, _SERIES = 0, 1
+
+
+def _coalesce(src, dst, cond, n):
+    """Chuẩn hoá cạnh về (nhỏ, lớn) và gộp cạnh song song (độ dẫn cộng lại)."""
+    lo, hi = np.minimum(src, dst), np.maximum(src, dst)
+    keys, inverse = np.unique(lo * n + hi, return_inverse=True)
+    return keys // n, keys % n, np.bincount(inverse, weights=cond, minlength=len(keys))
+
+
+class _SparseSymmetric:
+    """
+    Toán tử ma trận kề / Laplacian (có trọng số) trên danh sách cạnh - không tạo ma trận đặc.
+    Nhận một vector (n,) hoặc một khối (k, n) - mỗi HÀNG là một vector (liền bộ nhớ -> bincount nhanh).
+    """
+
+    def __init__(self, n, src, dst, weight):
+        self.n = n
+        self.rows = np.concatenate([src, dst])
+        self.cols = np.concatenate([dst, src])
+        self.vals = np.concatenate([weight, weight])
+        self.degree = np.bincount(self.rows, weights=self.vals, minlength=n)
+
+    def adjacency(self, x):
+        if x.ndim == 1:
+            return np.bincount(self.rows, weights=self.vals * x[self.cols], minlength=self.n)
+        return np.stack([np.bincount(self.rows, weights=self.vals * row[self.cols], minlength=self.n)
+                         for row in x])
+
+    def laplacian(self, x):
+        return self.degree * x - self.adjacency(x)
+
+
+def _scatter_add(x, index, values):
+    """x[:, index] += values cho khối (k, n), cộng dồn đúng khi index lặp lại."""
+    for row, vals in zip(x, values):
+        row += np.bincount(index, weights=vals, minlength=len(row))
+
+
+class LaplacianSolver:
+    """
+    Giải L x = b (tổng b bằng 0) trên đồ thị liên thông, trả về x = L⁺ b (trung bình 0).
+
+    - Khử Gauss theo vòng, vector hoá: mọi nút bậc 1 (lá) trong một vòng, rồi một tập độc
+      lập các nút bậc 2 (nối tiếp: hai cạnh thay bằng một cạnh độ dẫn c1·c2/(c1+c2)).
+      Phép khử là chính xác (không xấp xỉ); cây và các chuỗi/vòng dài co lại sau O(log n + độ sâu cây) vòng.
+    - Phần lõi còn lại (mọi nút bậc >= 3) giải bằng Conjugate Gradient khối, tiền điều kiện
+      Jacobi - lõi thường là phần lưới dày, điều kiện tốt.
+    - Nhiều vế phải (các hàng của một khối) giải cùng lúc; không bao giờ tạo ma trận n x n.
+    """
+
+    CG_TOL = 1e-10
+    CG_MAX_ITER = 5000
+
+    def __init__(self, n, src, dst, cond, seed=0):
+        self.n = n
+        self.rounds = []
+        alive = np.ones(n, dtype=bool)
+        priority = np.random.default_rng(seed).permutation(n)
+        src, dst, cond = _coalesce(src, dst, cond, n)
+        while alive.sum() > 1:
+            progressed = False
+            degree = np.bincount(src, minlength=n) + np.bincount(dst, minlength=n)
+            leaf = alive & (degree == 1)
+            if leaf.any():
+                # Cạnh có cả hai đầu là lá (thành phần 2 nút) chỉ khử đầu lớn hơn
+                at_dst = leaf[dst]
+                hit = leaf[src] | at_dst
+                v = np.where(at_dst, dst, src)[hit]
+                u = np.where(at_dst, src, dst)[hit]
+                self.rounds.append((_LEAF, v, u, cond[hit]))
+                alive[v] = False
+                src, dst, cond = src[~hit], dst[~hit], cond[~hit]
+                degree = np.bincount(src, minlength=n) + np.bincount(dst, minlength=n)
+                progressed = True
+
+            series = alive & (degree == 2)
+            if series.any():
+                # Tập độc lập: nút bậc 2 bị chặn nếu kề một nút bậc 2 có độ ưu tiên cao hơn
+                both = series[src] & series[dst]
+                s2, d2 = src[both], dst[both]
+                blocked = np.zeros(n, dtype=bool)
+                blocked[np.where(priority[s2] < priority[d2], s2, d2)] = True
+                pick = series & ~blocked
+                hit = pick[src] | pick[dst]
+                v = np.where(pick[src], src, dst)[hit]
+                other = np.where(pick[src], dst, src)[hit]
+                order = np.argsort(v, kind='stable')
+                v, other, c = v[order], other[order], cond[hit][order]
+                v, a, b, c1, c2 = v[0::2], other[0::2], other[1::2], c[0::2], c[1::2]
+                self.rounds.append((_SERIES, v, a, b, c1, c2))
+                alive[v] = False
+                src = np.concatenate([src[~hit], a])
+                dst = np.concatenate([dst[~hit], b])
+                cond = np.concatenate([cond[~hit], c1 * c2 / (c1 + c2)])
+                src, dst, cond = _coalesce(src, dst, cond, n)
+                progressed = True
+            if not progressed:
+                break
+
+        self.core = np.flatnonzero(alive)
+        local = np.full(n, -1, dtype=np.int64)
+        local[self.core] = np.arange(len(self.core))
+        self._core_op = _SparseSymmetric(len(self.core), local[src], local[dst], cond)
+        tracer.count("spectral.eliminated", n - len(self.core))
+
+    @property
+    def core_size(self):
+        return len(self.core)
+
+    def _core_solve(self, b):
+        """PCG khối (Jacobi) cho hệ lõi suy biến nhưng tương thích (mỗi hàng của b tổng bằng 0)."""
+        op = self._core_op
+        if op.n <= 1:
+            return np.zeros_like(b)
+        inv_diag = 1.0 / op.degree
+        x = np.zeros_like(b)
+        r = b - b.mean(axis=1, keepdims=True)
+        # Tiền điều kiện chiếu về tổng 0: không để nghiệm trôi dọc hạt nhân (vector hằng)
+        z = inv_diag * r
+        z -= z.mean(axis=1, keepdims=True)
+        p = z.copy()
+        rz = np.einsum('ij,ij->i', r, z)
+        target = LaplacianSolver.CG_TOL * np.maximum(np.linalg.norm(r, axis=1), 1e-300)
+        for _ in range(LaplacianSolver.CG_MAX_ITER):
+            if (np.linalg.norm(r, axis=1) <= target).all():
+                break
+            lp = op.laplacian(p)
+            pap = np.einsum('ij,ij->i', p, lp)
+            alpha = np.divide(rz, pap, out=np.zeros_like(rz), where=pap > 0)[:, None]
+            x += alpha * p
+            r -= alpha * lp
+            z = inv_diag * r
+            z -= z.mean(axis=1, keepdims=True)
+            rz_new = np.einsum('ij,ij->i', r, z)
+            beta = np.divide(rz_new, rz, out=np.zeros_like(rz), where=rz > 0)[:, None]
+            p = z + beta * p
+            rz = rz_new
+        return x
+
+    def solve(self, b):
+        """
+        x = L⁺ b; b là một vector (n,) hoặc một khối (k, n) gồm k vế phải theo hàng.
+        b được chiếu về tổng 0 trước khi giải.
+        """
+        single = b.ndim == 1
+        x = np.array(b, dtype=np.float64).reshape(-1, self.n)
+        x -= x.mean(axis=1, keepdims=True)
+        # Quét xuôi: dồn vế phải của nút bị khử về hàng xóm
+        for step in self.rounds:
+            if step[0] == _LEAF:
+                _, v, u, _ = step
+                _scatter_add(x, u, x[:, v])
+            else:
+                _, v, a, b_, c1, c2 = step
+                share = c1 / (c1 + c2)
+                _scatter_add(x, a, x[:, v] * share)
+                _scatter_add(x, b_, x[:, v] * (1 - share))
+        x[:, self.core] = self._core_solve(x[:, self.core])
+        # Quét ngược: thế nghiệm vào các nút đã khử (vòng sau cùng trước)
+        for step in reversed(self.rounds):
+            if step[0] == _LEAF:
+                _, v, u, c = step
+                x[:, v] = x[:, u] + x[:, v] / c
+            else:
+                _, v, a, b_, c1, c2 = step
+                x[:, v] = (c1 * x[:, a] + c2 * x[:, b_] + x[:, v]) / (c1 + c2)
+        x -= x.mean(axis=1, keepdims=True)
+        return x[0] if single else x
+
+
+def _lanczos(apply, n, steps, tol, largest, count=1, deflate=False, seed=0):
+    """
+    Lanczos với trực giao hoá lại toàn phần, dừng khi `count` cặp Ritz ở đầu cần tìm hội tụ
+    (chặn dư |beta_j · y_j| <= tol · |theta|). deflate=True: làm việc trong phần bù trực giao
+    của vector hằng (hạt nhân của Laplacian).
+
+    Returns:
+        tuple: (các giá trị Ritz theo thứ tự cần tìm, các vector Ritz (n, count), chặn dư, hội tụ?,
+                cơ sở Krylov trực chuẩn (số bước, n), vết của ma trận tam đường chéo = tr(Qᵀ A Q))
+    """
+    rng = np.random.default_rng(seed)
+    steps = min(steps, n - 1 if deflate else n)
+    basis = np.empty((steps, n))
+    q = rng.standard_normal(n)
+    if deflate:
+        q -= q.mean()
+    basis[0] = q / np.linalg.norm(q)
+    alphas, betas = [], []
+    for j in range(steps):
+        w = apply(basis[j])
+        if deflate:
+            w -= w.mean()
+        alphas.append(float(w @ basis[j]))
+        # Trực giao hoá lại toàn phần (2 lượt) giữ cơ sở trực chuẩn trong số học dấu phẩy động
+        for _ in range(2):
+            w -= basis[:j + 1].T @ (basis[:j + 1] @ w)
+        beta = float(np.linalg.norm(w))
+        breakdown = beta <= 1e-12 * max(1.0, abs(alphas[-1]))  # Không gian Krylov bất biến: Ritz là chính xác
+        last = breakdown or j + 1 == steps
+        if last or (j + 1) % 5 == 0 and j + 1 >= count:
+            tri = np.diag(alphas) + np.diag(betas, 1) + np.diag(betas, -1)
+            values, ritz = np.linalg.eigh(tri)  # Ma trận tam đường chéo cỡ số bước, không phải n x n
+            pick = np.argsort(-values if largest else values)[:count]
+            theta, vectors = values[pick], ritz[:, pick]
+            bounds = np.abs(beta * vectors[-1])
+            converged = breakdown or bool((bounds <= tol * np.maximum(np.abs(theta), 1e-300)).all())
+            if converged or last:
+                size = j + 1
+                return theta, basis[:size].T @ vectors, bounds, converged, basis[:size], float(sum(alphas))
+        betas.append(beta)
+        basis[j + 1] = w / beta
+
+
+class SpectralAnalyzer:
+    """
+    Chỉ số phổ về độ bền liên kết của mạng (trên thành phần liên thông lớn nhất):
+
+    - Liên thông đại số λ2 (trị riêng nhỏ thứ hai của Laplacian) và vector Fiedler: λ2 càng
+      nhỏ mạng càng dễ bị chia đôi; vector Fiedler chỉ ra chỗ chia (lát cắt quét Fiedler).
+    - Khoảng cách phổ λ1 - λ2 của ma trận kề: lớn = mạng "giãn nở" tốt, khó cô lập một vùng.
+    - Điện trở hiệu dụng toàn mạng R = n · tr(L⁺) = tổng điện trở giữa mọi cặp nút: nhỏ =
+      nhiều đường song song độc lập.
+
+    Mọi phép tính dùng toán tử thưa (NumPy) + Lanczos. λ2 nằm sát 0 (cây, vòng dài có λ2 ~ 1e-8)
+    nên Lanczos trực tiếp trên L hội tụ rất chậm -> dùng Lanczos nghịch đảo (trị lớn nhất của L⁺
+    là 1/λ2) với LaplacianSolver. Vết tr(L⁺) ước lượng kiểu Hutch++: phần hạng thấp lấy
+    từ chính cơ sở Krylov đó, phần còn lại bằng Hutchinson với các lần giải theo khối.
+    """
+
+    LANCZOS_STEPS = 150         # Ma trận kề (λ1, λ2); bộ nhớ cơ sở = số bước x n x 8 byte
+    SHIFT_INVERT_STEPS = 60     # L⁺ (mỗi bước một lần giải)
+    TOL = 1e-8                  # Chặn dư tương đối cho λ2 của Laplacian
+    ADJACENCY_TOL = 1e-6        # Sai số trị riêng ~ dư² / khoảng cách -> 1e-6 đủ cho λ1 - λ2
+    TRACE_SAMPLES = 20          # Số vector thử Hutchinson (mỗi vector một lần giải) cho tr(L⁺) khi đồ thị lớn
+    EXACT_TRACE_NODES = 200     # Đồ thị nhỏ hơn: tính tr(L⁺) chính xác (giải với từng vector đơn vị, theo khối)
+    EXACT_TRACE_BLOCK = 256
+    CUT_EDGES_SHOWN = 10
+
+    @staticmethod
+    def _largest_component(G, weight):
+        """(danh sách nút, nguồn, đích, trọng số) của thành phần liên thông lớn nhất theo chỉ số cục bộ."""
+        rep = SparseRepresentation.from_graph(G, weight=weight or 'weight')
+        component = max(nx.connected_components(G), key=len)
+        keep = np.zeros(rep.num_nodes, dtype=bool)
+        keep[[rep.index[v] for v in component]] = True
+        local = np.cumsum(keep) - 1
+        # Khuyên (self-loop) không góp vào Laplacian; độ dẫn không dương/không hợp lệ coi như 1
+        edges = keep[rep.edge_src] & keep[rep.edge_dst] & (rep.edge_src != rep.edge_dst)
+        weights = rep.edge_weight[edges] if weight else np.ones(int(edges.sum()))
+        weights = np.where(np.isfinite(weights) & (weights > 0), weights, 1.0)
+        nodes = [v for v, k in zip(rep.nodes, keep) if k]
+        return nodes, local[rep.edge_src[edges]], local[rep.edge_dst[edges]], weights
+
+    @staticmethod
+    def _fiedler(solver, n, seed):
+        """
+        Lanczos nghịch đảo trên L⁺: (λ2, vector Fiedler, chặn dư trên L, hội tụ?, cơ sở Krylov,
+        tr(Qᵀ L⁺ Q)) - cơ sở Krylov được dùng lại làm phần hạng thấp khi ước lượng tr(L⁺).
+        """
+        theta, vectors, bounds, ok, basis, projected = _lanczos(
+            solver.solve, n, SpectralAnalyzer.SHIFT_INVERT_STEPS, SpectralAnalyzer.TOL,
+            largest=True, deflate=True, seed=seed)
+        # L⁺ v = v / λ2 -> dư trên L bằng dư trên L⁺ nhân λ2²
+        value = 1.0 / theta[0]
+        return float(value), vectors[:, 0], float(bounds[0] * value * value), ok, basis, projected
+
+    @staticmethod
+    def _trace_pinv(solver, n, samples, seed, basis, projected):
+        """
+        tr(L⁺) và sai số tương đối ước lượng (0 nếu tính chính xác).
+
+        Kiểu Hutch++: tr(L⁺) = tr(Qᵀ L⁺ Q) + tr((I - QQᵀ) L⁺ (I - QQᵀ)). Q là cơ sở Krylov của
+        Lanczos tìm λ2 (đã bám các trị riêng lớn nhất của L⁺ - phần chiếm phần lớn vết), và
+        tr(Qᵀ L⁺ Q) chính là vết ma trận tam đường chéo -> không tốn lần giải nào. Phần dư ước
+        lượng Hutchinson với `samples` vector Rademacher chiếu khỏi Q (giải theo khối).
+        """
+        if n <= SpectralAnalyzer.EXACT_TRACE_NODES:
+            total = 0.0
+            for start in range(0, n, SpectralAnalyzer.EXACT_TRACE_BLOCK):
+                cols = np.arange(start, min(n, start + SpectralAnalyzer.EXACT_TRACE_BLOCK))
+                block = np.zeros((len(cols), n))
+                block[np.arange(len(cols)), cols] = 1.0
+                total += float(solver.solve(block)[np.arange(len(cols)), cols].sum())
+            return total, 0.0
+
+        rng = np.random.default_rng(seed + 1)
+        probes = rng.choice([-1.0, 1.0], size=(max(2, samples), n))
+        probes -= probes.mean(axis=1, keepdims=True)
+        probes -= (probes @ basis.T) @ basis
+        values = np.einsum('ij,ij->i', probes, solver.solve(probes))
+        total = projected + float(values.mean())
+        error = float(values.std(ddof=1) / np.sqrt(len(values)))
+        return total, error / total if total else 0.0
+
+    @staticmethod
+    def _sweep_cut(nodes, src, dst, fiedler):
+        """Lát cắt tỉ lệ nhỏ nhất (số cạnh cắt / cỡ phía nhỏ hơn) dọc thứ tự vector Fiedler."""
+        n = len(nodes)
+        position = np.empty(n, dtype=np.int64)
+        position[np.argsort(fiedler, kind='stable')] = np.arange(n)
+        lo = np.minimum(position[src], position[dst])
+        hi = np.maximum(position[src], position[dst])
+        # Cạnh cắt tiền tố cỡ k (k nút đầu) khi lo < k <= hi
+        diff = np.bincount(lo + 1, minlength=n + 1) - np.bincount(hi + 1, minlength=n + 1)
+        cut = np.cumsum(diff)[1:n]
+        sizes = np.arange(1, n)
+        ratio = cut / np.minimum(sizes, n - sizes)
+        best = int(np.argmin(ratio))
+        k = best + 1
+        crossing = np.flatnonzero((lo < k) & (hi >= k))
+        return {'sizes': (k, n - k), 'cut_edges': int(cut[best]), 'ratio': float(ratio[best]),
+                'edges': [(nodes[src[e]], nodes[dst[e]]) for e in crossing[:SpectralAnalyzer.CUT_EDGES_SHOWN]]}
+
+    @staticmethod
+    @traced("spectral.analyze")
+    @cached_result("spectral.analyze")
+    def analyze(G, weight=None, samples=TRACE_SAMPLES, seed=0):
+        """
+        Tính các chỉ số phổ của G.
+
+        Args:
+            weight: thuộc tính dùng làm độ dẫn của liên kết (VD: 'capacity'); None = mọi liên kết như nhau.
+            samples: số lần giải cho ước lượng tr(L⁺) (đồ thị lớn).
+        Returns:
+            dict: 'nodes', 'edges' (của thành phần xét), 'scope' ('graph' / 'largest_component'),
+                  'algebraic_connectivity', 'fiedler' {node: giá trị}, 'fiedler_residual',
+                  'fiedler_converged', 'fiedler_cut' {'sizes', 'cut_edges', 'ratio', 'edges'},
+                  'adjacency_lambda1', 'adjacency_lambda2', 'spectral_gap', 'spectral_gap_residual',
+                  'spectral_gap_converged' (False: λ1, λ2 gần trùng - hết số bước Lanczos, giá trị là ước lượng),
+                  'effective_resistance', 'mean_resistance', 'effective_resistance_error' (tương đối),
+                  'seconds'.
+        """
+        began = time.perf_counter()
+        result = {'nodes': G.number_of_nodes(), 'edges': 0, 'scope': 'graph',
+                  'algebraic_connectivity': 0.0, 'fiedler': {}, 'fiedler_residual': 0.0, 'fiedler_converged': True,
+                  'fiedler_cut': None, 'adjacency_lambda1': 0.0, 'adjacency_lambda2': 0.0, 'spectral_gap': 0.0,
+                  'spectral_gap_residual': 0.0, 'spectral_gap_converged': True, 'effective_resistance': 0.0, 'mean_resistance': 0.0,
+                  'effective_resistance_error': 0.0, 'seconds': 0.0}
+        if G.number_of_nodes() < 2:
+            return result
+
+        nodes, src, dst, weights = SpectralAnalyzer._largest_component(G, weight)
+        n = len(nodes)
+        result.update(nodes=n, edges=len(src),
+                      scope='graph' if n == G.number_of_nodes() else 'largest_component')
+        if n < 2:
+            return result
+        op = _SparseSymmetric(n, src, dst, weights)
+        solver = LaplacianSolver(n, src, dst, weights, seed=seed)
+
+        value, vector, residual, converged, basis, projected = SpectralAnalyzer._fiedler(solver, n, seed)
+        result.update(algebraic_connectivity=value, fiedler_residual=residual, fiedler_converged=converged,
+                      fiedler=dict(zip(nodes, vector.tolist())),
+                      fiedler_cut=SpectralAnalyzer._sweep_cut(nodes, src, dst, vector))
+
+        theta, _, bounds, ok, _, _ = _lanczos(op.adjacency, n, SpectralAnalyzer.LANCZOS_STEPS,
+                                        SpectralAnalyzer.ADJACENCY_TOL, largest=True, count=min(2, n), seed=seed)
+        lambda2 = float(theta[1]) if len(theta) > 1 else 0.0
+        result.update(adjacency_lambda1=float(theta[0]), adjacency_lambda2=lambda2,
+                      spectral_gap=float(theta[0]) - lambda2, spectral_gap_residual=float(bounds.max()),
+                      spectral_gap_converged=ok)
+
+        trace, error = SpectralAnalyzer._trace_pinv(solver, n, samples, seed, basis, projected)
+        del basis
+        result.update(effective_resistance=n * trace, mean_resistance=2 * trace / (n - 1),
+                      effective_resistance_error=error)
+        result['seconds'] = time.perf_counter() - began
+        logging.info(f"Spectral metrics ({n} nodes, core {solver.core_size}): lambda2={value:.6g}, "
+                     f"gap={result['spectral_gap']:.4g}, R={result['effective_resistance']:.6g} "
+                     f"in {result['seconds']:.2f}s")
+        return result
@@ -1,5 +1,7 @@
 import networkx as nx
 import logging
+from utils.instrumentation import traced, tracer
+from utils.result_cache import cached_result
 
 class STPManager:
     """
@@ -8,6 +10,8 @@ class STPManager:
     """
 
     @staticmethod
+    @traced("stp.compute_spanning_tree")
+    @cached_result("stp.compute_spanning_tree")
     def compute_spanning_tree(G):
         """
         Tính toán trạng thái STP cho toàn bộ mạng.
@@ -22,9 +26,9 @@ class STPManager:
         try:
             # Tính toán Minimum Spanning Tree (MST) dựa trên trọng số (Weight/Latency)
             # Trong thực tế STP dùng Path Cost, ở đây ta dùng Weight tương đương.
-            mst_graph = nx.minimum_spanning_tree(G, weight='weight')
-            
-            mst_edges = list(mst_graph.edges())
+            # Lấy thẳng danh sách cạnh MST: minimum_spanning_tree dựng thêm một đồ thị
+            # G.__class__() (VersionedGraph, có chỉ mục + theo dõi thay đổi) chỉ để đọc cạnh.
+            mst_edges = list(nx.minimum_spanning_edges(G, weight='weight', data=False))
             
             # Tất cả các cạnh trong G mà KHÔNG nằm trong MST sẽ bị Block
             all_edges = list(G.edges())
@@ -38,6 +42,7 @@ class STPManager:
                 if edge_tuple not in mst_set:
                     blocked_edges.append((u, v))
             
+            tracer.count("stp.blocked_links", len(blocked_edges))
             logging.info(f"STP Converged. Active: {len(mst_edges)}, Blocked: {len(blocked_edges)}")
             return mst_edges, blocked_edges
 
@@ -1,5 +1,8 @@
 import networkx as nx
+import heapq
 import logging
+from utils.instrumentation import traced, tracer
+from utils.result_cache import cached_result
 
 class BandwidthAnalyzer:
     """
@@ -8,6 +11,8 @@ class BandwidthAnalyzer:
     """
 
     @staticmethod
+    @traced("throughput.analyze_max_bandwidth")
+    @cached_result("throughput.analyze_max_bandwidth")
     def analyze_max_bandwidth(G, source, target):
         """
         Tính toán băng thông tối đa (Max Flow) giữa nguồn và đích.
@@ -40,6 +45,197 @@ class BandwidthAnalyzer:
             logging.error(f"Lỗi tính toán băng thông: {str(e)}")
             return 0, {}
 
+    @staticmethod
+    @traced("throughput.analyze_flow_paths")
+    @cached_result("throughput.analyze_flow_paths")
+    def analyze_flow_paths(G, source, target, capacity='capacity'):
+        """
+        Max Flow + phân rã luồng trong CÙNG một lần tính (một lần preflow-push):
+        - Luồng ròng trên mỗi cạnh vô hướng (triệt tiêu luồng hai chiều ngược nhau).
+        - Phân rã thành các đường đi có trọng số (tổng trọng số = băng thông tối đa).
+        - Lát cắt cực tiểu: các cạnh bão hoà nối tập đến được từ nguồn trong mạng dư.
+
+        Returns:
+            dict: {'value': Mbps,
+                   'paths': [(path, flow)] theo flow giảm dần,
+                   'edge_flow': {(u, v): (flow, capacity)} - chỉ cạnh có luồng,
+                   'cut_edges': [(u, v)] với u phía nguồn, v phía đích}
+                  Rỗng (value 0) nếu lỗi hoặc không có đường.
+        """
+        result = {'value': 0, 'paths': [], 'edge_flow': {}, 'cut_edges': []}
+        try:
+            if not G.has_node(source) or not G.has_node(target) or source == target:
+                return result
+
+            R = nx.flow.preflow_push(G, source, target, capacity=capacity)
+            result['value'] = R.graph['flow_value']
+
+            # Mạng dư của NetworkX lưu luồng phản đối xứng (flow[u][v] = -flow[v][u]),
+            # nên flow[u][v] chính là luồng ròng; đổi chiều để out_flow[a][b] > 0
+            out_flow = {}
+            for u, v, data in G.edges(data=True):
+                net = R[u][v]['flow'] if u != v else 0
+                if net == 0:
+                    continue
+                a, b = (u, v) if net > 0 else (v, u)
+                out_flow.setdefault(a, {})[b] = abs(net)
+                result['edge_flow'][(a, b)] = (abs(net), data.get(capacity, float('inf')))
+
+            result['paths'] = BandwidthAnalyzer._decompose_flow(out_flow, source, target)
+            result['paths'].sort(key=lambda item: -item[1])
+
+            # Lát cắt cực tiểu từ mạng dư: BFS theo cạnh còn dung lượng dư
+            reach = {source}
+            stack = [source]
+            while stack:
+                u = stack.pop()
+                for v, attr in R[u].items():
+                    if v not in reach and attr['capacity'] - attr['flow'] > 0:
+                        reach.add(v)
+                        stack.append(v)
+            result['cut_edges'] = [(u, v) if u in reach else (v, u)
+                                   for u, v in G.edges() if (u in reach) != (v in reach)]
+
+            tracer.count("throughput.flow_paths", len(result['paths']))
+            logging.info(f"Max Bandwidth {source}->{target}: {result['value']} Mbps "
+                         f"({len(result['paths'])} paths, {len(result['cut_edges'])} cut edges)")
+            return result
+
+        except Exception as e:
+            logging.error(f"Lỗi phân rã luồng: {str(e)}")
+            return {'value': 0, 'paths': [], 'edge_flow': {}, 'cut_edges': []}
+
+    @staticmethod
+    def _decompose_flow(out_flow, source, target):
+        """
+        Phân rã luồng ròng thành các đường s->t. Mỗi vòng DFS tìm một đường trên các cạnh
+        còn luồng rồi trừ đi lượng nhỏ nhất -> ít nhất một cạnh về 0, tối đa m đường.
+        Chu trình luồng (không đóng góp vào băng thông) bị bỏ qua. `out_flow` bị sửa tại chỗ.
+        """
+        paths = []
+        while True:
+            parent = {source: None}
+            stack = [source]
+            while stack and target not in parent:
+                u = stack.pop()
+                for v, f in out_flow.get(u, {}).items():
+                    if f > 0 and v not in parent:
+                        parent[v] = u
+                        stack.append(v)
+            if target not in parent:
+                return paths
+
+            path = [target]
+            while parent[path[-1]] is not None:
+                path.append(parent[path[-1]])
+            path.reverse()
+            amount = min(out_flow[u][v] for u, v in zip(path, path[1:]))
+            for u, v in zip(path, path[1:]):
+                out_flow[u][v] -= amount
+            paths.append((path, amount))
+
+    # ===========================
+    # ĐƯỜNG RỘNG NHẤT (WIDEST PATH / MAX-BOTTLENECK)
+    # ===========================
+
+    @staticmethod
+    def _widest_search(G, source, target=None, capacity='capacity'):
+        """
+        Dijkstra biến thể: thay "tổng độ trễ nhỏ nhất" bằng "cạnh hẹp nhất lớn nhất".
+        Hàng đợi ưu tiên là max-heap theo độ rộng; nút lấy ra đã có độ rộng tối ưu
+        nên có thể dừng ngay khi lấy ra `target`. Cạnh thiếu `capacity` coi là vô hạn
+        (giống nx.maximum_flow). Độ phức tạp O(m log n).
+
+        Returns:
+            tuple: (width, parent) - width[v]: băng thông nút cổ chai tốt nhất tới v,
+                   parent[v]: nút liền trước v trên đường rộng nhất.
+        """
+        width = {source: float('inf')}
+        parent = {source: None}
+        done = set()
+        heap = [(-float('inf'), 0, source)]
+        tie = 1
+        while heap:
+            neg_w, _, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+            if u == target:
+                break
+            w_u = -neg_w
+            for v, data in G[u].items():
+                if v in done:
+                    continue
+                w_v = min(w_u, data.get(capacity, float('inf')))
+                if w_v > width.get(v, -1):
+                    width[v] = w_v
+                    parent[v] = u
+                    heapq.heappush(heap, (-w_v, tie, v))
+                    tie += 1
+        tracer.count("throughput.widest_settled", len(done))
+        return width, parent
+
+    @staticmethod
+    @traced("throughput.find_widest_path")
+    @cached_result("throughput.find_widest_path")
+    def find_widest_path(G, source, target, capacity='capacity'):
+        """
+        Tìm đường đi ĐƠN có băng thông lớn nhất (max-bottleneck) giữa nguồn và đích
+        trong một lần duyệt, thay cho Max Flow + Dijkstra riêng rẽ.
+
+        Returns:
+            tuple: (bottleneck, path, bottleneck_edge)
+                   - bottleneck: băng thông của cạnh hẹp nhất trên đường (Mbps).
+                   - path: danh sách node, None nếu không có đường.
+                   - bottleneck_edge: (u, v) cạnh hẹp nhất, None nếu không có.
+        """
+        try:
+            if not G.has_node(source) or not G.has_node(target) or source == target:
+                return 0, None, None
+
+            width, parent = BandwidthAnalyzer._widest_search(G, source, target, capacity)
+            if target not in width:
+                logging.warning(f"Không có đường đi từ {source} đến {target}.")
+                return 0, None, None
+
+            path = [target]
+            while parent[path[-1]] is not None:
+                path.append(parent[path[-1]])
+            path.reverse()
+
+            bottleneck_edge = min(zip(path, path[1:]),
+                                  key=lambda e: G[e[0]][e[1]].get(capacity, float('inf')))
+            bottleneck = width[target]
+            logging.info(f"Widest Path {source}->{target}: {bottleneck} Mbps (bottleneck {bottleneck_edge})")
+            return bottleneck, path, bottleneck_edge
+
+        except Exception as e:
+            logging.error(f"Lỗi tính đường rộng nhất: {str(e)}")
+            return 0, None, None
+
+    @staticmethod
+    @traced("throughput.widest_paths_from")
+    @cached_result("throughput.widest_paths_from")
+    def widest_paths_from(G, source, capacity='capacity'):
+        """
+        Băng thông đường đơn tốt nhất từ MỘT nguồn tới MỌI đích trong một lần duyệt
+        (cây đường rộng nhất, tương đương đường đi trên cây khung cực đại).
+
+        Returns:
+            tuple: (width, parent) - width: {node: Mbps} của mọi nút tới được (trừ nguồn);
+                   parent: {node: nút liền trước}, parent[source] = None - lần ngược từ bất kỳ
+                   đích nào tới None để dựng lại đường như find_widest_path. ({}, {}) nếu lỗi.
+        """
+        try:
+            if not G.has_node(source):
+                return {}, {}
+            width, parent = BandwidthAnalyzer._widest_search(G, source, None, capacity)
+            del width[source]
+            return width, parent
+        except Exception as e:
+            logging.error(f"Lỗi tính đường rộng nhất: {str(e)}")
+            return {}, {}
+
     @staticmethod
     def get_utilization_color(current_flow, max_capacity):
         """
@@ -1,5 +1,8 @@
 import networkx as nx
 import logging
+from utils.instrumentation import traced
+from utils.result_cache import cached_result
+from algorithms.partitioning import ShardedAnalysis
 from collections import deque
 
 class VirusSimulator:
@@ -9,6 +12,8 @@ class VirusSimulator:
     """
 
     @staticmethod
+    @traced("traversal.simulate_spread")
+    @cached_result("traversal.simulate_spread")
     def simulate_spread(G, start_node):
         """
         Mô phỏng lây nhiễm virus bắt đầu từ 'start_node'.
@@ -20,6 +25,13 @@ class VirusSimulator:
         if start_node not in G:
             return []
 
+        # Mạng rất lớn + nhiều CPU + phân hoạch đã có sẵn: BFS theo vùng song song rồi ghép ở biên (cùng kết quả)
+        parts = ShardedAnalysis.shard_parts(G)
+        if parts:
+            steps = ShardedAnalysis.bfs_layers(G, start_node, parts)
+            logging.info(f"Simulation calculated (sharded): {len(steps)} steps of infection.")
+            return steps
+
         visited = set()
         visited.add(start_node)
         
@@ -0,0 +1,3 @@
+# NetGraph Sentinel Module: __init__.py
+# Architect: NetGraph Architect
+
@@ -0,0 +1,315 @@
+"""
+Bộ benchmark hiệu năng cho NetGraph Sentinel.
+
+Sinh từng kiểu tô pô của NetworkGenerator ở nhiều kích thước, đo thời gian các
+thuật toán chính, ghi kết quả ra file JSON và so sánh với baseline đã lưu để phát
+hiện suy giảm hiệu năng (regression) trước khi phát hành.
+
+Cách dùng:
+    python -m benchmarks.run_benchmarks                      # chạy + so sánh baseline
+    python -m benchmarks.run_benchmarks --scales 1 10 --large
+    python -m benchmarks.run_benchmarks --scales 10 --cases stp file_io --update-baseline --note "lý do"
+
+--update-baseline chỉ thay các phép đo (case, tô pô, scale) vừa chạy, giữ nguyên phần
+còn lại của baseline. Mọi thay đổi CỐ Ý làm đổi chi phí một thuật toán phải chạy lại bộ
+so sánh và cập nhật baseline trong cùng commit, kèm lý do (--note, lưu vào meta.notes).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import datetime
+import logging
+
+# Vẽ canvas ở chế độ offscreen (không cần màn hình)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import networkx as nx
+
+from utils.network_data import NetworkGenerator
+from utils.file_io import FileManager
+from algorithms.routing import RoutingManager
+from algorithms.throughput import BandwidthAnalyzer
+from algorithms.stp import STPManager
+from algorithms.auditing import NetworkAuditor
+from algorithms.centrality import CentralityAnalyzer
+from algorithms.traversal import VirusSimulator
+from algorithms.graph_theory import GraphTheoryManager
+from algorithms.forwarding import ForwardingSimulator
+from algorithms.packet_sim import PacketSimulator
+from algorithms.spectral import SpectralAnalyzer
+from algorithms.partitioning import GraphPartitioner, ShardedAnalysis
+from utils.result_cache import result_cache
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = "bench_results.json"
+
+TOPOLOGIES = ['hierarchical', 'mesh', 'star', 'ring']
+DEFAULT_SCALES = [1, 10, 50]
+LARGE_SCALES = [200, 1000]
+
+
+class BenchCase:
+    """Một phép đo: tên, hàm chạy và giới hạn số nút (tránh các thuật toán O(n²) treo máy)."""
+
+    def __init__(self, name, func, max_nodes=None):
+        self.name = name
+        self.func = func
+        self.max_nodes = max_nodes
+
+    def applies_to(self, G):
+        return self.max_nodes is None or G.number_of_nodes() <= self.max_nodes
+
+
+def _endpoints(G):
+    """Chọn cặp nút nguồn/đích cố định (theo thứ tự tên) để kết quả lặp lại được."""
+    nodes = sorted(G.nodes())
+    return nodes[0], nodes[-1]
+
+
+def _bench_save_load(G):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_topology.json")
+        FileManager.save_network_to_json(G, path)
+        FileManager.load_network_from_json(path)
+
+
+class _CanvasBench:
+    """Tạo NetworkCanvas offscreen một lần (QApplication chỉ được khởi tạo một lần)."""
+
+    def __init__(self):
+        self._app = None
+        self._canvas = None
+
+    def __call__(self, G):
+        if self._canvas is None:
+            from PyQt6.QtWidgets import QApplication
+            from ui.network_canvas import NetworkCanvas
+            self._app = QApplication.instance() or QApplication(sys.argv[:1])
+            self._canvas = NetworkCanvas()
+            self._canvas.resize(1024, 768)
+        self._canvas.draw_network(G)
+
+
+def build_cases(include_canvas=True):
+    """Danh sách các phép đo. Mỗi hàm nhận đồ thị G."""
+    acad = GraphTheoryManager()
+    cases = [
+        BenchCase("routing.find_shortest_path",
+                  lambda G: RoutingManager.find_shortest_path(G, *_endpoints(G))),
+        BenchCase("throughput.analyze_max_bandwidth",
+                  lambda G: BandwidthAnalyzer.analyze_max_bandwidth(G, *_endpoints(G))),
+        BenchCase("throughput.widest_paths_from",
+                  lambda G: BandwidthAnalyzer.widest_paths_from(G, _endpoints(G)[0])),
+        BenchCase("stp.compute_spanning_tree", STPManager.compute_spanning_tree),
+        BenchCase("auditing.perform_full_audit", NetworkAuditor.perform_full_audit),
+        BenchCase("centrality.rank_critical_nodes",
+                  lambda G: CentralityAnalyzer.rank_critical_nodes(G, top=NetworkAuditor.TOP_CRITICAL_NODES)),
+        BenchCase("spectral.analyze", SpectralAnalyzer.analyze),
+        BenchCase("traversal.simulate_spread",
+                  lambda G: VirusSimulator.simulate_spread(G, _endpoints(G)[0])),
+        # Cùng BFS theo vùng (gồm cả phân hoạch) và riêng phân hoạch: so với simulate_spread tuần tự
+        # để chọn ShardedAnalysis.SHARDED_MIN_NODES
+        BenchCase("traversal.simulate_spread_sharded",
+                  lambda G: ShardedAnalysis.bfs_layers(G, _endpoints(G)[0], NetworkAuditor.AUDIT_REGIONS)),
+        BenchCase("partitioning.partition",
+                  lambda G: GraphPartitioner.partition(G, NetworkAuditor.AUDIT_REGIONS)),
+        BenchCase("graph_theory.run_dfs", lambda G: acad.run_dfs(G, _endpoints(G)[0])),
+        BenchCase("graph_theory.check_bipartite", acad.check_bipartite),
+        BenchCase("graph_theory.get_representations", acad.get_representations),
+        BenchCase("graph_theory.find_eulerian", acad.find_eulerian),
+        BenchCase("file_io.save_load_json", _bench_save_load),
+        # FIB có cỡ (số thiết bị hạ tầng)^2 -> giới hạn kích thước
+        BenchCase("forwarding.validate",
+                  lambda G: ForwardingSimulator.validate(G, packets=100_000), max_nodes=5000),
+        BenchCase("packet_sim.simulate",
+                  lambda G: PacketSimulator.simulate(G, PacketSimulator.random_flows(G, 20, 200), duration=0.02),
+                  max_nodes=5000),
+    ]
+    if include_canvas:
+        # spring_layout là O(n²) mỗi vòng lặp -> giới hạn kích thước
+        cases.append(BenchCase("canvas.draw_network", _CanvasBench(), max_nodes=500))
+    return cases
+
+
+def build_topologies(scales, seed=42):
+    """Sinh (tên tô pô, scale, G) cho mọi kiểu tô pô ở mọi kích thước."""
+    generator = NetworkGenerator()
+    for topo in TOPOLOGIES:
+        for scale in scales:
+            random.seed(seed)  # Cố định ngẫu nhiên để so sánh giữa các lần chạy
+            yield topo, scale, generator.generate_network(topo, scale=scale)
+
+
+def time_call(func, G, repeats):
+    """Trả về danh sách thời gian (giây) của `repeats` lần chạy."""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(G)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_suite(scales, repeats=5, include_canvas=True, seed=42, verbose=True, only=None):
+    """
+    Chạy benchmark, trả về dict kết quả (sẵn sàng ghi JSON).
+    `only`: danh sách tiền tố tên phép đo cần chạy (None = tất cả).
+    """
+    cases = build_cases(include_canvas)
+    if only:
+        cases = [c for c in cases if c.name.startswith(tuple(only))]
+    results = []
+    for topo, scale, G in build_topologies(scales, seed):
+        n, m = G.number_of_nodes(), G.number_of_edges()
+        for case in cases:
+            if not case.applies_to(G):
+                continue
+            # Chạy lâu thì giảm số lần lặp để cả bộ benchmark vẫn kết thúc nhanh
+            samples = time_call(case.func, G, 1)
+            if samples[0] < 1.0:
+                samples += time_call(case.func, G, repeats - 1)
+            entry = {
+                "case": case.name,
+                "topology": topo,
+                "scale": scale,
+                "nodes": n,
+                "edges": m,
+                "repeats": len(samples),
+                "min_s": min(samples),
+                "median_s": statistics.median(samples),
+            }
+            results.append(entry)
+            if verbose:
+                print(f"{case.name:40s} {topo:12s} x{scale:<5d} n={n:<7d} "
+                      f"median={entry['median_s'] * 1000:10.3f} ms")
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "networkx": nx.__version__,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def _result_key(entry):
+    return (entry["case"], entry["topology"], entry["scale"])
+
+
+def compare_with_baseline(current, baseline, tolerance=0.25, min_delta=0.001):
+    """
+    So sánh kết quả hiện tại với baseline.
+
+    Một phép đo bị coi là regression khi thời gian nhỏ nhất (min, ổn định hơn median
+    trước nhiễu của máy) chậm hơn baseline quá `tolerance` (tỉ lệ) VÀ chênh lệch tuyệt
+    đối lớn hơn `min_delta` giây (lọc nhiễu phép đo nhỏ).
+
+    Returns:
+        list: Các dict mô tả regression (rỗng nếu không có).
+    """
+    base_map = {_result_key(e): e for e in baseline.get("results", [])}
+    regressions = []
+    for entry in current["results"]:
+        base = base_map.get(_result_key(entry))
+        if base is None:
+            continue
+        old, new = base["min_s"], entry["min_s"]
+        if new > old * (1 + tolerance) and new - old > min_delta:
+            regressions.append({
+                "case": entry["case"],
+                "topology": entry["topology"],
+                "scale": entry["scale"],
+                "baseline_s": old,
+                "current_s": new,
+                "ratio": new / old if old else float('inf'),
+            })
+    return regressions
+
+
+def merge_baseline(baseline, current, note=None):
+    """
+    Gộp kết quả hiện tại vào baseline cũ: phép đo trùng khoá (case, tô pô, scale) được
+    thay, phép đo chưa chạy lần này được giữ lại. Ghi chú lý do cập nhật vào meta.notes.
+    """
+    merged = {_result_key(e): e for e in baseline.get("results", [])}
+    merged.update((_result_key(e), e) for e in current["results"])
+    meta = dict(current["meta"])
+    meta["notes"] = list(baseline.get("meta", {}).get("notes", []))
+    if note:
+        meta["notes"].append(f"{meta['timestamp']}: {note}")
+    return {"meta": meta, "results": list(merged.values())}
+
+
+def _load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json(data, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NetGraph Sentinel benchmark suite")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="Các hệ số kích thước tô pô (mặc định: 1 10 50)")
+    parser.add_argument("--large", action="store_true",
+                        help="Thêm các tô pô tổng hợp lớn (scale 200, 1000)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-canvas", action="store_true", help="Bỏ qua benchmark vẽ canvas")
+    parser.add_argument("--cases", nargs="+", default=None,
+                        help="Chỉ chạy các phép đo có tên bắt đầu bằng các tiền tố này")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="File JSON kết quả")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="File JSON baseline")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Cập nhật baseline bằng các phép đo vừa chạy (giữ các phép đo khác)")
+    parser.add_argument("--note", default=None,
+                        help="Lý do cập nhật baseline (lưu vào meta.notes)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Ngưỡng chậm hơn cho phép so với baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)  # Tắt log "Route found"... để không làm nhiễu phép đo
+    result_cache.enabled = False   # Đo chi phí tính toán thật, không đo cache-hit
+
+    scales = list(args.scales) + (LARGE_SCALES if args.large else [])
+    current = run_suite(scales, args.repeats, not args.no_canvas, args.seed, only=args.cases)
+    _write_json(current, args.output)
+    print(f"\nĐã ghi kết quả: {args.output}")
+
+    if args.update_baseline:
+        baseline = _load_json(args.baseline) if os.path.exists(args.baseline) else {}
+        _write_json(merge_baseline(baseline, current, args.note), args.baseline)
+        print(f"Đã cập nhật baseline: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Chưa có baseline, bỏ qua bước so sánh (dùng --update-baseline để tạo).")
+        return 0
+
+    baseline = _load_json(args.baseline)
+    regressions = compare_with_baseline(current, baseline, args.tolerance)
+    if not regressions:
+        print("OK: Không phát hiện regression so với baseline.")
+        return 0
+
+    print(f"\n[!] PHÁT HIỆN {len(regressions)} REGRESSION:")
+    for r in regressions:
+        print(f"    {r['case']:40s} {r['topology']:12s} x{r['scale']:<5d} "
+              f"{r['baseline_s'] * 1000:.3f} ms -> {r['current_s'] * 1000:.3f} ms (x{r['ratio']:.2f})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Client Python đồng bộ cho dịch vụ JSON-RPC của NetGraph Sentinel (service/server.py).
+
+Một đối tượng NetGraphClient giữ MỘT kết nối mở và dùng lại cho mọi lần gọi (không
+bắt tay lại mỗi request); nếu server đã đóng kết nối cũ, client kết nối lại trước khi gửi.
+Request đã gửi thì không bao giờ gửi lại (kể cả khi hết thời gian chờ phản hồi).
+
+Ví dụ:
+    with NetGraphClient(unix_path="/tmp/netgraph.sock") as client:
+        client.load_topology("core", "network_config.json")
+        print(client.shortest_path("core", "PC-1-1-1", "SRV-1"))
+        flows, audit = client.batch([
+            ("bandwidth.max_flow", {"topology": "core", "source": "PC-1-1-1", "target": "SRV-1"}),
+            ("audit.full", {"topology": "core"}),
+        ])
+        deep = client.audit("core", centrality=True, regions=True, spectral=True)
+"""
+import itertools
+import json
+import socket
+import threading
+
+from service.server import DEFAULT_HOST, DEFAULT_PORT, RPCError
+
+
+class NetGraphClient:
+    """Client dòng-JSON dùng lại kết nối. An toàn khi dùng chung giữa nhiều luồng (có khoá)."""
+
+    def __init__(self, unix_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=60.0):
+        self.unix_path = unix_path
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # --- Kết nối ---
+    def connect(self):
+        if self._sock is not None:
+            return
+        if self.unix_path:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.unix_path)
+        else:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._file = sock.makefile("rb")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._sock is not None:
+            self._sock.close()
+        self._sock, self._file = None, None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _stale(self):
+        """Kết nối đang giữ đã bị server đóng (đọc thử không chặn thấy EOF)?"""
+        try:
+            self._sock.setblocking(False)
+            try:
+                return self._sock.recv(1, socket.MSG_PEEK) == b""
+            finally:
+                self._sock.settimeout(self.timeout)
+        except BlockingIOError:
+            return False
+        except OSError:
+            return True
+
+    def _send(self, data):
+        """
+        Gửi request, kết nối (lại) nếu cần. Chỉ thử lại khi lỗi xảy ra TRƯỚC khi request
+        rời client (kết nối thất bại / kết nối cũ đã chết) - khi đó server chưa chạy gì.
+        """
+        for attempt in (0, 1):
+            if self._sock is not None and self._stale():
+                self.close()
+            try:
+                self.connect()
+                self._sock.sendall(data)
+                return
+            except socket.timeout:
+                self.close()
+                raise
+            except OSError:
+                self.close()
+                if attempt:
+                    raise
+
+    def _roundtrip(self, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self._lock:
+            self._send(data)
+            # Request đã gửi: lỗi/timeout khi chờ phản hồi KHÔNG được gửi lại (phép phân tích
+            # có thể đang chạy hoặc đã chạy xong). Bỏ kết nối để phản hồi muộn không lệch dòng.
+            try:
+                line = self._file.readline()
+            except OSError:
+                self.close()
+                raise
+            if not line:
+                self.close()
+                raise ConnectionError("Server đã đóng kết nối trước khi trả lời.")
+            return json.loads(line)
+
+    @staticmethod
+    def _unwrap(response):
+        if "error" in response:
+            err = response["error"]
+            raise RPCError(err.get("code"), err.get("message"))
+        return response.get("result")
+
+    # --- Gọi RPC ---
+    def call(self, method, **params):
+        """Gọi một phương thức; ném RPCError nếu server trả về lỗi."""
+        req = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params}
+        return self._unwrap(self._roundtrip(req))
+
+    def batch(self, calls):
+        """
+        Gửi nhiều lời gọi trong MỘT thông điệp; server chạy chúng đồng thời.
+
+        Args:
+            calls: danh sách (method, params_dict).
+        Returns:
+            list: kết quả theo đúng thứ tự; phần tử lỗi là đối tượng RPCError (không ném).
+        """
+        calls = list(calls)
+        if not calls:
+            return []
+        ids = [next(self._ids) for _ in calls]
+        payload = [{"jsonrpc": "2.0", "id": i, "method": m, "params": p or {}}
+                   for i, (m, p) in zip(ids, calls)]
+        responses = self._roundtrip(payload)
+        if isinstance(responses, dict):  # Lỗi ở cấp batch
+            raise RPCError(responses["error"]["code"], responses["error"]["message"])
+        by_id = {r.get("id"): r for r in responses}
+        results = []
+        for i in ids:
+            try:
+                results.append(self._unwrap(by_id[i]))
+            except RPCError as e:
+                results.append(e)
+        return results
+
+    # --- Tiện ích ---
+    def load_topology(self, name, path):
+        return self.call("topology.load", name=name, path=path)
+
+    def shortest_path(self, topology, source, target):
+        return self.call("route.shortest", topology=topology, source=source, target=target)
+
+    def k_shortest_paths(self, topology, source, target, k=3):
+        return self.call("route.k_shortest", topology=topology, source=source, target=target, k=k)
+
+    def max_bandwidth(self, topology, source, target):
+        return self.call("bandwidth.max_flow", topology=topology, source=source, target=target)
+
+    def widest_path(self, topology, source, target):
+        return self.call("bandwidth.widest", topology=topology, source=source, target=target)
+
+    def widest_paths_from(self, topology, source):
+        return self.call("bandwidth.widest_all", topology=topology, source=source)
+
+    def audit(self, topology, **options):
+        """options: centrality / regions / spectral (bool) như NetworkAuditor.perform_full_audit."""
+        return self.call("audit.full", topology=topology, **options)
+
+    def spanning_tree(self, topology):
+        return self.call("stp.compute", topology=topology)
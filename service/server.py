@@ -0,0 +1,428 @@
+"""
+Dịch vụ JSON-RPC cục bộ (asyncio) cho NetGraph Sentinel.
+
+Cho phép script tự động hoá hỏi đường đi / băng thông / kiểm toán / STP mà không cần
+mở cửa sổ PyQt và không phải đọc lại file tô pô ở mỗi lần gọi.
+
+- Giao thức: JSON-RPC 2.0, mỗi thông điệp là MỘT dòng JSON. Một dòng có thể là một
+  request hoặc một mảng request (batch) - các request trong batch chạy đồng thời và
+  được trả lời trong một dòng (mảng), đúng thứ tự gửi.
+- Tô pô được nạp theo tên qua FileManager và giữ trong bộ nhớ (`topology.load`).
+- Phép phân tích nặng chạy trong pool tiến trình; mỗi worker giữ bản đồ thị của riêng
+  nó theo mã băm nội dung (sha256) lúc `topology.load`, nên chỉ đọc file một lần cho mỗi
+  lần nạp. Worker đọc lại file thấy nội dung khác mã băm thì báo lỗi thay vì phân tích
+  một tô pô khác với tô pô đã nạp; đồ thị của tô pô đã gỡ/nạp lại bị bỏ ở tác vụ kế tiếp.
+  Đồ thị không bị ghi trong lúc phục vụ nên các lệnh đọc chạy song song an toàn.
+
+Cách dùng:
+    python -m service.server --unix /tmp/netgraph.sock --topology core=network_config.json
+    python -m service.server --port 8765 --workers 4
+"""
+import argparse
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import os
+import signal
+import itertools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from utils.file_io import FileManager
+from algorithms.routing import RoutingManager
+from algorithms.throughput import BandwidthAnalyzer
+from algorithms.auditing import NetworkAuditor
+from algorithms.stp import STPManager
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_LINE_BYTES = 64 * 1024 * 1024  # Kết quả lớn (VD: danh sách cạnh) vẫn vừa một dòng
+
+# Mã lỗi chuẩn JSON-RPC 2.0
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SERVER_ERROR = -32000
+
+
+class RPCError(Exception):
+    """Lỗi trả về cho client dưới dạng đối tượng `error` của JSON-RPC."""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+# ===========================
+# CÁC PHÉP PHÂN TÍCH (chạy trong worker)
+# ===========================
+
+def _edge_list(edges):
+    return [[u, v] for u, v in edges]
+
+
+def _count_param(name, value):
+    """Tham số đếm (k, limit) từ JSON: số nguyên không âm, sai kiểu -> INVALID_PARAMS."""
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        count = -1
+    if count < 0 or isinstance(value, bool):
+        raise RPCError(INVALID_PARAMS, f"Tham số '{name}' phải là số nguyên không âm.")
+    return count
+
+
+def _route_shortest(G, source, target):
+    result = RoutingManager.find_shortest_path(G, source, target)
+    if result is None:
+        raise RPCError(INVALID_PARAMS, "Source hoặc Target node không tồn tại.")
+    path, latency = result
+    return {"path": path, "latency": latency}
+
+
+def _route_k_shortest(G, source, target, k=3):
+    paths = itertools.islice(RoutingManager.iter_k_shortest_paths(G, source, target), _count_param("k", k))
+    return [{"path": path, "latency": cost} for path, cost in paths]
+
+
+def _route_ecmp(G, source, target, limit=100):
+    paths = itertools.islice(RoutingManager.iter_ecmp_paths(G, source, target), _count_param("limit", limit))
+    return {"count": RoutingManager.count_ecmp_paths(G, source, target),
+            "paths": [path for path, _ in paths]}
+
+
+def _bandwidth_max_flow(G, source, target):
+    flow = BandwidthAnalyzer.analyze_flow_paths(G, source, target)
+    return {
+        "value": flow["value"],
+        "paths": [{"path": path, "flow": f} for path, f in flow["paths"]],
+        "edge_flow": [[u, v, f, cap] for (u, v), (f, cap) in flow["edge_flow"].items()],
+        "cut_edges": _edge_list(flow["cut_edges"]),
+    }
+
+
+def _bandwidth_widest(G, source, target):
+    width, path, bottleneck = BandwidthAnalyzer.find_widest_path(G, source, target)
+    return {"bandwidth": width, "path": path,
+            "bottleneck": list(bottleneck) if bottleneck else None}
+
+
+def _bandwidth_widest_all(G, source):
+    width, parent = BandwidthAnalyzer.widest_paths_from(G, source)
+    return {"bandwidth": width, "parent": parent}
+
+
+def _audit_full(G, centrality=False, regions=False, spectral=False):
+    report = dict(NetworkAuditor.perform_full_audit(G, centrality=centrality, regions=regions, spectral=spectral))
+    report["critical_links"] = _edge_list(report["critical_links"])
+    return report
+
+
+def _stp_compute(G):
+    active, blocked = STPManager.compute_spanning_tree(G)
+    return {"active": _edge_list(active), "blocked": _edge_list(blocked)}
+
+
+# Tên phương thức -> hàm (G, **params). Tham số "topology" được server tách ra trước.
+ANALYSIS_METHODS = {
+    "route.shortest": _route_shortest,
+    "route.k_shortest": _route_k_shortest,
+    "route.ecmp": _route_ecmp,
+    "bandwidth.max_flow": _bandwidth_max_flow,
+    "bandwidth.widest": _bandwidth_widest,
+    "bandwidth.widest_all": _bandwidth_widest_all,
+    "audit.full": _audit_full,
+    "stp.compute": _stp_compute,
+}
+
+# Bộ nhớ đồ thị trong từng worker (và trong server khi phân tích chạy tại chỗ):
+# mã băm nội dung file -> G
+_WORKER_GRAPHS = {}
+
+
+def _read_topology(path):
+    """Đọc file tô pô một lần, trả về (sha256 của nội dung, G)."""
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        G = FileManager.graph_from_node_link(json.loads(raw))
+    except Exception as e:
+        raise RPCError(SERVER_ERROR, f"Không đọc được tô pô {path}: {e}")
+    return hashlib.sha256(raw).hexdigest(), G
+
+
+def _evict_graphs(live):
+    """Bỏ đồ thị của các tô pô không còn nạp (mã băm không nằm trong `live`)."""
+    for digest in list(_WORKER_GRAPHS):
+        if digest not in live:
+            _WORKER_GRAPHS.pop(digest, None)
+
+
+def _worker_graph(path, digest, live):
+    _evict_graphs(live)
+    G = _WORKER_GRAPHS.get(digest)
+    if G is None:
+        actual, G = _read_topology(path)
+        if actual != digest:
+            raise RPCError(SERVER_ERROR, f"File {path} đã thay đổi sau khi nạp, hãy gọi topology.reload.")
+        _WORKER_GRAPHS[digest] = G
+    return G
+
+
+def run_analysis(path, digest, live, method, params):
+    """
+    Điểm vào trong worker. Trả về ("ok", result) hoặc ("error", code, message) thay vì
+    ném ngoại lệ để lỗi đi qua ranh giới tiến trình một cách đơn giản. Tham số đã được
+    server kiểm tra trước khi gửi, nên mọi ngoại lệ khác ở đây là lỗi nội bộ.
+    """
+    try:
+        G = _worker_graph(path, digest, live)
+        return ("ok", ANALYSIS_METHODS[method](G, **params))
+    except RPCError as e:
+        return ("error", e.code, e.message)
+    except Exception as e:
+        logging.error(f"RPC {method} Error: {type(e).__name__}: {str(e)}")
+        return ("error", INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+
+
+def _check_params(func, params, skip=0):
+    """Kiểm tra tên tham số khớp chữ ký hàm (bỏ qua `skip` tham số vị trí đầu, VD: G)."""
+    try:
+        inspect.signature(func).bind(*([None] * skip), **params)
+    except TypeError as e:
+        raise RPCError(INVALID_PARAMS, str(e))
+
+
+# ===========================
+# SERVER
+# ===========================
+
+class TopologyRegistry:
+    """
+    Các tô pô đã nạp theo tên. Mỗi tô pô được ghim theo `digest` (sha256 nội dung file lúc
+    nạp): worker chỉ dùng đúng nội dung đó. `in_process=True` (phân tích chạy trong chính
+    tiến trình server) giữ luôn đồ thị vừa parse cho worker thay vì để nó đọc lại file.
+    """
+
+    def __init__(self, in_process=False):
+        self._items = {}
+        self.in_process = in_process
+
+    def load(self, name, path):
+        path = os.path.abspath(path)
+        digest, G = _read_topology(path)
+        self._items[name] = {"path": path, "digest": digest,
+                             "nodes": G.number_of_nodes(), "edges": G.number_of_edges()}
+        if self.in_process:
+            _WORKER_GRAPHS[digest] = G
+        _evict_graphs(self.live_digests())
+        logging.info(f"Topology '{name}' loaded from {path}")
+        return self.describe(name)
+
+    def unload(self, name):
+        found = self._items.pop(name, None) is not None
+        _evict_graphs(self.live_digests())
+        return found
+
+    def live_digests(self):
+        return frozenset(item["digest"] for item in self._items.values())
+
+    def get(self, name):
+        item = self._items.get(name)
+        if item is None:
+            raise RPCError(INVALID_PARAMS, f"Chưa nạp tô pô '{name}'.")
+        return item
+
+    def describe(self, name):
+        return dict(self.get(name), name=name)
+
+    def names(self):
+        return sorted(self._items)
+
+
+class NetGraphServer:
+    """
+    Server JSON-RPC dòng-JSON. `workers=0` chạy phân tích trong một luồng nền của chính
+    tiến trình server (tiện khi thử nghiệm); >0 dùng pool tiến trình.
+    """
+
+    def __init__(self, workers=None):
+        self.registry = TopologyRegistry(in_process=(workers == 0))
+        if workers == 0:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rpc-analysis")
+        else:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        self._server = None
+        self.local_methods = {
+            "ping": lambda: "pong",
+            "topology.load": self.registry.load,
+            "topology.unload": self.registry.unload,
+            "topology.reload": lambda name: self.registry.load(name, self.registry.get(name)["path"]),
+            "topology.list": lambda: [self.registry.describe(n) for n in self.registry.names()],
+            "topology.info": self.registry.describe,
+            "methods": lambda: sorted(list(self.local_methods) + list(ANALYSIS_METHODS)),
+        }
+
+    # --- Vòng đời ---
+    async def start(self, unix_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            self._server = await asyncio.start_unix_server(self._handle_client, path=unix_path, limit=MAX_LINE_BYTES)
+            logging.info(f"NetGraph RPC listening on unix:{unix_path}")
+        else:
+            self._server = await asyncio.start_server(self._handle_client, host, port, limit=MAX_LINE_BYTES)
+            port = self._server.sockets[0].getsockname()[1]
+            logging.info(f"NetGraph RPC listening on {host}:{port}")
+        return self._server
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Xử lý kết nối ---
+    async def _handle_client(self, reader, writer):
+        # Mỗi kết nối giữ được lâu (client tái sử dụng); các dòng được xử lý đồng thời,
+        # khoá ghi đảm bảo mỗi phản hồi là một dòng nguyên vẹn.
+        write_lock = asyncio.Lock()
+        pending = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    await self._send(writer, write_lock, self._error(None, INVALID_REQUEST, "Thông điệp quá lớn."))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.ensure_future(self._process_line(line, writer, write_lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _process_line(self, line, writer, write_lock):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            await self._send(writer, write_lock, self._error(None, PARSE_ERROR, "Parse error"))
+            return
+
+        if isinstance(message, list):
+            if not message:
+                response = self._error(None, INVALID_REQUEST, "Batch rỗng.")
+            else:
+                results = await asyncio.gather(*(self._dispatch(m) for m in message))
+                response = [r for r in results if r is not None] or None
+        else:
+            response = await self._dispatch(message)
+
+        if response is not None:
+            await self._send(writer, write_lock, response)
+
+    async def _send(self, writer, write_lock, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n"
+        async with write_lock:
+            writer.write(data)
+            await writer.drain()
+
+    @staticmethod
+    def _error(req_id, code, message):
+        return {"jsonrpc": "2.0", "id": req_id, "error": {"code": code, "message": message}}
+
+    async def _dispatch(self, request):
+        """Xử lý một request; trả về None với notification (không có `id`)."""
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return self._error(None, INVALID_REQUEST, "Invalid Request")
+        req_id = request.get("id")
+        is_notification = "id" not in request
+        try:
+            result = await self.call(request["method"], request.get("params") or {})
+            response = {"jsonrpc": "2.0", "id": req_id, "result": result}
+        except RPCError as e:
+            response = self._error(req_id, e.code, e.message)
+        except Exception as e:
+            logging.error(f"RPC Dispatch Error: {type(e).__name__}: {str(e)}")
+            response = self._error(req_id, INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+        return None if is_notification else response
+
+    async def call(self, method, params):
+        if not isinstance(params, dict):
+            raise RPCError(INVALID_PARAMS, "params phải là object (tham số theo tên).")
+
+        local = self.local_methods.get(method)
+        if local is not None:
+            _check_params(local, params)
+            # Chạy ngoài vòng lặp sự kiện: nạp tô pô là I/O + parse JSON
+            return await asyncio.to_thread(local, **params)
+
+        if method not in ANALYSIS_METHODS:
+            raise RPCError(METHOD_NOT_FOUND, f"Method not found: {method}")
+        params = dict(params)
+        name = params.pop("topology", None)
+        if name is None:
+            raise RPCError(INVALID_PARAMS, "Thiếu tham số 'topology'.")
+        _check_params(ANALYSIS_METHODS[method], params, skip=1)
+        item = self.registry.get(name)
+
+        loop = asyncio.get_running_loop()
+        outcome = await loop.run_in_executor(
+            self.executor, run_analysis, item["path"], item["digest"], self.registry.live_digests(),
+            method, params)
+        if outcome[0] == "error":
+            raise RPCError(outcome[1], outcome[2])
+        return outcome[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NetGraph Sentinel - dịch vụ JSON-RPC cục bộ")
+    parser.add_argument("--unix", help="Đường dẫn Unix socket (ưu tiên hơn TCP)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Số tiến trình worker (mặc định: số CPU; 0 = chạy trong tiến trình server)")
+    parser.add_argument("--topology", action="append", default=[], metavar="NAME=PATH",
+                        help="Nạp sẵn tô pô khi khởi động (lặp lại được)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    server = NetGraphServer(workers=args.workers)
+    for spec in args.topology:
+        name, _, path = spec.partition("=")
+        server.registry.load(name, path)
+
+    async def run():
+        await server.start(args.unix, args.host, args.port)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, server.close)
+        try:
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.close()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Kiểm thử kiểm toán nền: kết quả tính trên bản sao được lưu cache theo version của đồ thị gốc,
+nên báo cáo xuất ngay sau Kiểm Toán Chuyên Sâu không kiểm toán lại.
+"""
+import random
+
+from algorithms.auditing import NetworkAuditor
+from utils.network_data import NetworkGenerator
+from utils.report_gen import ReportGenerator
+
+
+def _network():
+    random.seed(11)
+    return NetworkGenerator().generate_network('mesh', 2)
+
+
+def test_deep_audit_result_cached_for_live_graph(monkeypatch):
+    G = _network()
+    report = NetworkAuditor.audit_async(G, **NetworkAuditor.DEEP_AUDIT).result()
+    assert report["critical_nodes"] and report["spectral"]
+    assert NetworkAuditor.audit_async(G, **NetworkAuditor.DEEP_AUDIT).result() is report
+
+    calls = []
+    monkeypatch.setattr(NetworkAuditor, 'perform_full_audit',
+                        staticmethod(lambda *a, **k: calls.append(1) or {}))
+    assert NetworkAuditor.audit_async(G, **NetworkAuditor.DEEP_AUDIT).result() is report
+    assert calls == []
+
+
+def test_stale_version_not_reused():
+    G = _network()
+    report = NetworkAuditor.audit_async(G, **NetworkAuditor.DEEP_AUDIT).result()
+    u, v = next(iter(G.edges()))
+    G.remove_edge(u, v)
+    assert NetworkAuditor.audit_async(G, **NetworkAuditor.DEEP_AUDIT).result() is not report
+
+
+def test_txt_export_uses_deep_audit(tmp_path):
+    G = _network()
+    NetworkAuditor.audit_async(G, **NetworkAuditor.DEEP_AUDIT).result()
+    path = str(tmp_path / "audit_log.txt")
+    ok, _ = ReportGenerator.export_async(G, path).result()
+    text = open(path, encoding='utf-8').read()
+    assert ok and "CRITICAL DEVICES" in text and "Algebraic Conn" in text
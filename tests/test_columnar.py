@@ -0,0 +1,126 @@
+"""
+Kiểm thử đối chiếu ngẫu nhiên: VersionedGraph (kho cột và dict thường) so với nx.Graph thường
+qua chuỗi thao tác thêm/xoá/sửa node, cạnh và thuộc tính. Giá trị đọc lại phải bằng nhau VÀ
+cùng kiểu (int không thành float, ip sai dạng không bị chuẩn hoá...), kể cả sau pickle, deepcopy,
+copy, dựng lại từ đồ thị và checkout lịch sử.
+"""
+import copy
+import pickle
+import random
+
+import networkx as nx
+import pytest
+
+from utils.topology_history import TopologyHistory
+from utils.versioned_graph import VISUAL_ATTRS, VersionedGraph
+
+VALUES = [1, 10, 2.5, 1.0, True, None, 'Router', 'PC', '10.0.0.1', '10.00.0.1', '1.2.3', [1], 2 ** 60, 'x']
+KEYS = ['type', 'label', 'ip', 'weight', 'capacity', 'size', 'color', 'foo']
+STEPS = 120
+
+
+def _assert_same(G, R):
+    nodes = {n: dict(d) for n, d in G.nodes(data=True)}
+    assert nodes == {n: dict(d) for n, d in R.nodes(data=True)}
+    for n, attrs in nodes.items():
+        for k, value in attrs.items():
+            assert type(value) is type(R.nodes[n][k]), (n, k, value)
+    edges = {frozenset((u, v)): dict(d) for u, v, d in G.edges(data=True)}
+    assert edges == {frozenset((u, v)): dict(d) for u, v, d in R.edges(data=True)}
+    for u, v, attrs in G.edges(data=True):
+        for k, value in attrs.items():
+            assert type(value) is type(R[u][v][k]), (u, v, k, value)
+
+
+def _without_visual(R):
+    R = R.copy()
+    for _, attrs in list(R.nodes(data=True)) + [(None, d) for _, _, d in R.edges(data=True)]:
+        for k in [k for k in attrs if k in VISUAL_ATTRS]:
+            del attrs[k]
+    return R
+
+
+def _random_attrs(rng, node):
+    attrs = {rng.choice(KEYS): rng.choice(VALUES) for _ in range(rng.randrange(3))}
+    if isinstance(attrs.get('type'), list):
+        attrs['type'] = 'L'  # type được lập chỉ mục -> phải hash được
+    if rng.random() < 0.3:
+        attrs['label'] = node
+    return attrs
+
+
+def _mutate(rng, G, R):
+    """Một thao tác ngẫu nhiên áp lên cả hai đồ thị; trả về (attrs giữ lại của node vừa xoá) hoặc None."""
+    op, n, m = rng.randrange(11), rng.randrange(12), rng.randrange(12)
+    attrs = _random_attrs(rng, n)
+    if op == 0:
+        G.add_node(n, **attrs)
+        R.add_node(n, **attrs)
+    elif op == 1 and n in G:
+        held = (dict(G.nodes[n]), G.nodes[n])
+        G.remove_node(n)
+        R.remove_node(n)
+        return held
+    elif op == 2:
+        G.add_edge(n, m, **attrs)
+        R.add_edge(n, m, **attrs)
+    elif op == 3 and G.has_edge(n, m):
+        G.remove_edge(n, m)
+        R.remove_edge(n, m)
+    elif op == 4 and n in G:
+        key, value = rng.choice(KEYS), rng.choice(VALUES)
+        if key == 'type' and isinstance(value, list):
+            value = 'L'
+        G.nodes[n][key] = value
+        R.nodes[n][key] = value
+    elif op == 5 and n in G:
+        key = rng.choice(KEYS)
+        assert G.nodes[n].pop(key, 'z') == R.nodes[n].pop(key, 'z')
+    elif op == 6 and G.has_edge(n, m):
+        G[n][m].update(attrs)
+        R[n][m].update(attrs)
+    elif op == 7 and n in G and rng.random() < 0.2:
+        G.nodes[n].clear()
+        R.nodes[n].clear()
+    elif op == 8:
+        G.update_edge_attrs({(n, m): attrs})
+        if R.has_edge(n, m):
+            R[n][m].update(attrs)
+    elif op == 9 and rng.random() < 0.05:
+        G.clear_edges()
+        R.clear_edges()
+    elif op == 10 and n in G:
+        key = rng.choice(KEYS)
+        if key in G.nodes[n]:
+            del G.nodes[n][key]
+            del R.nodes[n][key]
+    return None
+
+
+@pytest.mark.parametrize("columnar", [True, False])
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_plain_graph(columnar, seed):
+    rng = random.Random(seed)
+    G, R = VersionedGraph(columnar=columnar), nx.Graph()
+    history = TopologyHistory(G) if seed % 2 else None
+    snapshots, held = [], None
+    for step in range(STEPS):
+        held = _mutate(rng, G, R) or held
+        _assert_same(G, R)
+        if held:
+            # View của node đã xoá tách ra dict riêng, vẫn giữ giá trị cũ
+            assert dict(held[1]) == held[0]
+        if history and step % 15 == 0:
+            snapshots.append((history.snapshot(), R.copy()))
+
+    for H in (pickle.loads(pickle.dumps(G)), copy.deepcopy(G), G.copy(), VersionedGraph(G, columnar=columnar)):
+        _assert_same(H, R)
+    for snapshot_id, expected in snapshots:
+        _assert_same(_without_visual(history.checkout(snapshot_id)), _without_visual(expected))
+
+
+def test_default_is_plain_dicts():
+    G = VersionedGraph()
+    G.add_edge('a', 'b', weight=1)
+    assert not G.columnar
+    assert not hasattr(G, 'edge_store')
@@ -0,0 +1,83 @@
+"""
+Kiểm thử đối chiếu FIB đã biên dịch với RoutingManager: gói đi theo bảng chuyển tiếp phải tới
+đúng đích với tổng độ trễ bằng đường ngắn nhất Dijkstra, và bảng đoạn phẳng phải trả lời giống
+PrefixTrie của từng thiết bị.
+"""
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from algorithms.forwarding import DELIVERED, ForwardingCompiler, ForwardingSimulator
+from algorithms.routing import RoutingManager
+from utils.network_data import NetworkGenerator
+
+CASES = [(topo, seed) for topo in ('hierarchical', 'mesh', 'star', 'ring') for seed in (1, 2, 3)]
+
+
+def _network(topo, seed):
+    random.seed(seed)
+    return NetworkGenerator().generate_network(topo, 2)
+
+
+def _pairs(G, count=150):
+    rng = random.Random(0)
+    nodes = sorted(G.nodes())
+    return [tuple(rng.sample(nodes, 2)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("topo,seed", CASES)
+def test_forwarded_path_is_a_shortest_path(topo, seed):
+    G = _network(topo, seed)
+    table = ForwardingCompiler.compile(G, workers=1)
+    for source, target in _pairs(G):
+        address = table.address_of(target).split('/')[0]
+        hops, status = ForwardingSimulator.trace(table, source, address)
+        path = [node for node, _, _ in hops]
+        assert status == DELIVERED
+        assert path[0] == source and path[-1] == target
+        assert all(G.has_edge(u, v) for u, v in zip(path, path[1:]))
+        _, latency = RoutingManager.find_shortest_path(G, source, target)
+        assert nx.path_weight(G, path, weight='weight') == pytest.approx(latency)
+
+
+@pytest.mark.parametrize("topo,seed", CASES)
+def test_flat_table_agrees_with_prefix_trie(topo, seed):
+    G = _network(topo, seed)
+    table = ForwardingCompiler.compile(G, workers=1)
+    pairs = _pairs(G)
+    sources = [table.index[s] for s, _ in pairs]
+    targets = [table.index[t] for _, t in pairs]
+    run = ForwardingSimulator.forward(table, sources, table.addresses[targets])
+    for i, (source, target) in enumerate(pairs):
+        hops, status = ForwardingSimulator.trace(table, source, int(table.addresses[table.index[target]]))
+        assert run['status'][i] == status
+        assert run['hops'][i] == len(hops) - 1
+        assert table.nodes[run['final'][i]] == hops[-1][0]
+
+
+@pytest.mark.parametrize("topo,seed", CASES)
+def test_validate_delivers_every_packet(topo, seed):
+    result = ForwardingSimulator.validate(_network(topo, seed), packets=20_000)
+    assert result['delivered'] == result['packets'] == 20_000
+    assert result['black_holes'] == result['ttl_exceeded'] == result['misdelivered'] == 0
+    assert np.isfinite(result['mean_hops'])
+
+
+def test_packets_scale_with_graph_size():
+    small, large = nx.path_graph(10), nx.empty_graph(50_000)
+    assert ForwardingSimulator.packets_for(small) == ForwardingSimulator.MIN_PACKETS
+    assert ForwardingSimulator.packets_for(large) == ForwardingSimulator.MAX_PACKETS
+    G = _network('hierarchical', 1)
+    assert ForwardingSimulator.packets_for(G) == max(ForwardingSimulator.MIN_PACKETS,
+                                                     ForwardingSimulator.PACKETS_PER_NODE * len(G))
+
+
+def test_validate_async_matches_validate():
+    G = _network('mesh', 1)
+    result, table = ForwardingSimulator.validate_async(G, packets=5_000).result()
+    expected = ForwardingSimulator.validate(G, packets=5_000)
+    for key in ('packets', 'delivered', 'black_holes', 'ttl_exceeded', 'misdelivered', 'routes', 'segments'):
+        assert result[key] == expected[key]
+    np.testing.assert_array_equal(table.next_hops, ForwardingCompiler.compile(G).next_hops)
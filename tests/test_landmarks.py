@@ -0,0 +1,63 @@
+"""
+Kiểm thử kiểm tra hợp lệ của chỉ mục ALT: khớp version -> dùng được, đồ thị đổi -> bị từ chối
+ngay (không so dấu vân tay mỗi lần hỏi), dựng lại ở nền -> dùng được và cho đúng đường ngắn nhất.
+"""
+import random
+
+import networkx as nx
+
+from algorithms import landmarks
+from algorithms.landmarks import LandmarkIndex
+from algorithms.routing import RoutingManager
+from utils.network_data import NetworkGenerator
+
+
+def _network():
+    random.seed(5)
+    return NetworkGenerator().generate_network('mesh', 3)
+
+
+def _count_fingerprints(monkeypatch):
+    calls = []
+    original = landmarks.graph_fingerprint
+    monkeypatch.setattr(landmarks, 'graph_fingerprint', lambda rep: calls.append(1) or original(rep))
+    return calls
+
+
+def test_stale_version_rejected_without_fingerprint(monkeypatch):
+    G = _network()
+    index = LandmarkIndex.build(G)
+    calls = _count_fingerprints(monkeypatch)
+    assert index.is_valid_for(G)
+    u, v = next(iter(G.edges()))
+    G[u][v]['weight'] = G[u][v]['weight'] + 7
+    assert not index.is_valid_for(G)
+    assert not index.is_valid_for(G)
+    assert calls == []
+
+
+def test_foreign_graph_checked_once_per_version(monkeypatch):
+    G = _network()
+    index = LandmarkIndex.build(nx.Graph(G))  # Dựng trên bản sao không có version
+    calls = _count_fingerprints(monkeypatch)
+    assert index.is_valid_for(G) and index.is_valid_for(G)
+    assert len(calls) == 1
+    u, v = next(iter(G.edges()))
+    G[u][v]['weight'] = G[u][v]['weight'] + 7
+    assert not index.is_valid_for(G) and not index.is_valid_for(G)
+    assert len(calls) == 1  # version đã khớp từ trước -> khác version bị từ chối ngay
+
+
+def test_rebuild_after_change_matches_dijkstra():
+    G = _network()
+    stale = LandmarkIndex.build(G)
+    u, v = next(iter(G.edges()))
+    G[u][v]['weight'] = G[u][v]['weight'] + 7
+    fresh = LandmarkIndex.build_async(G).result()
+    assert not stale.is_valid_for(G) and fresh.is_valid_for(G)
+    nodes = list(G.nodes())
+    rng = random.Random(0)
+    for _ in range(30):
+        s, t = rng.sample(nodes, 2)
+        expected = RoutingManager.find_shortest_path(G, s, t)[1]
+        assert RoutingManager.find_shortest_path_indexed(G, s, t, fresh)[1] == expected
@@ -0,0 +1,32 @@
+"""
+Kiểm thử mức sử dụng liên kết của PacketSimulator: chỉ tính thời gian truyền trong `duration`
+(không tính phần chạy nốt hàng đợi sau đó) nên luôn nằm trong [0, 1].
+"""
+import pytest
+
+from algorithms.packet_sim import PacketSimulator
+from utils.versioned_graph import VersionedGraph
+
+
+def _line():
+    G = VersionedGraph()
+    for n in 'ABC':
+        G.add_node(n, type='Router')
+    G.add_edge('A', 'B', weight=1, capacity=100)
+    G.add_edge('B', 'C', weight=1, capacity=100)
+    return G
+
+
+@pytest.mark.parametrize("arrivals", ['poisson', 'cbr'])
+def test_overloaded_link_utilization_capped(arrivals):
+    result = PacketSimulator.simulate(_line(), [('A', 'C', 150)], duration=0.2, arrivals=arrivals)
+    usage = {(u, v): util for u, v, util, _, _ in result['links']}
+    assert 0.99 < usage[('A', 'B')] <= 1.0
+    assert usage[('B', 'C')] <= 1.0
+    assert result['flows'][0]['dropped'] > 0
+
+
+def test_underloaded_link_utilization_matches_rate():
+    result = PacketSimulator.simulate(_line(), [('A', 'C', 50)], duration=0.2, arrivals='cbr')
+    usage = {(u, v): util for u, v, util, _, _ in result['links']}
+    assert usage[('A', 'B')] == pytest.approx(0.5, abs=0.01)
@@ -0,0 +1,71 @@
+"""
+Kiểm thử đường song song (pool tiến trình + SharedGraph) cho ra đúng kết quả của đường tuần tự.
+Ngưỡng PARALLEL_MIN_WORK được hạ về 0 để đồ thị nhỏ cũng đi qua pool.
+"""
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from algorithms.centrality import CentralityAnalyzer
+from algorithms.forwarding import ForwardingCompiler
+from algorithms.partitioning import ShardedAnalysis
+from utils.network_data import NetworkGenerator
+
+TOPOLOGIES = ('hierarchical', 'mesh', 'ring')
+
+
+@pytest.fixture
+def always_parallel(monkeypatch):
+    monkeypatch.setattr(CentralityAnalyzer, 'PARALLEL_MIN_WORK', 0)
+    monkeypatch.setattr(ForwardingCompiler, 'PARALLEL_MIN_WORK', 0)
+
+
+def _network(topo):
+    random.seed(5)
+    return NetworkGenerator().generate_network(topo, 3)
+
+
+@pytest.mark.parametrize("topo", TOPOLOGIES)
+@pytest.mark.parametrize("weight", ['weight', None])
+def test_betweenness_parallel_matches_sequential_and_networkx(always_parallel, topo, weight):
+    G = _network(topo)
+    sequential = CentralityAnalyzer.betweenness(G, weight=weight, exact=True, workers=1)['scores']
+    parallel = CentralityAnalyzer.betweenness(G, weight=weight, exact=True, workers=2)['scores']
+    expected = nx.betweenness_centrality(G, weight=weight, normalized=True)
+    for node in G:
+        assert parallel[node] == pytest.approx(sequential[node], abs=1e-12)
+        assert sequential[node] == pytest.approx(expected[node], abs=1e-9)
+
+
+@pytest.mark.parametrize("topo", TOPOLOGIES)
+def test_sampled_betweenness_parallel_matches_sequential(always_parallel, topo):
+    G = _network(topo)
+    sequential = CentralityAnalyzer.betweenness(G, exact=False, max_samples=40, workers=1)
+    parallel = CentralityAnalyzer.betweenness(G, exact=False, max_samples=40, workers=2)
+    assert parallel['samples'] == sequential['samples'] == 40
+    for node in G:
+        assert parallel['scores'][node] == pytest.approx(sequential['scores'][node], abs=1e-12)
+
+
+@pytest.mark.parametrize("topo", TOPOLOGIES)
+def test_fib_parallel_matches_sequential(always_parallel, topo):
+    G = _network(topo)
+    sequential = ForwardingCompiler.compile(G, workers=1)
+    parallel = ForwardingCompiler.compile(G, workers=2)
+    assert parallel.nodes == sequential.nodes
+    np.testing.assert_array_equal(parallel.keys, sequential.keys)
+    np.testing.assert_array_equal(parallel.next_hops, sequential.next_hops)
+
+
+@pytest.mark.parametrize("topo", TOPOLOGIES)
+def test_sharded_parallel_matches_sequential(topo):
+    G = _network(topo)
+    source = sorted(G.nodes())[0]
+    assert (ShardedAnalysis.connected_components(G, parts=4, workers=2)
+            == ShardedAnalysis.connected_components(G, parts=4, workers=1))
+    assert (ShardedAnalysis.bfs_layers(G, source, parts=4, workers=2)
+            == ShardedAnalysis.bfs_layers(G, source, parts=4, workers=1))
+    assert (ShardedAnalysis.region_audit(G, parts=4, workers=2)
+            == ShardedAnalysis.region_audit(G, parts=4, workers=1))
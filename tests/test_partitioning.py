@@ -0,0 +1,74 @@
+"""
+Kiểm thử đối chiếu ShardedAnalysis với networkx tuần tự trên đồ thị ngẫu nhiên
+(có thành phần rời, nút cô lập) và trên các tô pô của NetworkGenerator.
+"""
+import random
+
+import networkx as nx
+import pytest
+
+from algorithms.partitioning import GraphPartitioner, ShardedAnalysis
+from utils.network_data import NetworkGenerator
+
+
+def _random_graph(seed):
+    rng = random.Random(seed)
+    n = rng.randint(30, 300)
+    G = nx.gnm_random_graph(n, rng.randint(n // 2, 3 * n), seed=seed)
+    return nx.relabel_nodes(G, {v: f"N{v}" for v in G})
+
+
+def _graphs():
+    for seed in range(8):
+        yield f"gnm-{seed}", _random_graph(seed)
+    for topo in ('hierarchical', 'mesh', 'star', 'ring'):
+        random.seed(7)
+        yield topo, NetworkGenerator().generate_network(topo, 3)
+
+
+GRAPHS = list(_graphs())
+
+
+@pytest.mark.parametrize("name,G", GRAPHS, ids=[name for name, _ in GRAPHS])
+@pytest.mark.parametrize("parts", [2, 5])
+def test_partition_covers_every_node(name, G, parts):
+    partition = GraphPartitioner.partition(G, parts)
+    owned = [node for shard in partition.shards() for node in partition.shard_nodes(shard.index)]
+    assert sorted(owned) == sorted(G.nodes())
+    cut = sum(1 for u, v in G.edges() if partition.part_of(u) != partition.part_of(v))
+    assert partition.edge_cut == cut
+
+
+@pytest.mark.parametrize("name,G", GRAPHS, ids=[name for name, _ in GRAPHS])
+@pytest.mark.parametrize("parts", [2, 5])
+def test_connected_components_match_networkx(name, G, parts):
+    sharded = ShardedAnalysis.connected_components(G, parts=parts, workers=1)
+    expected = list(nx.connected_components(G))
+    assert sorted(map(sorted, sharded)) == sorted(map(sorted, expected))
+    assert [len(c) for c in sharded] == sorted((len(c) for c in expected), reverse=True)
+
+
+@pytest.mark.parametrize("name,G", GRAPHS, ids=[name for name, _ in GRAPHS])
+@pytest.mark.parametrize("parts", [2, 5])
+def test_bfs_layers_match_networkx(name, G, parts):
+    for source in random.Random(0).sample(sorted(G.nodes()), 3):
+        sharded = ShardedAnalysis.bfs_layers(G, source, parts=parts, workers=1)
+        expected = list(nx.bfs_layers(G, source))
+        assert [sorted(layer) for layer in sharded] == [sorted(layer) for layer in expected]
+
+
+def test_bfs_layers_unknown_source():
+    assert ShardedAnalysis.bfs_layers(nx.path_graph(5), 'missing', parts=2, workers=1) == []
+
+
+def test_shard_only_with_cached_partition(monkeypatch):
+    monkeypatch.setattr(ShardedAnalysis, 'SHARDED_MIN_NODES', 0)
+    random.seed(7)
+    G = NetworkGenerator().generate_network('mesh', 3)
+    assert ShardedAnalysis.shard_parts(G, workers=4) == 0  # Chưa có phân hoạch -> tuần tự
+    GraphPartitioner.partition(G, 3)
+    assert ShardedAnalysis.shard_parts(G, workers=4) == 3
+    assert ShardedAnalysis.shard_parts(G, workers=1) == 0
+    u, v = next(iter(G.edges()))
+    G[u][v]['weight'] = G[u][v]['weight'] + 1
+    assert ShardedAnalysis.shard_parts(G, workers=4) == 0  # Phân hoạch của version cũ không tính
@@ -0,0 +1,26 @@
+"""
+Kiểm thử định dạng báo cáo luồng: .jsonl là mỗi dòng một bản ghi, .json là MỘT mảng JSON hợp
+lệ chứa đúng các bản ghi đó.
+"""
+import json
+import random
+
+from utils.network_data import NetworkGenerator
+from utils.report_gen import ReportGenerator
+
+
+def test_json_is_single_array_matching_jsonl(tmp_path):
+    random.seed(13)
+    G = NetworkGenerator().generate_network('hierarchical', 2)
+    json_path, jsonl_path = str(tmp_path / "report.json"), str(tmp_path / "report.jsonl")
+    assert ReportGenerator.export_report(G, json_path)[0]
+    assert ReportGenerator.export_report(G, jsonl_path)[0]
+
+    with open(json_path, encoding='utf-8') as f:
+        records = json.load(f)
+    with open(jsonl_path, encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+
+    assert isinstance(records, list) and records[0]['kind'] == 'header'
+    strip = lambda rs: [{k: v for k, v in r.items() if k != 'generated'} for r in rs]
+    assert strip(records) == strip(lines)
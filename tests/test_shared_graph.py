@@ -0,0 +1,80 @@
+"""
+Kiểm thử vòng đời segment bộ nhớ chia sẻ: segment của SharedGraph.from_graph thuộc về đồ thị
+(bị xoá khi đồ thị đổi version, bị thu gom hoặc bị forget), segment của phân hoạch chỉ sống
+trong một phân tích.
+"""
+import gc
+import random
+
+import networkx as nx
+import pytest
+
+from algorithms.partitioning import GraphPartitioner, ShardedAnalysis
+from utils.network_data import NetworkGenerator
+from utils.result_cache import result_cache
+from utils.shared_graph import SharedGraph
+
+
+def _network():
+    random.seed(3)
+    return NetworkGenerator().generate_network('mesh', 2)
+
+
+def test_same_version_publishes_once():
+    G = _network()
+    shared = SharedGraph.from_graph(G, capacity=None)
+    assert SharedGraph.from_graph(G, capacity=None) is shared
+    assert SharedGraph.from_graph(G) is not shared  # Khác tham số -> segment khác
+
+
+def test_new_version_drops_old_segment():
+    G = _network()
+    old = SharedGraph.from_graph(G, capacity=None)
+    finalizer = old._finalizer
+    del old
+    u, v = next(iter(G.edges()))
+    G[u][v]['weight'] = 99
+    new = SharedGraph.from_graph(G, capacity=None)
+    assert not finalizer.alive
+    assert new._finalizer.alive
+
+
+def test_segment_released_with_graph():
+    G = _network()
+    finalizer = SharedGraph.from_graph(G, capacity=None)._finalizer
+    del G
+    gc.collect()
+    assert not finalizer.alive
+
+
+def test_forget_releases_without_waiting_for_gc():
+    G = _network()
+    finalizer = SharedGraph.from_graph(G, capacity=None)._finalizer
+    SharedGraph.forget(G)
+    assert not finalizer.alive
+
+
+def test_running_task_keeps_segment_alive():
+    G = _network()
+    shared = SharedGraph.from_graph(G, capacity=None)
+    SharedGraph.forget(G)
+    assert shared._finalizer.alive
+    assert SharedGraph.attach(shared.handle)['indptr'][-1] == 2 * G.number_of_edges()
+
+
+def test_plain_graph_is_not_retained():
+    H = nx.Graph(_network())
+    shared = SharedGraph.from_graph(H, capacity=None)
+    finalizer = shared._finalizer
+    assert SharedGraph.from_graph(H, capacity=None) is not shared
+    del shared
+    assert not finalizer.alive
+
+
+@pytest.mark.parametrize("analysis", ['connected_components', 'bfs_layers', 'region_audit'])
+def test_partition_segment_dropped_after_analysis(analysis):
+    G = _network()
+    args = (sorted(G.nodes())[0],) if analysis == 'bfs_layers' else ()
+    getattr(ShardedAnalysis, analysis)(G, *args, parts=3, workers=2)
+    assert GraphPartitioner.partition(G, 3)._shared is None
+    result_cache.invalidate_graph(G.graph_id)
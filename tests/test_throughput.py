@@ -0,0 +1,64 @@
+"""
+Kiểm thử đường rộng nhất từ một nguồn: băng thông tới mọi đích phải bằng cạnh hẹp nhất trên
+đường đi của cây khung cực đại (theo capacity), và cây `parent` dựng lại được đường như
+find_widest_path.
+"""
+import random
+
+import networkx as nx
+import pytest
+
+from algorithms.throughput import BandwidthAnalyzer
+from utils.network_data import NetworkGenerator
+
+
+def _random_graph(seed):
+    rng = random.Random(seed)
+    n = rng.randint(20, 120)
+    G = nx.gnm_random_graph(n, rng.randint(n, 3 * n), seed=seed)
+    for u, v in G.edges():
+        G[u][v]['capacity'] = rng.choice([10, 100, 1000, 10000, rng.randint(1, 5000)])
+    return nx.relabel_nodes(G, {v: f"N{v}" for v in G})
+
+
+def _graphs():
+    for seed in range(10):
+        yield f"gnm-{seed}", _random_graph(seed)
+    for topo in ('hierarchical', 'mesh', 'star', 'ring'):
+        random.seed(9)
+        yield topo, NetworkGenerator().generate_network(topo, 3)
+
+
+GRAPHS = list(_graphs())
+
+
+def _path_to(parent, target):
+    path = [target]
+    while parent[path[-1]] is not None:
+        path.append(parent[path[-1]])
+    return path[::-1]
+
+
+@pytest.mark.parametrize("name,G", GRAPHS, ids=[name for name, _ in GRAPHS])
+def test_widest_paths_match_maximum_spanning_tree(name, G):
+    tree = nx.maximum_spanning_tree(G, weight='capacity')
+    source = sorted(G.nodes())[0]
+    width, parent = BandwidthAnalyzer.widest_paths_from(G, source)
+    reachable = nx.node_connected_component(G, source) - {source}
+    assert set(width) == reachable
+    assert parent[source] is None
+    for target in reachable:
+        tree_path = nx.shortest_path(tree, source, target)
+        expected = min(tree[u][v]['capacity'] for u, v in zip(tree_path, tree_path[1:]))
+        path = _path_to(parent, target)
+        assert path[0] == source and path[-1] == target
+        assert width[target] == expected
+        assert min(G[u][v]['capacity'] for u, v in zip(path, path[1:])) == expected
+
+
+def test_matches_find_widest_path():
+    G = _random_graph(42)
+    source = sorted(G.nodes())[0]
+    width, _ = BandwidthAnalyzer.widest_paths_from(G, source)
+    for target in list(width)[:20]:
+        assert BandwidthAnalyzer.find_widest_path(G, source, target)[0] == width[target]
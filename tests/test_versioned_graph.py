@@ -0,0 +1,95 @@
+"""
+Kiểm thử VersionedGraph với các hàm networkx dựng đồ thị mới bằng G.__class__() rồi ghi
+thẳng dict thường vào G._node (relabel_nodes, convert_node_labels_to_integers...).
+"""
+import networkx as nx
+import pytest
+
+from utils.versioned_graph import VersionedGraph
+
+
+def _sample(columnar):
+    G = VersionedGraph(columnar=columnar)
+    G.add_node('R1', type='Router', ip='10.0.0.1')
+    G.add_node('PC1', type='PC')
+    G.add_edge('R1', 'PC1', weight=2, capacity=100, type='Ethernet')
+    G.add_edge('R1', 'R2', weight=5)
+    return G
+
+
+def _scan_node_types(G):
+    counts = {}
+    for _, t in G.nodes(data='type'):
+        counts[t] = counts.get(t, 0) + 1
+    return counts
+
+
+def _assert_consistent(H, G, mapping):
+    assert sorted(map(str, H.nodes())) == sorted(str(mapping.get(n, n)) for n in G)
+    for n, attrs in G.nodes(data=True):
+        assert dict(H.nodes[mapping.get(n, n)]) == dict(attrs)
+    for u, v, attrs in G.edges(data=True):
+        assert dict(H[mapping.get(u, u)][mapping.get(v, v)]) == dict(attrs)
+    # Chỉ mục theo loại phải khớp với dữ liệu thật
+    assert H.node_type_counts() == _scan_node_types(H)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_relabel_nodes_copy(columnar):
+    G = _sample(columnar)
+    mapping = {'R1': 'core-1'}
+    H = nx.relabel_nodes(G, mapping)
+    _assert_consistent(H, G, mapping)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_relabel_nodes_in_place(columnar):
+    G = _sample(columnar)
+    expected = G.copy()
+    nx.relabel_nodes(G, {'R1': 'core-1'}, copy=False)
+    _assert_consistent(G, expected, {'R1': 'core-1'})
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_convert_node_labels_to_integers(columnar):
+    G = _sample(columnar)
+    H = nx.convert_node_labels_to_integers(G, label_attribute='name')
+    assert sorted(H.nodes()) == [0, 1, 2]
+    assert {H.nodes[i]['name'] for i in H} == set(G.nodes())
+    assert H.node_type_counts() == _scan_node_types(H)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_edge_subgraph_copy(columnar):
+    G = _sample(columnar)
+    H = G.edge_subgraph([('R1', 'PC1')]).copy()
+    assert set(H.nodes()) == {'R1', 'PC1'}
+    assert dict(H['R1']['PC1']) == {'weight': 2, 'capacity': 100, 'type': 'Ethernet'}
+    assert H.edge_type_counts() == {'Ethernet': 1}
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_foreign_node_dict_is_tracked(columnar):
+    G = _sample(columnar)
+    events = []
+    G.add_listener(events.append)
+    version = G.version
+    G._node['PC1'] = {'type': 'Server'}
+    assert G.version > version
+    assert G.nodes_of_type('Server') == {'PC1'}
+    assert 'PC1' not in G.nodes_of_type('PC')
+    assert ('node_attr', 'PC1', 'type', 'PC', 'Server') in events
+    # Dict sau khi nhận về vẫn theo dõi thay đổi
+    version = G.version
+    G.nodes['PC1']['weight'] = 3
+    assert G.version > version
+
+
+def test_pickle_round_trip_keeps_tracking():
+    import pickle
+    G = _sample(False)
+    H = pickle.loads(pickle.dumps(G))
+    version = H.version
+    H._node['R2'] = {'type': 'Switch'}
+    assert H.version > version
+    assert H.nodes_of_type('Switch') == {'R2'}
@@ -1,5 +1,8 @@
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTextEdit, QPushButton, QLabel
+import itertools
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTextEdit, QPushButton, QLabel,
+                             QListView, QLineEdit, QFileDialog, QMessageBox, QApplication)
 from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
 
 class AuditReportDialog(QDialog):
     """
@@ -49,6 +52,46 @@ class AuditReportDialog(QDialog):
         else:
             bridges_text = "\n[OK] Không phát hiện điểm yếu đơn lẻ (cầu) nào.\n"
 
+        critical_text = ""
+        if data.get("critical_nodes"):
+            info = data.get("centrality", {})
+            accuracy = ("chính xác" if info.get("exact")
+                        else f"ước lượng {info.get('samples')} mẫu, sai số ±{info.get('epsilon', 0):.3f} "
+                             f"với độ tin cậy {1 - info.get('delta', 0.05):.0%}")
+            critical_text = f"\n[-] THIẾT BỊ TRỌNG YẾU (BETWEENNESS, {accuracy}):\n"
+            for rank, (node, n_type, score) in enumerate(data["critical_nodes"], 1):
+                critical_text += f"    {rank:>2}. {node:<14} {n_type:<8} {score:.4f}\n"
+            if not info.get("exact"):
+                critical_text += (f"    Thứ tự chắc chắn: {info.get('confident_ranks', 0)}/{len(data['critical_nodes'])} hạng đầu"
+                                  f"{'' if info.get('top_certain') else '; hạng cuối có thể đổi với thiết bị ngoài danh sách'}\n")
+        elif not data.get("centrality"):
+            critical_text = "\n[-] THIẾT BỊ TRỌNG YẾU: chưa tính (dùng Kiểm Toán Chuyên Sâu)\n"
+
+        regions_text = ""
+        if data.get("regions"):
+            regions_text = "\n[-] KIỂM TOÁN THEO VÙNG (PHÂN HOẠCH TỐI THIỂU CẠNH CẮT):\n"
+            for r in data["regions"]:
+                regions_text += (f"    Vùng {r['region']}: {r['nodes']} thiết bị, {r['internal_edges']} liên kết nội vùng, "
+                                 f"{r['cut_edges']} liên kết biên, {r['components']} phân mảnh, {r['bridges']} cầu\n")
+
+        spectral_text = ""
+        spec = data.get("spectral")
+        if spec and spec.get("nodes", 0) >= 2:
+            scope = "" if spec["scope"] == "graph" else f" (thành phần lớn nhất: {spec['nodes']} thiết bị)"
+            cut = spec["fiedler_cut"]
+            gap_note = "" if spec["spectral_gap_converged"] else " (ước lượng - λ1, λ2 gần trùng)"
+            resistance_note = ("chính xác" if not spec["effective_resistance_error"]
+                               else f"±{spec['effective_resistance_error']:.1%}")
+            spectral_text = (
+                f"    Liên thông đại số λ2: {spec['algebraic_connectivity']:.6g}{scope}\n"
+                f"    Lát cắt Fiedler:      {cut['cut_edges']} liên kết tách {cut['sizes'][0]} / {cut['sizes'][1]} thiết bị\n"
+                f"    Khoảng cách phổ:      {spec['spectral_gap']:.4g}{gap_note}\n"
+                f"    Điện trở hiệu dụng:   {spec['effective_resistance']:.4g} "
+                f"(TB {spec['mean_resistance']:.4g}/cặp, {resistance_note})\n"
+            )
+        elif "spectral" in data and not spec:
+            spectral_text = "    Chỉ số phổ (λ2, điện trở hiệu dụng): chưa tính (dùng Kiểm Toán Chuyên Sâu)\n"
+
         return (
             f"========================================\n"
             f"TRẠNG THÁI AN TOÀN MẠNG: [{status}]\n"
@@ -58,8 +101,135 @@ class AuditReportDialog(QDialog):
             f"    Số phân mảnh mạng:    {data['connected_components']}\n"
             f"\n[-] CHỈ SỐ PHỤC HỒI (RESILIENCE):\n"
             f"    Kết nối trung bình: {data['average_redundancy']:.2f} liên kết/thiết bị\n"
-            f"{bridges_text}\n"
+            f"{spectral_text}"
+            f"{bridges_text}"
+            f"{critical_text}"
+            f"{regions_text}\n"
             f"========================================\n"
             f"KHUYẾN NGHỊ:\n"
             f"{'Cần thêm các liên kết dự phòng để tăng độ tin cậy.' if not data['is_connected'] or data['critical_links'] else 'Mạng đang hoạt động ổn định.'}"
-        )
\ No newline at end of file
+        )
+
+
+class StreamRowModel(QAbstractListModel):
+    """
+    Model ảo hoá cho ResultStream: nạp hàng thô theo từng lô khi cuộn tới
+    (canFetchMore/fetchMore) và chỉ định dạng chuỗi cho các hàng đang hiển thị (data()).
+    """
+    BATCH_SIZE = 2000
+
+    def __init__(self, stream, parent=None):
+        super().__init__(parent)
+        self.stream = stream
+        self._rows = []
+        self._source = stream.iter_rows()
+        self._exhausted = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return self.stream.format_row(self._rows[index.row()])
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        batch = list(itertools.islice(self._source, self.BATCH_SIZE))
+        if len(batch) < self.BATCH_SIZE:
+            self._exhausted = True
+        if batch:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(batch) - 1)
+            self._rows.extend(batch)
+            self.endInsertRows()
+
+    def is_exhausted(self):
+        return self._exhausted
+
+
+class ResultStreamDialog(QDialog):
+    """
+    Cửa sổ xem kết quả phân tích lớn (DFS, Euler, biểu diễn đồ thị...).
+    Dùng QListView + model ảo hoá thay cho một QTextEdit chứa chuỗi khổng lồ,
+    có tìm kiếm và xuất file dạng luồng.
+    """
+    def __init__(self, title, stream, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(700, 500)
+        self.stream = stream
+        self.setStyleSheet("""
+            QDialog { background-color: #0A0A0A; border: 1px solid #00FF00; }
+            QLabel { color: #00FF00; font-weight: bold; font-size: 16px; }
+            QListView { background-color: #111; color: #00FF00; font-family: 'Consolas'; font-size: 12px; border: none; }
+            QListView::item:selected { background-color: #003300; }
+            QLineEdit { background-color: #111; color: #00FF00; border: 1px solid #555; padding: 5px; }
+            QPushButton { background-color: #003300; color: #00FF00; border: 1px solid #00FF00; padding: 10px; }
+            QPushButton:hover { background-color: #00FF00; color: #000000; }
+        """)
+
+        layout = QVBoxLayout(self)
+
+        lbl_title = QLabel(f"/// {title.upper()} ///")
+        layout.addWidget(lbl_title)
+
+        # Thanh tìm kiếm
+        search_layout = QHBoxLayout()
+        self.txt_search = QLineEdit()
+        self.txt_search.setPlaceholderText("Tìm kiếm...")
+        self.txt_search.returnPressed.connect(self.on_find_next)
+        btn_find = QPushButton("Tìm Tiếp")
+        btn_find.clicked.connect(self.on_find_next)
+        search_layout.addWidget(self.txt_search)
+        search_layout.addWidget(btn_find)
+        layout.addLayout(search_layout)
+
+        # Danh sách hàng ảo hoá
+        self.model = StreamRowModel(stream, self)
+        self.list_view = QListView()
+        self.list_view.setUniformItemSizes(True)  # Không phải đo từng hàng
+        self.list_view.setModel(self.model)
+        layout.addWidget(self.list_view)
+
+        btn_layout = QHBoxLayout()
+        btn_export = QPushButton("XUẤT FILE")
+        btn_export.clicked.connect(self.on_export)
+        btn_close = QPushButton("ĐÃ HIỂU")
+        btn_close.clicked.connect(self.accept)
+        btn_layout.addWidget(btn_export)
+        btn_layout.addWidget(btn_close)
+        layout.addLayout(btn_layout)
+
+    def on_find_next(self):
+        """Tìm hàng tiếp theo chứa từ khoá, nạp thêm hàng từ luồng khi cần."""
+        needle = self.txt_search.text().strip().lower()
+        if not needle:
+            return
+        current = self.list_view.currentIndex()
+        row = current.row() + 1 if current.isValid() else 0
+        while True:
+            total = self.model.rowCount()
+            while row < total:
+                if needle in self.model.stream.format_row(self.model._rows[row]).lower():
+                    index = self.model.index(row)
+                    self.list_view.setCurrentIndex(index)
+                    self.list_view.scrollTo(index, QListView.ScrollHint.PositionAtCenter)
+                    return
+                row += 1
+            if self.model.is_exhausted():
+                break
+            self.model.fetchMore()
+            QApplication.processEvents()  # Giữ giao diện phản hồi khi quét luồng dài
+        QMessageBox.information(self, "Tìm kiếm", f"Không tìm thấy '{self.txt_search.text()}'.")
+
+    def on_export(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Xuất Kết Quả", "analysis_result.txt", "Text (*.txt)")
+        if file_path:
+            ok, msg = self.stream.write_to(file_path)
+            if ok: QMessageBox.information(self, "Thành công", f"Đã xuất {msg} ra {file_path}")
+            else: QMessageBox.critical(self, "Lỗi", msg)
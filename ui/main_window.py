@@ -1,17 +1,27 @@
+import itertools
+import logging
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QLabel, QFrame, QMessageBox, QComboBox, 
-                             QGroupBox, QFileDialog, QMenuBar, QMenu, QTextEdit, QScrollArea)
+                             QGroupBox, QFileDialog, QMenuBar, QMenu, QTextEdit, QScrollArea,
+                             QInputDialog, QApplication)
 from PyQt6.QtGui import QAction
 from PyQt6.QtCore import Qt, QTimer
 
 # Import Views
 from ui.network_canvas import NetworkCanvas
-from ui.dialogs import AuditReportDialog
+from ui.scene_canvas import SceneCanvas
+from ui.dialogs import AuditReportDialog, ResultStreamDialog
 
 # Import Models & Utils
 from utils.network_data import NetworkGenerator
 from utils.file_io import FileManager
 from utils.report_gen import ReportGenerator
+from utils.instrumentation import tracer
+from utils.result_stream import ResultStream
+from utils.telemetry import TelemetryIngestor
+from utils.topology_history import TopologyHistory
+from utils.result_cache import result_cache
+from utils.shared_graph import SharedGraph
 
 # Import Algorithms (Core & Academic)
 from algorithms.routing import RoutingManager
@@ -20,8 +30,20 @@ from algorithms.throughput import BandwidthAnalyzer
 from algorithms.auditing import NetworkAuditor
 from algorithms.stp import STPManager
 from algorithms.graph_theory import GraphTheoryManager # <--- NEW IMPORT
+from algorithms.landmarks import LandmarkIndex
+from algorithms.forwarding import ForwardingSimulator, DELIVERED, BLACK_HOLE
+from algorithms.packet_sim import PacketSimulator
 
 class MainWindow(QMainWindow):
+    ALT_PATH_COUNT = 5  # Số đường ngắn nhất hiển thị trong "Đường Dự Phòng"
+    ALT_INDEX_MIN_NODES = 2000  # Từ cỡ này trở lên mới dựng chỉ mục ALT cho Dò Đường
+    ALT_REBUILD_DELAY_MS = 2000  # Đồ thị đổi -> dựng lại chỉ mục ALT sau nhịp này (gộp nhiều thay đổi)
+    PACKET_SIM_SECONDS = 0.2        # Thời gian mô phỏng gói tin (giây lưu lượng)
+    PACKET_SIM_FLOWS = 20           # Số luồng nền ngẫu nhiên chạy cùng luồng Nguồn -> Đích
+    PACKET_SIM_RATE_MBPS = 200      # Tốc độ mỗi luồng
+    TELEMETRY_INTERVAL_MS = 500  # Nhịp áp dụng lô telemetry (tối đa 1 lần tính lại / nhịp)
+    BACKGROUND_POLL_MS = 200     # Nhịp kiểm tra tác vụ nền (kiểm toán chuyên sâu, kiểm tra FIB) đã xong chưa
+
     def __init__(self):
         super().__init__()
 
@@ -68,6 +90,25 @@ class MainWindow(QMainWindow):
         self.acad_logic = GraphTheoryManager()
 
         self.current_graph = None 
+        self.history = None  # Lịch sử thay đổi của current_graph (mốc + delta)
+
+        # Chỉ mục ALT (landmark) cho truy vấn đường đi trên đồ thị lớn, dựng ở luồng nền
+        self.alt_index = None
+        self._alt_future = None
+        self._alt_rebuild_timer = QTimer()
+        self._alt_rebuild_timer.setSingleShot(True)
+        self._alt_rebuild_timer.timeout.connect(self._rebuild_alt_index)
+
+        # Tác vụ nền đang chạy: tiêu đề -> future (mỗi loại chỉ chạy một lần tại một thời điểm)
+        self._background_jobs = {}
+
+        # Telemetry: luồng nền gộp mẫu, timer áp dụng theo lô trên luồng giao diện
+        self.telemetry = None
+        self.telemetry_timer = QTimer()
+        self.telemetry_timer.timeout.connect(self._apply_telemetry)
+        # Phân tích gần nhất để chạy lại khi telemetry đổi thuộc tính nó phụ thuộc:
+        # (hàm, tập thuộc tính cạnh)
+        self._last_analysis = None
         
         # Animation State
         self.simulation_timer = QTimer()
@@ -111,10 +152,28 @@ class MainWindow(QMainWindow):
         
         file_menu.addSeparator()
 
-        action_export = QAction("Xuất Báo Cáo (.txt)", self) # Đã Việt hóa
-        action_export.setShortcut("Ctrl+E")
-        action_export.triggered.connect(self.on_export_report)
-        file_menu.addAction(action_export)
+        self.action_export = QAction("Xuất Báo Cáo (.txt)", self) # Đã Việt hóa
+        self.action_export.setShortcut("Ctrl+E")
+        self.action_export.triggered.connect(self.on_export_report)
+        file_menu.addAction(self.action_export)
+
+        file_menu.addSeparator()
+
+        action_snapshot = QAction("Tạo Mốc Tô Pô", self)
+        action_snapshot.triggered.connect(self.on_create_snapshot)
+        file_menu.addAction(action_snapshot)
+
+        action_compare = QAction("So Sánh Với Mốc Tô Pô...", self)
+        action_compare.triggered.connect(self.on_compare_snapshot)
+        file_menu.addAction(action_compare)
+
+        action_telemetry = QAction("Kết Nối Telemetry Trực Tiếp...", self)
+        action_telemetry.triggered.connect(self.on_connect_telemetry)
+        file_menu.addAction(action_telemetry)
+
+        action_telemetry_stop = QAction("Ngắt Telemetry", self)
+        action_telemetry_stop.triggered.connect(self.on_disconnect_telemetry)
+        file_menu.addAction(action_telemetry_stop)
         
         file_menu.addSeparator()
         
@@ -140,6 +199,10 @@ class MainWindow(QMainWindow):
         action_reps.triggered.connect(self.on_view_representations)
         acad_menu.addAction(action_reps)
 
+        action_reps_npz = QAction("Xuất Biểu diễn Thưa CSR/COO (.npz)", self)
+        action_reps_npz.triggered.connect(self.on_export_representations)
+        acad_menu.addAction(action_reps_npz)
+
         acad_menu.addSeparator()
 
         # 7.4 & 7.5 Euler
@@ -147,11 +210,37 @@ class MainWindow(QMainWindow):
         action_euler.triggered.connect(self.on_find_euler)
         acad_menu.addAction(action_euler)
 
+        # === 3. Performance Menu (Đo hiệu năng / Tracing) ===
+        perf_menu = menu_bar.addMenu("HIỆU NĂNG")
+
+        self.action_tracing = QAction("Bật Đo Thời Gian (Tracing)", self)
+        self.action_tracing.setCheckable(True)
+        self.action_tracing.setChecked(tracer.enabled)
+        self.action_tracing.toggled.connect(self.on_toggle_tracing)
+        perf_menu.addAction(self.action_tracing)
+
+        action_trace_export = QAction("Xuất Chrome Trace (.json)", self)
+        action_trace_export.triggered.connect(self.on_export_trace)
+        perf_menu.addAction(action_trace_export)
+
+        action_trace_reset = QAction("Xoá Dữ Liệu Đo", self)
+        action_trace_reset.triggered.connect(lambda: tracer.reset())
+        perf_menu.addAction(action_trace_reset)
+
+        # === 4. View Menu (Bộ vẽ) ===
+        view_menu = menu_bar.addMenu("HIỂN THỊ")
+
+        self.action_scene_renderer = QAction("Bộ Vẽ Qt Scene (Đồ Thị Lớn, Bắt Chuột)", self)
+        self.action_scene_renderer.setCheckable(True)
+        self.action_scene_renderer.toggled.connect(self.on_toggle_scene_renderer)
+        view_menu.addAction(self.action_scene_renderer)
+
     def _init_layout(self):
         """Khởi tạo bố cục chính (Đã thêm Thanh Cuộn)."""
         main_widget = QWidget()
         self.setCentralWidget(main_widget)
         main_layout = QHBoxLayout(main_widget)
+        self.main_layout = main_layout
         main_layout.setContentsMargins(5, 5, 5, 5)
         main_layout.setSpacing(5)
 
@@ -219,6 +308,11 @@ class MainWindow(QMainWindow):
         self.btn_audit.setStyleSheet("color: #00FF00; border: 1px dashed #00FF00;")
         self.btn_audit.clicked.connect(self.on_run_audit)
         l_topo.addWidget(self.btn_audit)
+
+        self.btn_deep_audit = QPushButton("Kiểm Toán Chuyên Sâu (Chạy Nền)")
+        self.btn_deep_audit.setStyleSheet("color: #00FF00; border: 1px dashed #00FF00;")
+        self.btn_deep_audit.clicked.connect(self.on_run_deep_audit)
+        l_topo.addWidget(self.btn_deep_audit)
         
         g_topo.setLayout(l_topo)
         panel_layout.addWidget(g_topo)
@@ -245,6 +339,29 @@ class MainWindow(QMainWindow):
         h_btn_layout.addWidget(self.btn_trace)
         h_btn_layout.addWidget(self.btn_bw)
         l_ops.addLayout(h_btn_layout)
+
+        l_ops.addWidget(QLabel("Chế độ Băng Thông:"))
+        self.combo_bw_mode = QComboBox()
+        self.combo_bw_mode.addItems([
+            "Đường Rộng Nhất (1 đường)",
+            "Luồng Cực Đại (Max Flow)"
+        ])
+        l_ops.addWidget(self.combo_bw_mode)
+
+        self.btn_alt = QPushButton("Đường Dự Phòng (K-Shortest / ECMP)")
+        self.btn_alt.setStyleSheet("color: #FF00FF; border: 1px solid #FF00FF;")
+        self.btn_alt.clicked.connect(self.on_alternate_paths)
+        l_ops.addWidget(self.btn_alt)
+
+        self.btn_fib = QPushButton("Kiểm Tra Chuyển Tiếp (FIB / LPM)")
+        self.btn_fib.setStyleSheet("color: #00BFFF; border: 1px solid #00BFFF;")
+        self.btn_fib.clicked.connect(self.on_check_forwarding)
+        l_ops.addWidget(self.btn_fib)
+
+        self.btn_packet_sim = QPushButton("Mô Phỏng Gói Tin (Hàng Đợi)")
+        self.btn_packet_sim.setStyleSheet("color: #FFD700; border: 1px solid #FFD700;")
+        self.btn_packet_sim.clicked.connect(self.on_simulate_packets)
+        l_ops.addWidget(self.btn_packet_sim)
         
         g_ops.setLayout(l_ops)
         panel_layout.addWidget(g_ops)
@@ -288,6 +405,29 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(scroll_area)
         main_layout.addWidget(self.canvas, stretch=1)
 
+    def on_toggle_scene_renderer(self, enabled):
+        """Đổi bộ vẽ giữa matplotlib (NetworkCanvas) và QGraphicsScene (SceneCanvas), giữ layout + overlay."""
+        old = self.canvas
+        new = SceneCanvas() if enabled else NetworkCanvas()
+        new.current_pos = old.current_pos
+        new.overlay = old.overlay
+        if enabled:
+            new.hovered.connect(lambda text: self.statusBar().showMessage(text, 3000))
+            new.node_clicked.connect(self.on_canvas_node_clicked)
+            new.edge_clicked.connect(lambda edge: self._set_status(new.describe_edge(*edge)))
+        self.main_layout.replaceWidget(old, new)
+        old.deleteLater()
+        self.canvas = new
+        if self.current_graph is not None:
+            new.draw_network(self.current_graph, keep_layout=True)
+        self._set_status(f"Bộ vẽ: {'Qt Scene' if enabled else 'Matplotlib'}")
+
+    def on_canvas_node_clicked(self, node):
+        """Nhấp vào node trên SceneCanvas: chọn làm nguồn (Shift: làm đích) và hiện thông tin."""
+        combo = self.combo_target if QApplication.keyboardModifiers() & Qt.KeyboardModifier.ShiftModifier else self.combo_source
+        combo.setCurrentText(str(node))
+        self._set_status(self.canvas.describe_node(node))
+
     # --- EVENT HANDLERS (CORE) ---
 
     def on_generate_network(self):
@@ -310,11 +450,22 @@ class MainWindow(QMainWindow):
         
         # Gọi hàm sinh mạng mới trong NetworkGenerator
         # (Đảm bảo bạn đã cập nhật file utils/network_data.py trước đó)
-        self.current_graph = self.generator.generate_network(topo_key)
+        self._replace_graph(self.generator.generate_network(topo_key))
         
         # Cập nhật giao diện
         self._refresh_ui_data()
-        self.lbl_stats.setText(f"Đã khởi tạo mạng ({topo_type_text}). Sẵn sàng chờ lệnh.") # Đã Việt hóa
+        self._set_status(f"Đã khởi tạo mạng ({topo_type_text}). Sẵn sàng chờ lệnh.") # Đã Việt hóa
+
+    def _replace_graph(self, G, topology_path=None):
+        """Thay current_graph: bỏ kết quả cache của đồ thị cũ, gắn lịch sử + chỉ mục ALT mới."""
+        old = self.current_graph
+        if old is not None and old is not G:
+            result_cache.invalidate_graph(old.graph_id)
+            SharedGraph.forget(old)
+        self.current_graph = G
+        self._last_analysis = None
+        self._start_history()
+        self._prepare_alt_index(topology_path)
 
     def _refresh_ui_data(self):
         """Vẽ lại đồ thị và cập nhật ComboBox."""
@@ -329,6 +480,146 @@ class MainWindow(QMainWindow):
                 c.addItems(nodes)
                 c.blockSignals(False)
 
+    def _prepare_alt_index(self, topology_path=None):
+        """
+        Chuẩn bị chỉ mục ALT cho đồ thị hiện tại (chỉ với đồ thị lớn): ưu tiên đọc file
+        .alt.npz đi kèm file tô pô, nếu không có/không khớp thì dựng lại ở luồng nền.
+        """
+        self.alt_index, self._alt_future = None, None
+        self._alt_rebuild_timer.stop()
+        G = self.current_graph
+        if G is None or G.number_of_nodes() < self.ALT_INDEX_MIN_NODES:
+            return
+        if topology_path:
+            self.alt_index, _ = FileManager.load_landmark_index(G, topology_path)
+            if self.alt_index is not None:
+                return
+        self._alt_future = LandmarkIndex.build_async(G)
+
+    def _graph_changed(self):
+        """
+        Gọi sau mỗi lần current_graph đổi tại chỗ (telemetry, chỉnh sửa): hẹn dựng lại chỉ mục
+        ALT ở luồng nền. Hẹn một lần cho cả loạt thay đổi (không dời hẹn theo từng thay đổi,
+        nên telemetry liên tục vẫn được dựng lại mỗi ALT_REBUILD_DELAY_MS).
+        """
+        G = self.current_graph
+        if G is None or G.number_of_nodes() < self.ALT_INDEX_MIN_NODES:
+            return
+        if not self._alt_rebuild_timer.isActive():
+            self._alt_rebuild_timer.start(self.ALT_REBUILD_DELAY_MS)
+
+    def _rebuild_alt_index(self):
+        """Dựng chỉ mục ALT cho version hiện tại; lần dựng trước chưa xong thì hẹn lại."""
+        G = self.current_graph
+        if G is None:
+            return
+        if self._alt_future is not None and not self._alt_future.done():
+            self._alt_rebuild_timer.start(self.ALT_REBUILD_DELAY_MS)
+            return
+        self._current_alt_index()  # Nhận kết quả lần dựng trước (nếu có) trước khi thay future
+        index = self.alt_index
+        if index is not None and index.graph_key == (G.graph_id, G.version):
+            return
+        self._alt_future = LandmarkIndex.build_async(G)
+
+    def _current_alt_index(self):
+        """
+        Chỉ mục ALT mới nhất đã dựng xong, hoặc None. Không kiểm tra còn khớp đồ thị hay không:
+        nơi dùng tự kiểm tra đúng một lần (find_shortest_path_indexed, lưu file).
+        """
+        if self._alt_future is not None and self._alt_future.done():
+            try:
+                self.alt_index = self._alt_future.result()
+            except Exception as e:
+                logging.error(f"ALT Build Error: {str(e)}")
+            self._alt_future = None
+        return self.alt_index
+
+    def _start_history(self):
+        """Gắn lịch sử tô pô mới cho current_graph (bỏ lịch sử của đồ thị cũ)."""
+        if self.history is not None:
+            self.history.detach()
+        self.history = TopologyHistory(self.current_graph) if self.current_graph is not None else None
+
+    def on_create_snapshot(self):
+        if self.history is None:
+            return
+        snap_id = self.history.snapshot()
+        self._set_status(f"[LỊCH SỬ TÔ PÔ]\nĐã tạo mốc #{snap_id} (version {self.current_graph.version}).")
+
+    def on_compare_snapshot(self):
+        """So sánh trạng thái hiện tại với một mốc đã chọn (chỉ xét phần bị thay đổi)."""
+        if self.history is None:
+            return
+        snaps = self.history.snapshots()
+        labels = [f"#{s['id']} {s['label']} ({s['pending_events']} thay đổi tới nay)" for s in snaps]
+        choice, ok = QInputDialog.getItem(self, "So Sánh Tô Pô", "Chọn mốc:", labels, 0, False)
+        if not ok:
+            return
+        snap = snaps[labels.index(choice)]
+        diff = self.history.diff(snap['id'])
+        stream = ResultStream.from_text(
+            "So Sánh Tô Pô",
+            "\n".join([f"Mốc #{snap['id']} ({snap['label']}) -> hiện tại"] + TopologyHistory.format_diff(diff)))
+        self._show_academic_result("So Sánh Tô Pô", stream)
+
+    def on_connect_telemetry(self):
+        """Kết nối nguồn telemetry (file / pipe / socket) và bắt đầu áp dụng theo lô."""
+        source, ok = QInputDialog.getText(
+            self, "Telemetry",
+            "Nguồn số liệu liên kết (đường dẫn file/pipe, tcp://host:port, unix:///path):")
+        if not ok or not source.strip():
+            return
+        self.on_disconnect_telemetry()
+        ingestor = TelemetryIngestor(source.strip())
+        ok, msg = ingestor.start()
+        if not ok:
+            QMessageBox.critical(self, "Lỗi", msg)
+            return
+        self.telemetry = ingestor
+        self.telemetry_timer.start(self.TELEMETRY_INTERVAL_MS)
+        self.statusBar().showMessage(f"Telemetry: đang nhận từ {source.strip()}")
+
+    def on_disconnect_telemetry(self):
+        self.telemetry_timer.stop()
+        if self.telemetry is not None:
+            self.telemetry.stop()
+            self.statusBar().showMessage(f"Telemetry: đã ngắt ({self.telemetry.received} mẫu)")
+            self.telemetry = None
+
+    def _apply_telemetry(self):
+        """
+        Nhịp timer: lấy lô đã gộp, ghi vào đồ thị (một lần tăng version) và chỉ chạy lại
+        phân tích gần nhất khi lô đổi đúng thuộc tính nó phụ thuộc. Tính lại + vẽ lại
+        do đó xảy ra tối đa một lần mỗi TELEMETRY_INTERVAL_MS.
+        """
+        ingestor = self.telemetry
+        if ingestor is None:
+            return
+        if not ingestor.running:
+            self.on_disconnect_telemetry()
+        batch = ingestor.drain()
+        if not batch or self.current_graph is None:
+            return
+
+        changed, attrs, missing = TelemetryIngestor.apply_batch(self.current_graph, batch)
+        if changed:
+            self._graph_changed()
+        if changed and self.history is not None:
+            # Một mốc cuốn chiếu cho telemetry (không tạo mốc mới mỗi nhịp 500 ms)
+            self.history.rolling_snapshot("Telemetry (mới nhất)")
+        self.statusBar().showMessage(
+            f"Telemetry: {ingestor.received} mẫu, lô {len(batch)} liên kết, "
+            f"{len(changed)} thay đổi, {missing} không khớp tô pô")
+        if changed and self._last_analysis and (attrs & self._last_analysis[1]):
+            self._last_analysis[0]()
+
+    def _set_status(self, text):
+        """Cập nhật khung Log. Khi bật tracing, kèm theo các phép đo thời gian gần nhất."""
+        if tracer.enabled:
+            text += f"\n\n[ĐO HIỆU NĂNG - GẦN NHẤT]\n{tracer.format_recent()}"
+        self.lbl_stats.setText(text)
+
     def reset_visual_state(self):
         """Hàm trung tâm để dọn dẹp giao diện về trạng thái mặc định."""
         # Dừng animation virus nếu đang chạy
@@ -341,44 +632,169 @@ class MainWindow(QMainWindow):
         self.infected_history.clear()
         
         if self.current_graph:
-            # Khôi phục màu sắc và kích thước mặc định cho NODE
-            for node, data in self.current_graph.nodes(data=True):
-                n_type = data.get('type', 'PC')
-                # Màu mặc định theo loại
-                if n_type == 'PC': color = '#D3D3D3'; size = 250
-                elif n_type == 'Switch': color = '#00BFFF'; size = 350
-                elif n_type == 'Router': color = '#FF4500'; size = 450
-                elif n_type == 'Server': color = '#32CD32'; size = 300 # Thêm Server
-                else: color = '#FFFFFF'; size = 300
-                
-                self.current_graph.nodes[node]['color'] = color
-                self.current_graph.nodes[node]['size'] = size
-            
-            # Khôi phục mặc định cho CẠNH (Edge)
-            for u, v, data in self.current_graph.edges(data=True):
-                # Xóa màu đặc biệt (virus/highlight)
-                if 'color' in data:
-                    del data['color'] 
-                # Xóa trạng thái STP
-                if 'stp_state' in data:
-                    del data['stp_state']
-
-            # Vẽ lại đồ thị sạch sẽ (giữ nguyên vị trí)
-            self.canvas.draw_network(self.current_graph, keep_layout=True)
-            self.lbl_stats.setText("Đã đặt lại trạng thái hiển thị. Sẵn sàng.") # Đã Việt hóa
+            # Trạng thái hiển thị nằm trong overlay của canvas: xoá O(1), chỉ vẽ lại phần đã tô
+            self.canvas.clear_overlay()
+            self._set_status("Đã đặt lại trạng thái hiển thị. Sẵn sàng.") # Đã Việt hóa
 
     def on_trace_route(self):
         self.reset_visual_state() # <--- THÊM DÒNG NÀY
         src, dst = self.combo_source.currentText(), self.combo_target.currentText()
         if src == dst or not src: return
         
-        path, lat = self.router_logic.find_shortest_path(self.current_graph, src, dst)
+        self._last_analysis = (self.on_trace_route, {'weight'})
+        path, lat = self.router_logic.find_shortest_path_indexed(
+            self.current_graph, src, dst, self._current_alt_index())
         if path:
             self.canvas.highlight_path(path)
-            self.lbl_stats.setText(f"[KẾT QUẢ ĐỊNH TUYẾN]\nĐường đi: {' -> '.join(path)}\nTổng độ trễ: {lat} ms") # Đã Việt hóa
+            self._set_status(f"[KẾT QUẢ ĐỊNH TUYẾN]\nĐường đi: {' -> '.join(path)}\nTổng độ trễ: {lat} ms") # Đã Việt hóa
         else:
             QMessageBox.warning(self, "Không thể tới", "Không tìm thấy đường đi giữa các nút đã chọn.") # Đã Việt hóa
 
+    def on_alternate_paths(self):
+        """Liệt kê đường dự phòng: K đường ngắn nhất + toàn bộ đường ECMP (sinh lười)."""
+        self.reset_visual_state()
+        src, dst = self.combo_source.currentText(), self.combo_target.currentText()
+        if src == dst or not src or not dst:
+            QMessageBox.warning(self, "Lỗi", "Vui lòng chọn Nút Nguồn và Nút Đích khác nhau.")
+            return
+
+        G = self.current_graph
+        k_paths = list(itertools.islice(self.router_logic.iter_k_shortest_paths(G, src, dst), self.ALT_PATH_COUNT))
+        if not k_paths:
+            QMessageBox.warning(self, "Không thể tới", "Không tìm thấy đường đi giữa các nút đã chọn.")
+            return
+        self.canvas.highlight_path(k_paths[0][0])
+
+        n_ecmp = self.router_logic.count_ecmp_paths(G, src, dst)
+        header = [f"Từ: {src}  ->  Đến: {dst}",
+                  f"Số đường ECMP (cùng chi phí nhỏ nhất {k_paths[0][1]} ms): {n_ecmp}",
+                  "",
+                  f"--- {len(k_paths)} đường ngắn nhất (không lặp) ---"]
+        header += [f"#{i}  [{cost} ms, {len(path) - 1} hop]  {' -> '.join(path)}"
+                   for i, (path, cost) in enumerate(k_paths, 1)]
+        header += ["", "--- Các đường ECMP ---"]
+
+        stream = ResultStream(
+            "Đường Dự Phòng",
+            row_factory=lambda: enumerate(self.router_logic.iter_ecmp_paths(G, src, dst), 1),
+            formatter=lambda row: f"ECMP #{row[0]}  {' -> '.join(row[1][0])}",
+            header=header, total_rows=n_ecmp,
+        )
+        self._set_status(f"[ĐƯỜNG DỰ PHÒNG]\nĐường chính: {' -> '.join(k_paths[0][0])}\n"
+                         f"Số đường ECMP: {n_ecmp}")
+        self._show_academic_result("Đường Dự Phòng", stream)
+
+    def _run_background(self, title, future, button, on_done):
+        """
+        Theo dõi một tác vụ nền: khoá nút bấm, kiểm tra định kỳ trên luồng giao diện, xong thì
+        gọi on_done(future) - trừ khi sơ đồ đã bị thay trong lúc chạy (kết quả không còn khớp).
+        """
+        G = self.current_graph
+        self._background_jobs[title] = future
+        button.setEnabled(False)
+        self._set_status(f"[{title}]\nĐang tính trên luồng nền...")
+
+        def poll():
+            if not future.done():
+                QTimer.singleShot(self.BACKGROUND_POLL_MS, poll)
+                return
+            del self._background_jobs[title]
+            button.setEnabled(True)
+            if G is not self.current_graph:
+                self._set_status(f"[{title}]\nĐã bỏ kết quả: sơ đồ đã được thay trong lúc tính.")
+                return
+            on_done(future)
+        QTimer.singleShot(self.BACKGROUND_POLL_MS, poll)
+
+    def on_check_forwarding(self):
+        """
+        Biên dịch FIB của mọi thiết bị, đẩy một lô gói ngẫu nhiên (số gói theo cỡ mạng) và dò gói
+        Nguồn -> Đích. Biên dịch + kiểm chứng chạy trên luồng nền.
+        """
+        G = self.current_graph
+        if G is None or G.number_of_nodes() == 0 or "CHUYỂN TIẾP GÓI" in self._background_jobs:
+            return
+        self.reset_visual_state()
+        self._run_background("CHUYỂN TIẾP GÓI", ForwardingSimulator.validate_async(G), self.btn_fib,
+                             self._show_forwarding_check)
+
+    def _show_forwarding_check(self, future):
+        try:
+            result, table = future.result()
+        except ValueError as e:
+            self._set_status("[CHUYỂN TIẾP GÓI]\nKhông thể biên dịch FIB.")
+            QMessageBox.warning(self, "Không thể biên dịch FIB", str(e))
+            return
+
+        lines = [f"Tuyến: {result['routes']:,}  |  Đoạn sau nén: {result['segments']:,}  "
+                 f"({result['fib_bytes'] / 1e6:.2f} MB)"]
+        if not result['addresses_from_graph']:
+            lines.append("Địa chỉ IP trong đồ thị thiếu hoặc trùng -> dùng kế hoạch địa chỉ tự sinh")
+        lines += [f"Gói thử: {result['packets']:,}  ({result['lookups_per_sec'] / 1e6:.1f} triệu tra cứu/giây)",
+                  f"  Tới đích: {result['delivered']:,} (trung bình {result['mean_hops']:.2f} chặng)",
+                  f"  Black hole: {result['black_holes']:,}",
+                  f"  Hết TTL (vòng lặp): {result['ttl_exceeded']:,}",
+                  f"  Giao nhầm nút: {result['misdelivered']:,}"]
+        if result['black_hole_spots']:
+            lines += ["", "--- Điểm huỷ gói nhiều nhất (thiết bị -> đích) ---"]
+            lines += [f"{router} -> {target}: {count:,} gói" for router, target, count in result['black_hole_spots']]
+
+        src, dst = self.combo_source.currentText(), self.combo_target.currentText()
+        if src and dst and src != dst and src in table.index and dst in table.index:
+            address = table.address_of(dst).split('/')[0]
+            hops, status = ForwardingSimulator.trace(table, src, address)
+            verdict = {DELIVERED: "tới đích", BLACK_HOLE: "bị huỷ (black hole)"}.get(status, "hết TTL")
+            lines += ["", f"--- Dò gói {src} ({table.address_of(src)}) -> {dst} ({address}): {verdict} ---"]
+            lines += [f"{node}: khớp {prefix or 'không có tuyến'} -> {hop}" for node, prefix, hop in hops]
+            if status == DELIVERED:
+                self.canvas.highlight_path([node for node, _, _ in hops])
+
+        self._set_status(f"[CHUYỂN TIẾP GÓI]\nTới đích: {result['delivered']:,}/{result['packets']:,}\n"
+                         f"Black hole: {result['black_holes']:,} | Vòng lặp: {result['ttl_exceeded']:,}")
+        self._show_academic_result("Kiểm Tra Bảng Chuyển Tiếp", "\n".join(lines))
+
+    def on_simulate_packets(self):
+        """Mô phỏng sự kiện rời rạc: luồng Nguồn -> Đích cùng các luồng nền, báo độ trễ / mất gói."""
+        self.reset_visual_state()
+        G = self.current_graph
+        if G is None or G.number_of_nodes() < 2:
+            return
+        flows = PacketSimulator.random_flows(G, self.PACKET_SIM_FLOWS, self.PACKET_SIM_RATE_MBPS)
+        src, dst = self.combo_source.currentText(), self.combo_target.currentText()
+        if src and dst and src != dst:
+            flows.insert(0, (src, dst, self.PACKET_SIM_RATE_MBPS))
+        try:
+            result = PacketSimulator.simulate(G, flows, duration=self.PACKET_SIM_SECONDS)
+        except ValueError as e:
+            QMessageBox.warning(self, "Không thể mô phỏng", str(e))
+            return
+
+        flows = result['flows']
+        sent = sum(f['sent'] for f in flows)
+        dropped = sum(f['dropped'] for f in flows)
+        lines = [f"{len(flows)} luồng x {self.PACKET_SIM_RATE_MBPS} Mbps trong {self.PACKET_SIM_SECONDS} s "
+                 f"| {result['events']:,} sự kiện ({result['events_per_sec'] / 1e6:.2f} triệu/giây)",
+                 f"Gói gửi: {sent:,} | Mất: {dropped:,} ({dropped / sent:.2%})" if sent else "Không có gói nào",
+                 "", "--- Từng luồng (độ trễ ms: trung bình / p50 / p99 / max) ---"]
+        for f in flows:
+            head = f"{f['src']} -> {f['dst']}: "
+            if not f['routable']:
+                lines.append(head + "không có đường (black hole)")
+            elif f['latency_ms'] is None:
+                lines.append(head + f"mất toàn bộ {f['dropped']:,} gói")
+            else:
+                lat = f['latency_ms']
+                lines.append(head + f"{lat['mean']:.3f} / {lat['p50']:.3f} / {lat['p99']:.3f} / {lat['max']:.3f}"
+                             f"  | mất {f['loss']:.2%}")
+        lines += ["", "--- Liên kết bận nhất (mức sử dụng, hàng đợi dài nhất, gói bị huỷ) ---"]
+        lines += [f"{u} -> {v}: {util:.1%}, {peak} gói, huỷ {drops:,}" for u, v, util, peak, drops in result['links']]
+        if result['truncated']:
+            lines.append("(Dừng sớm do chạm trần số sự kiện)")
+
+        self._set_status(f"[MÔ PHỎNG GÓI TIN]\nGói gửi: {sent:,} | Mất: {dropped:,}\n"
+                         f"{result['events']:,} sự kiện")
+        self._show_academic_result("Mô Phỏng Gói Tin", "\n".join(lines))
+
     def on_analyze_bandwidth(self):
         self.reset_visual_state() # Dọn dẹp giao diện
         
@@ -389,43 +805,73 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Lỗi", "Vui lòng chọn Nút Nguồn và Nút Đích khác nhau.")
             return
 
-        # 1. Tính toán Băng thông tối đa (Logic Toán học)
-        max_flow, _ = self.bandwidth_logic.analyze_max_bandwidth(self.current_graph, src, dst)
-
-        # 2. Tìm đường đi ngắn nhất để làm minh họa (Visual)
-        # (Chúng ta cần một đường dẫn hợp lệ để vẽ lên bản đồ, tránh lỗi vẽ cạnh không tồn tại)
-        path, _ = self.router_logic.find_shortest_path(self.current_graph, src, dst)
+        self._last_analysis = (self.on_analyze_bandwidth, {'capacity'})
 
-        # 3. Vẽ đường minh họa lên Canvas
-        if path:
+        # Chế độ đường rộng nhất: một lần duyệt cho cả băng thông, đường đi và điểm nghẽn
+        if self.combo_bw_mode.currentIndex() == 0:
+            width, path, bottleneck = self.bandwidth_logic.find_widest_path(self.current_graph, src, dst)
+            if not path:
+                QMessageBox.warning(self, "Không thể tới", "Không tìm thấy đường đi giữa các nút đã chọn.")
+                return
             self.canvas.highlight_path(path)
-        
-        # 4. Hiển thị kết quả tính toán
-        self.lbl_stats.setText(f"[KIỂM TRA BĂNG THÔNG]\nTừ: {src}\nĐến: {dst}\nDung lượng tối đa: {max_flow} Mbps")
+            self._set_status(f"[ĐƯỜNG RỘNG NHẤT]\nTừ: {src}\nĐến: {dst}\n"
+                             f"Đường đi: {' -> '.join(path)}\n"
+                             f"Băng thông đơn đường: {width} Mbps\n"
+                             f"Liên kết nghẽn: {bottleneck[0]} - {bottleneck[1]}")
+            return
+
+        # 1. Max Flow + phân rã luồng + lát cắt cực tiểu trong một lần tính
+        flow = self.bandwidth_logic.analyze_flow_paths(self.current_graph, src, dst)
+
+        # 2. Tô màu đúng các cạnh mang luồng theo mức sử dụng (một lần vẽ gộp)
+        edge_colors = {
+            edge: self.bandwidth_logic.get_utilization_color(f, cap)
+            for edge, (f, cap) in flow['edge_flow'].items()
+        }
+        self.canvas.highlight_flow(edge_colors, flow['cut_edges'], (src, dst))
+
+        # 3. Hiển thị kết quả tính toán
+        lines = [f"[KIỂM TRA BĂNG THÔNG]", f"Từ: {src}", f"Đến: {dst}",
+                 f"Dung lượng tối đa: {flow['value']} Mbps",
+                 f"Số đường luồng: {len(flow['paths'])}"]
+        lines += [f"  {f} Mbps: {' -> '.join(p)}" for p, f in flow['paths'][:self.ALT_PATH_COUNT]]
+        if len(flow['paths']) > self.ALT_PATH_COUNT:
+            lines.append(f"  ... còn {len(flow['paths']) - self.ALT_PATH_COUNT} đường")
+        lines.append("Liên kết nghẽn (lát cắt cực tiểu): "
+                     + (", ".join(f"{u}-{v}" for u, v in flow['cut_edges']) or "không có"))
+        self._set_status("\n".join(lines))
 
     def on_run_stp(self):
         self.reset_visual_state() # <--- THÊM DÒNG NÀY
+        self._last_analysis = (self.on_run_stp, {'weight'})
         active, blocked = self.stp_logic.compute_spanning_tree(self.current_graph)
         
-        # Xóa trạng thái STP cũ (nếu có)
-        for u, v, d in self.current_graph.edges(data=True):
-            d.pop('stp_state', None)
-
-        # Gán trạng thái STP mới vào thuộc tính của cạnh
-        for u, v in active:
-            self.current_graph[u][v]['stp_state'] = 'forwarding'
-        for u, v in blocked:
-            self.current_graph[u][v]['stp_state'] = 'blocking'
-        
-        # Yêu cầu canvas vẽ lại với dữ liệu đồ thị đã được cập nhật
-        self.canvas.draw_network(self.current_graph, keep_layout=True)
-        self.lbl_stats.setText(f"[CHẾ ĐỘ STP]\nLiên kết Hoạt động: {len(active)}\nLiên kết Bị chặn: {len(blocked)}\nĐã thực thi cấu trúc không vòng lặp.") # Đã Việt hóa
+        # Tô trạng thái STP lên overlay (reset_visual_state đã xoá trạng thái cũ)
+        overlay = self.canvas.overlay
+        overlay.set_edges(active, color='#00FF00', width=2.0)
+        overlay.set_edges(blocked, color='#FF0000', width=1.0, style='dashed')
+        self.canvas.render_overlay()
+        self._set_status(f"[CHẾ ĐỘ STP]\nLiên kết Hoạt động: {len(active)}\nLiên kết Bị chặn: {len(blocked)}\nĐã thực thi cấu trúc không vòng lặp.") # Đã Việt hóa
 
     def on_run_audit(self):
+        # Chỉ các kiểm tra tuyến tính -> chạy ngay trên luồng giao diện
         report = self.auditor_logic.perform_full_audit(self.current_graph)
         dialog = AuditReportDialog(report, self)
         dialog.exec()
 
+    def on_run_deep_audit(self):
+        """Kiểm toán kèm xếp hạng betweenness, kiểm toán theo vùng và chỉ số phổ trên luồng nền; xong thì mở báo cáo."""
+        G = self.current_graph
+        if G is None or "KIỂM TOÁN CHUYÊN SÂU" in self._background_jobs:
+            return
+        self._run_background("KIỂM TOÁN CHUYÊN SÂU", self.auditor_logic.audit_async(G, **NetworkAuditor.DEEP_AUDIT),
+                             self.btn_deep_audit, self._show_deep_audit)
+
+    def _show_deep_audit(self, future):
+        self._set_status("[KIỂM TOÁN CHUYÊN SÂU]\nHoàn tất.")
+        dialog = AuditReportDialog(future.result(), self)
+        dialog.exec()
+
     def on_simulate_virus(self):
         self.reset_visual_state() # <--- THÊM DÒNG NÀY
         start_node = self.combo_virus.currentText()
@@ -433,20 +879,20 @@ class MainWindow(QMainWindow):
         
         self.infection_steps = self.virus_logic.simulate_spread(self.current_graph, start_node)
         if self.infection_steps:
-            self.canvas.draw_network(self.current_graph) # Reset visual
             self.current_step_index = 0
             self.infected_history.clear() # <--- THÊM DÒNG NÀY (Reset lịch sử)
-            self.lbl_stats.setText(f"⚠️ PHÁT HIỆN VIRUS TẠI {start_node}!") # Đã Việt hóa
+            self._set_status(f"⚠️ PHÁT HIỆN VIRUS TẠI {start_node}!") # Đã Việt hóa
             self.simulation_timer.start(500)
 
     def run_simulation_step(self):
         """Thực hiện một bước mô phỏng lây lan virus."""
         if self.current_step_index >= len(self.infection_steps):
             self.simulation_timer.stop()
-            self.lbl_stats.setText("MẠNG ĐÃ BỊ XÂM NHẬP HOÀN TOÀN. Mô phỏng kết thúc.") # Đã Việt hóa
+            self._set_status("MẠNG ĐÃ BỊ XÂM NHẬP HOÀN TOÀN. Mô phỏng kết thúc.") # Đã Việt hóa
             return
 
         newly_infected_nodes = self.infection_steps[self.current_step_index]
+        overlay = self.canvas.overlay
         
         # Xử lý cho bước > 0 (Không phải Patient Zero)
         if self.current_step_index > 0:
@@ -459,41 +905,33 @@ class MainWindow(QMainWindow):
                     if neighbor in self.infected_history:
                         # Đánh dấu cạnh nối giữa chúng là màu ĐỎ
                         if self.current_graph.has_edge(neighbor, new_node):
-                            self.current_graph[neighbor][new_node]['color'] = '#FF0000'
+                            overlay.set_edge(neighbor, new_node, color='#FF0000', width=3.0)
 
         # Tô màu ĐỎ cho các node mới nhiễm và thêm vào lịch sử
         for node in newly_infected_nodes:
-            self.current_graph.nodes[node]['color'] = '#FF0000' # Red
-            self.current_graph.nodes[node]['size'] = 600 # Phình to ra
+            overlay.set_node(node, color='#FF0000', size=600) # Red, phình to ra
             self.infected_history.add(node) # Ghi nhận đã nhiễm
             
-        # Vẽ lại đồ thị với màu sắc mới (cả node và edge)
-        self.canvas.draw_network(self.current_graph, keep_layout=True)
+        # Chỉ vẽ lại các node/cạnh vừa đổi màu
+        self.canvas.render_overlay()
         
         nodes_str = ", ".join(newly_infected_nodes)
-        self.lbl_stats.setText(f"Bước {self.current_step_index + 1}: Virus đang lây lan sang {nodes_str}...") # Đã Việt hóa
+        self._set_status(f"Bước {self.current_step_index + 1}: Virus đang lây lan sang {nodes_str}...") # Đã Việt hóa
         self.current_step_index += 1
 
     # --- EVENT HANDLERS (ACADEMIC TOOLS) ---
 
     def _show_academic_result(self, title, content):
-        """Hàm hỗ trợ hiển thị kết quả học thuật bằng Dialog."""
-        # Tận dụng AuditReportDialog nhưng thay đổi dữ liệu đầu vào một chút
-        # Vì AuditReportDialog mong đợi một dict, ta "hack" nhẹ để nó hiển thị text raw
-        dummy_report = {
-            "is_connected": False, "connected_components": 0, "critical_links": [], "average_redundancy": 0
-        }
-        dialog = AuditReportDialog(dummy_report, self)
-        dialog.setWindowTitle(title)
-        # Ghi đè nội dung text trực tiếp
-        dialog.txt_content.setText(content)
+        """Hàm hỗ trợ hiển thị kết quả học thuật (chuỗi hoặc ResultStream) bằng trình xem ảo hoá."""
+        stream = content if isinstance(content, ResultStream) else ResultStream.from_text(title, content)
+        dialog = ResultStreamDialog(title, stream, self)
         dialog.exec()
 
     def on_run_dfs(self):
         """Xử lý yêu cầu duyệt DFS."""
         # Lấy nút đang chọn ở Source làm nút bắt đầu DFS
         start_node = self.combo_source.currentText()
-        result = self.acad_logic.run_dfs(self.current_graph, start_node)
+        result = self.acad_logic.dfs_stream(self.current_graph, start_node)
         self._show_academic_result("Kết quả duyệt DFS", result) # Đã Việt hóa
 
     def on_check_bipartite(self):
@@ -503,21 +941,49 @@ class MainWindow(QMainWindow):
 
     def on_view_representations(self):
         """Xử lý xem các biểu diễn đồ thị."""
-        result = self.acad_logic.get_representations(self.current_graph)
+        result = self.acad_logic.representations_stream(self.current_graph)
         self._show_academic_result("Biểu diễn Đồ thị", result) # Đã Việt hóa
 
+    def on_export_representations(self):
+        """Xuất biểu diễn thưa (CSR/COO) ra file .npz cho xử lý số học bên ngoài."""
+        file_path, _ = QFileDialog.getSaveFileName(self, "Xuất Biểu diễn Thưa", "graph_sparse.npz", "NumPy (*.npz)")
+        if file_path:
+            ok, msg = self.acad_logic.export_representations(self.current_graph, file_path)
+            if ok: self._set_status(f"Đã xuất biểu diễn thưa: {file_path}")
+            else: QMessageBox.critical(self, "Lỗi", msg)
+
     def on_find_euler(self):
         """Xử lý tìm chu trình Euler."""
-        result = self.acad_logic.find_eulerian(self.current_graph)
+        result = self.acad_logic.euler_stream(self.current_graph)
         self._show_academic_result("Phân tích Đường đi/Chu trình Euler", result) # Đã Việt hóa
 
+    # --- PERFORMANCE TRACING ---
+
+    def on_toggle_tracing(self, checked):
+        if checked:
+            tracer.enable()
+            self._set_status("Đã bật đo thời gian. Các thao tác tiếp theo sẽ được ghi lại.")
+        else:
+            tracer.disable()
+            self._set_status("Đã tắt đo thời gian.")
+
+    def on_export_trace(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Xuất Chrome Trace", "netgraph_trace.json", "JSON (*.json)")
+        if file_path:
+            ok, msg = tracer.export_chrome_trace(file_path)
+            if ok: self._set_status(f"Đã xuất trace: {file_path}\n(Mở bằng chrome://tracing hoặc Perfetto)")
+            else: QMessageBox.critical(self, "Lỗi", msg)
+
     # --- FILE OPERATIONS ---
 
     def on_save_file(self):
         file_path, _ = QFileDialog.getSaveFileName(self, "Lưu Sơ Đồ", "network_config.json", "JSON (*.json)") # Đã Việt hóa
         if file_path:
             ok, msg = FileManager.save_network_to_json(self.current_graph, file_path)
-            if ok: self.lbl_stats.setText(f"Đã lưu: {file_path}") # Đã Việt hóa
+            index = self._current_alt_index()
+            if ok and index is not None and index.is_valid_for(self.current_graph):
+                FileManager.save_landmark_index(index, file_path)
+            if ok: self._set_status(f"Đã lưu: {file_path}") # Đã Việt hóa
             else: QMessageBox.critical(self, "Lỗi", msg) # Đã Việt hóa
 
     def on_open_file(self):
@@ -526,17 +992,26 @@ class MainWindow(QMainWindow):
             G, msg = FileManager.load_network_from_json(file_path)
             if G:
                 self.reset_visual_state() # <--- THÊM DÒNG NÀY
-                self.current_graph = G
+                self._replace_graph(G, file_path)
                 self._refresh_ui_data()
-                self.lbl_stats.setText(f"Đã tải: {file_path}") # Đã Việt hóa
+                self._set_status(f"Đã tải: {file_path}") # Đã Việt hóa
             else:
                 QMessageBox.critical(self, "Lỗi", msg) # Đã Việt hóa
 
     def on_export_report(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, "Xuất Báo Cáo", "audit_log.txt", "Text (*.txt)") # Đã Việt hóa
-        if file_path:
-            # Truyền self.current_graph vào hàm get_topology_stats
-            stats = self.generator.get_topology_stats(self.current_graph) # <--- SỬA DÒNG NÀY
-            audit = self.auditor_logic.perform_full_audit(self.current_graph)
-            ok, msg = ReportGenerator.export_summary(self.current_graph, stats, audit, file_path)
-            if ok: QMessageBox.information(self, "Thành công", f"Đã xuất báo cáo ra {file_path}") # Đã Việt hóa
\ No newline at end of file
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Xuất Báo Cáo", "audit_log.txt",
+            "Text (*.txt);;JSON Lines (*.jsonl);;JSON (*.json);;CSV (*.csv);;HTML (*.html)") # Đã Việt hóa
+        if file_path and self.current_graph is not None and "XUẤT BÁO CÁO" not in self._background_jobs:
+            # Định dạng chọn theo phần mở rộng; JSONL/CSV/HTML được ghi theo luồng. Chạy trên luồng
+            # nền, báo cáo .txt dùng lại kết quả Kiểm Toán Chuyên Sâu của cùng version nếu đã có
+            self._run_background("XUẤT BÁO CÁO", ReportGenerator.export_async(self.current_graph, file_path),
+                                 self.action_export, lambda future: self._show_export_result(future, file_path))
+
+    def _show_export_result(self, future, file_path):
+        ok, msg = future.result()
+        if ok:
+            self._set_status(f"[XUẤT BÁO CÁO]\nĐã xuất: {file_path}")
+            QMessageBox.information(self, "Thành công", f"Đã xuất báo cáo ra {file_path}") # Đã Việt hóa
+        else:
+            QMessageBox.critical(self, "Lỗi", msg)
\ No newline at end of file
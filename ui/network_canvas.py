@@ -5,7 +5,11 @@ import matplotlib.patheffects as path_effects
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 import numpy as np
 from matplotlib.figure import Figure
+from matplotlib.colors import to_rgba, to_rgba_array
 from PyQt6.QtWidgets import QWidget, QVBoxLayout
+from utils.instrumentation import traced, tracer
+from utils.versioned_graph import node_type_groups
+from ui.visual_overlay import VisualOverlay
 
 # --- CẤU HÌNH HÌNH DÁNG (MATPLOTLIB MARKERS) ---
 SHAPE_MAP = {
@@ -15,9 +19,28 @@ SHAPE_MAP = {
     'PC': 'o',
 }
 
+# --- LỚP NỀN: (màu, kích thước) theo loại thiết bị, (màu, độ dày) theo loại cáp ---
+# Trạng thái phân tích (virus, STP...) không ghi vào đồ thị mà nằm trong VisualOverlay.
+NODE_STYLES = {
+    'Router': ('#FF4500', 450),  # Orange Red
+    'Switch': ('#00BFFF', 350),  # Deep Sky Blue
+    'Server': ('#32CD32', 300),  # Lime Green
+    'PC': ('#D3D3D3', 250),      # Light Gray
+}
+DEFAULT_NODE_STYLE = ('#FFFFFF', 300)
+EDGE_STYLES = {
+    'Fiber': ('#00FFFF', 2.0),   # Cáp quang - Cyan
+}
+DEFAULT_EDGE_STYLE = ('#AAAAAA', 1.5)  # Cáp Ethernet - xám sáng
+
+
 class NetworkCanvas(QWidget):
     """
     Widget vẽ đồ thị với Cyberpunk style clean và tối ưu hiển thị.
+
+    `draw_network` dựng lớp nền (layout, cạnh, node, nhãn) một lần; trạng thái hiển thị của
+    các phân tích nằm trong `self.overlay` (VisualOverlay). `render_overlay()` chỉ cập nhật
+    màu/kích thước của các phần tử thay đổi trên các collection đã vẽ, không dựng lại hình.
     """
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -42,144 +65,232 @@ class NetworkCanvas(QWidget):
         self.current_pos = None
         self.highlight_artists = []
 
+        # 3. Overlay + các lớp nền có thể sửa tại chỗ
+        self.overlay = VisualOverlay()
+        self._edge_layer = None   # dict: artist, colors, base_colors, widths, base_widths, styles, touched
+        self._edge_slots = {}     # (u, v) -> chỉ số trong lớp cạnh
+        self._node_layers = []    # mỗi loại thiết bị một lớp: artist, colors, base_colors, sizes, ...
+        self._node_slots = {}     # node -> (chỉ số lớp, chỉ số trong lớp)
+
+    @traced("canvas.draw_network", cat='render')
     def draw_network(self, G, keep_layout=False):
         """Vẽ mạng với Cyberpunk style clean và tối giản."""
         try:
-            self.clear_highlights()
+            self.clear_highlights(redraw=False)
             self.ax.clear()
             self.ax.axis('off')
             self.current_G = G
+            self._edge_layer, self._edge_slots = None, {}
+            self._node_layers, self._node_slots = [], {}
 
             if G is None or G.number_of_nodes() == 0:
                 self.canvas.draw()
                 return
 
             # 1. Layout Logic - Tối ưu độ giãn
-            if not keep_layout or self.current_pos is None:
-                num_nodes = G.number_of_nodes()
-                if num_nodes > 0:
-                    k_val = 2.8 / np.sqrt(num_nodes)  # Tăng độ giãn
-                else:
-                    k_val = 0.5
+            with tracer.span("canvas.layout", cat='render'):
+                if not keep_layout or self.current_pos is None:
+                    num_nodes = G.number_of_nodes()
+                    if num_nodes > 0:
+                        k_val = 2.8 / np.sqrt(num_nodes)  # Tăng độ giãn
+                    else:
+                        k_val = 0.5
                 
-                self.current_pos = nx.spring_layout(
-                    G, seed=42, k=k_val, iterations=150, scale=2.8
-                )
-            else:
-                unplaced = [n for n in G.nodes() if n not in self.current_pos]
-                if unplaced:
-                    new_pos = nx.spring_layout(
-                        G, pos=self.current_pos, 
-                        fixed=list(self.current_pos.keys())
+                    self.current_pos = nx.spring_layout(
+                        G, seed=42, k=k_val, iterations=150, scale=2.8
                     )
-                    self.current_pos.update(new_pos)
+                else:
+                    unplaced = [n for n in G.nodes() if n not in self.current_pos]
+                    if unplaced:
+                        new_pos = nx.spring_layout(
+                            G, pos=self.current_pos, 
+                            fixed=list(self.current_pos.keys())
+                        )
+                        self.current_pos.update(new_pos)
             
             pos = self.current_pos
 
             # --- LAYER 1: DÂY CÁP (EDGES) - ZORDER=1 ---
-            edge_colors = []
-            edge_widths = []
-            edge_styles = []
-            for u, v, d in G.edges(data=True):
-                # Ưu tiên 1: Màu đặc biệt (giữ nguyên)
-                if d.get('color'):
-                    edge_colors.append(d.get('color'))
-                    edge_widths.append(3.0 if d.get('color') == '#FF0000' else 1.5)
-                elif d.get('stp_state') == 'forwarding':
-                    edge_colors.append('#00FF00')
-                    edge_widths.append(2.0)
-                elif d.get('stp_state') == 'blocking':
-                    edge_colors.append('#FF0000')
-                    edge_widths.append(1.0)
-                # Ưu tiên 2: Cáp quang (Fiber) - Giữ nguyên Cyan
-                elif d.get('type') == 'Fiber':
-                    edge_colors.append('#00FFFF')
-                    edge_widths.append(2.0)
-                # Mặc định: Cáp Ethernet (Cải tiến màu và độ dày)
-                else:
-                    # Thay #555555 (xám tối) bằng #AAAAAA (xám sáng hơn nhiều)
-                    edge_colors.append('#AAAAAA')
-                    # Tăng độ dày lên chút
-                    edge_widths.append(1.5)
-                edge_styles.append(
-                    'dashed' if d.get('stp_state') == 'blocking'
-                    else d.get('style', 'solid')
-                )
-            nx.draw_networkx_edges(
-                G, pos, ax=self.ax,
-                edge_color=edge_colors,
-                width=edge_widths,
-                style=edge_styles,
-                # Tăng độ trong suốt chung lên 0.9 (từ 0.8)
-                alpha=0.9
-            )
+            with tracer.span("canvas.edges", cat='render'):
+                edgelist, edge_colors, edge_widths = [], [], []
+                for u, v, e_type in G.edges(data='type'):
+                    color, width = EDGE_STYLES.get(e_type, DEFAULT_EDGE_STYLE)
+                    self._edge_slots[(u, v)] = len(edgelist)
+                    edgelist.append((u, v))
+                    edge_colors.append(color)
+                    edge_widths.append(width)
+                if edgelist:
+                    artist = nx.draw_networkx_edges(
+                        G, pos, ax=self.ax,
+                        edgelist=edgelist,
+                        edge_color=edge_colors,
+                        width=edge_widths,
+                        # Tăng độ trong suốt chung lên 0.9 (từ 0.8)
+                        alpha=0.9
+                    )
+                    base_colors = to_rgba_array(edge_colors)
+                    base_widths = np.asarray(edge_widths, dtype=float)
+                    self._edge_layer = {
+                        'artist': artist,
+                        'colors': base_colors.copy(), 'base_colors': base_colors,
+                        'widths': base_widths.copy(), 'base_widths': base_widths,
+                        'styles': ['solid'] * len(edgelist),
+                        'touched': set(),
+                    }
 
-            # --- LAYER 2: NODES (Thiết bị) - Neon colors ---
-            node_groups = {}
-            for node, data in G.nodes(data=True):
-                n_type = data.get('type', 'PC')
-                if n_type not in node_groups:
-                    node_groups[n_type] = []
-                node_groups[n_type].append(node)
-
-            # Màu Cyberpunk neon cho từng loại thiết bị
-            DEFAULT_COLORS = {
-                'Router': '#FF00FF',   # Magenta neon
-                'Switch': '#00D9FF',   # Cyan neon
-                'Server': '#FF0055',   # Pink neon
-                'PC': '#00FF41',       # Matrix green
-            }
-
-            for n_type, nodes_in_group in node_groups.items():
-                shape = SHAPE_MAP.get(n_type, 'o')
-                default_color = DEFAULT_COLORS.get(n_type, '#FFFFFF')
-                
-                colors = [
-                    G.nodes[n].get('color', default_color) 
-                    for n in nodes_in_group
-                ]
-                sizes = [
-                    G.nodes[n].get('size', 450)  # Tăng size một chút
-                    for n in nodes_in_group
-                ]
-
-                nx.draw_networkx_nodes(
-                    G, pos, ax=self.ax,
-                    nodelist=nodes_in_group,
-                    node_shape=shape,
-                    node_color=colors,
-                    node_size=sizes,
-                    edgecolors='#FFFFFF',  # Viền trắng sáng
-                    linewidths=2.0,
-                    alpha=0.9
-                )
+            # --- LAYER 2: NODES (Thiết bị) - Màu theo loại ---
+            with tracer.span("canvas.nodes", cat='render'):
+                # Nhóm theo loại lấy từ chỉ mục của đồ thị (node không có type vẽ như PC)
+                node_groups = {}
+                for n_type, nodes_in_group in node_type_groups(G).items():
+                    node_groups.setdefault('PC' if n_type is None else n_type, []).extend(nodes_in_group)
+
+                for n_type, nodes_in_group in node_groups.items():
+                    shape = SHAPE_MAP.get(n_type, 'o')
+                    color, size = NODE_STYLES.get(n_type, DEFAULT_NODE_STYLE)
+                    artist = nx.draw_networkx_nodes(
+                        G, pos, ax=self.ax,
+                        nodelist=nodes_in_group,
+                        node_shape=shape,
+                        node_color=color,
+                        node_size=size,
+                        edgecolors='#FFFFFF',  # Viền trắng sáng
+                        linewidths=2.0,
+                        alpha=0.9
+                    )
+                    count = len(nodes_in_group)
+                    base_colors = np.tile(to_rgba(color), (count, 1))
+                    base_sizes = np.full(count, float(size))
+                    layer = {
+                        'artist': artist,
+                        'colors': base_colors.copy(), 'base_colors': base_colors,
+                        'sizes': base_sizes.copy(), 'base_sizes': base_sizes,
+                        'touched': set(),
+                    }
+                    layer_index = len(self._node_layers)
+                    self._node_layers.append(layer)
+                    for i, n in enumerate(nodes_in_group):
+                        self._node_slots[n] = (layer_index, i)
 
             # --- LAYER 3: LABELS - Rõ ràng trên nền đen ---
-            label_pos = {k: (v[0], v[1] - 0.13) for k, v in pos.items()}
-
-            text_items = nx.draw_networkx_labels(
-                G, label_pos, ax=self.ax,
-                font_size=9,
-                font_color='#FFFFFF',  # Trắng sáng
-                font_weight='bold',
-                font_family='monospace'  # Font monospace cho cảm giác tech
-            )
+            with tracer.span("canvas.labels", cat='render'):
+                label_pos = {k: (v[0], v[1] - 0.13) for k, v in pos.items()}
+
+                text_items = nx.draw_networkx_labels(
+                    G, label_pos, ax=self.ax,
+                    font_size=9,
+                    font_color='#FFFFFF',  # Trắng sáng
+                    font_weight='bold',
+                    font_family='monospace'  # Font monospace cho cảm giác tech
+                )
 
-            # Viền đen đậm hơn cho chữ để tách biệt rõ
-            for _, text_obj in text_items.items():
-                text_obj.set_path_effects([
-                    path_effects.withStroke(linewidth=3.5, foreground='#000000')
-                ])
+                # Viền đen đậm hơn cho chữ để tách biệt rõ
+                for _, text_obj in text_items.items():
+                    text_obj.set_path_effects([
+                        path_effects.withStroke(linewidth=3.5, foreground='#000000')
+                    ])
 
-            self.canvas.draw()
+            # Lớp nền mới vẽ chưa có overlay -> áp toàn bộ overlay hiện tại
+            self.overlay.take_changes()
+            self._apply_overlay(False, list(self.overlay.nodes()), list(self.overlay.edges()))
+
+            tracer.count("canvas.nodes_drawn", G.number_of_nodes())
+            with tracer.span("canvas.draw", cat='render'):
+                self.canvas.draw()
 
         except Exception as e:
             print(f"Drawing Error: {e}")
             import traceback
             traceback.print_exc()
 
-    def clear_highlights(self):
-        """Xóa sạch các đường highlight cũ trên canvas."""
+    # --- OVERLAY ---
+    @traced("canvas.render_overlay", cat='render')
+    def render_overlay(self):
+        """Vẽ lại đúng các phần tử overlay đã thay đổi kể từ lần vẽ trước."""
+        cleared, nodes, edges = self.overlay.take_changes()
+        if not (cleared or nodes or edges):
+            return
+        self._apply_overlay(cleared, nodes, edges)
+        tracer.count("canvas.overlay_updates", len(nodes) + len(edges))
+        self.canvas.draw_idle()
+
+    def clear_overlay(self, redraw=True):
+        """Đưa hiển thị về lớp nền: xoá overlay (O(1)) và các lớp highlight."""
+        self.overlay.clear()
+        self.clear_highlights(redraw=False)
+        if redraw:
+            self.render_overlay()
+
+    def _apply_overlay(self, cleared, nodes, edges):
+        """Sửa tại chỗ mảng màu/kích thước của các collection, chỉ ở những vị trí bị chạm tới."""
+        changed_layers = set()
+        edge_layer = self._edge_layer
+
+        if cleared:
+            for i, layer in enumerate(self._node_layers):
+                if layer['touched']:
+                    idx = list(layer['touched'])
+                    layer['colors'][idx] = layer['base_colors'][idx]
+                    layer['sizes'][idx] = layer['base_sizes'][idx]
+                    layer['touched'].clear()
+                    changed_layers.add(i)
+            if edge_layer is not None and edge_layer['touched']:
+                idx = list(edge_layer['touched'])
+                edge_layer['colors'][idx] = edge_layer['base_colors'][idx]
+                edge_layer['widths'][idx] = edge_layer['base_widths'][idx]
+                for i in idx:
+                    edge_layer['styles'][i] = 'solid'
+                edge_layer['touched'].clear()
+                changed_layers.add('edges')
+
+        for n, style in nodes:
+            slot = self._node_slots.get(n)
+            if slot is None:
+                continue
+            layer_index, i = slot
+            layer = self._node_layers[layer_index]
+            style = style or {}
+            layer['colors'][i] = to_rgba(style['color']) if 'color' in style else layer['base_colors'][i]
+            layer['sizes'][i] = style.get('size', layer['base_sizes'][i])
+            layer['touched'].add(i)
+            changed_layers.add(layer_index)
+
+        if edge_layer is not None:
+            for (u, v), style in edges:
+                i = self._edge_slot(u, v)
+                if i is None:
+                    continue
+                edge_layer['colors'][i] = to_rgba(style['color']) if 'color' in style else edge_layer['base_colors'][i]
+                edge_layer['widths'][i] = style.get('width', edge_layer['base_widths'][i])
+                edge_layer['styles'][i] = style.get('style', 'solid')
+                edge_layer['touched'].add(i)
+                changed_layers.add('edges')
+
+        for key in changed_layers:
+            if key == 'edges':
+                artist = edge_layer['artist']
+                artist.set_color(edge_layer['colors'])
+                artist.set_linewidth(edge_layer['widths'])
+                artist.set_linestyle(edge_layer['styles'])
+            else:
+                layer = self._node_layers[key]
+                layer['artist'].set_facecolor(layer['colors'])
+                layer['artist'].set_sizes(layer['sizes'])
+
+    def _edge_slot(self, u, v):
+        i = self._edge_slots.get((u, v))
+        return i if i is not None else self._edge_slots.get((v, u))
+
+    def _node_size(self, node):
+        """Kích thước đang hiển thị của node (overlay nếu có, nếu không thì theo loại)."""
+        style = self.overlay.node_style(node)
+        if style and 'size' in style:
+            return style['size']
+        n_type = self.current_G.nodes[node].get('type', 'PC')
+        return NODE_STYLES.get(n_type, DEFAULT_NODE_STYLE)[1]
+
+    def clear_highlights(self, redraw=True):
+        """Xóa sạch các đường highlight cũ trên canvas (redraw=False khi sắp vẽ lớp mới ngay sau)."""
         if not self.highlight_artists:
             return
 
@@ -190,11 +301,13 @@ class NetworkCanvas(QWidget):
                 pass
 
         self.highlight_artists.clear()
-        self.canvas.draw()
+        if redraw:
+            self.canvas.draw()
 
+    @traced("canvas.highlight_path", cat='render')
     def highlight_path(self, path_nodes):
         """Highlight đường đi với hiệu ứng neon nổi bật."""
-        self.clear_highlights()
+        self.clear_highlights(redraw=False)
 
         if not self.current_G or not path_nodes or not self.current_pos:
             return
@@ -215,10 +328,9 @@ class NetworkCanvas(QWidget):
 
         # Highlight Nodes
         for node in path_nodes:
-            node_data = self.current_G.nodes[node]
-            n_type = node_data.get('type', 'PC')
+            n_type = self.current_G.nodes[node].get('type', 'PC')
             shape = SHAPE_MAP.get(n_type, 'o')
-            size = node_data.get('size', 450)
+            size = self._node_size(node)
 
             node_artist = nx.draw_networkx_nodes(
                 self.current_G, pos, ax=self.ax,
@@ -233,4 +345,60 @@ class NetworkCanvas(QWidget):
             if node_artist:
                 self.highlight_artists.append(node_artist)
 
-        self.canvas.draw()
\ No newline at end of file
+        self.canvas.draw()
+    @traced("canvas.highlight_flow", cat='render')
+    def highlight_flow(self, edge_colors, cut_edges=(), endpoints=()):
+        """
+        Tô màu các cạnh mang luồng theo mức sử dụng và đánh dấu lát cắt cực tiểu.
+        Mỗi lớp là MỘT lệnh vẽ gộp (một LineCollection), cả khung hình chỉ vẽ lại một lần.
+
+        Args:
+            edge_colors (dict): {(u, v): màu} cho các cạnh có luồng.
+            cut_edges (list): Các cạnh bão hoà thuộc lát cắt cực tiểu (vẽ nét đứt, dày).
+            endpoints (tuple): Nút nguồn/đích cần làm nổi bật.
+        """
+        self.clear_highlights(redraw=False)
+
+        if not self.current_G or not self.current_pos:
+            return
+
+        G, pos = self.current_G, self.current_pos
+        if edge_colors:
+            edgelist = list(edge_colors)
+            artist = nx.draw_networkx_edges(
+                G, pos, ax=self.ax,
+                edgelist=edgelist,
+                edge_color=[edge_colors[e] for e in edgelist],
+                width=3.5,
+                alpha=1.0
+            )
+            if artist:
+                self.highlight_artists.append(artist)
+
+        if cut_edges:
+            artist = nx.draw_networkx_edges(
+                G, pos, ax=self.ax,
+                edgelist=list(cut_edges),
+                edge_color='#FF0000',
+                width=6.0,
+                style='dashed',
+                alpha=0.9
+            )
+            if artist:
+                self.highlight_artists.append(artist)
+
+        if endpoints:
+            artist = nx.draw_networkx_nodes(
+                G, pos, ax=self.ax,
+                nodelist=list(endpoints),
+                node_color='#FF00FF',
+                node_size=[self._node_size(n) + 250 for n in endpoints],
+                edgecolors='#FFFFFF',
+                linewidths=3.0,
+                alpha=0.95
+            )
+            if artist:
+                self.highlight_artists.append(artist)
+
+        tracer.count("canvas.flow_edges_drawn", len(edge_colors))
+        self.canvas.draw()
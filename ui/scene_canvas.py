@@ -0,0 +1,689 @@
+import math
+from collections import deque
+import networkx as nx
+import numpy as np
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QGraphicsView, QGraphicsScene,
+                             QGraphicsItem, QGraphicsLineItem, QStyleOptionGraphicsItem)
+from PyQt6.QtGui import (QPen, QBrush, QColor, QPainter, QPainterPath, QPainterPathStroker,
+                         QPolygonF, QFont, QImage)
+from PyQt6.QtCore import Qt, QRectF, QPointF, QLineF, QTimer, pyqtSignal
+from utils.instrumentation import traced, tracer
+from utils.versioned_graph import node_type_groups
+from ui.network_canvas import (SHAPE_MAP, NODE_STYLES, DEFAULT_NODE_STYLE,
+                               EDGE_STYLES, DEFAULT_EDGE_STYLE)
+from ui.visual_overlay import VisualOverlay
+
+# --- CẤU HÌNH ---
+SCENE_SCALE = 200.0          # Số pixel (toạ độ scene) cho một đơn vị layout
+LARGE_GRAPH_NODES = 1500     # Từ cỡ này dùng bố cục cây hướng tâm O(n + m) thay cho spring layout
+NODE_RADIUS_FACTOR = 0.55    # Bán kính = sqrt(size) * hệ số (size theo quy ước diện tích của matplotlib)
+LABEL_MIN_LOD = 0.6          # Thu nhỏ dưới mức này thì không vẽ nhãn
+SHAPE_MIN_LOD = 0.25         # Dưới mức này node chỉ là một ô vuông tô màu (không viền)
+PICK_WIDTH = 8.0             # Độ rộng vùng bắt chuột quanh cạnh
+OVERVIEW_MIN_NODES = 5000    # Từ cỡ này: thu nhỏ thì vẽ ảnh toàn cảnh, item được dựng theo lô
+OVERVIEW_MAX_LOD = 0.25      # Tỉ lệ zoom dưới mức này thì hiện ảnh toàn cảnh thay cho các item
+OVERVIEW_PIXELS = 2048       # Cạnh dài của ảnh toàn cảnh (pixel)
+BUILD_BATCH = 4000           # Số item dựng trong một lượt của vòng lặp sự kiện
+SCENE_MARGIN = 60.0
+BACKGROUND = '#0a0a0a'
+HOVER_COLOR = '#FF00FF'
+LABEL_FONT = QFont('monospace', 7)
+LABEL_FONT.setBold(True)
+
+_SHAPE_PATHS = {}
+
+
+def _shape_path(shape, radius):
+    """Đường viền node theo marker kiểu matplotlib (D, s, ^, o), dùng chung giữa các item."""
+    key = (shape, radius)
+    path = _SHAPE_PATHS.get(key)
+    if path is None:
+        path = QPainterPath()
+        r = radius
+        if shape == 'D':
+            path.addPolygon(QPolygonF([QPointF(0, -r), QPointF(r, 0), QPointF(0, r), QPointF(-r, 0)]))
+            path.closeSubpath()
+        elif shape == 's':
+            path.addRect(QRectF(-r * 0.8, -r * 0.8, r * 1.6, r * 1.6))
+        elif shape == '^':
+            path.addPolygon(QPolygonF([QPointF(0, -r), QPointF(r, r * 0.75), QPointF(-r, r * 0.75)]))
+            path.closeSubpath()
+        else:
+            path.addEllipse(QPointF(0, 0), r * 0.85, r * 0.85)
+        _SHAPE_PATHS[key] = path
+    return path
+
+
+def _radius(size):
+    return round(math.sqrt(max(size, 1)) * NODE_RADIUS_FACTOR, 1)
+
+
+class NodeItem(QGraphicsItem):
+    """Một node trên scene: hình theo loại thiết bị + nhãn, tự giảm chi tiết khi thu nhỏ."""
+
+    def __init__(self, canvas, node, shape, color, size, interactive=True):
+        super().__init__()
+        self.canvas = canvas
+        self.node = node
+        # Item highlight (không tương tác) nằm đè lên node gốc -> không vẽ nhãn lần nữa
+        self.label = str(node) if interactive else ""
+        self.shape_kind = shape
+        self.color = QColor(color)
+        self.radius = _radius(size)
+        self._hover = False
+        self._bounds = self._compute_bounds()
+        # Mỗi node được rasterize một lần vào pixmap cache; pan/zoom nhỏ chỉ blit lại
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+        if interactive:
+            self.setAcceptHoverEvents(True)
+        else:
+            self.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
+
+    def _compute_bounds(self):
+        r = self.radius + 2
+        half = max(r, 4 * len(self.label) + 4)
+        return QRectF(-half, -r, 2 * half, 2 * r + 14)
+
+    def boundingRect(self):
+        return self._bounds
+
+    def shape(self):
+        return _shape_path(self.shape_kind, self.radius)
+
+    def set_style(self, color, size):
+        radius = _radius(size)
+        if radius != self.radius:
+            self.prepareGeometryChange()
+            self.radius = radius
+            self._bounds = self._compute_bounds()
+        self.color = QColor(color)
+        self.update()
+
+    def paint(self, painter, option, widget=None):
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        if lod < SHAPE_MIN_LOD:
+            r = self.radius
+            painter.fillRect(QRectF(-r, -r, 2 * r, 2 * r), self.color)
+            return
+        painter.setBrush(QBrush(self.color))
+        painter.setPen(QPen(QColor(HOVER_COLOR if self._hover else '#FFFFFF'), 3.0 if self._hover else 2.0))
+        painter.drawPath(_shape_path(self.shape_kind, self.radius))
+        if lod >= LABEL_MIN_LOD and self.label:
+            rect = QRectF(self._bounds.left(), self.radius + 1, self._bounds.width(), 12)
+            painter.setFont(LABEL_FONT)
+            painter.setPen(QColor('#000000'))
+            painter.drawText(rect.translated(1, 1), Qt.AlignmentFlag.AlignHCenter, self.label)
+            painter.setPen(QColor('#FFFFFF'))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignHCenter, self.label)
+
+    def hoverEnterEvent(self, event):
+        self._hover = True
+        self.setToolTip(self.canvas.describe_node(self.node))
+        self.update()
+        self.canvas.hovered.emit(self.canvas.describe_node(self.node))
+
+    def hoverLeaveEvent(self, event):
+        self._hover = False
+        self.update()
+
+    def mousePressEvent(self, event):
+        self.canvas.node_clicked.emit(self.node)
+        event.accept()
+
+
+class EdgeItem(QGraphicsLineItem):
+    """Một cạnh: vẽ bằng code C++ của QGraphicsLineItem, chỉ vùng bắt chuột được nới rộng."""
+
+    def __init__(self, canvas, u, v, line, pen, interactive=True):
+        super().__init__(line)
+        self.canvas = canvas
+        self.edge = (u, v)
+        self.setPen(pen)
+        self._pick = None
+        if interactive:
+            self.setAcceptHoverEvents(True)
+        else:
+            self.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
+
+    def _pick_path(self):
+        if self._pick is None:
+            path = QPainterPath(self.line().p1())
+            path.lineTo(self.line().p2())
+            stroker = QPainterPathStroker()
+            stroker.setWidth(PICK_WIDTH)
+            self._pick = stroker.createStroke(path)
+        return self._pick
+
+    def shape(self):
+        return self._pick_path()
+
+    def boundingRect(self):
+        return self._pick_path().boundingRect()
+
+    def hoverEnterEvent(self, event):
+        text = self.canvas.describe_edge(*self.edge)
+        self.setToolTip(text)
+        self.canvas.hovered.emit(text)
+
+    def mousePressEvent(self, event):
+        self.canvas.edge_clicked.emit(self.edge)
+        event.accept()
+
+
+class _OverviewItem(QGraphicsItem):
+    """
+    Toàn cảnh đồ thị lớn khi thu nhỏ: node/cạnh được raster hoá một lần vào ảnh nền, overlay
+    vào một ảnh trong suốt riêng (dựng lại khi overlay đổi), highlight vẽ trực tiếp. Một khung
+    hình chỉ còn là blit hai ảnh thay vì duyệt hàng trăm nghìn item.
+    """
+
+    def __init__(self, canvas):
+        super().__init__()
+        self.canvas = canvas
+        self.rect = QRectF()
+        self._base = None
+        self._overlay = None
+        self.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
+
+    def boundingRect(self):
+        return self.rect
+
+    def reset(self, rect):
+        self.prepareGeometryChange()
+        self.rect = rect
+        self._base = self._overlay = None
+        self.update()
+
+    def invalidate_overlay(self):
+        self._overlay = None
+        self.update()
+
+    def _begin(self, fill):
+        """Ảnh mới phủ `rect` (cạnh dài OVERVIEW_PIXELS) và painter đã đặt theo toạ độ scene."""
+        rect = self.rect
+        ratio = OVERVIEW_PIXELS / max(rect.width(), rect.height(), 1.0)
+        image = QImage(max(1, math.ceil(rect.width() * ratio)), max(1, math.ceil(rect.height() * ratio)),
+                       QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(fill)
+        painter = QPainter(image)
+        painter.scale(ratio, ratio)
+        painter.translate(-rect.left(), -rect.top())
+        return image, painter, ratio
+
+    @staticmethod
+    def _dot_pen(color, radius, ratio):
+        pen = QPen(QColor(color), max(2.0, 2 * radius * ratio))
+        pen.setCosmetic(True)
+        pen.setCapStyle(Qt.PenCapStyle.SquareCap)
+        return pen
+
+    def _draw(self, painter, ratio, edges, nodes):
+        """Vẽ theo nhóm style: {(color, width, style): [QLineF]} và {(color, size): [QPointF]}."""
+        for (color, width, style), lines in edges.items():
+            painter.setPen(SceneCanvas._edge_pen(color, min(width, 2.0), style))
+            painter.drawLines(lines)
+        for (color, size), points in nodes.items():
+            painter.setPen(self._dot_pen(color, _radius(size), ratio))
+            painter.drawPoints(points)
+
+    @traced("scene.overview_base", cat='render')
+    def _render_base(self):
+        canvas, G = self.canvas, self.canvas.current_G
+        image, painter, ratio = self._begin(QColor(BACKGROUND))
+        point = canvas._point
+        edges, nodes = {}, {}
+        for u, v, e_type in G.edges(data='type'):
+            color, width = EDGE_STYLES.get(e_type, DEFAULT_EDGE_STYLE)
+            edges.setdefault((color, width, 'solid'), []).append(QLineF(point(u), point(v)))
+        for n_type, group in node_type_groups(G).items():
+            style = NODE_STYLES.get('PC' if n_type is None else n_type, DEFAULT_NODE_STYLE)
+            nodes.setdefault(style, []).extend(point(n) for n in group)
+        self._draw(painter, ratio, edges, nodes)
+        painter.end()
+        return image
+
+    @traced("scene.overview_overlay", cat='render')
+    def _render_overlay(self):
+        canvas, G = self.canvas, self.canvas.current_G
+        image, painter, ratio = self._begin(Qt.GlobalColor.transparent)
+        point = canvas._point
+        edges, nodes = {}, {}
+        for (u, v), style in canvas.overlay.edges():
+            if G.has_edge(u, v):
+                color, width = EDGE_STYLES.get(G[u][v].get('type'), DEFAULT_EDGE_STYLE)
+                key = (style.get('color', color), style.get('width', width), style.get('style', 'solid'))
+                edges.setdefault(key, []).append(QLineF(point(u), point(v)))
+        for n, style in canvas.overlay.nodes():
+            if n in G:
+                color, size = canvas._base_node_style(n)
+                key = (style.get('color', color), style.get('size', size))
+                nodes.setdefault(key, []).append(point(n))
+        self._draw(painter, ratio, edges, nodes)
+        painter.end()
+        return image
+
+    def paint(self, painter, option, widget=None):
+        if self.canvas.current_G is None or self.rect.isEmpty():
+            return
+        if self._base is None:
+            self._base = self._render_base()
+        if self._overlay is None:
+            self._overlay = self._render_overlay() if len(self.canvas.overlay) else False
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.drawImage(self.rect, self._base)
+        if self._overlay:
+            painter.drawImage(self.rect, self._overlay)
+        for pen, lines, points in self.canvas.highlight_specs:
+            painter.setPen(pen)
+            if lines:
+                painter.drawLines(lines)
+            if points:
+                painter.drawPoints(points)
+
+
+class _GraphView(QGraphicsView):
+    """View: kéo để di chuyển, lăn chuột để phóng to/thu nhỏ quanh con trỏ."""
+
+    ZOOM_STEP = 1.15
+    zoomed = pyqtSignal()
+
+    def __init__(self, scene, parent=None):
+        super().__init__(scene, parent)
+        self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setRenderHint(QPainter.RenderHint.Antialiasing)
+        # Chỉ vẽ lại vùng bị thay đổi; không lưu/khôi phục trạng thái painter cho mỗi item
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate)
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontSavePainterState, True)
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing, True)
+        self.setCacheMode(QGraphicsView.CacheModeFlag.CacheBackground)
+        self.setBackgroundBrush(QBrush(QColor(BACKGROUND)))
+        self.setStyleSheet("border: none;")
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120.0
+        if steps:
+            factor = self.ZOOM_STEP ** steps
+            self.scale(factor, factor)
+            self.zoomed.emit()
+        event.accept()
+
+
+class SceneCanvas(QWidget):
+    """
+    Bộ vẽ thay thế dựa trên QGraphicsScene (chỉ mục không gian BSP, chạy trên CPU).
+
+    Cùng API với NetworkCanvas (draw_network, highlight_path, highlight_flow, clear_highlights,
+    overlay / render_overlay / clear_overlay) nên MainWindow đổi qua lại được. Khác biệt:
+    - Mỗi node/cạnh là một item: pan/zoom chỉ vẽ lại phần nhìn thấy, node được cache thành pixmap,
+      thu nhỏ thì bỏ nhãn/viền (level of detail).
+    - Di chuột/nhấp chuột bắt được node và cạnh (tín hiệu hovered, node_clicked, edge_clicked).
+    - Đồ thị lớn (>= LARGE_GRAPH_NODES) dùng bố cục vòng theo tầng BFS thay cho spring layout.
+    - Đồ thị rất lớn (>= OVERVIEW_MIN_NODES): khi thu nhỏ dưới OVERVIEW_MAX_LOD view chuyển sang
+      scene toàn cảnh (một ảnh raster, không nhãn, không item riêng); item của scene chi tiết được
+      dựng theo lô BUILD_BATCH qua vòng lặp sự kiện nên giao diện không bị treo khi nạp.
+    """
+
+    hovered = pyqtSignal(str)
+    node_clicked = pyqtSignal(object)
+    edge_clicked = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.scene = QGraphicsScene(self)
+        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.BspTreeIndex)
+        self.overview_scene = QGraphicsScene(self)
+        self.overview_scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
+        self._overview = _OverviewItem(self)
+        self.overview_scene.addItem(self._overview)
+        self.view = _GraphView(self.scene, self)
+        self.view.zoomed.connect(self._update_lod)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+
+        self.current_G = None
+        self.current_pos = None
+        self.highlight_items = []
+        self.highlight_specs = []   # (pen, [QLineF], [QPointF]) vẽ trên scene toàn cảnh
+        self.overlay = VisualOverlay()
+        self._node_items = {}
+        self._edge_items = {}
+        self._touched_nodes = set()
+        self._touched_edges = set()
+        self._points = {}           # node -> QPointF toạ độ scene, tính một lần mỗi lần vẽ
+        self._use_overview = False
+        self._build_token = 0
+
+    # --- BỐ CỤC ---
+    @staticmethod
+    def _radial_layout(G):
+        """
+        Bố cục cây hướng tâm theo cây BFS từ node bậc cao nhất của mỗi thành phần, O(n + m).
+        Mỗi node nhận một "múi" góc tỉ lệ với số lá trong cây con của nó, các con chia múi của
+        cha -> nhánh nằm cạnh node cha; bán kính vòng tăng đủ để các node trên vòng không chồng nhau.
+        """
+        spacing = 0.12   # Khoảng cách tối thiểu giữa hai node trên cùng một vòng
+        ring_gap = 0.6
+        placed = []      # (pos_tương_đối, bán_kính) mỗi thành phần
+        for comp in sorted(nx.connected_components(G), key=len, reverse=True):
+            root = max(comp, key=G.degree)
+            order, depth, children = [root], {root: 0}, {root: []}
+            frontier = deque([root])
+            while frontier:
+                u = frontier.popleft()
+                for v in G.adj[u]:
+                    if v not in depth:
+                        depth[v] = depth[u] + 1
+                        children[v] = []
+                        children[u].append(v)
+                        order.append(v)
+                        frontier.append(v)
+            # Số lá của cây con (duyệt ngược thứ tự BFS = từ lá lên gốc)
+            leaves = {}
+            for n in reversed(order):
+                leaves[n] = sum(leaves[c] for c in children[n]) or 1
+            # Bán kính từng tầng
+            per_depth = {}
+            for n in order:
+                per_depth[depth[n]] = per_depth.get(depth[n], 0) + 1
+            radii, radius = [0.0], 0.0
+            for d in range(1, max(per_depth) + 1):
+                radius = max(radius + ring_gap, per_depth[d] * spacing / (2 * math.pi))
+                radii.append(radius)
+            # Chia múi góc từ gốc xuống
+            pos, wedge = {}, {root: (0.0, 2 * math.pi)}
+            for n in order:
+                start, span = wedge[n]
+                angle = start + span / 2
+                r = radii[depth[n]]
+                pos[n] = (r * math.cos(angle), r * math.sin(angle))
+                total = leaves[n]
+                for c in children[n]:
+                    share = span * leaves[c] / total
+                    wedge[c] = (start, share)
+                    start += share
+            placed.append((pos, radius + ring_gap / 2))
+
+        # Xếp các thành phần theo hàng (lớn trước), độ rộng hàng ~ căn bậc hai tổng diện tích
+        width = math.sqrt(sum((2 * r) ** 2 for _, r in placed))
+        result, x, y, row_h = {}, 0.0, 0.0, 0.0
+        for pos, r in placed:
+            if x > 0 and x + 2 * r > width:
+                x, y, row_h = 0.0, y + row_h, 0.0
+            cx, cy = x + r, y + r
+            for n, (px, py) in pos.items():
+                result[n] = (cx + px, cy + py)
+            x += 2 * r
+            row_h = max(row_h, 2 * r)
+        return result
+
+    def _layout(self, G):
+        num_nodes = G.number_of_nodes()
+        if num_nodes >= LARGE_GRAPH_NODES:
+            return self._radial_layout(G)
+        # Cùng tham số với NetworkCanvas để hai bộ vẽ cho cùng một hình
+        return nx.spring_layout(G, seed=42, k=2.8 / np.sqrt(num_nodes), iterations=150, scale=2.8)
+
+    def _place_unplaced(self, G):
+        """Node mới (VD: thêm sau khi đã vẽ) đặt cạnh một hàng xóm đã có vị trí."""
+        pos = self.current_pos
+        for n in G.nodes():
+            if n not in pos:
+                anchor = next((pos[v] for v in G.adj[n] if v in pos), (0.0, 0.0))
+                pos[n] = (anchor[0] + 0.15, anchor[1] + 0.15)
+
+    # --- VẼ ---
+    @staticmethod
+    def _edge_pen(color, width, style='solid'):
+        pen = QPen(QColor(color), width)
+        pen.setCosmetic(True)  # Độ dày theo pixel màn hình, không phình khi phóng to
+        if style == 'dashed':
+            pen.setStyle(Qt.PenStyle.DashLine)
+        return pen
+
+    def _point(self, node):
+        return self._points[node]
+
+    def _scene_rect(self, G):
+        """Khung scene tính thẳng từ toạ độ (không cần chờ item được dựng xong)."""
+        pos = self.current_pos
+        xy = np.array([pos[n] for n in G], dtype=float) * SCENE_SCALE
+        left, top = xy[:, 0].min(), -xy[:, 1].max()
+        right, bottom = xy[:, 0].max(), -xy[:, 1].min()
+        return QRectF(left, top, right - left, bottom - top).adjusted(
+            -SCENE_MARGIN, -SCENE_MARGIN, SCENE_MARGIN, SCENE_MARGIN)
+
+    @traced("scene.draw_network", cat='render')
+    def draw_network(self, G, keep_layout=False):
+        """
+        Dựng lại toàn bộ scene (mỗi node/cạnh một item). Đồ thị rất lớn được dựng theo lô: hàm trả
+        về ngay sau lô đầu, các lô sau chạy qua QTimer; lần vẽ mới huỷ các lô còn dở của lần trước.
+        """
+        first_draw = self.current_G is None
+        self._build_token += 1
+        self.highlight_items.clear()
+        self.highlight_specs.clear()
+        self.scene.clear()
+        self._node_items, self._edge_items = {}, {}
+        self._touched_nodes, self._touched_edges = set(), set()
+        self.current_G = G
+        if G is None or G.number_of_nodes() == 0:
+            self._use_overview = False
+            self._overview.reset(QRectF())
+            self._update_lod()
+            return
+
+        with tracer.span("scene.layout", cat='render'):
+            fresh = not keep_layout or self.current_pos is None
+            if fresh:
+                self.current_pos = self._layout(G)
+            else:
+                self._place_unplaced(G)
+
+        pos = self.current_pos
+        self._points = {n: QPointF(pos[n][0] * SCENE_SCALE, -pos[n][1] * SCENE_SCALE) for n in G}
+        rect = self._scene_rect(G)
+        self.scene.setSceneRect(rect)
+        self.overview_scene.setSceneRect(rect)
+        self._overview.reset(rect)
+        self._use_overview = G.number_of_nodes() >= OVERVIEW_MIN_NODES
+        self.overlay.take_changes()
+        if fresh or first_draw:
+            self.view.fitInView(rect, Qt.AspectRatioMode.KeepAspectRatio)
+        self._update_lod()
+
+        batches = self._build_items(G)
+        if self._use_overview:
+            self._build_step(self._build_token, batches)
+        else:
+            for _ in batches:
+                pass
+            self._finish_build()
+
+    def _build_items(self, G):
+        """Sinh item cạnh rồi item node, dừng (yield) sau mỗi BUILD_BATCH item."""
+        count = 0
+        pens = {}
+        for u, v, e_type in G.edges(data='type'):
+            pen = pens.get(e_type)
+            if pen is None:
+                pen = pens[e_type] = self._edge_pen(*EDGE_STYLES.get(e_type, DEFAULT_EDGE_STYLE))
+            item = EdgeItem(self, u, v, QLineF(self._point(u), self._point(v)), pen)
+            item.setZValue(0)
+            self.scene.addItem(item)
+            self._edge_items[(u, v)] = item
+            count += 1
+            if count % BUILD_BATCH == 0:
+                yield
+
+        for n_type, nodes in node_type_groups(G).items():
+            n_type = 'PC' if n_type is None else n_type
+            shape = SHAPE_MAP.get(n_type, 'o')
+            color, size = NODE_STYLES.get(n_type, DEFAULT_NODE_STYLE)
+            for n in nodes:
+                item = NodeItem(self, n, shape, color, size)
+                item.setPos(self._point(n))
+                item.setZValue(1)
+                self.scene.addItem(item)
+                self._node_items[n] = item
+                count += 1
+                if count % BUILD_BATCH == 0:
+                    yield
+
+    def _build_step(self, token, batches):
+        if token != self._build_token:
+            return  # Đã có lần vẽ mới, bỏ phần còn dở
+        with tracer.span("scene.build_batch", cat='render'):
+            done = next(batches, StopIteration) is StopIteration
+        if done:
+            self._finish_build()
+        else:
+            QTimer.singleShot(0, lambda: self._build_step(token, batches))
+
+    def _finish_build(self):
+        """Item dựng sau khi overlay đổi vẫn mang style gốc -> áp lại toàn bộ overlay hiện tại."""
+        self._apply_overlay(False, list(self.overlay.nodes()), list(self.overlay.edges()))
+        tracer.count("scene.items", len(self._node_items) + len(self._edge_items))
+
+    # --- MỨC CHI TIẾT ---
+    def _update_lod(self):
+        """Chọn scene cho view: toàn cảnh khi đồ thị rất lớn và đang thu nhỏ, ngược lại scene chi tiết."""
+        overview = self._use_overview and self.view.transform().m11() < OVERVIEW_MAX_LOD
+        target = self.overview_scene if overview else self.scene
+        if self.view.scene() is not target:
+            center = self.view.mapToScene(self.view.viewport().rect().center())
+            self.view.setScene(target)
+            self.view.centerOn(center)
+
+    # --- OVERLAY ---
+    @traced("scene.render_overlay", cat='render')
+    def render_overlay(self):
+        """Cập nhật đúng các item có trạng thái overlay thay đổi (Qt chỉ vẽ lại vùng của chúng)."""
+        cleared, nodes, edges = self.overlay.take_changes()
+        if cleared or nodes or edges:
+            self._apply_overlay(cleared, nodes, edges)
+            self._overview.invalidate_overlay()
+            tracer.count("scene.overlay_updates", len(nodes) + len(edges))
+
+    def clear_overlay(self, redraw=True):
+        self.overlay.clear()
+        self.clear_highlights()
+        if redraw:
+            self.render_overlay()
+
+    def _base_node_style(self, node):
+        n_type = self.current_G.nodes[node].get('type', 'PC')
+        return NODE_STYLES.get(n_type, DEFAULT_NODE_STYLE)
+
+    def _base_edge_pen(self, u, v):
+        return self._edge_pen(*EDGE_STYLES.get(self.current_G[u][v].get('type'), DEFAULT_EDGE_STYLE))
+
+    def _apply_overlay(self, cleared, nodes, edges):
+        if cleared:
+            for n in self._touched_nodes:
+                item = self._node_items.get(n)
+                if item is not None:
+                    item.set_style(*self._base_node_style(n))
+            for key in self._touched_edges:
+                item = self._edge_items[key]
+                item.setPen(self._base_edge_pen(*key))
+            self._touched_nodes, self._touched_edges = set(), set()
+
+        for n, style in nodes:
+            item = self._node_items.get(n)
+            if item is None:
+                continue
+            color, size = self._base_node_style(n)
+            style = style or {}
+            item.set_style(style.get('color', color), style.get('size', size))
+            self._touched_nodes.add(n)
+
+        for (u, v), style in edges:
+            key = (u, v) if (u, v) in self._edge_items else (v, u)
+            item = self._edge_items.get(key)
+            if item is None:
+                continue
+            color, width = EDGE_STYLES.get(self.current_G[u][v].get('type'), DEFAULT_EDGE_STYLE)
+            item.setPen(self._edge_pen(style.get('color', color), style.get('width', width),
+                                       style.get('style', 'solid')))
+            self._touched_edges.add(key)
+
+    # --- HIGHLIGHT ---
+    def clear_highlights(self, redraw=True):
+        """Gỡ các item highlight (Qt tự vẽ lại vùng bị ảnh hưởng; `redraw` giữ cho cùng API)."""
+        for item in self.highlight_items:
+            self.scene.removeItem(item)
+        self.highlight_items.clear()
+        if self.highlight_specs:
+            self.highlight_specs.clear()
+            self._overview.update()
+
+    def _node_size(self, node):
+        style = self.overlay.node_style(node)
+        if style and 'size' in style:
+            return style['size']
+        return self._base_node_style(node)[1]
+
+    def _add_highlight_edges(self, edges, color, width, style='solid'):
+        pen = self._edge_pen(color, width, style)
+        lines = []
+        for u, v in edges:
+            line = QLineF(self._point(u), self._point(v))
+            item = EdgeItem(self, u, v, line, pen, interactive=False)
+            item.setZValue(10)
+            self.scene.addItem(item)
+            self.highlight_items.append(item)
+            lines.append(line)
+        self.highlight_specs.append((pen, lines, []))
+        self._overview.update()
+
+    def _add_highlight_nodes(self, nodes, color):
+        nodes = list(nodes)
+        pen = _OverviewItem._dot_pen(color, 4.0, 1.0)
+        self.highlight_specs.append((pen, [], [self._point(n) for n in nodes]))
+        self._overview.update()
+        for n in nodes:
+            n_type = self.current_G.nodes[n].get('type', 'PC')
+            item = NodeItem(self, n, SHAPE_MAP.get(n_type, 'o'), color, self._node_size(n) + 250,
+                            interactive=False)
+            item.setPos(self._point(n))
+            item.setZValue(11)
+            self.scene.addItem(item)
+            self.highlight_items.append(item)
+
+    @traced("scene.highlight_path", cat='render')
+    def highlight_path(self, path_nodes):
+        self.clear_highlights()
+        if not self.current_G or not path_nodes or not self.current_pos:
+            return
+        self._add_highlight_edges(zip(path_nodes, path_nodes[1:]), '#FF00FF', 4.0)
+        self._add_highlight_nodes(path_nodes, '#FF00FF')
+
+    @traced("scene.highlight_flow", cat='render')
+    def highlight_flow(self, edge_colors, cut_edges=(), endpoints=()):
+        self.clear_highlights()
+        if not self.current_G or not self.current_pos:
+            return
+        for edge, color in edge_colors.items():
+            self._add_highlight_edges([edge], color, 3.5)
+        self._add_highlight_edges(cut_edges, '#FF0000', 6.0, 'dashed')
+        self._add_highlight_nodes(endpoints, '#FF00FF')
+        tracer.count("scene.flow_edges_drawn", len(edge_colors))
+
+    # --- BẮT CHUỘT ---
+    def describe_node(self, node):
+        data = self.current_G.nodes[node] if self.current_G is not None and node in self.current_G else {}
+        parts = [f"{node}", data.get('type', '?')]
+        if data.get('ip'):
+            prefix_len = data.get('prefix_len')
+            parts.append(f"{data['ip']}/{prefix_len}" if prefix_len is not None else data['ip'])
+        if self.current_G is not None and node in self.current_G:
+            parts.append(f"bậc {self.current_G.degree(node)}")
+        return " | ".join(str(p) for p in parts)
+
+    def describe_edge(self, u, v):
+        data = self.current_G[u][v] if self.current_G is not None and self.current_G.has_edge(u, v) else {}
+        return (f"{u} - {v} | {data.get('type', '?')} | trễ {data.get('weight', '?')} ms | "
+                f"{data.get('capacity', '?')} Mbps")
@@ -0,0 +1,94 @@
+class VisualOverlay:
+    """
+    Trạng thái hiển thị của các phân tích (màu/kích thước node, màu/nét cạnh) tách khỏi
+    mô hình đồ thị. Canvas sở hữu overlay; đồ thị chỉ chứa dữ liệu mạng nên file lưu ra
+    không còn thuộc tính giao diện và việc tô màu không làm đồ thị đổi version.
+
+    - Khoá theo id node và cặp node của cạnh (vô hướng: (u, v) và (v, u) là một).
+    - Mỗi lần ghi đánh dấu phần tử là "bẩn"; canvas lấy các thay đổi bằng `take_changes()`
+      và chỉ vẽ lại đúng các phần tử đó.
+    - `clear()` là O(1): bỏ các dict cũ và bật cờ `cleared`; canvas tự khôi phục những
+      phần tử mà nó đã từng tô.
+
+    Khoá style dùng bởi canvas: node {'color', 'size'}, cạnh {'color', 'width', 'style'}.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self._edges = {}  # frozenset({u, v}) -> ((u, v), style)
+        self._dirty_nodes = set()
+        self._dirty_edges = set()
+        self._cleared = False
+
+    @staticmethod
+    def _edge_key(u, v):
+        return frozenset((u, v))
+
+    # --- Ghi ---
+    def set_node(self, node, **style):
+        """Gộp style vào node (VD: color='#FF0000', size=600)."""
+        current = self._nodes.get(node)
+        if current is None:
+            self._nodes[node] = style
+        else:
+            current.update(style)
+        self._dirty_nodes.add(node)
+
+    def set_edge(self, u, v, **style):
+        """Gộp style vào cạnh (VD: color='#00FF00', width=2.0, style='dashed')."""
+        key = self._edge_key(u, v)
+        current = self._edges.get(key)
+        if current is None:
+            self._edges[key] = ((u, v), style)
+        else:
+            current[1].update(style)
+        self._dirty_edges.add(key)
+
+    def set_edges(self, edges, **style):
+        for u, v in edges:
+            self.set_edge(u, v, **style)
+
+    def clear(self):
+        """Xoá toàn bộ overlay trong O(1)."""
+        self._nodes, self._edges = {}, {}
+        self._dirty_nodes, self._dirty_edges = set(), set()
+        self._cleared = True
+
+    # --- Đọc ---
+    def node_style(self, node):
+        """Style overlay của node, hoặc None nếu node đang hiển thị mặc định."""
+        return self._nodes.get(node)
+
+    def edge_style(self, u, v):
+        entry = self._edges.get(self._edge_key(u, v))
+        return entry[1] if entry is not None else None
+
+    def nodes(self):
+        """Các cặp (node, style) đang có trong overlay."""
+        return self._nodes.items()
+
+    def edges(self):
+        """Các cặp ((u, v), style) đang có trong overlay."""
+        return self._edges.values()
+
+    def __len__(self):
+        return len(self._nodes) + len(self._edges)
+
+    def take_changes(self):
+        """
+        Lấy và đặt lại danh sách thay đổi kể từ lần gọi trước.
+
+        Returns:
+            tuple: (cleared, [(node, style | None)], [((u, v), style | None)]) - cleared=True nghĩa là
+                   overlay đã bị xoá hết trước các thay đổi này.
+        """
+        nodes = [(n, self._nodes.get(n)) for n in self._dirty_nodes]
+        edges = []
+        for key in self._dirty_edges:
+            entry = self._edges.get(key)
+            if entry is not None:
+                edges.append(entry)
+        cleared = self._cleared
+        self._dirty_nodes, self._dirty_edges = set(), set()
+        self._cleared = False
+        return cleared, nodes, edges
@@ -0,0 +1,344 @@
+import socket
+import sys
+from array import array
+import numpy as np
+
+# Giá trị "không có" của kho (khác None - None là giá trị hợp lệ)
+MISSING = object()
+
+# Lược đồ cột: thuộc tính -> kiểu lưu. Giá trị không hợp kiểu cột được lưu ở dict phụ của hàng.
+#   category: mã int32 trỏ vào bảng giá trị chuỗi dùng chung (interned)
+#   number:   float64 + cờ int/float để đọc lại đúng kiểu Python ban đầu
+#   ipv4:     địa chỉ IPv4 dạng chấm đóng gói thành uint32
+#   label:    chỉ một cờ "nhãn trùng id phần tử" - nhãn được suy ra từ id khi đọc
+NODE_SCHEMA = {'type': 'category', 'label': 'label', 'ip': 'ipv4', 'prefix_len': 'number',
+               'color': 'category', 'size': 'number'}
+EDGE_SCHEMA = {'type': 'category', 'weight': 'number', 'capacity': 'number',
+               'color': 'category', 'width': 'number', 'style': 'category', 'stp_state': 'category'}
+
+_INT_LIMIT = 2 ** 53  # Số nguyên lớn hơn không biểu diễn chính xác bằng float64
+
+
+def pack_ipv4(value):
+    """'a.b.c.d' -> uint32, hoặc None nếu không phải IPv4 dạng chấm chuẩn (đọc lại phải ra đúng chuỗi cũ)."""
+    if type(value) is not str:
+        return None
+    try:
+        packed = int.from_bytes(socket.inet_aton(value), 'big')
+    except (OSError, ValueError):
+        return None
+    # inet_aton chấp nhận cả dạng rút gọn/thập lục phân -> chỉ nhận khi đọc lại ra đúng chuỗi
+    return packed if unpack_ipv4(packed) == value else None
+
+
+def unpack_ipv4(packed):
+    return f"{packed >> 24}.{(packed >> 16) & 255}.{(packed >> 8) & 255}.{packed & 255}"
+
+
+class _CategoryColumn:
+    __slots__ = ('codes', 'categories', 'lookup')
+
+    def __init__(self, capacity):
+        self.codes = array('i', [-1]) * capacity
+        self.categories = []
+        self.lookup = {}
+
+    def grow(self, extra):
+        self.codes.extend(array('i', [-1]) * extra)
+
+    def get(self, row, ident=None):
+        code = self.codes[row]
+        return self.categories[code] if code >= 0 else MISSING
+
+    def put(self, row, value, ident=None):
+        """Ghi nếu giá trị hợp kiểu cột; trả về False (không ghi) nếu không."""
+        if type(value) is not str:
+            return False
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.categories)
+            self.categories.append(value)
+        self.codes[row] = code
+        return True
+
+    def clear(self, row):
+        self.codes[row] = -1
+
+    def gather(self, rows, default):
+        codes = np.frombuffer(self.codes, dtype=np.int32)[rows]
+        table = np.array(self.categories + [default], dtype=object)
+        return table[np.where(codes >= 0, codes, len(self.categories))]
+
+    def nbytes(self):
+        return self.codes.itemsize * len(self.codes) + sum(sys.getsizeof(c) for c in self.categories)
+
+
+class _NumberColumn:
+    __slots__ = ('values', 'flags')  # flags: 0 = không có, 1 = float, 2 = int
+
+    def __init__(self, capacity):
+        self.values = array('d', [0.0]) * capacity
+        self.flags = array('b', [0]) * capacity
+
+    def grow(self, extra):
+        self.values.extend(array('d', [0.0]) * extra)
+        self.flags.extend(array('b', [0]) * extra)
+
+    def get(self, row, ident=None):
+        flag = self.flags[row]
+        if flag == 2:
+            return int(self.values[row])
+        return self.values[row] if flag else MISSING
+
+    def put(self, row, value, ident=None):
+        kind = type(value)
+        if kind is int:
+            if not -_INT_LIMIT < value < _INT_LIMIT:
+                return False
+            self.flags[row] = 2
+        elif kind is float:
+            self.flags[row] = 1
+        else:
+            return False
+        self.values[row] = value
+        return True
+
+    def clear(self, row):
+        self.flags[row] = 0
+
+    def gather(self, rows, default):
+        values = np.frombuffer(self.values, dtype=np.float64)[rows]
+        present = np.frombuffer(self.flags, dtype=np.int8)[rows] != 0
+        return np.where(present, values, np.nan if default is None else default)
+
+    def nbytes(self):
+        return 9 * len(self.flags)
+
+
+class _IPv4Column:
+    __slots__ = ('values', 'flags')
+
+    def __init__(self, capacity):
+        self.values = array('I', [0]) * capacity
+        self.flags = array('b', [0]) * capacity
+
+    def grow(self, extra):
+        self.values.extend(array('I', [0]) * extra)
+        self.flags.extend(array('b', [0]) * extra)
+
+    def get(self, row, ident=None):
+        return unpack_ipv4(self.values[row]) if self.flags[row] else MISSING
+
+    def put(self, row, value, ident=None):
+        packed = pack_ipv4(value)
+        if packed is None:
+            return False
+        self.values[row] = packed
+        self.flags[row] = 1
+        return True
+
+    def clear(self, row):
+        self.flags[row] = 0
+
+    def gather(self, rows, default):
+        """Địa chỉ đóng gói (uint32); hàng không có địa chỉ nhận `default` (None -> 0)."""
+        values = np.frombuffer(self.values, dtype=np.uint32)[rows]
+        present = np.frombuffer(self.flags, dtype=np.int8)[rows] != 0
+        return np.where(present, values, np.uint32(default or 0))
+
+    def nbytes(self):
+        return 5 * len(self.flags)
+
+
+class _LabelColumn:
+    __slots__ = ('flags',)
+
+    def __init__(self, capacity):
+        self.flags = array('b', [0]) * capacity
+
+    def grow(self, extra):
+        self.flags.extend(array('b', [0]) * extra)
+
+    def get(self, row, ident=None):
+        return ident if ident is not None and self.flags[row] else MISSING
+
+    def put(self, row, value, ident=None):
+        if ident is None or type(value) is not type(ident) or value != ident:
+            return False
+        self.flags[row] = 1
+        return True
+
+    def clear(self, row):
+        self.flags[row] = 0
+
+    def gather(self, rows, default):
+        raise TypeError("Cột nhãn suy ra từ id phần tử - đọc qua từng phần tử")
+
+    def nbytes(self):
+        return len(self.flags)
+
+
+_COLUMN_KINDS = {'category': _CategoryColumn, 'number': _NumberColumn,
+                 'ipv4': _IPv4Column, 'label': _LabelColumn}
+
+
+class AttributeStore:
+    """
+    Kho thuộc tính dạng cột cho node hoặc cạnh của một đồ thị.
+
+    - Mỗi phần tử chiếm một hàng (số nguyên); hàng được cấp khi phần tử ghi thuộc tính lần
+      đầu và trả lại (tái sử dụng) khi phần tử bị xoá.
+    - Thuộc tính trong lược đồ được lưu trong cột kiểu chặt (array.array) tạo lười ở lần ghi
+      đầu tiên -> cột không dùng không tốn bộ nhớ. Giá trị không hợp kiểu (VD: weight là
+      chuỗi, ip không chuẩn) và thuộc tính ngoài lược đồ nằm trong dict phụ của hàng đó.
+    - Đọc trả về đúng giá trị/kiểu Python đã ghi (int vẫn là int, chuỗi ip giữ nguyên).
+    - `column()` đọc cả cột cho một dãy hàng dưới dạng mảng NumPy (không qua từng dict).
+
+    Kho không biết gì về đồ thị; dict-view theo dõi thay đổi nằm ở VersionedGraph.
+    """
+
+    def __init__(self, schema):
+        self.schema = dict(schema)
+        self._columns = {}
+        self._extra = {}     # hàng -> {thuộc tính: giá trị} cho phần không vào được cột
+        self._capacity = 0
+        self._size = 0
+        self._free = []
+
+    def __len__(self):
+        """Số hàng đang được dùng."""
+        return self._size - len(self._free)
+
+    # --- Cấp / trả hàng ---
+    def alloc(self):
+        if self._free:
+            return self._free.pop()
+        if self._size == self._capacity:
+            extra = max(64, self._capacity)
+            for col in self._columns.values():
+                col.grow(extra)
+            self._capacity += extra
+        row = self._size
+        self._size += 1
+        return row
+
+    def release(self, row):
+        for col in self._columns.values():
+            col.clear(row)
+        if row in self._extra:
+            self._drop_row_extra(row)
+        self._free.append(row)
+
+    # --- Đọc / ghi theo hàng ---
+    def get(self, row, attr, default=MISSING, ident=None):
+        col = self._columns.get(attr)
+        if col is not None:
+            value = col.get(row, ident)
+            if value is not MISSING:
+                return value
+        if self._extra:
+            extra = self._extra.get(row)
+            if extra is not None:
+                return extra.get(attr, default)
+        return default
+
+    def set(self, row, attr, value, ident=None):
+        col = self._columns.get(attr)
+        if col is None:
+            kind = self.schema.get(attr)
+            if kind is not None:
+                col = _COLUMN_KINDS[kind](self._capacity)
+                if not col.put(row, value, ident):
+                    col = None  # Chưa có giá trị nào hợp kiểu -> chưa tạo cột
+                else:
+                    self._add_column(attr, col)
+                    if self._extra:
+                        self._drop_extra(row, attr)
+                    return
+        elif col.put(row, value, ident):
+            if self._extra:
+                self._drop_extra(row, attr)
+            return
+        else:
+            col.clear(row)
+        extra = self._extra.get(row)
+        if extra is None:
+            self._extra[row] = {attr: value}
+        else:
+            extra[attr] = value
+
+    def _add_column(self, attr, col):
+        """Thêm cột mới, giữ các cột theo thứ tự lược đồ (thứ tự khoá khi đọc cả hàng)."""
+        self._columns[attr] = col
+        order = list(self.schema)
+        self._columns = {a: self._columns[a] for a in order if a in self._columns}
+
+    def _drop_extra(self, row, attr):
+        extra = self._extra.get(row)
+        if extra is not None and attr in extra:
+            del extra[attr]
+            if not extra:
+                self._drop_row_extra(row)
+
+    def _drop_row_extra(self, row):
+        del self._extra[row]
+        if not self._extra:
+            self._extra = {}  # dict không tự co lại: nhãn đi qua đây lúc tạo node sẽ để lại bảng rỗng lớn
+
+    def discard(self, row, attr, ident=None):
+        """Xoá thuộc tính của hàng; trả về giá trị cũ hoặc MISSING."""
+        col = self._columns.get(attr)
+        if col is not None:
+            value = col.get(row, ident)
+            if value is not MISSING:
+                col.clear(row)
+                return value
+        extra = self._extra.get(row)
+        if extra is None or attr not in extra:
+            return MISSING
+        value = extra.pop(attr)
+        if not extra:
+            self._drop_row_extra(row)
+        return value
+
+    def row_dict(self, row, ident=None):
+        """Mọi thuộc tính của hàng thành dict thường (một lượt qua các cột)."""
+        out = {}
+        for attr, col in self._columns.items():
+            value = col.get(row, ident)
+            if value is not MISSING:
+                out[attr] = value
+        if self._extra:
+            extra = self._extra.get(row)
+            if extra is not None:
+                out.update(extra)
+        return out
+
+    def keys(self, row, ident=None):
+        return self.row_dict(row, ident).keys()
+
+    def compact(self, row, ident):
+        """Đưa nhãn đang nằm ở dict phụ vào cột khi đã biết id phần tử (nhãn trùng id -> chỉ còn 1 cờ)."""
+        extra = self._extra.get(row)
+        if extra is not None and 'label' in extra:
+            self.set(row, 'label', extra['label'], ident)
+
+    # --- Đọc theo cột ---
+    def column(self, attr, rows, default=None):
+        """
+        Giá trị thuộc tính `attr` của các hàng `rows` dạng mảng NumPy:
+        number -> float64, category -> object, ipv4 -> uint32 (đóng gói).
+        Hàng không có giá trị (hoặc giá trị nằm ở dict phụ) nhận `default`.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        col = self._columns.get(attr)
+        if col is None:
+            return np.full(len(rows), default, dtype=object if not isinstance(default, (int, float)) else float)
+        return col.gather(rows, default)
+
+    def memory_bytes(self):
+        """Ước lượng bộ nhớ của các cột và dict phụ (byte)."""
+        total = sum(col.nbytes() for col in self._columns.values())
+        for extra in self._extra.values():
+            total += sys.getsizeof(extra) + sum(sys.getsizeof(v) for v in extra.values())
+        return total
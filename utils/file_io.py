@@ -1,6 +1,9 @@
 import json
+import os
 import networkx as nx
 import logging
+from utils.versioned_graph import VersionedGraph, VISUAL_ATTRS
+from utils.instrumentation import traced
 
 class FileManager:
     """
@@ -9,6 +12,7 @@ class FileManager:
     """
 
     @staticmethod
+    @traced("file_io.save_network_to_json", cat='io')
     def save_network_to_json(G, filepath):
         """
         Lưu đồ thị mạng xuống file JSON.
@@ -17,8 +21,8 @@ class FileManager:
             if G is None:
                 return False, "Empty Graph"
             
-            # Chuyển đổi Graph object thành Dictionary
-            data = nx.node_link_data(G)
+            # Chuyển đổi Graph object thành Dictionary (bỏ thuộc tính giao diện nếu còn sót)
+            data = FileManager._strip_visual_attrs(nx.node_link_data(G))
             
             with open(filepath, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=4)
@@ -30,6 +34,7 @@ class FileManager:
             return False, str(e)
 
     @staticmethod
+    @traced("file_io.load_network_from_json", cat='io')
     def load_network_from_json(filepath):
         """
         Đọc file JSON và tái tạo lại đồ thị mạng.
@@ -38,11 +43,56 @@ class FileManager:
             with open(filepath, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
-            # Tái tạo Graph từ Dictionary
-            G = nx.node_link_graph(data)
+            G = FileManager.graph_from_node_link(data)
             
             logging.info(f"Network loaded from {filepath}")
             return G, "Success"
         except Exception as e:
             logging.error(f"Load Error: {str(e)}")
-            return None, str(e)
\ No newline at end of file
+            return None, str(e)
+    @staticmethod
+    def graph_from_node_link(data):
+        """
+        Tái tạo Graph từ dữ liệu node-link đã parse (dạng VersionedGraph để theo dõi thay đổi).
+        File cũ có thể còn color/size... -> bỏ, hiển thị do canvas quyết định.
+        """
+        return VersionedGraph(nx.node_link_graph(FileManager._strip_visual_attrs(data)))
+
+    @staticmethod
+    def _strip_visual_attrs(data):
+        """Xoá thuộc tính hiển thị (VISUAL_ATTRS) khỏi node/cạnh của dữ liệu node-link."""
+        for key in ('nodes', 'links', 'edges'):
+            for item in data.get(key, ()):
+                for attr in VISUAL_ATTRS.intersection(item):
+                    del item[attr]
+        return data
+
+    # ===========================
+    # CHỈ MỤC ALT ĐI KÈM FILE TÔ PÔ
+    # ===========================
+
+    @staticmethod
+    def landmark_index_path(topology_path):
+        """Đường dẫn file chỉ mục đi kèm: network.json -> network.alt.npz"""
+        return os.path.splitext(topology_path)[0] + ".alt.npz"
+
+    @staticmethod
+    @traced("file_io.save_landmark_index", cat='io')
+    def save_landmark_index(index, topology_path):
+        """Lưu chỉ mục ALT cạnh file tô pô. Trả về (ok, msg)."""
+        if index is None:
+            return False, "No index"
+        return index.save_npz(FileManager.landmark_index_path(topology_path))
+
+    @staticmethod
+    @traced("file_io.load_landmark_index", cat='io')
+    def load_landmark_index(G, topology_path):
+        """
+        Đọc chỉ mục ALT đi kèm file tô pô (nếu có và còn khớp với G).
+        Trả về (index, msg); index là None nếu không dùng được.
+        """
+        from algorithms.landmarks import LandmarkIndex
+        path = FileManager.landmark_index_path(topology_path)
+        if not os.path.exists(path):
+            return None, "Not found"
+        return LandmarkIndex.load_npz(path, G)
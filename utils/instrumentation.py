@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import threading
+import functools
+import logging
+from collections import deque, defaultdict
+
+
+class _NullSpan:
+    """Span rỗng dùng khi tắt đo đạc: không cấp phát, không đọc đồng hồ."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Context manager đo một đoạn code và ghi lại vào Tracer khi kết thúc."""
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        self.tracer.record(self.name, self.cat, self.start, end - self.start, self.args)
+        return False
+
+
+class Tracer:
+    """
+    Bộ thu thập thời gian (timing) và bộ đếm (counter) cho các hot-path.
+
+    - Khi tắt (mặc định), `span()` trả về một đối tượng rỗng dùng chung và decorator
+      `traced` chỉ tốn một phép kiểm tra cờ -> chi phí gần như bằng 0.
+    - Khi bật, mỗi span được lưu dưới dạng sự kiện "complete" (ph='X') để xuất ra
+      định dạng Chrome Trace Event (mở bằng chrome://tracing hoặc Perfetto).
+    """
+
+    def __init__(self, max_events=200000, recent_size=20):
+        self.enabled = False
+        self._origin_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=max_events)   # (name, cat, start_ns, dur_ns, tid, args)
+        self._recent = deque(maxlen=recent_size)  # (name, dur_ns)
+        self._stats = {}                          # name -> [count, total_ns, max_ns]
+        self._counters = defaultdict(int)
+
+    # --- Điều khiển ---
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """Xoá toàn bộ dữ liệu đã thu thập."""
+        with self._lock:
+            self._events.clear()
+            self._recent.clear()
+            self._stats.clear()
+            self._counters.clear()
+            self._origin_ns = time.perf_counter_ns()
+
+    # --- Thu thập ---
+    def span(self, name, cat='app', **args):
+        """Context manager đo thời gian một khối lệnh: `with tracer.span('draw.edges'): ...`"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args or None)
+
+    def record(self, name, cat, start_ns, dur_ns, args=None):
+        """Ghi một sự kiện đã đo xong."""
+        with self._lock:
+            self._events.append((name, cat, start_ns, dur_ns, threading.get_ident(), args))
+            self._recent.append((name, dur_ns))
+            stat = self._stats.get(name)
+            if stat is None:
+                self._stats[name] = [1, dur_ns, dur_ns]
+            else:
+                stat[0] += 1
+                stat[1] += dur_ns
+                if dur_ns > stat[2]:
+                    stat[2] = dur_ns
+
+    def count(self, name, value=1):
+        """Tăng bộ đếm `name` thêm `value` (bỏ qua khi đang tắt)."""
+        if self.enabled:
+            with self._lock:
+                self._counters[name] += value
+
+    # --- Truy vấn ---
+    def stats(self):
+        """Trả về dict: name -> {'count', 'total_ms', 'avg_ms', 'max_ms'}."""
+        with self._lock:
+            return {
+                name: {
+                    "count": c,
+                    "total_ms": total / 1e6,
+                    "avg_ms": total / c / 1e6,
+                    "max_ms": mx / 1e6,
+                }
+                for name, (c, total, mx) in self._stats.items()
+            }
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def format_recent(self, limit=6):
+        """Chuỗi tóm tắt các phép đo gần nhất (mới nhất ở trên) để hiển thị trên giao diện."""
+        with self._lock:
+            items = list(self._recent)[-limit:]
+        if not items:
+            return "(Chưa có dữ liệu đo)"
+        return "\n".join(f"  {name}: {dur / 1e6:.2f} ms" for name, dur in reversed(items))
+
+    # --- Xuất dữ liệu ---
+    def to_chrome_trace(self):
+        """Chuyển dữ liệu sang dict theo định dạng Chrome Trace Event."""
+        with self._lock:
+            events = list(self._events)
+            counters = dict(self._counters)
+            origin = self._origin_ns
+        trace_events = []
+        for name, cat, start_ns, dur_ns, tid, args in events:
+            ev = {
+                "name": name, "cat": cat, "ph": "X",
+                "ts": (start_ns - origin) / 1000.0, "dur": dur_ns / 1000.0,
+                "pid": self._pid, "tid": tid,
+            }
+            if args:
+                ev["args"] = {k: str(v) for k, v in args.items()}
+            trace_events.append(ev)
+        if counters:
+            # Bộ đếm được ghi thành một sự kiện 'C' ở cuối dòng thời gian
+            end_ts = (time.perf_counter_ns() - origin) / 1000.0
+            trace_events.append({
+                "name": "counters", "ph": "C", "ts": end_ts,
+                "pid": self._pid, "tid": 0, "args": counters,
+            })
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, filepath):
+        """Ghi file JSON Chrome Trace. Trả về (ok, msg) giống các hàm I/O khác."""
+        try:
+            with open(filepath, 'w', encoding='utf-8') as f:
+                json.dump(self.to_chrome_trace(), f)
+            logging.info(f"Trace exported to {filepath}")
+            return True, "Success"
+        except Exception as e:
+            logging.error(f"Trace Export Error: {str(e)}")
+            return False, str(e)
+
+
+# Tracer dùng chung toàn ứng dụng. Bật sẵn bằng biến môi trường NETGRAPH_TRACE=1.
+tracer = Tracer()
+if os.environ.get("NETGRAPH_TRACE", "").lower() in ("1", "true", "yes"):
+    tracer.enable()
+
+
+def traced(name, cat='algorithm'):
+    """
+    Decorator đo thời gian một hàm. Đặt BÊN DƯỚI @staticmethod:
+
+        @staticmethod
+        @traced("routing.find_shortest_path")
+        def find_shortest_path(G, s, t): ...
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.record(name, cat, start, time.perf_counter_ns() - start)
+        return wrapper
+    return decorator
@@ -1,29 +1,27 @@
 import networkx as nx
 import random
+from utils.attribute_store import unpack_ipv4
+from utils.versioned_graph import VersionedGraph, node_type_counts
+from utils.result_cache import cached_result
 
 class NetworkGenerator:
     """
     Class chịu trách nhiệm sinh ra các đồ thị mạng giả lập với nhiều kiểu tô pô khác nhau.
     """
 
-    def __init__(self):
-        # Định nghĩa màu sắc và kích thước chuẩn cho các loại thiết bị
-        self.device_styles = {
-            'Router': {'color': '#FF4500', 'size': 450}, # Orange Red
-            'Switch': {'color': '#00BFFF', 'size': 350}, # Deep Sky Blue
-            'Server': {'color': '#32CD32', 'size': 300}, # Lime Green
-            'PC':     {'color': '#D3D3D3', 'size': 250}  # Light Gray
-        }
+    # Dải địa chỉ cấp phát: mạng con truy cập lấy từ 10.0.0.0/8, loopback hạ tầng từ 100.64.0.0/10
+    SUBNET_POOL = (10 << 24, 8)
+    LOOPBACK_POOL = ((100 << 24) | (64 << 16), 10)
 
     def _add_node_with_style(self, G, node_name, node_type):
-        """Hàm tiện ích để thêm node với style chuẩn."""
-        style = self.device_styles.get(node_type, self.device_styles['PC'])
+        """
+        Hàm tiện ích để thêm node với thuộc tính chuẩn.
+        Chỉ ghi dữ liệu mạng; màu/kích thước do canvas quyết định theo `type`.
+        Địa chỉ IP được cấp sau khi dựng xong tô pô (xem `assign_addresses`).
+        """
         G.add_node(node_name, 
                    type=node_type, 
-                   label=node_name, 
-                   color=style['color'], 
-                   size=style['size'],
-                   ip=f"192.168.{random.randint(1,254)}.{random.randint(1,254)}")
+                   label=node_name)
 
     def _add_edge_with_style(self, G, u, v, edge_type='Ethernet'):
         """Hàm tiện ích để thêm cạnh với style chuẩn."""
@@ -36,16 +34,15 @@ class NetworkGenerator:
     # CÁC HÀM SINH TÔ PÔ CỤ THỂ
     # ===========================
 
-    def _gen_hierarchical(self):
+    def _gen_hierarchical(self, scale=1):
         """Sinh mạng phân cấp (Hierarchical / Tree)."""
-        G = nx.Graph()
+        G = VersionedGraph()
         # 1. Core Layer (Routers)
-        core_routers = ['R1', 'R2', 'R3']
+        core_routers = [f"R{i+1}" for i in range(3 * scale)]
         for r in core_routers: self._add_node_with_style(G, r, 'Router')
         # Nối các Core Router với nhau thành một vòng hoặc lưới nhỏ (Fiber)
-        self._add_edge_with_style(G, 'R1', 'R2', 'Fiber')
-        self._add_edge_with_style(G, 'R2', 'R3', 'Fiber')
-        self._add_edge_with_style(G, 'R3', 'R1', 'Fiber')
+        for i, r in enumerate(core_routers):
+            self._add_edge_with_style(G, r, core_routers[(i + 1) % len(core_routers)], 'Fiber')
 
         # 2. Distribution Layer (Switches)
         dist_switches = []
@@ -74,16 +71,16 @@ class NetworkGenerator:
                     self._add_edge_with_style(G, sw, srv_name, 'Fiber')
         return G
 
-    def _gen_mesh(self):
+    def _gen_mesh(self, scale=1):
         """Sinh mạng lưới (Mesh) - Ngẫu nhiên, độ kết nối cao."""
         # Sử dụng mô hình Watts-Strogatz để tạo mạng "thế giới nhỏ" (small-world)
         # Đảm bảo tính liên thông và có các cụm.
-        n_routers = 8
+        n_routers = 8 * scale
         k_neighbors = 4 # Mỗi node nối với 4 node gần nhất
         p_rewire = 0.3  # Xác suất nối lại cạnh để tạo đường tắt
         
         G_base = nx.connected_watts_strogatz_graph(n_routers, k_neighbors, p_rewire, seed=random.randint(1, 1000))
-        G = nx.Graph()
+        G = VersionedGraph()
 
         # Đổi tên node và gán kiểu Router cho mạng lõi
         router_map = {i: f"R{i+1}" for i in range(n_routers)}
@@ -101,17 +98,15 @@ class NetworkGenerator:
                 self._add_edge_with_style(G, r_name, pc_name, 'Ethernet')
         return G
 
-    def _gen_star(self):
+    def _gen_star(self, scale=1):
         """Sinh mạng hình sao (Star)."""
-        G = nx.Graph()
+        G = VersionedGraph()
         # Node trung tâm (Core Switch/Router)
         center_node = "CORE-SW"
         self._add_node_with_style(G, center_node, 'Switch')
-        # Kích thước core switch lớn hơn một chút
-        G.nodes[center_node]['size'] = 500 
 
         # Các node vệ tinh (PCs/Servers)
-        num_spokes = random.randint(8, 15)
+        num_spokes = random.randint(8, 15) * scale
         for i in range(num_spokes):
             node_type = 'Server' if random.random() > 0.8 else 'PC'
             node_name = f"{node_type}-{i+1}"
@@ -121,10 +116,10 @@ class NetworkGenerator:
             self._add_edge_with_style(G, center_node, node_name, edge_type)
         return G
 
-    def _gen_ring(self):
+    def _gen_ring(self, scale=1):
         """Sinh mạng vòng tròn (Ring)."""
-        G = nx.Graph()
-        num_switches = random.randint(5, 8)
+        G = VersionedGraph()
+        num_switches = random.randint(5, 8) * scale
         
         # Tạo các Switch trong vòng tròn
         switch_names = [f"SW{i+1}" for i in range(num_switches)]
@@ -146,33 +141,108 @@ class NetworkGenerator:
                 self._add_edge_with_style(G, sw, pc_name, 'Ethernet')
         return G
 
+    # ===========================
+    # CẤP ĐỊA CHỈ THEO MẠNG CON
+    # ===========================
+
+    @staticmethod
+    def plan_addresses(G):
+        """
+        Lập kế hoạch địa chỉ IPv4 không trùng lặp, bám theo tô pô:
+        - Mỗi thiết bị hạ tầng có PC/Server gắn trực tiếp là gateway của một mạng con riêng
+          (khối nhỏ nhất là luỹ thừa của 2 chứa đủ địa chỉ mạng, gateway, các host và broadcast);
+          gateway nhận địa chỉ .1 của khối, host nhận các địa chỉ kế tiếp.
+        - Thiết bị hạ tầng không có host và host không nối thiết bị hạ tầng nào nhận một
+          địa chỉ loopback /32.
+        Khối lớn được cấp trước nên mọi khối tự căn lề; các khối cùng cỡ giữ thứ tự chèn node
+        (gần với thứ tự tô pô) để bảng định tuyến gộp được các mạng con liền kề.
+
+        Returns:
+            dict: {node: (địa chỉ uint32, độ dài tiền tố)}
+        Raises:
+            ValueError: nếu dải địa chỉ không đủ cho đồ thị.
+        """
+        from algorithms.partitioning import ENDPOINT_TYPES
+        hosts_of = {}
+        loopbacks = []
+        for node, t in G.nodes(data='type'):
+            if t not in ENDPOINT_TYPES:
+                hosts_of.setdefault(node, [])
+        for node, t in G.nodes(data='type'):
+            if t not in ENDPOINT_TYPES:
+                continue
+            gateway = next((v for v in G[node] if v in hosts_of), None)
+            if gateway is None:
+                loopbacks.append(node)
+            else:
+                hosts_of[gateway].append(node)
+
+        plan = {}
+        blocks = []
+        for gateway, hosts in hosts_of.items():
+            if hosts:
+                blocks.append(((len(hosts) + 2).bit_length(), gateway, hosts))  # +mạng, gateway, broadcast
+            else:
+                loopbacks.append(gateway)
+        blocks.sort(key=lambda b: -b[0])  # sort ổn định: cùng cỡ giữ thứ tự chèn
+
+        base, length = NetworkGenerator.SUBNET_POOL
+        cursor, limit = base, base + (1 << (32 - length))
+        for bits, gateway, hosts in blocks:
+            if cursor + (1 << bits) > limit:
+                raise ValueError(f"Dải {unpack_ipv4(base)}/{length} không đủ cho {len(blocks)} mạng con")
+            plan[gateway] = (cursor + 1, 32 - bits)
+            for offset, host in enumerate(hosts, 2):
+                plan[host] = (cursor + offset, 32 - bits)
+            cursor += 1 << bits
+
+        base, length = NetworkGenerator.LOOPBACK_POOL
+        if len(loopbacks) >= (1 << (32 - length)):
+            raise ValueError(f"Dải loopback {unpack_ipv4(base)}/{length} không đủ cho {len(loopbacks)} địa chỉ")
+        for offset, node in enumerate(loopbacks, 1):
+            plan[node] = (base + offset, 32)
+        return plan
+
+    @staticmethod
+    def assign_addresses(G):
+        """Ghi kế hoạch địa chỉ vào thuộc tính node: `ip` (dạng chấm) và `prefix_len`."""
+        for node, (address, prefix_len) in NetworkGenerator.plan_addresses(G).items():
+            attrs = G.nodes[node]
+            attrs['ip'] = unpack_ipv4(address)
+            attrs['prefix_len'] = prefix_len
+        return G
+
     # ===========================
     # HÀM CHÍNH (PUBLIC API)
     # ===========================
-    def generate_network(self, topology_type='hierarchical'):
+    def generate_network(self, topology_type='hierarchical', scale=1):
         """
         Hàm chính để sinh mạng dựa trên kiểu tô pô được yêu cầu.
         Args:
             topology_type (str): 'hierarchical', 'mesh', 'star', hoặc 'ring'.
+            scale (int): Hệ số nhân số lượng thiết bị (1 = kích thước mặc định trên giao diện).
         """
         if topology_type == 'mesh':
-            return self._gen_mesh()
+            G = self._gen_mesh(scale)
         elif topology_type == 'star':
-            return self._gen_star()
+            G = self._gen_star(scale)
         elif topology_type == 'ring':
-            return self._gen_ring()
+            G = self._gen_ring(scale)
         else:
             # Mặc định là hierarchical
-            return self._gen_hierarchical()
+            G = self._gen_hierarchical(scale)
+        return self.assign_addresses(G)
 
+    @cached_result("network_data.get_topology_stats")
     def get_topology_stats(self, G):
         """Trả về thống kê cơ bản của đồ thị hiện tại."""
         if G is None: return {}
+        counts = node_type_counts(G)  # Chỉ mục theo loại: O(số loại), không quét node
         stats = {
             "total_nodes": G.number_of_nodes(),
             "total_edges": G.number_of_edges(),
-            "routers": len([n for n, d in G.nodes(data=True) if d.get('type') == 'Router']),
-            "switches": len([n for n, d in G.nodes(data=True) if d.get('type') == 'Switch']),
-            "endpoints": len([n for n, d in G.nodes(data=True) if d.get('type') in ['PC', 'Server']]),
+            "routers": counts.get('Router', 0),
+            "switches": counts.get('Switch', 0),
+            "endpoints": counts.get('PC', 0) + counts.get('Server', 0),
         }
         return stats
\ No newline at end of file
@@ -1,4 +1,20 @@
+import csv
 import datetime
+import html
+import json
+import logging
+import math
+import os
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import networkx as nx
+from utils.instrumentation import traced, tracer
+from utils.versioned_graph import node_type_counts, edge_type_counts
+
+# Xuất báo cáo từ giao diện chạy trên một luồng nền riêng (các lần xuất xếp hàng)
+_EXPORT_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-export")
 
 class ReportGenerator:
     """
@@ -31,6 +47,15 @@ class ReportGenerator:
                 f.write(f"    - System Status:  {status}\n")
                 f.write(f"    - Connectivity:   {'Full' if audit_result['is_connected'] else 'Partitioned'}\n")
                 f.write(f"    - Redundancy:     {audit_result['average_redundancy']:.2f} links/node\n")
+                spec = audit_result.get('spectral')
+                if spec and spec.get('nodes', 0) >= 2:
+                    gap_note = "" if spec['spectral_gap_converged'] else " (estimate)"
+                    error = spec['effective_resistance_error']
+                    f.write(f"    - Algebraic Conn: {spec['algebraic_connectivity']:.6g} "
+                            f"(Fiedler cut: {spec['fiedler_cut']['cut_edges']} links)\n")
+                    f.write(f"    - Spectral Gap:   {spec['spectral_gap']:.4g}{gap_note}\n")
+                    f.write(f"    - Resistance:     {spec['effective_resistance']:.4g}"
+                            f"{f' (+/-{error:.1%})' if error else ''}\n")
                 
                 f.write("\n[3] VULNERABILITIES (Single Points of Failure)\n")
                 if audit_result['critical_links']:
@@ -38,6 +63,18 @@ class ReportGenerator:
                         f.write(f"    [!] Weak Link: {u} <---> {v}\n")
                 else:
                     f.write("    [OK] No critical weak links detected.\n")
+
+                if audit_result.get('critical_nodes'):
+                    info = audit_result.get('centrality', {})
+                    accuracy = ("exact" if info.get('exact')
+                                else f"sampled, {info.get('samples')} sources, +/-{info.get('epsilon', 0):.3f} "
+                                     f"at {1 - info.get('delta', 0.05):.0%} confidence")
+                    f.write(f"\n[4] CRITICAL DEVICES (Betweenness, {accuracy})\n")
+                    for rank, (node, n_type, score) in enumerate(audit_result['critical_nodes'], 1):
+                        f.write(f"    {rank:>2}. {node} ({n_type}): {score:.4f}\n")
+                    if not info.get('exact'):
+                        f.write(f"    Order certain for top {info.get('confident_ranks', 0)}"
+                                f"{'' if info.get('top_certain') else ' (last rank may swap with an unlisted device)'}\n")
                 
                 f.write("\n==================================================\n")
                 f.write(" CONFIDENTIAL - INTERNAL USE ONLY\n")
@@ -45,4 +82,351 @@ class ReportGenerator:
                 
             return True, f"Report exported to {filepath}"
         except Exception as e:
-            return False, str(e)
\ No newline at end of file
+            return False, str(e)
+
+    # ===========================
+    # BÁO CÁO DẠNG LUỒNG (JSONL / CSV / HTML)
+    # ===========================
+
+    # Thứ tự các mục trong báo cáo; mỗi mục là một generator bản ghi độc lập
+    SECTIONS = ('topology', 'connectivity', 'bridges', 'articulation_points', 'criticality', 'spectral',
+                'bandwidth', 'stp')
+    FORMATS = {'.jsonl': 'jsonl', '.json': 'json', '.csv': 'csv', '.html': 'html', '.htm': 'html'}
+    QUEUE_SIZE = 4096      # Số bản ghi tối đa mỗi mục được tính trước khi writer tới lượt
+    BUFFER_SIZE = 1 << 20
+
+    @staticmethod
+    def format_for_path(filepath):
+        """Chọn định dạng theo phần mở rộng: 'jsonl' | 'json' | 'csv' | 'html' | 'txt'."""
+        return ReportGenerator.FORMATS.get(os.path.splitext(filepath)[1].lower(), 'txt')
+
+    @staticmethod
+    def export_async(G, filepath, sections=None, fmt=None):
+        """
+        Chạy export_report trên luồng nền (trên bản sao đồ thị), trả về Future của (ok, msg).
+        Báo cáo .txt lấy kiểm toán qua NetworkAuditor.audit_async với DEEP_AUDIT: dùng lại kết quả
+        Kiểm Toán Chuyên Sâu đã có / đang chạy cho cùng version thay vì kiểm toán lại.
+        """
+        fmt = fmt or ReportGenerator.format_for_path(filepath)
+        audit = None
+        if fmt == 'txt':
+            from algorithms.auditing import NetworkAuditor
+            audit = NetworkAuditor.audit_async(G, **NetworkAuditor.DEEP_AUDIT)
+        snapshot = nx.Graph(G)
+        return _EXPORT_EXECUTOR.submit(
+            lambda: ReportGenerator.export_report(snapshot, filepath, sections, fmt,
+                                                  audit=audit.result() if audit is not None else None))
+
+    @staticmethod
+    @traced("report_gen.export_report", cat='io')
+    def export_report(G, filepath, sections=None, fmt=None, audit=None):
+        """
+        Xuất báo cáo kiểm toán theo luồng. Các mục được tính ĐỒNG THỜI trên các luồng nền,
+        mỗi mục đẩy bản ghi vào một hàng đợi có giới hạn; writer ghi lần lượt từng mục theo
+        thứ tự qua bộ đệm. Bộ nhớ dành cho đầu ra vì thế bị chặn bởi
+        QUEUE_SIZE x số mục, không phụ thuộc số cầu / thành phần liên thông của mạng.
+        Báo cáo .txt dùng kết quả Kiểm Toán Chuyên Sâu (`audit` nếu truyền vào, không thì
+        perform_full_audit với NetworkAuditor.DEEP_AUDIT - trúng cache nếu vừa kiểm toán).
+
+        Returns:
+            tuple: (ok, msg) giống các hàm I/O khác.
+        """
+        fmt = fmt or ReportGenerator.format_for_path(filepath)
+        if fmt == 'txt':
+            from utils.network_data import NetworkGenerator
+            from algorithms.auditing import NetworkAuditor
+            stats = NetworkGenerator().get_topology_stats(G)
+            if audit is None:
+                audit = NetworkAuditor.perform_full_audit(G, **NetworkAuditor.DEEP_AUDIT)
+            return ReportGenerator.export_summary(G, stats, audit, filepath)
+
+        writer_cls = {'jsonl': _JsonlWriter, 'json': _JsonWriter, 'csv': _CsvWriter, 'html': _HtmlWriter}.get(fmt)
+        if writer_cls is None:
+            return False, f"Định dạng không hỗ trợ: {fmt}"
+        sections = list(sections or ReportGenerator.SECTIONS)
+
+        stop = threading.Event()
+        queues = {name: queue.Queue(maxsize=ReportGenerator.QUEUE_SIZE) for name in sections}
+        try:
+            with ThreadPoolExecutor(max_workers=len(sections), thread_name_prefix="report") as pool:
+                for name in sections:
+                    pool.submit(_produce_section, name, G, queues[name], stop)
+                try:
+                    count = 0
+                    with open(filepath, 'w', encoding='utf-8', newline='',
+                              buffering=ReportGenerator.BUFFER_SIZE) as f:
+                        writer = writer_cls(f)
+                        writer.begin(_report_header(G))
+                        for name in sections:
+                            for record in _drain_section(queues[name]):
+                                writer.write(record)
+                                count += 1
+                        writer.end()
+                finally:
+                    stop.set()  # Giải phóng producer đang chờ nếu writer dừng giữa chừng
+            tracer.count("report.records", count)
+            logging.info(f"Report ({fmt}) exported to {filepath}: {count} records")
+            return True, f"Report exported to {filepath}"
+        except Exception as e:
+            logging.error(f"Report Export Error: {str(e)}")
+            return False, str(e)
+
+
+# --- Các mục báo cáo: generator bản ghi dict {'section', 'kind', ...} ---
+
+_END = object()
+
+
+def _report_header(G):
+    return {'section': 'report', 'kind': 'header',
+            'generated': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'nodes': G.number_of_nodes(), 'edges': G.number_of_edges()}
+
+
+def _section_topology(G):
+    node_types = {('Unknown' if t is None else t): c for t, c in node_type_counts(G).items()}
+    edge_types = {('Unknown' if t is None else t): c for t, c in edge_type_counts(G).items()}
+    yield {'section': 'topology', 'kind': 'summary',
+           'total_nodes': G.number_of_nodes(), 'total_edges': G.number_of_edges(),
+           'routers': node_types.get('Router', 0), 'switches': node_types.get('Switch', 0),
+           'endpoints': node_types.get('PC', 0) + node_types.get('Server', 0)}
+    for t, c in sorted(node_types.items(), key=lambda kv: str(kv[0])):
+        yield {'section': 'topology', 'kind': 'node_type', 'type': t, 'count': c}
+    for t, c in sorted(edge_types.items(), key=lambda kv: str(kv[0])):
+        yield {'section': 'topology', 'kind': 'edge_type', 'type': t, 'count': c}
+
+
+def _section_connectivity(G):
+    sizes = sorted((len(c) for c in nx.connected_components(G)), reverse=True) if len(G) else []
+    degrees = [d for _, d in G.degree()]
+    yield {'section': 'connectivity', 'kind': 'summary',
+           'is_connected': len(sizes) == 1, 'connected_components': len(sizes),
+           'largest_component': sizes[0] if sizes else 0,
+           'average_redundancy': round(sum(degrees) / len(degrees), 4) if degrees else 0.0}
+    if len(sizes) > 1:
+        for i, size in enumerate(sizes, 1):
+            yield {'section': 'connectivity', 'kind': 'component', 'component': i, 'size': size}
+
+
+def _section_bridges(G):
+    count = 0
+    for u, v in nx.bridges(G):
+        count += 1
+        yield {'section': 'bridges', 'kind': 'bridge', 'u': u, 'v': v}
+    yield {'section': 'bridges', 'kind': 'summary', 'bridges': count,
+           'status': 'STABLE' if count == 0 else 'CRITICAL'}
+
+
+def _section_articulation_points(G):
+    count = 0
+    for n in nx.articulation_points(G):
+        count += 1
+        yield {'section': 'articulation_points', 'kind': 'articulation_point', 'node': n,
+               'type': G.nodes[n].get('type', 'Unknown')}
+    yield {'section': 'articulation_points', 'kind': 'summary', 'articulation_points': count}
+
+
+def _section_criticality(G):
+    from algorithms.auditing import NetworkAuditor
+    from algorithms.centrality import CentralityAnalyzer
+    ranking, info = CentralityAnalyzer.rank_critical_nodes(G, top=NetworkAuditor.TOP_CRITICAL_NODES)
+    yield {'section': 'criticality', 'kind': 'summary', 'metric': 'betweenness', **info}
+    for rank, (node, n_type, score) in enumerate(ranking, 1):
+        yield {'section': 'criticality', 'kind': 'critical_node', 'rank': rank, 'node': node,
+               'type': n_type, 'betweenness': round(score, 6)}
+
+
+def _section_spectral(G):
+    from algorithms.spectral import SpectralAnalyzer
+    spec = SpectralAnalyzer.analyze(G)
+    cut = spec['fiedler_cut'] or {'sizes': (0, 0), 'cut_edges': 0, 'edges': []}
+    yield {'section': 'spectral', 'kind': 'summary', 'scope': spec['scope'], 'nodes': spec['nodes'],
+           'algebraic_connectivity': spec['algebraic_connectivity'],
+           'spectral_gap': spec['spectral_gap'], 'spectral_gap_converged': spec['spectral_gap_converged'],
+           'effective_resistance': spec['effective_resistance'], 'mean_resistance': spec['mean_resistance'],
+           'effective_resistance_error': spec['effective_resistance_error'],
+           'fiedler_cut_edges': cut['cut_edges'], 'fiedler_cut_sizes': f"{cut['sizes'][0]}/{cut['sizes'][1]}"}
+    for u, v in cut['edges']:
+        yield {'section': 'spectral', 'kind': 'fiedler_cut_edge', 'u': u, 'v': v}
+
+
+def _section_bandwidth(G):
+    caps = Counter(c for _, _, c in G.edges(data='capacity') if c is not None)
+    links = sum(caps.values())
+    total = sum(c * k for c, k in caps.items())
+    yield {'section': 'bandwidth', 'kind': 'summary', 'links_with_capacity': links,
+           'total_capacity': total,
+           'min_capacity': min(caps) if caps else 0, 'max_capacity': max(caps) if caps else 0,
+           'mean_capacity': round(total / links, 4) if links else 0.0}
+    for c, k in sorted(caps.items()):
+        yield {'section': 'bandwidth', 'kind': 'capacity_class', 'capacity': c, 'links': k}
+
+
+def _section_stp(G):
+    from algorithms.stp import STPManager
+    active, blocked = STPManager.compute_spanning_tree(G)
+    tree_weight = sum(G[u][v].get('weight', 1) for u, v in active)
+    yield {'section': 'stp', 'kind': 'summary', 'active_links': len(active),
+           'blocked_links': len(blocked), 'tree_weight': tree_weight}
+
+
+_SECTION_FUNCS = {
+    'topology': _section_topology,
+    'connectivity': _section_connectivity,
+    'bridges': _section_bridges,
+    'articulation_points': _section_articulation_points,
+    'criticality': _section_criticality,
+    'spectral': _section_spectral,
+    'bandwidth': _section_bandwidth,
+    'stp': _section_stp,
+}
+
+
+def _produce_section(name, G, out, stop):
+    """Chạy trên luồng nền: đẩy bản ghi của một mục vào hàng đợi (chặn khi đầy)."""
+    def put(item):
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        with tracer.span(f"report.section.{name}", cat='io'):
+            for record in _SECTION_FUNCS[name](G):
+                if not put(record):
+                    return
+    except Exception as e:
+        logging.error(f"Report Section '{name}' Error: {str(e)}")
+        put({'section': name, 'kind': 'error', 'message': str(e)})
+    put(_END)
+
+
+def _drain_section(q):
+    while True:
+        record = q.get()
+        if record is _END:
+            return
+        yield record
+
+
+# --- Writer theo định dạng ---
+
+def _plain(value):
+    """Giá trị JSON-hoá được (tên nút có thể là tuple/đối tượng)."""
+    return value if isinstance(value, (str, int, float, bool)) or value is None else str(value)
+
+
+def _finite(value):
+    return None if isinstance(value, float) and not math.isfinite(value) else value
+
+
+class _JsonlWriter:
+    """Mỗi bản ghi một dòng JSON."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def begin(self, header):
+        self.write(header)
+
+    def write(self, record):
+        self.f.write(json.dumps({k: _plain(v) for k, v in record.items()}, ensure_ascii=False))
+        self.f.write("\n")
+
+    def end(self):
+        pass
+
+
+class _JsonWriter:
+    """
+    Một mảng JSON hợp lệ (header rồi các bản ghi), vẫn ghi ngay từng bản ghi.
+    Số không hữu hạn (inf/nan) không có trong JSON chuẩn -> ghi null.
+    """
+
+    def __init__(self, f):
+        self.f = f
+
+    def begin(self, header):
+        self.f.write("[\n")
+        self._dump(header)
+
+    def write(self, record):
+        self.f.write(",\n")
+        self._dump(record)
+
+    def end(self):
+        self.f.write("\n]\n")
+
+    def _dump(self, record):
+        self.f.write(json.dumps({k: _finite(_plain(v)) for k, v in record.items()},
+                                ensure_ascii=False, allow_nan=False))
+
+
+class _CsvWriter:
+    """
+    CSV dạng "dài" (section, record, field, value): các mục có cột khác nhau vẫn nằm
+    chung một bảng và ghi được ngay từng bản ghi mà không cần biết trước mọi cột.
+    """
+
+    def __init__(self, f):
+        self.w = csv.writer(f)
+        self.index = 0
+
+    def begin(self, header):
+        self.w.writerow(['section', 'record', 'kind', 'field', 'value'])
+        self.write(header)
+
+    def write(self, record):
+        self.index += 1
+        section, kind = record['section'], record['kind']
+        self.w.writerows([section, self.index, kind, k, _plain(v)]
+                         for k, v in record.items() if k not in ('section', 'kind'))
+
+    def end(self):
+        pass
+
+
+class _HtmlWriter:
+    """HTML tĩnh: mỗi mục một tiêu đề, mỗi nhóm bản ghi cùng loại một bảng (ghi dần từng hàng)."""
+
+    def __init__(self, f):
+        self.f = f
+        self.section = None
+        self.columns = None
+
+    def begin(self, header):
+        e = html.escape
+        self.f.write("<!DOCTYPE html>\n<html><head><meta charset='utf-8'>"
+                     "<title>NetGraph Sentinel - Audit Report</title>"
+                     "<style>body{font-family:monospace;background:#0a0a0a;color:#ddd}"
+                     "table{border-collapse:collapse;margin:6px 0 18px}"
+                     "td,th{border:1px solid #333;padding:2px 8px}th{color:#0ff}</style></head><body>\n")
+        self.f.write(f"<h1>NETGRAPH SENTINEL - SECURITY AUDIT REPORT</h1>\n"
+                     f"<p>Date: {e(header['generated'])} | Nodes: {header['nodes']} | "
+                     f"Edges: {header['edges']}</p>\n")
+
+    def _close_table(self):
+        if self.columns is not None:
+            self.f.write("</table>\n")
+            self.columns = None
+
+    def write(self, record):
+        e = html.escape
+        if record['section'] != self.section:
+            self._close_table()
+            self.section = record['section']
+            self.f.write(f"<h2>{e(self.section)}</h2>\n")
+        columns = [k for k in record if k not in ('section', 'kind')]
+        if columns != self.columns:
+            self._close_table()
+            self.columns = columns
+            self.f.write(f"<h3>{e(record['kind'])}</h3><table><tr>"
+                         + "".join(f"<th>{e(c)}</th>" for c in columns) + "</tr>\n")
+        self.f.write("<tr>" + "".join(f"<td>{e(str(record[c]))}</td>" for c in columns) + "</tr>\n")
+
+    def end(self):
+        self._close_table()
+        self.f.write("</body></html>\n")
@@ -0,0 +1,134 @@
+import functools
+import threading
+from collections import OrderedDict
+import networkx as nx
+from utils.instrumentation import tracer
+
+
+class ResultCache:
+    """
+    Cache kết quả phân tích, khoá theo (graph_id, version, tên thao tác, tham số).
+
+    - Giới hạn số phần tử, loại bỏ theo LRU (ít được dùng gần đây nhất).
+    - Tự vô hiệu hoá: khi đồ thị đổi version, các kết quả của version cũ không còn được
+      tra tới và bị xoá ngay khi có kết quả mới của đồ thị đó.
+    - Kết quả trả về là đối tượng DÙNG CHUNG -> nơi gọi không được sửa trực tiếp.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._latest_version = {}  # graph_id -> version mới nhất đã thấy
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        graph_id, version = key[0], key[1]
+        with self._lock:
+            latest = self._latest_version.get(graph_id, -1)
+            if version < latest:
+                return  # Kết quả tính xong muộn (luồng nền) cho version đã cũ: không ai tra tới nữa
+            if latest < version:
+                self._latest_version[graph_id] = version
+                self._purge(lambda k: k[0] == graph_id and k[1] < version)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def cached_args(self, graph_id, version, op_name):
+        """Các bộ đối số vị trí (sau đồ thị) đã có kết quả `op_name` cho (graph_id, version); không tính hit/miss."""
+        with self._lock:
+            return [k[3] for k in self._entries if k[0] == graph_id and k[1] == version and k[2] == op_name]
+
+    def invalidate_graph(self, graph_id):
+        """Xoá mọi kết quả của một đồ thị (VD: khi đóng/thay thế đồ thị)."""
+        with self._lock:
+            self._purge(lambda k: k[0] == graph_id)
+            self._latest_version.pop(graph_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._latest_version.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _purge(self, predicate):
+        for k in [k for k in self._entries if predicate(k)]:
+            del self._entries[k]
+
+
+# Cache dùng chung cho mọi Manager
+result_cache = ResultCache()
+_MISSING = object()
+
+
+def result_key(op_name, G, args=(), kwargs=None):
+    """
+    Khoá cache của op_name(G, *args, **kwargs) đúng như @cached_result tạo; None nếu G không
+    cache được (không có version, view đóng băng, tham số không hash được). Dùng khi kết quả
+    được tính trên bản sao (luồng nền) nhưng cần lưu/tra theo đồ thị gốc.
+    """
+    version = getattr(G, 'version', None)
+    if version is None or nx.is_frozen(G):
+        return None
+    key = (G.graph_id, version, op_name, tuple(args), tuple(sorted((kwargs or {}).items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def cached_result(op_name):
+    """
+    Decorator cache kết quả của một hàm phân tích nhận đồ thị làm tham số.
+
+    Tham số đồ thị là đối số nx.Graph đầu tiên; các đối số đứng trước nó (VD: `self`)
+    không tham gia khoá. Chỉ cache với đồ thị có version (VersionedGraph) và không
+    phải view bị đóng băng (subgraph view không có version riêng đáng tin cậy).
+    Đặt BÊN DƯỚI @traced để thời gian cache-hit vẫn được đo.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not result_cache.enabled:
+                return func(*args, **kwargs)
+
+            for idx, arg in enumerate(args):
+                if isinstance(arg, nx.Graph):
+                    break
+            else:
+                return func(*args, **kwargs)
+
+            key = result_key(op_name, args[idx], args[idx + 1:], kwargs)
+            if key is None:
+                return func(*args, **kwargs)
+
+            value = result_cache.get(key, _MISSING)
+            if value is not _MISSING:
+                tracer.count("cache.hits")
+                return value
+
+            tracer.count("cache.misses")
+            value = func(*args, **kwargs)
+            result_cache.put(key, value)
+            return value
+        return wrapper
+    return decorator
@@ -0,0 +1,61 @@
+import itertools
+import logging
+
+
+class ResultStream:
+    """
+    Kết quả phân tích dạng luồng hàng (row stream) thay cho một chuỗi khổng lồ.
+
+    - `row_factory`: hàm không tham số trả về iterator các hàng THÔ (VD: tuple).
+      Mỗi lần gọi bắt đầu lại từ đầu -> có thể vừa hiển thị vừa xuất file.
+    - `formatter`: chuyển một hàng thô thành chuỗi. Chỉ được gọi cho hàng thực sự
+      hiển thị / ghi ra, nên chi phí định dạng tỉ lệ với phần người dùng xem.
+    - `header` / `footer`: vài dòng văn bản ngắn trước/sau các hàng.
+    """
+
+    def __init__(self, title, row_factory=None, formatter=str, header=None, footer=None, total_rows=None):
+        self.title = title
+        self.row_factory = row_factory or (lambda: iter(()))
+        self.formatter = formatter
+        self.header = list(header or [])
+        self.footer = list(footer or [])
+        self.total_rows = total_rows  # None nếu không biết trước
+
+    @classmethod
+    def from_text(cls, title, text):
+        """Bọc một kết quả văn bản sẵn có (mỗi dòng là một hàng)."""
+        return cls(title, header=text.split("\n"))
+
+    def iter_rows(self):
+        """Duyệt mọi hàng thô, kể cả header/footer (ở dạng chuỗi)."""
+        return itertools.chain(self.header, self.row_factory(), self.footer)
+
+    def format_row(self, row):
+        if isinstance(row, str):
+            return row
+        return self.formatter(row)
+
+    def iter_lines(self):
+        return map(self.format_row, self.iter_rows())
+
+    def to_text(self):
+        """Ghép toàn bộ thành một chuỗi (một lần join, không cộng chuỗi lặp)."""
+        return "\n".join(self.iter_lines())
+
+    def write_to(self, filepath, buffer_size=1 << 20):
+        """
+        Ghi luồng ra file theo từng hàng qua bộ đệm, không dựng toàn bộ chuỗi trong RAM.
+        Trả về (ok, msg) giống các hàm I/O khác.
+        """
+        try:
+            count = 0
+            with open(filepath, 'w', encoding='utf-8', buffering=buffer_size) as f:
+                for line in self.iter_lines():
+                    f.write(line)
+                    f.write("\n")
+                    count += 1
+            logging.info(f"Result stream '{self.title}' written to {filepath} ({count} lines)")
+            return True, f"{count} dòng"
+        except Exception as e:
+            logging.error(f"Stream Export Error: {str(e)}")
+            return False, str(e)
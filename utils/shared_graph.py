@@ -0,0 +1,208 @@
+import logging
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import networkx as nx
+import numpy as np
+from utils.versioned_graph import node_type_groups
+
+# Mô tả đủ để tiến trình khác gắn vào: tên segment, {tên mảng: (dtype, shape, offset)}, siêu dữ liệu nhỏ
+SharedGraphHandle = namedtuple('SharedGraphHandle', ['name', 'layout', 'meta'])
+
+_OWNED = weakref.WeakValueDictionary()  # Segment do tiến trình này tạo: tên -> SharedGraph
+_ATTACHED = OrderedDict()               # Segment đã gắn vào (phía worker): tên -> (shm, arrays)
+_ATTACH_LOCK = threading.Lock()
+ATTACH_CACHE = 4                        # Số segment giữ gắn sẵn trong mỗi worker
+
+# Segment đã công bố cho từng đồ thị có version: đồ thị -> {(version, weight, capacity): SharedGraph}.
+# Khoá yếu theo chính đồ thị nên segment sống không lâu hơn đồ thị; chỉ giữ version hiện tại.
+_PUBLISHED = weakref.WeakKeyDictionary()
+_PUBLISHED_LOCK = threading.Lock()
+
+# Pool tiến trình dùng chung, tạo lười; tác vụ chỉ mang handle nên khởi động không phụ thuộc kích thước đồ thị
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def worker_pool(workers):
+    """Pool tiến trình dùng chung cho các phân tích song song (tạo lại nếu đổi số worker)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None or _POOL._max_workers != workers:
+            if _POOL is not None:
+                _POOL.shutdown(wait=False)
+            _POOL = ProcessPoolExecutor(max_workers=workers)
+        return _POOL
+
+
+def _release(shm, owner_pid):
+    """Đóng và xoá segment. Chỉ tiến trình tạo ra mới xoá (tiến trình con fork không được xoá hộ)."""
+    try:
+        shm.close()
+    except BufferError:
+        pass  # Còn view NumPy trỏ vào -> vùng nhớ được giải phóng khi view cuối cùng bị huỷ
+    if os.getpid() == owner_pid:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _open_untracked(name):
+    """
+    Gắn vào segment có sẵn mà KHÔNG đăng ký với resource_tracker. Trước Python 3.13,
+    SharedMemory(create=False) tự đăng ký nên tracker sẽ xoá segment khi worker thoát
+    (và với fork, worker dùng chung tracker với tiến trình chính).
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _views(buf, layout):
+    arrays = {}
+    for key, (dtype, shape, offset) in layout.items():
+        array = np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+        array.flags.writeable = False
+        arrays[key] = array
+    return arrays
+
+
+class SharedGraph:
+    """
+    Các mảng chỉ số nguyên của đồ thị đặt trong MỘT segment multiprocessing.shared_memory.
+
+    - Tiến trình chính tạo segment, chép mảng vào một lần (căn lề ALIGN byte) và gửi cho
+      worker `handle` (vài trăm byte) thay vì pickle mảng -> chi phí giao việc không phụ
+      thuộc kích thước đồ thị.
+    - Worker gọi `SharedGraph.attach(handle)` để nhận view NumPy chỉ đọc, không sao chép;
+      segment đã gắn được giữ lại (tối đa ATTACH_CACHE) cho các tác vụ sau.
+    - Vòng đời: `release()` / khối `with` / khi đối tượng bị thu gom (weakref.finalize) đều
+      đóng và xoá segment; resource_tracker vẫn dọn nếu tiến trình chính chết đột ngột.
+      Segment của `from_graph` thuộc về đồ thị: bị bỏ khi đồ thị đổi version, bị thu gom
+      hoặc khi gọi `forget(G)`; tác vụ đang chạy vẫn giữ tham chiếu riêng tới khi xong.
+    """
+
+    ALIGN = 64
+
+    def __init__(self, arrays, meta=None):
+        layout, offset = {}, 0
+        arrays = {key: np.ascontiguousarray(a) for key, a in arrays.items()}
+        for key, a in arrays.items():
+            layout[key] = (a.dtype.str, a.shape, offset)
+            offset += -(-a.nbytes // self.ALIGN) * self.ALIGN
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for key, a in arrays.items():
+            _, shape, start = layout[key]
+            np.ndarray(shape, dtype=a.dtype, buffer=self._shm.buf, offset=start)[...] = a
+        self.handle = SharedGraphHandle(self._shm.name, layout, dict(meta or {}))
+        self.arrays = _views(self._shm.buf, layout)
+        self.nbytes = offset
+        self._finalizer = weakref.finalize(self, _release, self._shm, os.getpid())
+        _OWNED[self.handle.name] = self
+
+    def __getitem__(self, key):
+        return self.arrays[key]
+
+    @property
+    def meta(self):
+        return self.handle.meta
+
+    def release(self):
+        """Đóng và xoá segment (gọi nhiều lần không sao)."""
+        self.arrays = {}
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+    @staticmethod
+    def attach(handle):
+        """
+        View chỉ đọc các mảng của segment `handle` (dict tên -> np.ndarray).
+        Trong tiến trình đã tạo segment thì dùng thẳng mảng của nó.
+        """
+        owner = _OWNED.get(handle.name)
+        if owner is not None and owner.arrays:
+            return owner.arrays
+        with _ATTACH_LOCK:
+            entry = _ATTACHED.get(handle.name)
+            if entry is not None:
+                _ATTACHED.move_to_end(handle.name)
+                return entry[1]
+            shm = _open_untracked(handle.name)
+            arrays = _views(shm.buf, handle.layout)
+            _ATTACHED[handle.name] = (shm, arrays)
+            while len(_ATTACHED) > ATTACH_CACHE:
+                _, (old, _) = _ATTACHED.popitem(last=False)
+                try:
+                    old.close()
+                except BufferError:
+                    pass
+            return arrays
+
+    @staticmethod
+    def from_graph(G, weight='weight', capacity='capacity'):
+        """
+        Công bố CSR của đồ thị (thứ tự nút theo SparseRepresentation.from_graph):
+        'indptr', 'indices', 'weights' (trọng số từng ô CSR), 'capacities' (nếu capacity không None)
+        và 'types' (mã loại thiết bị từng nút, -1 = không có; tên loại ở meta['type_names']).
+        Với đồ thị có version, mỗi version chỉ công bố một lần và segment gắn với vòng đời đồ thị
+        (xem `forget`); đồ thị không version thì mỗi lần gọi công bố một segment mới.
+        """
+        version = getattr(G, 'version', None)
+        if version is None or nx.is_frozen(G):
+            return SharedGraph._publish(G, weight, capacity)
+        key = (version, weight, capacity)
+        with _PUBLISHED_LOCK:
+            shared = _PUBLISHED.get(G, {}).get(key)
+        if shared is None:
+            shared = SharedGraph._publish(G, weight, capacity)
+            with _PUBLISHED_LOCK:
+                entries = _PUBLISHED.setdefault(G, {})
+                # Version cũ không còn truy cập được -> bỏ segment của nó
+                for old in [k for k in entries if k[0] != version]:
+                    del entries[old]
+                shared = entries.setdefault(key, shared)
+        return shared
+
+    @staticmethod
+    def forget(G):
+        """Bỏ các segment đã công bố cho G (VD: UI thay đồ thị) mà không chờ đồ thị bị thu gom."""
+        with _PUBLISHED_LOCK:
+            _PUBLISHED.pop(G, None)
+
+    @staticmethod
+    def _publish(G, weight, capacity):
+        from algorithms.representations import SparseRepresentation
+        rep = SparseRepresentation.from_graph(G, weight=weight)
+        indptr, indices, weights = rep.adjacency_csr(weighted=True)
+        arrays = {'indptr': indptr, 'indices': indices, 'weights': weights}
+        if capacity is not None:
+            arrays['capacities'] = SparseRepresentation.from_graph(G, weight=capacity).edge_weight[rep.edge_ids]
+
+        types = np.full(rep.num_nodes, -1, dtype=np.int16)
+        type_names = []
+        for t, members in node_type_groups(G).items():
+            if t is None:
+                continue
+            types[[rep.index[v] for v in members]] = len(type_names)
+            type_names.append(t)
+        arrays['types'] = types
+
+        shared = SharedGraph(arrays, meta={'nodes': rep.num_nodes, 'type_names': type_names})
+        logging.info(f"Shared graph published: {shared.handle.name}, {shared.nbytes / 1e6:.1f} MB")
+        return shared
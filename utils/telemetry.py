@@ -0,0 +1,255 @@
+import json
+import logging
+import math
+import os
+import select
+import socket
+import stat
+import sys
+import threading
+import time
+from utils.instrumentation import tracer
+
+
+def _number(text):
+    text = text.strip()
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _metric(value):
+    """Giá trị weight/capacity của một mẫu: số hữu hạn không âm (chuỗi số được chấp nhận)."""
+    number = _number(value) if isinstance(value, str) else value
+    if isinstance(number, bool) or not isinstance(number, (int, float)) \
+            or not math.isfinite(number) or number < 0:
+        raise ValueError(f"Giá trị liên kết không hợp lệ: {value!r}")
+    return number
+
+
+class TelemetryIngestor:
+    """
+    Thu nhận số liệu liên kết (telemetry) theo luồng và gộp thành lô cập nhật.
+
+    Nguồn (`source`):
+        - đường dẫn file thường: đọc nối đuôi kiểu `tail -f` (mặc định bắt đầu từ cuối file)
+        - đường dẫn named pipe (FIFO) hoặc "-" (stdin)
+        - "tcp://host:port" hoặc "unix:///duong/dan.sock": kết nối tới socket và đọc
+    Mỗi dòng là một mẫu, dạng JSON  {"u": "R1", "v": "R2", "weight": 12, "capacity": 800}
+    hoặc CSV  R1,R2,12,800  (weight, capacity; để trống = không đổi). Dòng "#" bị bỏ qua.
+    Giá trị phải là số hữu hạn không âm; dòng sai định dạng/giá trị bị đếm vào `errors`.
+
+    Luồng nền chỉ đọc + phân tích và GỘP mẫu theo cạnh (mẫu mới nhất thắng) vào một dict;
+    luồng giao diện gọi `drain()` theo nhịp timer để lấy cả lô. Số phép ghi vào đồ thị do
+    đó tỉ lệ với số cạnh thay đổi trong mỗi nhịp, không phải số mẫu nhận được.
+    """
+
+    FIELDS = ('weight', 'capacity')
+    READ_SIZE = 1 << 16
+
+    def __init__(self, source, from_start=False, poll_interval=0.05):
+        self.source = source
+        self.from_start = from_start
+        self.poll_interval = poll_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._close = None
+        self.received = 0
+        self.errors = 0
+        self.last_error = None
+
+    # --- Vòng đời ---
+    def start(self):
+        """Mở nguồn và chạy luồng đọc. Trả về (ok, msg) giống các hàm I/O khác."""
+        try:
+            read_chunk, self._close = self._open_source()
+        except Exception as e:
+            logging.error(f"Telemetry Open Error: {str(e)}")
+            return False, str(e)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(read_chunk,),
+                                        name="telemetry-reader", daemon=True)
+        self._thread.start()
+        logging.info(f"Telemetry ingestion started from {self.source}")
+        return True, "Success"
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._close is not None:
+            try:
+                self._close()
+            except OSError:
+                pass
+            self._close = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # --- Nguồn dữ liệu ---
+    def _open_source(self):
+        """
+        Trả về (read_chunk, close). read_chunk() -> bytes; b'' nghĩa là "chưa có dữ liệu",
+        None nghĩa là nguồn đã kết thúc. Mọi lần đọc đều có timeout ngắn để luồng dừng kịp.
+        """
+        src = self.source
+        wait = max(self.poll_interval, 0.01)
+
+        if src.startswith("tcp://") or src.startswith("unix://"):
+            if src.startswith("tcp://"):
+                host, _, port = src[len("tcp://"):].rpartition(":")
+                sock = socket.create_connection((host or "127.0.0.1", int(port)), timeout=5)
+            else:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(src[len("unix://"):])
+            sock.settimeout(wait)
+
+            def read_socket():
+                try:
+                    return sock.recv(self.READ_SIZE) or None
+                except socket.timeout:
+                    return b""
+            return read_socket, sock.close
+
+        if src == "-" or stat.S_ISFIFO(os.stat(src).st_mode):
+            fd = sys.stdin.fileno() if src == "-" else os.open(src, os.O_RDONLY | os.O_NONBLOCK)
+
+            def read_pipe():
+                ready, _, _ = select.select([fd], [], [], wait)
+                if not ready:
+                    return b""
+                try:
+                    # FIFO chưa có đầu ghi cũng trả về b'' -> coi là "chưa có dữ liệu"
+                    return os.read(fd, self.READ_SIZE) or (None if src == "-" else self._idle(wait))
+                except BlockingIOError:
+                    return b""
+            return read_pipe, (lambda: None) if src == "-" else (lambda: os.close(fd))
+
+        f = open(src, "rb")
+        if not self.from_start:
+            f.seek(0, os.SEEK_END)
+
+        def read_file():
+            data = f.read(self.READ_SIZE)
+            if data:
+                return data
+            if os.stat(src).st_size < f.tell():  # File bị cắt ngắn / xoay vòng log
+                f.seek(0)
+            return self._idle(wait)
+        return read_file, f.close
+
+    @staticmethod
+    def _idle(wait):
+        time.sleep(wait)
+        return b""
+
+    def _run(self, read_chunk):
+        tail = b""
+        while not self._stop.is_set():
+            try:
+                chunk = read_chunk()
+            except Exception as e:
+                self.last_error = str(e)
+                logging.error(f"Telemetry Read Error: {str(e)}")
+                break
+            if chunk is None:
+                break
+            if not chunk:
+                continue
+            lines = (tail + chunk).split(b"\n")
+            tail = lines.pop()
+            self._ingest(lines)
+        if tail.strip():
+            self._ingest([tail])
+        logging.info(f"Telemetry reader stopped ({self.received} samples)")
+
+    # --- Phân tích + gộp ---
+    @classmethod
+    def parse_line(cls, line):
+        """Chuyển một dòng thành ((u, v), {attr: value}); None nếu là dòng trống/chú thích."""
+        line = line.strip()
+        if not line or line.startswith("#"):
+            return None
+        if line.startswith("{"):
+            obj = json.loads(line)
+            u, v = obj["u"], obj["v"]
+            if not all(isinstance(n, (str, int)) and not isinstance(n, bool) for n in (u, v)):
+                raise ValueError(f"Tên node không hợp lệ: {u!r}, {v!r}")
+            attrs = {k: _metric(obj[k]) for k in cls.FIELDS if obj.get(k) is not None}
+        else:
+            parts = line.split(",")
+            u, v = parts[0].strip(), parts[1].strip()
+            attrs = {k: _metric(p) for k, p in zip(cls.FIELDS, parts[2:]) if p.strip()}
+        # Cạnh vô hướng: chuẩn hoá thứ tự để (u, v) và (v, u) gộp vào cùng một khoá
+        if str(v) < str(u):
+            u, v = v, u
+        return (u, v), attrs
+
+    def _ingest(self, raw_lines):
+        local = {}
+        samples = errors = 0
+        parse = self.parse_line
+        for raw in raw_lines:
+            try:
+                parsed = parse(raw.decode("utf-8"))
+            except (ValueError, KeyError, IndexError, TypeError, UnicodeDecodeError):
+                # TypeError: JSON hợp lệ nhưng sai kiểu (VD: dòng là mảng) - không được làm chết luồng đọc
+                errors += 1
+                continue
+            if parsed is None:
+                continue
+            samples += 1
+            key, attrs = parsed
+            if attrs:
+                prev = local.get(key)
+                if prev is None:
+                    local[key] = attrs
+                else:
+                    prev.update(attrs)
+        with self._lock:
+            pending = self._pending
+            for key, attrs in local.items():
+                prev = pending.get(key)
+                if prev is None:
+                    pending[key] = attrs
+                else:
+                    prev.update(attrs)
+            self.received += samples
+            self.errors += errors
+
+    def drain(self):
+        """Lấy toàn bộ cập nhật đã gộp kể từ lần gọi trước: {(u, v): {attr: value}}."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if batch:
+            tracer.count("telemetry.batch_edges", len(batch))
+        return batch
+
+    @staticmethod
+    def apply_batch(G, batch):
+        """
+        Ghi lô cập nhật vào đồ thị làm việc (một lần tăng version với VersionedGraph).
+
+        Returns:
+            tuple: (changed_edges, changed_attrs, missing)
+        """
+        if hasattr(G, 'update_edge_attrs'):
+            return G.update_edge_attrs(batch)
+        changed_edges, changed_attrs, missing = [], set(), 0
+        for (u, v), attrs in batch.items():
+            if not G.has_edge(u, v):
+                missing += 1
+                continue
+            data = G[u][v]
+            diff = {k: val for k, val in attrs.items() if data.get(k) != val}
+            if diff:
+                data.update(diff)
+                changed_attrs.update(diff)
+                changed_edges.append((u, v))
+        return changed_edges, changed_attrs, missing
@@ -0,0 +1,267 @@
+import time
+import logging
+from utils.versioned_graph import ABSENT, VISUAL_ATTRS
+
+
+def _edge_key(u, v):
+    return frozenset((u, v))
+
+
+class TopologyHistory:
+    """
+    Lịch sử tô pô dạng nhật ký thay đổi (delta log) gắn vào một VersionedGraph.
+
+    - Đồ thị sống là bản DUY NHẤT được lưu đầy đủ; mọi phiên bản cũ dùng chung (structural
+      sharing) toàn bộ phần không đổi với nó. Mỗi sự kiện thay đổi (xem
+      VersionedGraph.add_listener) mang đủ giá trị cũ để đảo ngược được.
+    - Mốc (snapshot) chỉ là một vị trí trong nhật ký -> tạo mốc O(1), bộ nhớ tăng theo số
+      chỉnh sửa chứ không theo (số mốc x kích thước đồ thị).
+    - `diff(a, b)` so sánh hai mốc chỉ với các phần tử bị chạm tới giữa chúng, không dựng
+      lại đồ thị. `checkout(a)` dựng lại đầy đủ một phiên bản: sao chép đồ thị sống rồi
+      đảo ngược các sự kiện sau mốc, O(n + m + số sự kiện).
+
+    Chỉ ghi nhận thay đổi phân tích; thuộc tính hiển thị (VISUAL_ATTRS) không vào lịch sử.
+
+    Giữ tối đa `max_snapshots` mốc và khoảng `max_events` sự kiện: mỗi lần tạo/dời mốc,
+    phần cũ nhất vượt trần bị bỏ bằng discard_before (luôn giữ mốc mới nhất cùng các sự
+    kiện sau nó). Nguồn ghi liên tục (telemetry) nên dùng `rolling_snapshot` - một mốc
+    duy nhất được dời tới hiện tại - thay vì tạo mốc mới mỗi nhịp.
+    """
+
+    MAX_SNAPSHOTS = 100
+    MAX_EVENTS = 200_000
+
+    def __init__(self, G, base_label="Ban đầu", max_snapshots=MAX_SNAPSHOTS, max_events=MAX_EVENTS):
+        self.graph = G
+        self.max_snapshots = max_snapshots
+        self.max_events = max_events
+        self._log = []
+        self._base = 0          # Số sự kiện đã bị loại bỏ khỏi đầu nhật ký (discard_before)
+        self._snapshots = {}    # id -> {'id', 'label', 'offset', 'version', 'time'}
+        self._rolling = {}      # nhãn -> id của mốc cuốn chiếu (rolling_snapshot)
+        self._next_id = 1
+        G.add_listener(self._log.append)
+        self.snapshot(base_label)
+
+    def detach(self):
+        """Ngừng theo dõi đồ thị (gọi khi đổi sang đồ thị khác)."""
+        try:
+            self.graph.remove_listener(self._log.append)
+        except ValueError:
+            pass
+
+    # --- Mốc ---
+    def snapshot(self, label=None):
+        """Đánh dấu trạng thái hiện tại; trả về id của mốc."""
+        snap_id = self._next_id
+        self._next_id += 1
+        self._snapshots[snap_id] = {
+            'id': snap_id,
+            'label': label or f"Mốc {snap_id}",
+            'offset': self._base + len(self._log),
+            'version': getattr(self.graph, 'version', None),
+            'time': time.time(),
+        }
+        self._enforce_retention()
+        return snap_id
+
+    def rolling_snapshot(self, label):
+        """
+        Mốc cuốn chiếu: lần đầu tạo mốc `label`, các lần sau dời chính mốc đó tới trạng thái
+        hiện tại (giữ id). Dùng cho nguồn thay đổi liên tục để không sinh một mốc mỗi nhịp.
+        """
+        snap = self._snapshots.get(self._rolling.get(label))
+        if snap is None:
+            self._rolling[label] = self.snapshot(label)
+            return self._rolling[label]
+        snap.update(offset=self._base + len(self._log),
+                    version=getattr(self.graph, 'version', None), time=time.time())
+        self._enforce_retention()
+        return snap['id']
+
+    def _enforce_retention(self):
+        """Bỏ mốc + sự kiện cũ nhất vượt max_snapshots / max_events (giữ mốc mới nhất)."""
+        snaps = sorted(self._snapshots.values(), key=lambda s: (s['offset'], s['id']))
+        if self.max_snapshots and len(snaps) > self.max_snapshots:
+            for s in snaps[:len(snaps) - self.max_snapshots]:
+                del self._snapshots[s['id']]
+            snaps = snaps[len(snaps) - self.max_snapshots:]
+        if not snaps:
+            return
+        end = self._base + len(self._log)
+        keep = next((s for s in snaps if self.max_events is None or end - s['offset'] <= self.max_events),
+                    snaps[-1])
+        # Sự kiện trước mốc cũ nhất còn giữ không còn mốc nào cần tới
+        self.discard_before(keep['id'])
+
+    def snapshots(self):
+        """Danh sách mốc (cũ -> mới), mỗi mốc kèm số sự kiện tính tới hiện tại."""
+        end = self._base + len(self._log)
+        return [dict(s, pending_events=end - s['offset'])
+                for s in sorted(self._snapshots.values(), key=lambda s: s['offset'])]
+
+    def latest_snapshot(self):
+        return max(self._snapshots) if self._snapshots else None
+
+    @property
+    def event_count(self):
+        return len(self._log)
+
+    def discard_before(self, snap_id):
+        """Bỏ các sự kiện (và mốc) cũ hơn `snap_id` để giới hạn bộ nhớ."""
+        offset = self._offset(snap_id)
+        del self._log[:offset - self._base]
+        self._base = offset
+        self._snapshots = {k: s for k, s in self._snapshots.items() if s['offset'] >= offset}
+        self._rolling = {label: k for label, k in self._rolling.items() if k in self._snapshots}
+
+    def _offset(self, snap_id):
+        if snap_id is None:
+            return self._base + len(self._log)
+        snap = self._snapshots.get(snap_id)
+        if snap is None:
+            raise KeyError(f"Không có mốc {snap_id}")
+        return snap['offset']
+
+    def _events_after(self, offset):
+        return self._log[offset - self._base:]
+
+    # --- Dựng lại phiên bản ---
+    def checkout(self, snap_id):
+        """Dựng lại đồ thị tại mốc `snap_id` (đồ thị mới, độc lập với đồ thị sống)."""
+        H = self.graph.copy()
+        for event in reversed(self._events_after(self._offset(snap_id))):
+            self._undo_on_graph(H, event)
+        logging.info(f"Topology checkout #{snap_id}: {H.number_of_nodes()} nodes, {H.number_of_edges()} edges")
+        return H
+
+    @staticmethod
+    def _undo_on_graph(H, event):
+        kind = event[0]
+        if kind == 'add_node':
+            H.remove_node(event[1])
+        elif kind == 'remove_node':
+            _, n, attrs, edges = event
+            H.add_node(n, **attrs)
+            for nbr, edge_attrs in edges:
+                H.add_edge(n, nbr, **edge_attrs)
+        elif kind == 'add_edge':
+            H.remove_edge(event[1], event[2])
+        elif kind == 'remove_edge':
+            H.add_edge(event[1], event[2], **event[3])
+        else:
+            data = H.nodes[event[1]] if kind == 'node_attr' else H[event[1]][event[2]]
+            key, old = event[-3], event[-2]
+            if old is ABSENT:
+                data.pop(key, None)
+            else:
+                data[key] = old
+
+    # --- So sánh ---
+    def diff(self, snap_a, snap_b=None):
+        """
+        Thay đổi ròng từ mốc `snap_a` tới mốc `snap_b` (None = trạng thái hiện tại).
+        Chỉ xét các node/cạnh bị chạm tới sau `snap_a`: chi phí O(số sự kiện), không O(n + m).
+
+        Returns:
+            dict: {'nodes_added', 'nodes_removed', 'edges_added', 'edges_removed': [...],
+                   'node_changes': {n: {attr: (cũ, mới)}}, 'edge_changes': {(u, v): {attr: (cũ, mới)}}}
+                  Giá trị thuộc tính không tồn tại được trả về là None.
+        """
+        off_a, off_b = self._offset(snap_a), self._offset(snap_b)
+        if off_a > off_b:
+            off_a, off_b = off_b, off_a
+        events = self._events_after(off_a)
+
+        # 1. Tập phần tử bị chạm tới + trạng thái hiện tại của chúng (None = không tồn tại)
+        G = self.graph
+        nodes, edges, names = {}, {}, {}
+        for event in events:
+            kind = event[0]
+            if kind in ('add_node', 'remove_node', 'node_attr'):
+                nodes[event[1]] = None
+                if kind == 'remove_node':
+                    for nbr, _ in event[3]:
+                        edges[_edge_key(event[1], nbr)] = None
+                        names.setdefault(_edge_key(event[1], nbr), (event[1], nbr))
+            else:
+                edges[_edge_key(event[1], event[2])] = None
+                names.setdefault(_edge_key(event[1], event[2]), (event[1], event[2]))
+        for n in nodes:
+            nodes[n] = dict(G.nodes[n]) if G.has_node(n) else None
+        for key in edges:
+            u, v = names[key]
+            edges[key] = dict(G[u][v]) if G.has_edge(u, v) else None
+
+        # 2. Đảo ngược tới mốc b rồi tới mốc a trên trạng thái thu gọn
+        after_b = off_b - off_a  # Chỉ số sự kiện đầu tiên sau mốc b
+        for i in range(len(events) - 1, after_b - 1, -1):
+            self._undo_on_state(nodes, edges, events[i])
+        state_b = ({n: (d.copy() if d is not None else None) for n, d in nodes.items()},
+                   {k: (d.copy() if d is not None else None) for k, d in edges.items()})
+        for i in range(after_b - 1, -1, -1):
+            self._undo_on_state(nodes, edges, events[i])
+
+        result = {'nodes_added': [], 'nodes_removed': [], 'edges_added': [], 'edges_removed': [],
+                  'node_changes': {}, 'edge_changes': {}}
+        self._compare(nodes, state_b[0], lambda n: n, result, 'nodes', 'node_changes')
+        self._compare(edges, state_b[1], lambda k: names[k], result, 'edges', 'edge_changes')
+        return result
+
+    @staticmethod
+    def _undo_on_state(nodes, edges, event):
+        kind = event[0]
+        if kind == 'add_node':
+            nodes[event[1]] = None
+        elif kind == 'remove_node':
+            _, n, attrs, removed = event
+            nodes[n] = dict(attrs)
+            for nbr, edge_attrs in removed:
+                edges[_edge_key(n, nbr)] = dict(edge_attrs)
+        elif kind == 'add_edge':
+            edges[_edge_key(event[1], event[2])] = None
+        elif kind == 'remove_edge':
+            edges[_edge_key(event[1], event[2])] = dict(event[3])
+        else:
+            data = nodes[event[1]] if kind == 'node_attr' else edges[_edge_key(event[1], event[2])]
+            key, old = event[-3], event[-2]
+            if data is None:
+                return
+            if old is ABSENT:
+                data.pop(key, None)
+            else:
+                data[key] = old
+
+    @staticmethod
+    def _compare(before, after, name_of, result, prefix, changes_key):
+        for key, old in before.items():
+            new = after[key]
+            if old is None and new is None:
+                continue
+            if old is None:
+                result[f'{prefix}_added'].append(name_of(key))
+            elif new is None:
+                result[f'{prefix}_removed'].append(name_of(key))
+            else:
+                delta = {attr: (old.get(attr), new.get(attr))
+                         for attr in set(old) | set(new)
+                         if attr not in VISUAL_ATTRS and old.get(attr, ABSENT) != new.get(attr, ABSENT)}
+                if delta:
+                    result[changes_key][name_of(key)] = delta
+
+    @staticmethod
+    def format_diff(diff):
+        """Chuyển kết quả diff thành các dòng văn bản (để hiển thị / xuất báo cáo)."""
+        lines = [f"Node thêm: {len(diff['nodes_added'])} | Node xoá: {len(diff['nodes_removed'])} | "
+                 f"Cạnh thêm: {len(diff['edges_added'])} | Cạnh xoá: {len(diff['edges_removed'])} | "
+                 f"Node đổi thuộc tính: {len(diff['node_changes'])} | Cạnh đổi thuộc tính: {len(diff['edge_changes'])}",
+                 ""]
+        lines += [f"+ Node {n}" for n in diff['nodes_added']]
+        lines += [f"- Node {n}" for n in diff['nodes_removed']]
+        lines += [f"+ Cạnh {u} - {v}" for u, v in diff['edges_added']]
+        lines += [f"- Cạnh {u} - {v}" for u, v in diff['edges_removed']]
+        for n, delta in diff['node_changes'].items():
+            lines.append(f"~ Node {n}: " + ", ".join(f"{k}: {a} -> {b}" for k, (a, b) in sorted(delta.items())))
+        for (u, v), delta in diff['edge_changes'].items():
+            lines.append(f"~ Cạnh {u} - {v}: " + ", ".join(f"{k}: {a} -> {b}" for k, (a, b) in sorted(delta.items())))
+        return lines
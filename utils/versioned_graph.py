@@ -0,0 +1,762 @@
+import itertools
+import functools
+from collections.abc import MutableMapping
+import networkx as nx
+from utils.attribute_store import AttributeStore, MISSING, NODE_SCHEMA, EDGE_SCHEMA
+
+# Các thuộc tính chỉ phục vụ hiển thị (màu, kích thước, trạng thái STP vẽ trên canvas).
+# Thay đổi chúng KHÔNG làm kết quả phân tích cũ bị lỗi thời -> không tăng version.
+VISUAL_ATTRS = frozenset({'color', 'size', 'stp_state', 'style'})
+
+# Mỗi đồ thị có một mã định danh duy nhất (không dùng id() vì id có thể bị tái sử dụng)
+_graph_ids = itertools.count(1)
+
+# Thuộc tính được lập chỉ mục phụ (loại thiết bị / loại cáp -> tập phần tử)
+INDEXED_ATTR = 'type'
+
+# Giá trị "không có thuộc tính" trong sự kiện thay đổi (khác None - None là giá trị hợp lệ)
+ABSENT = object()
+
+
+def _bucket_add(index, key, member):
+    bucket = index.get(key)
+    if bucket is None:
+        index[key] = {member}
+    else:
+        bucket.add(member)
+
+
+def _bucket_discard(index, key, member):
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.discard(member)
+        if not bucket:
+            del index[key]
+
+
+def _node_of(item):
+    """Node trong một phần tử của add_nodes_from: `n` hoặc `(n, attrs)` (giống quy tắc của networkx)."""
+    try:
+        hash(item)
+        return item
+    except TypeError:
+        return item[0]
+
+
+def _scan_counts(types):
+    counts = {}
+    for t in types:
+        counts[t] = counts.get(t, 0) + 1
+    return counts
+
+
+def _scan_groups(nodes_with_type):
+    groups = {}
+    for n, t in nodes_with_type:
+        groups.setdefault(t, []).append(n)
+    return groups
+
+
+def _restore_attr_dict(graph, items, key=None):
+    """Khôi phục dict thuộc tính khi pickle/deepcopy mà không tăng version."""
+    d = _TrackedAttrDict(graph)
+    dict.update(d, items)
+    d._key = key
+    return d
+
+
+class _TrackedAttrDict(dict):
+    """
+    Dict thuộc tính của node/cạnh, báo cho đồ thị chủ mỗi khi bị sửa.
+    Chỉ các thao tác ghi bị ghi đè; các thao tác đọc vẫn chạy bằng code C của dict.
+
+    `_key` là danh tính của phần tử sở hữu dict: ('node_attr', n) hoặc ('edge_attr', u, v),
+    được gán khi phần tử được thêm vào đồ thị. Nó dùng để cập nhật chỉ mục theo loại
+    (INDEXED_ATTR) và để phát sự kiện thay đổi kèm giá trị cũ/mới khi đồ thị có listener;
+    các phép ghi khác chỉ tốn thêm một phép kiểm tra.
+    """
+    __slots__ = ('_graph', '_key')
+
+    def __init__(self, graph=None):
+        super().__init__()
+        self._graph = graph
+        self._key = None
+
+    def __reduce__(self):
+        return (_restore_attr_dict, (self._graph, dict(self), self._key))
+
+    _raw_set = dict.__setitem__  # Ghi không kích hoạt theo dõi (đồ thị tự lo version/sự kiện)
+
+    def _release(self):
+        pass
+
+    def _listening(self):
+        graph = self._graph
+        return graph is not None and self._key is not None and graph._listeners
+
+    def _touch(self, keys):
+        if self._graph is not None:
+            self._graph._attrs_touched(keys)
+
+    def _changed(self, changes):
+        """changes: [(attr, old, new)] - cập nhật chỉ mục và phát sự kiện (trừ thuộc tính hiển thị)."""
+        if self._graph is not None and self._key is not None:
+            self._graph._attrs_changed(self._key, changes)
+
+    def __setitem__(self, key, value):
+        if self._key is not None and (key == INDEXED_ATTR or self._listening()):
+            old = dict.get(self, key, ABSENT)
+            super().__setitem__(key, value)
+            self._changed([(key, old, value)])
+        else:
+            super().__setitem__(key, value)
+        self._touch((key,))
+
+    def __delitem__(self, key):
+        old = dict.__getitem__(self, key)
+        super().__delitem__(key)
+        self._changed([(key, old, ABSENT)])
+        self._touch((key,))
+
+    def pop(self, key, *default):
+        present = key in self
+        value = super().pop(key, *default)
+        if present:
+            self._changed([(key, value, ABSENT)])
+            self._touch((key,))
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._changed([(item[0], item[1], ABSENT)])
+        self._touch((item[0],))
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return super().__getitem__(key)
+
+    def update(self, *args, **kwargs):
+        if self._key is None:
+            # Dict chưa có danh tính = node/cạnh đang được add_* tạo: thao tác đó tự tăng
+            # version và đưa phần tử vào chỉ mục sau khi ghi xong -> ghi thẳng như dict
+            dict.update(self, *args, **kwargs)
+            return
+        changes = dict(*args, **kwargs)
+        if changes:
+            if INDEXED_ATTR in changes or self._listening():
+                olds = [(k, dict.get(self, k, ABSENT), v) for k, v in changes.items()]
+                super().update(changes)
+                self._changed(olds)
+            else:
+                super().update(changes)
+            self._touch(changes)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        items = list(self.items())
+        super().clear()
+        self._changed([(k, v, ABSENT) for k, v in items])
+        self._touch([k for k, _ in items])
+
+
+class _ColumnarAttrDict(MutableMapping):
+    """
+    Dict-view thuộc tính của một node/cạnh, dữ liệu nằm trong AttributeStore (dạng cột) của
+    đồ thị. Cùng giao thức theo dõi với _TrackedAttrDict (`_key`, version, chỉ mục, sự kiện).
+
+    - Hàng trong kho chỉ được cấp ở lần ghi đầu tiên (networkx tạo sẵn dict rỗng làm giá trị
+      mặc định rồi bỏ đi, các dict đó không tốn hàng nào).
+    - Khi phần tử bị xoá khỏi đồ thị, view tách khỏi kho (`_release`): giá trị được chép ra
+      dict riêng nên ai còn giữ view vẫn đọc đúng, còn hàng được tái sử dụng.
+    - `copy()` trả về dict thường, giống dict thuộc tính của networkx.
+    """
+    __slots__ = ('_graph', '_store', '_row', '_k')  # _row: số hàng, -1 (chưa có) hoặc dict sau khi tách
+
+    def __init__(self, graph, store):
+        self._graph = graph
+        self._store = store
+        self._row = -1
+        self._k = None
+
+    @property
+    def _key(self):
+        return self._k
+
+    @_key.setter
+    def _key(self, key):
+        self._k = key
+        if type(self._row) is int and self._row >= 0 and key is not None and key[0] == 'node_attr':
+            self._store.compact(self._row, key[1])
+
+    def _ident(self):
+        key = self._k
+        return key[1] if key is not None and key[0] == 'node_attr' else None
+
+    # --- Truy cập kho (không theo dõi) ---
+    def _get(self, attr, default=ABSENT):
+        row = self._row
+        if type(row) is not int:
+            return row.get(attr, default)
+        if row < 0:
+            return default
+        value = self._store.get(row, attr, MISSING, self._ident() if attr == 'label' else None)
+        return default if value is MISSING else value
+
+    def _raw_set(self, attr, value):
+        row = self._row
+        if type(row) is not int:
+            row[attr] = value
+            return
+        if row < 0:
+            row = self._row = self._store.alloc()
+        self._store.set(row, attr, value, self._ident() if attr == 'label' else None)
+
+    def _raw_del(self, attr):
+        row = self._row
+        if type(row) is not int:
+            return row.pop(attr, ABSENT)
+        if row < 0:
+            return ABSENT
+        value = self._store.discard(row, attr, self._ident() if attr == 'label' else None)
+        return ABSENT if value is MISSING else value
+
+    def _as_dict(self):
+        row = self._row
+        if type(row) is not int:
+            return row
+        return self._store.row_dict(row, self._ident()) if row >= 0 else {}
+
+    def _release(self):
+        """Tách khỏi kho khi phần tử bị xoá khỏi đồ thị (gọi nhiều lần không sao)."""
+        row = self._row
+        if type(row) is not int:
+            return
+        own = self._as_dict()
+        if row >= 0:
+            self._store.release(row)
+        self._store, self._row = None, own
+
+    # --- Mapping ---
+    def __getitem__(self, attr):
+        value = self._get(attr)
+        if value is ABSENT:
+            raise KeyError(attr)
+        return value
+
+    def get(self, attr, default=None):
+        return self._get(attr, default)
+
+    def __contains__(self, attr):
+        return self._get(attr) is not ABSENT
+
+    def __iter__(self):
+        return iter(list(self._as_dict()))
+
+    def __len__(self):
+        return len(self._as_dict())
+
+    def keys(self):
+        return self._as_dict().keys()
+
+    def items(self):
+        return self._as_dict().items()
+
+    def values(self):
+        return self._as_dict().values()
+
+    def __repr__(self):
+        return repr(self._as_dict())
+
+    def copy(self):
+        return dict(self._as_dict())
+
+    # --- Ghi có theo dõi (giống _TrackedAttrDict) ---
+    def __setitem__(self, attr, value):
+        graph = self._graph
+        if self._k is not None and (attr == INDEXED_ATTR or graph._listeners):
+            old = self._get(attr)
+            self._raw_set(attr, value)
+            graph._attrs_changed(self._k, [(attr, old, value)])
+        else:
+            self._raw_set(attr, value)
+        graph._attrs_touched((attr,))
+
+    def __delitem__(self, attr):
+        old = self._raw_del(attr)
+        if old is ABSENT:
+            raise KeyError(attr)
+        if self._k is not None:
+            self._graph._attrs_changed(self._k, [(attr, old, ABSENT)])
+        self._graph._attrs_touched((attr,))
+
+    def pop(self, attr, *default):
+        old = self._raw_del(attr)
+        if old is ABSENT:
+            if default:
+                return default[0]
+            raise KeyError(attr)
+        if self._k is not None:
+            self._graph._attrs_changed(self._k, [(attr, old, ABSENT)])
+        self._graph._attrs_touched((attr,))
+        return old
+
+    def update(self, *args, **kwargs):
+        changes = dict(*args, **kwargs)
+        if not changes:
+            return
+        graph = self._graph
+        if self._k is not None and (INDEXED_ATTR in changes or graph._listeners):
+            olds = [(k, self._get(k), v) for k, v in changes.items()]
+            for k, v in changes.items():
+                self._raw_set(k, v)
+            graph._attrs_changed(self._k, olds)
+        else:
+            row = self._row
+            if type(row) is int:
+                # Đường nhanh (thêm node/cạnh mới): ghi thẳng vào kho
+                store = self._store
+                if row < 0:
+                    row = self._row = store.alloc()
+                ident = self._ident()
+                for k, v in changes.items():
+                    store.set(row, k, v, ident)
+            else:
+                row.update(changes)
+        graph._attrs_touched(changes)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        items = list(self.items())
+        for k, _ in items:
+            self._raw_del(k)
+        if self._k is not None:
+            self._graph._attrs_changed(self._k, [(k, v, ABSENT) for k, v in items])
+        self._graph._attrs_touched([k for k, _ in items])
+
+
+def _restore_node_dict(graph, items):
+    d = _NodeDict(graph)
+    dict.update(d, items)
+    return d
+
+
+class _NodeDict(dict):
+    """
+    Bảng node -> dict thuộc tính (G._node). Một số hàm networkx ghi thẳng dict thường vào
+    đây (VD: relabel_nodes/convert_node_labels_to_integers: `H._node.update((n, d.copy()))`).
+    Dict lạ được nhận về: node đã có -> chép nội dung vào dict có theo dõi hiện tại (version,
+    chỉ mục, sự kiện vẫn đúng); node mới -> bọc vào dict của đồ thị, lập chỉ mục khi add_*.
+    """
+    __slots__ = ('_graph',)
+
+    def __init__(self, graph):
+        super().__init__()
+        self._graph = graph
+
+    def __reduce__(self):
+        return (_restore_node_dict, (self._graph, dict(self)))
+
+    def __setitem__(self, n, attrs):
+        if isinstance(attrs, (_TrackedAttrDict, _ColumnarAttrDict)) and attrs._graph is self._graph:
+            dict.__setitem__(self, n, attrs)
+            return
+        current = self.get(n)
+        if current is None:
+            wrapped = self._graph.node_attr_dict_factory()
+            wrapped.update(attrs)
+            dict.__setitem__(self, n, wrapped)
+            return
+        for attr in [a for a in current if a not in attrs]:
+            del current[attr]
+        current.update(attrs)
+
+    def update(self, *args, **kwargs):
+        for n, attrs in dict(*args, **kwargs).items():
+            self[n] = attrs
+
+
+class VersionedGraph(nx.Graph):
+    """
+    Đồ thị mạng làm việc có bộ đếm thay đổi (mutation counter).
+
+    `version` tăng mỗi khi cấu trúc (node/cạnh) hoặc thuộc tính phân tích (weight,
+    capacity, type...) thay đổi, kể cả khi sửa trực tiếp qua `G.nodes[n][...]` hay
+    `G[u][v][...]`. Kết hợp với `graph_id`, cặp (graph_id, version) định danh duy nhất
+    một trạng thái của đồ thị -> dùng làm khoá cache kết quả phân tích.
+
+    Đồ thị còn duy trì chỉ mục phụ theo thuộc tính `type` (loại thiết bị -> tập node,
+    loại cáp -> tập cạnh), luôn khớp với dữ liệu qua mọi thao tác thêm/xoá/sửa. Nhờ đó
+    đếm theo loại là O(số loại) và lọc theo loại là O(kết quả) thay vì quét toàn đồ thị.
+
+    Mặc định thuộc tính là dict thường như networkx. columnar=True (tuỳ chọn) đặt thuộc tính
+    node/cạnh vào hai AttributeStore dạng cột (type mã hoá, weight/capacity dạng số, ip đóng
+    gói 32 bit, label suy ra từ id), mỗi phần tử chỉ giữ một dict-view nhỏ: tiết kiệm bộ nhớ
+    cho đồ thị rất lớn nhưng mỗi lần đọc thuộc tính chậm hơn (Dijkstra ~1.7x, MST ~1.3x,
+    edges(data='weight') ~2.8x), nên chỉ bật khi bộ nhớ quan trọng hơn tốc độ phân tích.
+    """
+
+    def __init__(self, incoming_graph_data=None, columnar=False, **attr):
+        self.version = 0
+        self.graph_id = next(_graph_ids)
+        self.columnar = columnar
+        # Factory là thuộc tính của instance để dict thuộc tính biết đồ thị chủ
+        self._install_stores(nodes=True, edges=True)
+        self.node_dict_factory = functools.partial(_NodeDict, self)
+        self._listeners = []
+        self._node_types = {}   # type -> set(node); node không có 'type' nằm ở khoá None
+        self._edge_types = {}   # type -> set((u, v)) theo hướng lúc cạnh được thêm
+        # Sao từ nx.Graph vô hướng: thêm node/cạnh theo hai lô thay vì qua convert của
+        # networkx (mỗi node một lần add_edges_from -> mỗi lần một lượt lập chỉ mục)
+        bulk = (isinstance(incoming_graph_data, nx.Graph)
+                and not incoming_graph_data.is_directed() and not incoming_graph_data.is_multigraph())
+        super().__init__(None if bulk else incoming_graph_data, **attr)
+        if bulk:
+            self.graph.update(incoming_graph_data.graph)
+            self.graph.update(attr)
+            self.add_nodes_from(incoming_graph_data.nodes(data=True))
+            self.add_edges_from(incoming_graph_data.edges(data=True))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_listeners'] = []  # Listener (VD: lịch sử) thuộc về đồ thị gốc, không đi theo bản sao
+        return state
+
+    def __setstate__(self, state):
+        # Bản sao (pickle/deepcopy) là một đồ thị khác -> cấp graph_id mới
+        self.__dict__.update(state)
+        self.__dict__.setdefault('_listeners', [])
+        self.__dict__.setdefault('columnar', False)  # Dữ liệu lưu trước khi có kho cột
+        if not isinstance(self._node, _NodeDict):
+            self.node_dict_factory = functools.partial(_NodeDict, self)
+            self._node = _restore_node_dict(self, self._node)
+        self.graph_id = next(_graph_ids)
+        if '_node_types' not in state:
+            self._rebuild_indexes()
+
+    # Đồ thị suy ra theo hướng (to_directed/to_undirected) là bản phân tích một lần:
+    # dùng lớp networkx thường, không mang chỉ mục + theo dõi thay đổi của đồ thị làm việc.
+    def to_directed_class(self):
+        return nx.DiGraph
+
+    def to_undirected_class(self):
+        return nx.Graph
+
+    def _install_stores(self, nodes, edges):
+        """Tạo kho cột mới (hoặc factory dict thường) cho node và/hoặc cạnh."""
+        if not self.columnar:
+            self.node_attr_dict_factory = functools.partial(_TrackedAttrDict, self)
+            self.edge_attr_dict_factory = functools.partial(_TrackedAttrDict, self)
+            return
+        if nodes:
+            self.node_store = AttributeStore(NODE_SCHEMA)
+            self.node_attr_dict_factory = functools.partial(_ColumnarAttrDict, self, self.node_store)
+        if edges:
+            self.edge_store = AttributeStore(EDGE_SCHEMA)
+            self.edge_attr_dict_factory = functools.partial(_ColumnarAttrDict, self, self.edge_store)
+
+    def _bump(self):
+        self.version += 1
+
+    # --- Được dict thuộc tính gọi khi bị sửa ---
+    def _attrs_touched(self, keys):
+        if any(k not in VISUAL_ATTRS for k in keys):
+            self._bump()
+
+    def _attrs_changed(self, key, changes):
+        """changes: [(attr, old, new)] - cập nhật chỉ mục và phát sự kiện (trừ thuộc tính hiển thị)."""
+        for attr, old, new in changes:
+            if attr == INDEXED_ATTR:
+                self._reindex(key, old, new)
+            if attr not in VISUAL_ATTRS and self._listeners:
+                self._emit(key + (attr, old, new))
+
+    # --- Sự kiện thay đổi (cho lịch sử tô pô, đồng bộ...) ---
+    def add_listener(self, callback):
+        """
+        Đăng ký callback(event) nhận mọi thay đổi KHÔNG phải hiển thị, dạng tuple:
+            ('add_node', n, attrs)             ('remove_node', n, attrs, [(nbr, edge_attrs)])
+            ('add_edge', u, v, attrs)          ('remove_edge', u, v, attrs)
+            ('node_attr', n, key, old, new)    ('edge_attr', u, v, key, old, new)
+        old/new là ABSENT khi thuộc tính chưa có / bị xoá. attrs là bản sao tại thời điểm đó.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self._listeners.remove(callback)
+
+    def _emit(self, event):
+        for callback in self._listeners:
+            callback(event)
+
+    @staticmethod
+    def _public(attrs):
+        return {k: v for k, v in attrs.items() if k not in VISUAL_ATTRS}
+
+    # --- Chỉ mục theo loại ---
+    def _index_node(self, n, d):
+        """Gán danh tính + đưa node MỚI vào chỉ mục (dict chưa có _key nghĩa là node vừa được tạo)."""
+        d._key = ('node_attr', n)
+        _bucket_add(self._node_types, d.get(INDEXED_ATTR), n)
+        if self._listeners:
+            self._emit(('add_node', n, self._public(d)))
+
+    def _index_edge(self, u, v, d):
+        d._key = ('edge_attr', u, v)
+        _bucket_add(self._edge_types, d.get(INDEXED_ATTR), (u, v))
+        if self._listeners:
+            self._emit(('add_edge', u, v, self._public(d)))
+
+    def _index_new(self, nodes=(), edges=()):
+        """Đưa vào chỉ mục các node/cạnh trong danh sách vừa thêm mà chưa có danh tính."""
+        node_dicts = self._node
+        for n in nodes:
+            d = node_dicts[n]
+            if getattr(d, '_key', None) is None:
+                self._index_node(n, d)
+        adj = self._adj
+        for u, v in edges:
+            d = adj[u][v]
+            if getattr(d, '_key', None) is None:
+                self._index_edge(u, v, self._adopt_edge(u, v, d))
+
+    def _adopt_edge(self, u, v, d):
+        """Dict cạnh lạ (dict thường ghi thẳng vào _adj) -> bọc vào dict có theo dõi của đồ thị."""
+        if isinstance(d, (_TrackedAttrDict, _ColumnarAttrDict)) and d._graph is self:
+            return d
+        wrapped = self.edge_attr_dict_factory()
+        wrapped.update(d)
+        self._adj[u][v] = self._adj[v][u] = wrapped
+        return wrapped
+
+    def _unindex_edge(self, d):
+        """Gỡ cạnh khỏi chỉ mục và trả hàng của nó về kho cột (gọi TRƯỚC khi xoá khỏi đồ thị)."""
+        key = getattr(d, '_key', None)
+        if key is not None:
+            _bucket_discard(self._edge_types, d.get(INDEXED_ATTR), key[1:])
+            d._release()
+
+    def _unindex_node(self, n):
+        """Gỡ node cùng các cạnh kề khỏi chỉ mục (gọi TRƯỚC khi xoá khỏi đồ thị)."""
+        d = self._node[n]
+        _bucket_discard(self._node_types, d.get(INDEXED_ATTR), n)
+        for edge_data in self._adj[n].values():
+            self._unindex_edge(edge_data)
+        if hasattr(d, '_release'):
+            d._release()
+
+    def _reindex(self, key, old, new):
+        """Thuộc tính `type` của một phần tử đổi từ old sang new (ABSENT = không có)."""
+        if key[0] == 'node_attr':
+            index, member = self._node_types, key[1]
+        else:
+            index, member = self._edge_types, key[1:]
+        _bucket_discard(index, None if old is ABSENT else old, member)
+        _bucket_add(index, None if new is ABSENT else new, member)
+
+    def _rebuild_indexes(self):
+        """Dựng lại chỉ mục từ đầu (chỉ dùng khi khôi phục dữ liệu cũ không kèm chỉ mục)."""
+        self._node_types, self._edge_types = {}, {}
+        for n, d in self._node.items():
+            d._key = ('node_attr', n)
+            _bucket_add(self._node_types, d.get(INDEXED_ATTR), n)
+        for u, v, d in nx.Graph.edges(self, data=True):
+            d._key = ('edge_attr', u, v)
+            _bucket_add(self._edge_types, d.get(INDEXED_ATTR), (u, v))
+
+    def _has_index(self):
+        # Subgraph view (G.subgraph(...)) là instance rỗng trỏ vào dữ liệu của đồ thị gốc:
+        # chỉ mục của nó không phản ánh dữ liệu -> phải quét.
+        return '_graph' not in self.__dict__
+
+    def nodes_of_type(self, node_type):
+        """Tập node có `type` == node_type (None = node không có type). O(kết quả)."""
+        if not self._has_index():
+            return frozenset(n for n, t in self.nodes(data=INDEXED_ATTR) if t == node_type)
+        return frozenset(self._node_types.get(node_type, ()))
+
+    def edges_of_type(self, edge_type):
+        """Tập cạnh (u, v) có `type` == edge_type (None = cạnh không có type). O(kết quả)."""
+        if not self._has_index():
+            return frozenset((u, v) for u, v, t in self.edges(data=INDEXED_ATTR) if t == edge_type)
+        return frozenset(self._edge_types.get(edge_type, ()))
+
+    def node_type_counts(self):
+        """{type: số node}. O(số loại)."""
+        if not self._has_index():
+            return _scan_counts(t for _, t in self.nodes(data=INDEXED_ATTR))
+        return {t: len(members) for t, members in self._node_types.items()}
+
+    def edge_type_counts(self):
+        """{type: số cạnh}. O(số loại)."""
+        if not self._has_index():
+            return _scan_counts(t for _, _, t in self.edges(data=INDEXED_ATTR))
+        return {t: len(members) for t, members in self._edge_types.items()}
+
+    def node_type_groups(self):
+        """{type: [node]} - nhóm node theo loại, O(n) chỉ một lượt sao chép (không rẽ nhánh)."""
+        if not self._has_index():
+            return _scan_groups(self.nodes(data=INDEXED_ATTR))
+        return {t: list(members) for t, members in self._node_types.items()}
+
+    # --- Các thao tác thay đổi cấu trúc ---
+    def add_node(self, node_for_adding, **attr):
+        super().add_node(node_for_adding, **attr)
+        self._bump()
+        d = self._node[node_for_adding]
+        if d._key is None:
+            self._index_node(node_for_adding, d)
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        nodes_for_adding = list(nodes_for_adding)
+        super().add_nodes_from(nodes_for_adding, **attr)
+        self._bump()
+        self._index_new(nodes=[_node_of(item) for item in nodes_for_adding])
+
+    def _removed_node_event(self, n):
+        edges = [(nbr, self._public(d)) for nbr, d in self._adj[n].items()]
+        return ('remove_node', n, self._public(self._node[n]), edges)
+
+    def remove_node(self, n):
+        event = None
+        if n in self._node:
+            event = self._removed_node_event(n) if self._listeners else None
+            self._unindex_node(n)
+        super().remove_node(n)
+        self._bump()
+        if event:
+            self._emit(event)
+
+    def remove_nodes_from(self, nodes):
+        if self._listeners:
+            for n in list(nodes):
+                if n in self._node:
+                    self.remove_node(n)
+            return
+        nodes = list(nodes)
+        for n in nodes:
+            if n in self._node:
+                self._unindex_node(n)
+        super().remove_nodes_from(nodes)
+        self._bump()
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        super().add_edge(u_of_edge, v_of_edge, **attr)
+        self._bump()
+        self._index_new(nodes=(u_of_edge, v_of_edge), edges=((u_of_edge, v_of_edge),))
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        ebunch_to_add = list(ebunch_to_add)
+        super().add_edges_from(ebunch_to_add, **attr)
+        self._bump()
+        edges = [(e[0], e[1]) for e in ebunch_to_add]
+        # Node mới phải vào chỉ mục (và phát sự kiện) trước cạnh nối chúng
+        self._index_new(nodes=[n for e in edges for n in e], edges=edges)
+
+    def remove_edge(self, u, v):
+        event = None
+        if self.has_edge(u, v):
+            d = self._adj[u][v]
+            event = ('remove_edge', u, v, self._public(d)) if self._listeners else None
+            self._unindex_edge(d)
+        super().remove_edge(u, v)
+        self._bump()
+        if event:
+            self._emit(event)
+
+    def remove_edges_from(self, ebunch):
+        if self._listeners:
+            for e in list(ebunch):
+                if self.has_edge(e[0], e[1]):
+                    self.remove_edge(e[0], e[1])
+            return
+        ebunch = list(ebunch)
+        for e in ebunch:
+            d = self._adj.get(e[0], {}).get(e[1])
+            if d is not None:
+                self._unindex_edge(d)
+        super().remove_edges_from(ebunch)
+        self._bump()
+
+    def clear(self):
+        if self._listeners:
+            self.remove_nodes_from(list(self._node))
+        super().clear()
+        self._node_types, self._edge_types = {}, {}
+        self._install_stores(nodes=True, edges=True)
+        self._bump()
+
+    def clear_edges(self):
+        if self._listeners:
+            self.remove_edges_from(list(self.edges()))
+        super().clear_edges()
+        self._edge_types = {}
+        self._install_stores(nodes=False, edges=True)
+        self._bump()
+
+    # --- Cập nhật thuộc tính hàng loạt ---
+    def update_edge_attrs(self, updates):
+        """
+        Ghi một lô thuộc tính cạnh {(u, v): {attr: value}} với MỘT lần tăng version
+        (thay vì mỗi phép ghi một lần). Cạnh không tồn tại bị bỏ qua.
+
+        Returns:
+            tuple: (changed_edges, changed_attrs, missing) - danh sách cạnh thực sự đổi giá trị,
+                   tập tên thuộc tính đã đổi, số cạnh không tồn tại.
+        """
+        adj = self._adj
+        listening = bool(self._listeners)
+        changed_edges, changed_attrs, missing = [], set(), 0
+        for (u, v), attrs in updates.items():
+            data = adj.get(u, {}).get(v)
+            if data is None:
+                missing += 1
+                continue
+            edge_changed = False
+            for key, value in attrs.items():
+                old = data.get(key, ABSENT)
+                if old != value:
+                    data._raw_set(key, value)
+                    changed_attrs.add(key)
+                    if key == INDEXED_ATTR and data._key is not None:
+                        self._reindex(data._key, old, value)
+                    edge_changed = True
+                    if listening and key not in VISUAL_ATTRS:
+                        self._emit((getattr(data, '_key', None) or ('edge_attr', u, v)) + (key, old, value))
+            if edge_changed:
+                changed_edges.append((u, v))
+        if changed_attrs - VISUAL_ATTRS:
+            self._bump()
+        return changed_edges, changed_attrs, missing
+
+
+# --- Truy vấn theo loại cho mọi đồ thị (dùng chỉ mục nếu là VersionedGraph) ---
+def node_type_counts(G):
+    if isinstance(G, VersionedGraph):
+        return G.node_type_counts()
+    return _scan_counts(t for _, t in G.nodes(data=INDEXED_ATTR))
+
+
+def edge_type_counts(G):
+    if isinstance(G, VersionedGraph):
+        return G.edge_type_counts()
+    return _scan_counts(t for _, _, t in G.edges(data=INDEXED_ATTR))
+
+
+def node_type_groups(G):
+    if isinstance(G, VersionedGraph):
+        return G.node_type_groups()
+    return _scan_groups(G.nodes(data=INDEXED_ATTR))
+
+
+def nodes_of_type(G, node_type):
+    if isinstance(G, VersionedGraph):
+        return G.nodes_of_type(node_type)
+    return frozenset(n for n, t in G.nodes(data=INDEXED_ATTR) if t == node_type)